@@ -0,0 +1,63 @@
+-- =====================================================
+-- Migration 023: Server-side ML training exports
+-- =====================================================
+-- Date: 2026-10-17
+-- Author: Darwin Education
+--
+-- get_pass_prediction_features() returns the whole feature view and the
+-- trainer then drops sparse users and fills NaNs in pandas. This RPC
+-- applies the min-attempts filter and the NaN defaults in the database so
+-- only training-ready rows are transferred. PostgREST applies the caller's
+-- select= projection and keyset paging (order=attempt_id, attempt_id=gt.)
+-- on top of the result set.
+--
+-- Used by: packages/ml-training darwin_ml.data.export_pass_prediction_features
+-- =====================================================
+
+CREATE OR REPLACE FUNCTION get_pass_prediction_training_rows(
+  p_min_attempts INTEGER DEFAULT 3
+)
+RETURNS TABLE (
+  attempt_id UUID,
+  user_id UUID,
+  theta NUMERIC,
+  standard_error NUMERIC,
+  scaled_score INTEGER,
+  theta_delta NUMERIC,
+  clinica_medica_pct FLOAT,
+  cirurgia_pct FLOAT,
+  gine_pct FLOAT,
+  pediatria_pct FLOAT,
+  saude_pct FLOAT,
+  streak_days INTEGER,
+  xp INTEGER,
+  target BOOLEAN
+) AS $$
+  SELECT
+    f.attempt_id,
+    f.user_id,
+    f.theta,
+    f.standard_error,
+    f.scaled_score,
+    -- First attempt of each user has no previous theta
+    COALESCE(f.theta_delta, 0),
+    COALESCE(f.clinica_medica_pct, 0),
+    COALESCE(f.cirurgia_pct, 0),
+    COALESCE(f.gine_pct, 0),
+    COALESCE(f.pediatria_pct, 0),
+    COALESCE(f.saude_pct, 0),
+    f.streak_days,
+    f.xp,
+    f.target
+  FROM (
+    SELECT
+      v.*,
+      COUNT(*) OVER (PARTITION BY v.user_id) AS user_attempts
+    FROM ml_pass_prediction_features v
+  ) f
+  WHERE f.user_attempts >= p_min_attempts;
+$$ LANGUAGE sql STABLE;
+
+-- Returns every user's features: only the service role may call it
+REVOKE EXECUTE ON FUNCTION get_pass_prediction_training_rows(INTEGER) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION get_pass_prediction_training_rows(INTEGER) TO service_role;
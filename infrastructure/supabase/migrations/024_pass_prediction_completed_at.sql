@@ -0,0 +1,115 @@
+-- =====================================================
+-- Migration 024: Attempt timestamps in the pass prediction export
+-- =====================================================
+-- Date: 2026-10-17
+-- Author: Darwin Education
+--
+-- The pass predictor trains on a time-based split (earlier attempts fit,
+-- later attempts evaluate) and labels each attempt with the outcome of the
+-- user's next one, so the training rows need to know when each attempt
+-- completed. Appends completed_at to ml_pass_prediction_features, to
+-- get_pass_prediction_training_rows and to get_pass_prediction_features
+-- (their return types change, so both functions are dropped and
+-- recreated; the latter's SELECT * would no longer match its 004 result
+-- type).
+--
+-- Used by: packages/ml-training darwin_ml.models.pass_predictor
+-- =====================================================
+
+CREATE OR REPLACE VIEW ml_pass_prediction_features AS
+SELECT
+  ea.id AS attempt_id,
+  ea.user_id,
+  ea.theta,
+  ea.standard_error,
+  ea.scaled_score,
+  (ea.theta - LAG(ea.theta) OVER (PARTITION BY ea.user_id ORDER BY ea.started_at)) AS theta_delta,
+  (ea.area_breakdown->'clinica_medica'->>'percentage')::float AS clinica_medica_pct,
+  (ea.area_breakdown->'cirurgia'->>'percentage')::float AS cirurgia_pct,
+  (ea.area_breakdown->'ginecologia_obstetricia'->>'percentage')::float AS gine_pct,
+  (ea.area_breakdown->'pediatria'->>'percentage')::float AS pediatria_pct,
+  (ea.area_breakdown->'saude_coletiva'->>'percentage')::float AS saude_pct,
+  p.streak_days,
+  p.xp,
+  ea.passed AS target,
+  ea.completed_at
+FROM exam_attempts ea
+JOIN profiles p ON ea.user_id = p.id
+WHERE ea.completed_at IS NOT NULL;
+
+DROP FUNCTION IF EXISTS get_pass_prediction_training_rows(INTEGER);
+
+CREATE FUNCTION get_pass_prediction_training_rows(
+  p_min_attempts INTEGER DEFAULT 3
+)
+RETURNS TABLE (
+  attempt_id UUID,
+  user_id UUID,
+  theta NUMERIC,
+  standard_error NUMERIC,
+  scaled_score INTEGER,
+  theta_delta NUMERIC,
+  clinica_medica_pct FLOAT,
+  cirurgia_pct FLOAT,
+  gine_pct FLOAT,
+  pediatria_pct FLOAT,
+  saude_pct FLOAT,
+  streak_days INTEGER,
+  xp INTEGER,
+  target BOOLEAN,
+  completed_at TIMESTAMPTZ
+) AS $$
+  SELECT
+    f.attempt_id,
+    f.user_id,
+    f.theta,
+    f.standard_error,
+    f.scaled_score,
+    -- First attempt of each user has no previous theta
+    COALESCE(f.theta_delta, 0),
+    COALESCE(f.clinica_medica_pct, 0),
+    COALESCE(f.cirurgia_pct, 0),
+    COALESCE(f.gine_pct, 0),
+    COALESCE(f.pediatria_pct, 0),
+    COALESCE(f.saude_pct, 0),
+    f.streak_days,
+    f.xp,
+    f.target,
+    f.completed_at
+  FROM (
+    SELECT
+      v.*,
+      COUNT(*) OVER (PARTITION BY v.user_id) AS user_attempts
+    FROM ml_pass_prediction_features v
+  ) f
+  WHERE f.user_attempts >= p_min_attempts;
+$$ LANGUAGE sql STABLE;
+
+-- Returns every user's features: only the service role may call it
+REVOKE EXECUTE ON FUNCTION get_pass_prediction_training_rows(INTEGER) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION get_pass_prediction_training_rows(INTEGER) TO service_role;
+
+DROP FUNCTION IF EXISTS get_pass_prediction_features();
+
+CREATE FUNCTION get_pass_prediction_features()
+RETURNS TABLE (
+  attempt_id UUID,
+  user_id UUID,
+  theta NUMERIC,
+  standard_error NUMERIC,
+  scaled_score INTEGER,
+  theta_delta NUMERIC,
+  clinica_medica_pct FLOAT,
+  cirurgia_pct FLOAT,
+  gine_pct FLOAT,
+  pediatria_pct FLOAT,
+  saude_pct FLOAT,
+  streak_days INTEGER,
+  xp INTEGER,
+  target BOOLEAN,
+  completed_at TIMESTAMPTZ
+) AS $$
+BEGIN
+  RETURN QUERY SELECT * FROM ml_pass_prediction_features;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER;
@@ -0,0 +1,28 @@
+-- =====================================================
+-- Migration 025: One prediction per user, type and model version
+-- =====================================================
+-- Date: 2026-10-17
+-- Author: Darwin Education
+--
+-- user_predictions only had a UUID primary key, so a retried or re-run
+-- batch write from the ML trainers inserted every prediction again. Drops
+-- existing duplicates (keeping the newest row) and adds a unique key on
+-- (user_id, prediction_type, model_version) so writers can upsert with
+-- on_conflict=user_id,prediction_type,model_version.
+--
+-- Used by: packages/ml-training darwin_ml.models.theta_scoring,
+--          darwin_ml.models.pass_predictor
+-- =====================================================
+
+DELETE FROM user_predictions up
+USING user_predictions newer
+WHERE up.user_id = newer.user_id
+  AND up.prediction_type = newer.prediction_type
+  AND up.model_version IS NOT DISTINCT FROM newer.model_version
+  AND (up.created_at, up.id) < (newer.created_at, newer.id);
+
+ALTER TABLE user_predictions
+  DROP CONSTRAINT IF EXISTS user_predictions_version_key;
+ALTER TABLE user_predictions
+  ADD CONSTRAINT user_predictions_version_key
+  UNIQUE (user_id, prediction_type, model_version);
@@ -16,7 +16,17 @@ fi
 
 poetry install --no-interaction --no-ansi
 
+# Share one Supabase pull per dataset across the training modules below
+export DARWIN_ML_CACHE_DIR="${DARWIN_ML_CACHE_DIR:-$ROOT_DIR/data/cache}"
+
 poetry run python -m darwin_ml.models.pass_predictor
 poetry run python -m darwin_ml.models.bkt
-poetry run python -m darwin_ml.models.recommender
 poetry run python -m darwin_ml.models.irt_calibration
+poetry run python -m darwin_ml.models.theta_scoring
+poetry run python -m darwin_ml.models.mirt --calibration artifacts/irt_calibration.json
+poetry run python -m darwin_ml.models.cdm
+poetry run python -m darwin_ml.models.fsrs --per-user --workers 4
+poetry run python -m darwin_ml.models.hlr
+
+# Version the outputs above and record them in artifacts/registry/manifest.json
+poetry run python -m darwin_ml.export.registry
@@ -1,19 +1,145 @@
-"""Data loading and export utilities for ML training."""
+"""
+Data loading and export utilities for ML training.
 
-from .supabase_export import (
-    get_supabase_client,
-    export_pass_prediction_features,
-    export_irt_item_responses,
-    export_knowledge_states,
-    export_flashcard_reviews,
-    export_all_training_data,
-)
+Importing this package is cheap and has no side effects: the public names
+below are resolved from their submodules on first attribute access, so
+pandas, pyarrow and the Supabase client are only imported when an export
+actually runs. Call load_env() (or get_supabase_client()) to read .env.
+"""
+
+import importlib
+from typing import TYPE_CHECKING, Any
+
+# Public name -> defining submodule
+_EXPORTS = {
+    "load_env": ".env",
+    "Vocabulary": ".vocab",
+    "ResponseMatrix": ".responses",
+    "ExportWriter": ".columnar",
+    "write_chunks": ".columnar",
+    "write_frame": ".columnar",
+    "read_export": ".columnar",
+    "ExportCache": ".cache",
+    "coerce_frame": ".dtypes",
+    "FrameCoercer": ".dtypes",
+    "MemoryReport": ".dtypes",
+    "RestClient": ".rest_client",
+    "DataBackend": ".backend",
+    "get_backend": ".backend",
+    "insert_rows": ".backend",
+    "LocalBackend": ".local_backend",
+    "SyntheticSpec": ".synthetic",
+    "generate_synthetic_tables": ".synthetic",
+    "build_local_backend": ".synthetic",
+    "EnamedStore": ".enamed",
+    "open_enamed": ".enamed",
+    "export_all_concurrent": ".parallel_export",
+    "export_incremental": ".incremental",
+    "export_all_incremental": ".incremental",
+    "read_dataset": ".incremental",
+    "compact_dataset": ".incremental",
+    "get_supabase_client": ".supabase_export",
+    "flatten_attempt_responses": ".supabase_export",
+    "iter_keyset_pages": ".supabase_export",
+    "iter_irt_item_responses": ".supabase_export",
+    "iter_knowledge_states": ".supabase_export",
+    "iter_flashcard_reviews": ".supabase_export",
+    "iter_study_activity": ".supabase_export",
+    "export_pass_prediction_features": ".supabase_export",
+    "export_irt_item_responses": ".supabase_export",
+    "export_knowledge_states": ".supabase_export",
+    "export_flashcard_reviews": ".supabase_export",
+    "export_study_activity": ".supabase_export",
+    "export_all_training_data": ".supabase_export",
+}
 
 __all__ = [
+    "load_env",
+    "Vocabulary",
+    "ResponseMatrix",
+    "ExportWriter",
+    "write_chunks",
+    "write_frame",
+    "read_export",
+    "ExportCache",
+    "coerce_frame",
+    "FrameCoercer",
+    "MemoryReport",
+    "RestClient",
+    "DataBackend",
+    "get_backend",
+    "insert_rows",
+    "LocalBackend",
+    "SyntheticSpec",
+    "generate_synthetic_tables",
+    "build_local_backend",
+    "EnamedStore",
+    "open_enamed",
+    "export_all_concurrent",
+    "export_incremental",
+    "export_all_incremental",
+    "read_dataset",
+    "compact_dataset",
     "get_supabase_client",
+    "flatten_attempt_responses",
+    "iter_keyset_pages",
+    "iter_irt_item_responses",
+    "iter_knowledge_states",
+    "iter_flashcard_reviews",
+    "iter_study_activity",
     "export_pass_prediction_features",
     "export_irt_item_responses",
     "export_knowledge_states",
     "export_flashcard_reviews",
+    "export_study_activity",
     "export_all_training_data",
 ]
+
+if TYPE_CHECKING:
+    from .backend import DataBackend, get_backend, insert_rows
+    from .cache import ExportCache
+    from .columnar import ExportWriter, read_export, write_chunks, write_frame
+    from .dtypes import FrameCoercer, MemoryReport, coerce_frame
+    from .enamed import EnamedStore, open_enamed
+    from .env import load_env
+    from .incremental import (
+        compact_dataset,
+        export_all_incremental,
+        export_incremental,
+        read_dataset,
+    )
+    from .local_backend import LocalBackend
+    from .parallel_export import export_all_concurrent
+    from .responses import ResponseMatrix
+    from .rest_client import RestClient
+    from .supabase_export import (
+        export_all_training_data,
+        export_flashcard_reviews,
+        export_irt_item_responses,
+        export_knowledge_states,
+        export_pass_prediction_features,
+        export_study_activity,
+        flatten_attempt_responses,
+        get_supabase_client,
+        iter_flashcard_reviews,
+        iter_irt_item_responses,
+        iter_keyset_pages,
+        iter_knowledge_states,
+        iter_study_activity,
+    )
+    from .synthetic import SyntheticSpec, build_local_backend, generate_synthetic_tables
+    from .vocab import Vocabulary
+
+
+def __getattr__(name: str) -> Any:
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    # Cache on the package so later lookups skip __getattr__
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted([*globals(), *__all__])
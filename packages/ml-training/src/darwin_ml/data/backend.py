@@ -0,0 +1,135 @@
+"""
+Data Backends
+
+The exporters talk to their data source through the PostgREST query-builder
+subset below, which supabase-py's Client, the pooled RestClient and the
+SQLite-backed LocalBackend all implement. get_backend() picks one from the
+environment, so the same pipeline can run against production or offline
+against synthetic data. Batch jobs write their results back through the
+same interface with insert_rows().
+
+Environment:
+    DARWIN_ML_BACKEND   "supabase" (default), "rest" or "local"
+    DARWIN_ML_LOCAL_DB  SQLite file for the local backend
+"""
+
+import os
+from typing import Any, Iterable, Optional, Protocol
+
+BACKEND_ENV = "DARWIN_ML_BACKEND"
+LOCAL_DB_ENV = "DARWIN_ML_LOCAL_DB"
+BACKENDS = ("supabase", "rest", "local")
+# Rows per bulk insert request
+INSERT_BATCH_ROWS = 1_000
+
+
+class QueryBuilder(Protocol):
+    """Chainable table/RPC query, as used by the exporters."""
+
+    @property
+    def not_(self) -> "QueryBuilder": ...
+
+    def select(self, columns: str = "*") -> "QueryBuilder": ...
+
+    def eq(self, column: str, value: Any) -> "QueryBuilder": ...
+
+    def gt(self, column: str, value: Any) -> "QueryBuilder": ...
+
+    def gte(self, column: str, value: Any) -> "QueryBuilder": ...
+
+    def lt(self, column: str, value: Any) -> "QueryBuilder": ...
+
+    def is_(self, column: str, value: str) -> "QueryBuilder": ...
+
+    def or_(self, filters: str) -> "QueryBuilder": ...
+
+    def order(
+        self, column: str, *, desc: bool = False, nullsfirst: Optional[bool] = None
+    ) -> "QueryBuilder": ...
+
+    def limit(self, size: int) -> "QueryBuilder": ...
+
+    def insert(self, rows: list[dict]) -> "QueryBuilder": ...
+
+    def upsert(self, rows: list[dict], *, on_conflict: str) -> "QueryBuilder": ...
+
+    def execute(self) -> Any:
+        """Run the query; the result's .data holds the rows as dicts."""
+        ...
+
+
+class DataBackend(Protocol):
+    """Source of the training tables and feature RPCs."""
+
+    def table(self, name: str) -> QueryBuilder: ...
+
+    def rpc(self, name: str, params: Optional[dict] = None) -> QueryBuilder: ...
+
+
+def insert_rows(
+    client: DataBackend,
+    table: str,
+    rows: Iterable[dict],
+    batch_rows: int = INSERT_BATCH_ROWS,
+    on_conflict: Optional[str] = None,
+) -> int:
+    """
+    Insert rows into a table in bulk requests of batch_rows.
+
+    Args:
+        on_conflict: Comma-separated unique key (e.g. "user_id,topic"); rows
+            whose key already exists replace it instead of failing
+
+    Returns:
+        Number of rows inserted
+    """
+
+    def send(batch: list[dict]) -> None:
+        query = client.table(table)
+        if on_conflict:
+            query.upsert(batch, on_conflict=on_conflict).execute()
+        else:
+            query.insert(batch).execute()
+
+    total = 0
+    batch: list[dict] = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == batch_rows:
+            send(batch)
+            total += len(batch)
+            batch = []
+    if batch:
+        send(batch)
+        total += len(batch)
+    return total
+
+
+def get_backend(name: Optional[str] = None) -> DataBackend:
+    """
+    Create the configured data backend.
+
+    Args:
+        name: "supabase", "rest" or "local" (defaults to DARWIN_ML_BACKEND,
+            then "supabase")
+    """
+    from .env import load_env
+
+    load_env()
+    name = name or os.environ.get(BACKEND_ENV) or "supabase"
+    if name == "supabase":
+        from .supabase_export import get_supabase_client
+
+        return get_supabase_client()
+    if name == "rest":
+        from .rest_client import RestClient
+
+        return RestClient.from_env()
+    if name == "local":
+        from .local_backend import LocalBackend
+
+        path = os.environ.get(LOCAL_DB_ENV)
+        if not path:
+            raise ValueError(f"{LOCAL_DB_ENV} must be set to use the local backend")
+        return LocalBackend(path)
+    raise ValueError(f"Unknown backend {name!r}; expected one of {BACKENDS}")
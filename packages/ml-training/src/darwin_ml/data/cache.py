@@ -0,0 +1,223 @@
+"""
+Export Cache
+
+Content-addressed local cache for exported training frames. Entries are
+keyed by a hash of (dataset, filter params, source watermark) and stored as
+Parquet, so the model modules run by train_all_models.sh can share one
+Supabase pull per dataset instead of re-exporting the same tables.
+
+Entries expire after a TTL, and the least recently used ones are evicted
+once the cache grows past its size budget.
+"""
+
+import hashlib
+import json
+import os
+import time
+from datetime import timedelta
+from typing import Any, Callable, Optional, Union
+
+import pandas as pd
+
+from .columnar import read_export, write_frame
+
+CACHE_DIR_ENV = "DARWIN_ML_CACHE_DIR"
+DEFAULT_CACHE_DIR = "data/cache"
+DEFAULT_TTL = timedelta(hours=24)
+DEFAULT_MAX_BYTES = 2 * 1024**3
+
+
+def cache_key(dataset: str, params: dict[str, Any], watermark: Any = None) -> str:
+    """Stable hex digest identifying one export's contents."""
+    payload = json.dumps(
+        {"dataset": dataset, "params": params, "watermark": watermark},
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class ExportCache:
+    """
+    Directory of cached export frames with TTL and LRU size eviction.
+
+    Each entry is <key>.parquet plus a <key>.json sidecar; the sidecar's
+    mtime doubles as the last-access time for LRU ordering. Writes go
+    through a temporary file and os.replace, so concurrent training jobs
+    never read a partial entry.
+
+    Args:
+        directory: Cache directory (created on first write)
+        ttl: Maximum age of an entry
+        max_bytes: Size budget for all Parquet files in the cache
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        ttl: timedelta = DEFAULT_TTL,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+    ) -> None:
+        self.directory = directory
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+    def _paths(self, key: str) -> tuple[str, str]:
+        base = os.path.join(self.directory, key)
+        return f"{base}.parquet", f"{base}.json"
+
+    def _entries(self) -> list[dict]:
+        if not os.path.isdir(self.directory):
+            return []
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(".json"):
+                continue
+            key = name[: -len(".json")]
+            data_path, meta_path = self._paths(key)
+            try:
+                with open(meta_path) as f:
+                    meta = json.load(f)
+                meta["key"] = key
+                meta["last_access"] = os.path.getmtime(meta_path)
+                meta["size"] = os.path.getsize(data_path)
+            except (OSError, ValueError):
+                continue
+            entries.append(meta)
+        return entries
+
+    def _remove(self, key: str) -> None:
+        for path in self._paths(key):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def _expired(self, created_at: float) -> bool:
+        return time.time() - created_at > self.ttl.total_seconds()
+
+    def get(
+        self, dataset: str, params: dict[str, Any], watermark: Any = None
+    ) -> Optional[pd.DataFrame]:
+        """Return the cached frame, or None on a miss or expired entry."""
+        key = cache_key(dataset, params, watermark)
+        data_path, meta_path = self._paths(key)
+        try:
+            with open(meta_path) as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+
+        if self._expired(meta["created_at"]) or not os.path.exists(data_path):
+            self._remove(key)
+            self.misses += 1
+            return None
+
+        os.utime(meta_path)
+        self.hits += 1
+        # The dataset schema may add declared columns the frame did not have
+        return read_export(data_path, columns=meta["columns"])
+
+    def put(
+        self,
+        dataset: str,
+        params: dict[str, Any],
+        watermark: Any,
+        df: pd.DataFrame,
+    ) -> str:
+        """Store a frame and evict old entries; returns the entry key."""
+        os.makedirs(self.directory, exist_ok=True)
+        key = cache_key(dataset, params, watermark)
+        data_path, meta_path = self._paths(key)
+
+        tmp_data = f"{data_path}.{os.getpid()}.tmp.parquet"
+        write_frame(df, tmp_data, dataset)
+        os.replace(tmp_data, data_path)
+
+        meta = {
+            "dataset": dataset,
+            "params": params,
+            "watermark": watermark,
+            "rows": len(df),
+            "columns": [str(c) for c in df.columns],
+            "created_at": time.time(),
+        }
+        tmp_meta = f"{meta_path}.{os.getpid()}.tmp"
+        with open(tmp_meta, "w") as f:
+            json.dump(meta, f, default=str)
+        os.replace(tmp_meta, meta_path)
+
+        self.evict()
+        return key
+
+    def get_or_load(
+        self,
+        dataset: str,
+        params: dict[str, Any],
+        watermark: Any,
+        load: Callable[[], pd.DataFrame],
+    ) -> pd.DataFrame:
+        """Serve from the cache, or call load() and cache its result."""
+        df = self.get(dataset, params, watermark)
+        if df is not None:
+            return df
+        df = load()
+        if not df.empty:
+            self.put(dataset, params, watermark, df)
+        return df
+
+    def evict(self) -> int:
+        """Drop expired entries, then LRU entries until under max_bytes."""
+        removed = 0
+        live = []
+        for entry in self._entries():
+            if self._expired(entry["created_at"]):
+                self._remove(entry["key"])
+                removed += 1
+            else:
+                live.append(entry)
+
+        total = sum(entry["size"] for entry in live)
+        for entry in sorted(live, key=lambda e: e["last_access"]):
+            if total <= self.max_bytes:
+                break
+            self._remove(entry["key"])
+            total -= entry["size"]
+            removed += 1
+        return removed
+
+    def watermarks(self) -> dict[str, Any]:
+        """Source watermark of the newest live entry of each dataset."""
+        newest: dict[str, dict] = {}
+        for entry in self._entries():
+            if self._expired(entry["created_at"]):
+                continue
+            current = newest.get(entry["dataset"])
+            if current is None or entry["created_at"] > current["created_at"]:
+                newest[entry["dataset"]] = entry
+        return {dataset: entry["watermark"] for dataset, entry in newest.items()}
+
+    def clear(self) -> None:
+        for entry in self._entries():
+            self._remove(entry["key"])
+
+
+def resolve_cache(cache: Union["ExportCache", bool, None]) -> Optional[ExportCache]:
+    """
+    Interpret the cache= argument of the export_* functions.
+
+    None uses the directory in DARWIN_ML_CACHE_DIR (no caching if unset),
+    True uses that directory or DEFAULT_CACHE_DIR, False disables caching
+    and an ExportCache instance is used as-is.
+    """
+    if isinstance(cache, ExportCache):
+        return cache
+    if cache is False:
+        return None
+    directory = os.environ.get(CACHE_DIR_ENV)
+    if cache is True:
+        directory = directory or DEFAULT_CACHE_DIR
+    return ExportCache(directory) if directory else None
@@ -0,0 +1,338 @@
+"""
+Columnar Export Writers
+
+Writes exported training data as Parquet (default) or Arrow IPC files with
+explicit column types: dictionary-encoded IDs, narrow integers and zstd
+compression. Pages are buffered into row groups of ROW_GROUP_SIZE rows so
+each row group's dictionary, statistics and compression frame are amortized
+over many rows. CSV is kept as a fallback format for ad-hoc inspection.
+"""
+
+import os
+from typing import Iterable, Optional
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.ipc as ipc
+import pyarrow.parquet as pq
+
+from .vocab import Vocabulary
+
+# Format name -> file extension
+EXPORT_FORMATS = {
+    "parquet": ".parquet",
+    "arrow": ".arrow",
+    "csv": ".csv",
+}
+DEFAULT_FORMAT = "parquet"
+COMPRESSION = "zstd"
+# Rows buffered per Parquet row group / Arrow record batch. Each Parquet row
+# group stores its own dictionary pages, so small groups repeat the IDs.
+ROW_GROUP_SIZE = 65_536
+
+_ID = pa.dictionary(pa.int32(), pa.string())
+_TS = pa.timestamp("us", tz="UTC")
+
+# Explicit Arrow schemas for each exported dataset. Columns missing from a
+# frame are written as nulls; extra columns keep their inferred type.
+DATASET_SCHEMAS: dict[str, pa.Schema] = {
+    "pass_prediction": pa.schema(
+        [
+            ("attempt_id", pa.string()),
+            ("user_id", _ID),
+            ("theta", pa.float32()),
+            ("standard_error", pa.float32()),
+            ("scaled_score", pa.int16()),
+            ("theta_delta", pa.float32()),
+            ("clinica_medica_pct", pa.float32()),
+            ("cirurgia_pct", pa.float32()),
+            ("gine_pct", pa.float32()),
+            ("pediatria_pct", pa.float32()),
+            ("saude_pct", pa.float32()),
+            ("streak_days", pa.int32()),
+            ("xp", pa.int32()),
+            ("target", pa.bool_()),
+            ("completed_at", _TS),
+        ]
+    ),
+    "irt_responses": pa.schema(
+        [
+            ("user_id", _ID),
+            ("question_id", _ID),
+            ("correct", pa.int8()),
+            ("response_time_ms", pa.int32()),
+        ]
+    ),
+    "knowledge_states": pa.schema(
+        [
+            ("id", pa.string()),
+            ("user_id", _ID),
+            ("topic", _ID),
+            ("mastery_probability", pa.float32()),
+            ("response_count", pa.int32()),
+            ("last_correct_at", _TS),
+            ("last_incorrect_at", _TS),
+            ("updated_at", _TS),
+        ]
+    ),
+    "flashcard_reviews": pa.schema(
+        [
+            ("id", pa.string()),
+            ("user_id", _ID),
+            ("flashcard_id", _ID),
+            ("quality", pa.int8()),
+            ("reviewed_at", _TS),
+            ("ease_factor_before", pa.float32()),
+            ("ease_factor_after", pa.float32()),
+            ("interval_before", pa.int32()),
+            ("interval_after", pa.int32()),
+        ]
+    ),
+    "study_activity": pa.schema(
+        [
+            ("id", pa.string()),
+            ("user_id", _ID),
+            ("knowledge_component", _ID),
+            ("correct", pa.bool_()),
+            ("created_at", _TS),
+        ]
+    ),
+}
+
+
+def format_from_path(path: str) -> str:
+    """Infer the export format from a file extension (defaults to CSV)."""
+    ext = os.path.splitext(path)[1].lower()
+    for name, suffix in EXPORT_FORMATS.items():
+        if ext == suffix:
+            return name
+    return "csv"
+
+
+class _DictionaryEncoder:
+    """
+    Encodes a string column against a Vocabulary that only ever grows.
+
+    Every batch carries the full vocabulary seen so far, so successive
+    dictionaries are prefix extensions of each other. That is what Arrow IPC
+    files require (deltas, no replacement); only the new entries are written.
+    """
+
+    def __init__(self) -> None:
+        self.vocab = Vocabulary()
+        self._dictionary = pa.array([], type=pa.string())
+
+    def encode(self, series: pd.Series) -> pa.DictionaryArray:
+        codes = self.vocab.encode(series)
+        if len(self._dictionary) != len(self.vocab):
+            self._dictionary = pa.array(self.vocab.values, type=pa.string())
+        indices = pa.array(codes, mask=codes < 0, type=pa.int32())
+        return pa.DictionaryArray.from_arrays(indices, self._dictionary)
+
+
+def _encode_local(series: pd.Series) -> pa.DictionaryArray:
+    """
+    Dictionary-encode a string column against its own distinct values.
+
+    Parquet writes an Arrow dictionary as the row group's dictionary page
+    as-is, so it must hold only the IDs the row group uses.
+    """
+    codes, uniques = pd.factorize(series, use_na_sentinel=True)
+    indices = pa.array(codes.astype(np.int32), mask=codes < 0, type=pa.int32())
+    dictionary = pa.array([str(value) for value in uniques], type=pa.string())
+    return pa.DictionaryArray.from_arrays(indices, dictionary)
+
+
+def _to_arrow(series: pd.Series, arrow_type: pa.DataType) -> pa.Array:
+    """Coerce a JSON-derived pandas column to an explicit Arrow type."""
+    if pa.types.is_timestamp(arrow_type):
+        values = pd.to_datetime(series, utc=True, format="ISO8601")
+        return pa.array(values, type=arrow_type, from_pandas=True)
+    if pa.types.is_integer(arrow_type) or pa.types.is_floating(arrow_type):
+        values = pd.to_numeric(series, errors="coerce").astype("float64")
+        return pa.array(values, type=arrow_type, from_pandas=True, safe=False)
+    if pa.types.is_boolean(arrow_type):
+        values = series.astype("boolean")
+        return pa.array(values, type=arrow_type, from_pandas=True)
+    if pa.types.is_string(arrow_type):
+        values = series.astype(object).where(series.notna(), None)
+        return pa.array(values.map(_str_or_none), type=arrow_type)
+    return pa.array(series, type=arrow_type, from_pandas=True)
+
+
+def _str_or_none(value) -> Optional[str]:
+    return None if value is None else str(value)
+
+
+class ExportWriter:
+    """
+    Incremental writer for one exported dataset.
+
+    Frames are appended with write() and buffered until ROW_GROUP_SIZE rows
+    are pending; the Arrow schema is fixed by the dataset's entry in
+    DATASET_SCHEMAS plus whatever extra columns the first frame carries. Use
+    as a context manager so the last row group and the footer are written.
+
+    Args:
+        path: Output file; the format is inferred from its extension
+        dataset: Key into DATASET_SCHEMAS (None infers all types)
+        format: Override the format inferred from path
+        row_group_size: Rows per Parquet row group / Arrow record batch
+    """
+
+    def __init__(
+        self,
+        path: str,
+        dataset: Optional[str] = None,
+        format: Optional[str] = None,
+        row_group_size: int = ROW_GROUP_SIZE,
+    ) -> None:
+        self.path = path
+        self.format = format or format_from_path(path)
+        if self.format not in EXPORT_FORMATS:
+            raise ValueError(f"Unknown export format: {self.format}")
+        self.rows = 0
+        self._declared = DATASET_SCHEMAS.get(dataset) if dataset else None
+        self._schema: Optional[pa.Schema] = None
+        self._encoders: dict[str, _DictionaryEncoder] = {}
+        self._writer = None
+        self._row_group_size = row_group_size
+        self._pending: list[pd.DataFrame] = []
+        self._pending_rows = 0
+
+    def __enter__(self) -> "ExportWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _resolve_schema(self, df: pd.DataFrame) -> pa.Schema:
+        fields = list(self._declared) if self._declared is not None else []
+        declared = {field.name for field in fields}
+        for column in df.columns:
+            if column in declared:
+                continue
+            inferred = pa.Table.from_pandas(df[[column]], preserve_index=False)
+            field = inferred.schema.field(column)
+            if pa.types.is_null(field.type):
+                # All-null in the first frame; later frames may carry strings
+                field = field.with_type(pa.string())
+            fields.append(field)
+        return pa.schema(fields)
+
+    def _to_batch(self, df: pd.DataFrame) -> pa.RecordBatch:
+        arrays = []
+        for field in self._schema:
+            if field.name not in df.columns:
+                arrays.append(pa.nulls(len(df), type=field.type))
+            elif pa.types.is_dictionary(field.type) and self.format == "parquet":
+                arrays.append(_encode_local(df[field.name]))
+            elif pa.types.is_dictionary(field.type):
+                encoder = self._encoders.setdefault(field.name, _DictionaryEncoder())
+                arrays.append(encoder.encode(df[field.name]))
+            else:
+                arrays.append(_to_arrow(df[field.name], field.type))
+        return pa.RecordBatch.from_arrays(arrays, schema=self._schema)
+
+    def write(self, df: pd.DataFrame) -> None:
+        """Append a frame to the output file."""
+        if df.empty:
+            return
+
+        if self.format == "csv":
+            first = self.rows == 0
+            df.to_csv(self.path, index=False, mode="w" if first else "a", header=first)
+            self.rows += len(df)
+            return
+
+        if self._schema is None:
+            self._schema = self._resolve_schema(df)
+            if self.format == "parquet":
+                self._writer = pq.ParquetWriter(
+                    self.path,
+                    self._schema,
+                    compression=COMPRESSION,
+                    use_dictionary=True,
+                )
+            else:
+                options = ipc.IpcWriteOptions(
+                    compression=COMPRESSION, emit_dictionary_deltas=True
+                )
+                self._writer = ipc.new_file(self.path, self._schema, options=options)
+
+        self._pending.append(df)
+        self._pending_rows += len(df)
+        self.rows += len(df)
+        if self._pending_rows >= self._row_group_size:
+            self._flush()
+
+    def _flush(self) -> None:
+        """Write the buffered frames as one row group."""
+        if not self._pending:
+            return
+        df = pd.concat(self._pending, ignore_index=True)
+        self._pending = []
+        self._pending_rows = 0
+        batch = self._to_batch(df)
+        if self.format == "parquet":
+            self._writer.write_table(
+                pa.Table.from_batches([batch]), row_group_size=len(df)
+            )
+        else:
+            self._writer.write_batch(batch)
+
+    def close(self) -> None:
+        if self._writer is not None:
+            self._flush()
+            self._writer.close()
+            self._writer = None
+
+
+def write_chunks(
+    chunks: Iterable[pd.DataFrame],
+    output_path: str,
+    dataset: Optional[str] = None,
+) -> int:
+    """
+    Drain a chunk iterator into a single export file in constant memory.
+
+    Returns:
+        Number of rows written (0 means no file was created)
+    """
+    with ExportWriter(output_path, dataset) as writer:
+        for chunk in chunks:
+            writer.write(chunk)
+    return writer.rows
+
+
+def write_frame(
+    df: pd.DataFrame, output_path: str, dataset: Optional[str] = None
+) -> int:
+    """Write a single DataFrame to an export file."""
+    return write_chunks([df], output_path, dataset)
+
+
+def read_export(path: str, columns: Optional[list[str]] = None) -> pd.DataFrame:
+    """
+    Load an export file written by ExportWriter.
+
+    Parquet and Arrow files are memory-mapped; dictionary columns come back
+    as pandas categoricals and nullable integers as pandas Int dtypes.
+    """
+    fmt = format_from_path(path)
+    if fmt == "parquet":
+        table = pq.read_table(path, columns=columns, memory_map=True)
+    elif fmt == "arrow":
+        table = ipc.open_file(pa.memory_map(path)).read_all()
+        if columns is not None:
+            table = table.select(columns)
+    else:
+        return pd.read_csv(path, usecols=columns)
+
+    df = table.to_pandas()
+    # Keep nullable integer columns narrow instead of widening to float64
+    for field in table.schema:
+        if pa.types.is_integer(field.type) and table.column(field.name).null_count:
+            df[field.name] = df[field.name].astype(f"Int{field.type.bit_width}")
+    return df
@@ -0,0 +1,184 @@
+"""
+Compact Frame Dtypes
+
+Pandas dtype registry for the exported datasets, derived from the Arrow
+DATASET_SCHEMAS so in-memory frames and export files agree on column types.
+Rows arrive from PostgREST as JSON, which pandas turns into object and
+float64 columns; coercing each page at ingest keeps repeated UUIDs as
+categorical codes, scores as float32 and counts as nullable small ints.
+"""
+
+from dataclasses import dataclass
+from typing import Optional
+
+import pandas as pd
+import pyarrow as pa
+
+from .columnar import DATASET_SCHEMAS
+from .vocab import Vocabulary
+
+
+def pandas_dtype(arrow_type: pa.DataType) -> Optional[str]:
+    """Compact pandas dtype for an Arrow type (None keeps the column as-is)."""
+    if pa.types.is_dictionary(arrow_type):
+        return "category"
+    if pa.types.is_integer(arrow_type):
+        return f"Int{arrow_type.bit_width}"
+    if pa.types.is_floating(arrow_type):
+        return f"float{arrow_type.bit_width}"
+    if pa.types.is_boolean(arrow_type):
+        return "boolean"
+    if pa.types.is_timestamp(arrow_type):
+        return "datetime64[ns, UTC]"
+    return None
+
+
+# Dataset -> column -> pandas dtype
+DATASET_DTYPES: dict[str, dict[str, str]] = {
+    name: {
+        field.name: dtype
+        for field in schema
+        if (dtype := pandas_dtype(field.type)) is not None
+    }
+    for name, schema in DATASET_SCHEMAS.items()
+}
+
+
+@dataclass(frozen=True)
+class MemoryReport:
+    """Frame memory before and after dtype coercion (deep, in bytes)."""
+
+    dataset: str
+    rows: int
+    bytes_before: int
+    bytes_after: int
+
+    @property
+    def bytes_saved(self) -> int:
+        return self.bytes_before - self.bytes_after
+
+    @property
+    def ratio(self) -> float:
+        """Fraction of the original memory that was saved."""
+        return self.bytes_saved / self.bytes_before if self.bytes_before else 0.0
+
+    def __add__(self, other: "MemoryReport") -> "MemoryReport":
+        return MemoryReport(
+            self.dataset,
+            self.rows + other.rows,
+            self.bytes_before + other.bytes_before,
+            self.bytes_after + other.bytes_after,
+        )
+
+    def __str__(self) -> str:
+        return (
+            f"{self.dataset}: {self.rows} rows, "
+            f"{self.bytes_before / 1e6:.1f} MB -> {self.bytes_after / 1e6:.1f} MB "
+            f"({self.ratio:.0%} saved)"
+        )
+
+
+def _coerce_column(
+    series: pd.Series, dtype: str, vocab: Optional[Vocabulary]
+) -> pd.Series:
+    if dtype == "category":
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            # Already encoded (e.g. against a caller's shared vocabulary)
+            return series
+        vocab = vocab if vocab is not None else Vocabulary()
+        return pd.Series(vocab.categorical(vocab.encode(series)), index=series.index)
+    if dtype.startswith("datetime64"):
+        return pd.to_datetime(series, utc=True, format="ISO8601")
+    if dtype == "boolean":
+        return series.astype("boolean")
+    if dtype.startswith("Int"):
+        # Through float64 so JSON numbers and None land in one pass
+        values = pd.to_numeric(series, errors="coerce")
+        return values.astype("float64").astype(dtype)
+    return pd.to_numeric(series, errors="coerce").astype(dtype)
+
+
+def memory_bytes(df: pd.DataFrame) -> int:
+    return int(df.memory_usage(deep=True, index=False).sum())
+
+
+def coerce_frame(
+    df: pd.DataFrame,
+    dataset: str,
+    vocabularies: Optional[dict[str, Vocabulary]] = None,
+) -> pd.DataFrame:
+    """
+    Coerce a JSON-derived frame to its dataset's compact dtypes.
+
+    Columns not in the registry are left untouched.
+
+    Args:
+        df: Frame to coerce (not modified)
+        dataset: Key into DATASET_DTYPES
+        vocabularies: Per-column vocabularies for categorical columns; pass
+            the same dict for every page so category codes stay stable and
+            pages concatenate without re-encoding
+    """
+    dtypes = DATASET_DTYPES[dataset]
+    out = df.copy(deep=False)
+    for column in df.columns:
+        dtype = dtypes.get(column)
+        if dtype is None or out[column].dtype in (dtype, dtype.lower()):
+            # Already compact (a non-null int8 column needs no Int8 mask)
+            continue
+        vocab = None
+        if dtype == "category" and vocabularies is not None:
+            vocab = vocabularies.setdefault(column, Vocabulary())
+        out[column] = _coerce_column(out[column], dtype, vocab)
+    return out
+
+
+class FrameCoercer:
+    """
+    Coerces successive pages of one dataset and tallies the memory saved.
+
+    Categorical columns share one Vocabulary per column across pages.
+
+    Args:
+        dataset: Key into DATASET_DTYPES
+    """
+
+    def __init__(self, dataset: str) -> None:
+        self.dataset = dataset
+        self.vocabularies: dict[str, Vocabulary] = {}
+        self._pages = MemoryReport(dataset, 0, 0, 0)
+        self._categories: dict[str, pd.Index] = {}
+
+    @property
+    def report(self) -> MemoryReport:
+        """Savings so far, as if the coerced pages were concatenated."""
+        shared = sum(
+            int(categories.memory_usage(deep=True))
+            for categories in self._categories.values()
+        )
+        return MemoryReport(
+            self.dataset,
+            self._pages.rows,
+            self._pages.bytes_before,
+            self._pages.bytes_after + shared,
+        )
+
+    def __call__(self, df: pd.DataFrame) -> pd.DataFrame:
+        if df.empty:
+            return df
+        before = memory_bytes(df)
+        out = coerce_frame(df, self.dataset, self.vocabularies)
+
+        # Every page carries the full (growing) categories of its column, but
+        # concatenated pages share one copy: count only the codes per page
+        # and the latest, largest categories once in report
+        after = 0
+        for column in out.columns:
+            series = out[column]
+            if isinstance(series.dtype, pd.CategoricalDtype):
+                after += series.cat.codes.nbytes
+                self._categories[column] = series.cat.categories
+            else:
+                after += int(series.memory_usage(deep=True, index=False))
+        self._pages += MemoryReport(self.dataset, len(out), before, after)
+        return out
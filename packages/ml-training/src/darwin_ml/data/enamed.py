@@ -0,0 +1,321 @@
+"""
+ENAMED Microdata
+
+Loader for the INEP ENAMED 2025 microdata (microdados_enamed_2025_*/DADOS).
+The release splits each population into ';'-separated text files of one or
+a few columns apiece (arq1 holds the course/institution codes, the others a
+single questionnaire or demographic item). Parsing them is slow and every
+consumer needs a different subset, so open_enamed() converts each file once
+into an uncompressed Arrow IPC table under data/enamed/ and afterwards
+serves columns straight from memory-mapped files.
+
+INEP shuffles the rows of every file independently (the files share the
+CO_CURSO multiset but not the row order), so rows are NOT linked across
+files: read() returns columns from a single source file, and by_course()
+joins files at course level, the finest grain the release supports.
+
+Environment:
+    DARWIN_ML_ENAMED_DIR  DADOS directory of the microdata release
+"""
+
+import json
+import os
+import re
+from pathlib import Path
+from typing import Optional, Union
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pa_csv
+import pyarrow.ipc as ipc
+
+from .columnar import read_export
+
+ENAMED_DIR_ENV = "DARWIN_ML_ENAMED_DIR"
+DEFAULT_SOURCE_DIR = (
+    Path(__file__).resolve().parents[5] / "microdados_enamed_2025_19-01-26" / "DADOS"
+)
+DEFAULT_STORE_DIR = "data/enamed"
+MANIFEST = "manifest.json"
+STORE_VERSION = 1
+
+# Population -> subdirectory of DADOS
+POPULATIONS = {"enade": "Enade", "demais": "Demais Participantes"}
+ITEMS_FILE = "microdados2025_parametros_itens.txt"
+ITEMS_TABLE = "itens"
+COURSE_KEY = "CO_CURSO"
+
+# "." marks a missing answer in the questionnaire files
+NULL_VALUES = ["", "."]
+
+_ARQ_PATTERN = re.compile(r"_arq(\d+)\.txt$")
+
+
+def source_files(source_dir: Union[str, Path, None] = None) -> dict[str, Path]:
+    """Store table name -> source text file, in arq order per population."""
+    source_dir = Path(
+        source_dir or os.environ.get(ENAMED_DIR_ENV) or DEFAULT_SOURCE_DIR
+    )
+    files: dict[str, Path] = {}
+    for population, subdir in POPULATIONS.items():
+        matches = [
+            (int(m.group(1)), path)
+            for path in (source_dir / subdir).glob("*.txt")
+            if (m := _ARQ_PATTERN.search(path.name))
+        ]
+        for number, path in sorted(matches):
+            files[f"{population}_arq{number}"] = path
+    items = source_dir / ITEMS_FILE
+    if items.exists():
+        files[ITEMS_TABLE] = items
+    if not files:
+        raise FileNotFoundError(
+            f"No ENAMED microdata under {source_dir}; set {ENAMED_DIR_ENV}"
+        )
+    return files
+
+
+def _narrow(column: pa.ChunkedArray) -> pa.ChunkedArray:
+    """Smallest Arrow type that holds the parsed column."""
+    if pa.types.is_integer(column.type):
+        if column.null_count == len(column):
+            return column.cast(pa.int8())
+        bounds = pc.min_max(column)
+        low, high = bounds["min"].as_py(), bounds["max"].as_py()
+        for dtype in (pa.int8(), pa.int16(), pa.int32()):
+            info = np.iinfo(dtype.to_pandas_dtype())
+            if info.min <= low and high <= info.max:
+                return column.cast(dtype)
+        return column
+    if pa.types.is_floating(column.type):
+        return column.cast(pa.float32())
+    if pa.types.is_string(column.type):
+        encoded = column.dictionary_encode().combine_chunks()
+        index_type = pa.int8() if len(encoded.dictionary) <= 127 else pa.int16()
+        return pa.chunked_array(
+            [
+                pa.DictionaryArray.from_arrays(
+                    encoded.indices.cast(index_type), encoded.dictionary
+                )
+            ]
+        )
+    return column
+
+
+def parse_source(path: Union[str, Path]) -> pa.Table:
+    """Parse one microdata text file into a compactly typed Arrow table."""
+    table = pa_csv.read_csv(
+        path,
+        parse_options=pa_csv.ParseOptions(delimiter=";"),
+        convert_options=pa_csv.ConvertOptions(
+            null_values=NULL_VALUES, strings_can_be_null=True
+        ),
+    )
+    return pa.table(
+        [_narrow(column) for column in table.columns], names=table.column_names
+    )
+
+
+def _fingerprint(path: Path) -> dict:
+    stat = path.stat()
+    return {"path": str(path), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def build_enamed_store(
+    source_dir: Union[str, Path, None] = None,
+    store_dir: Union[str, Path] = DEFAULT_STORE_DIR,
+) -> dict:
+    """
+    Convert every microdata file into an Arrow table under store_dir.
+
+    Args:
+        source_dir: DADOS directory (DARWIN_ML_ENAMED_DIR, then the copy
+            checked into the repository)
+        store_dir: Output directory for the .arrow tables and manifest.json
+
+    Returns:
+        The manifest: source fingerprints, row counts and column -> table
+        maps per population
+    """
+    store_dir = Path(store_dir)
+    store_dir.mkdir(parents=True, exist_ok=True)
+    manifest: dict = {"version": STORE_VERSION, "tables": {}, "columns": {}}
+    for name, path in source_files(source_dir).items():
+        table = parse_source(path)
+        target = store_dir / f"{name}.arrow"
+        tmp = target.with_suffix(".arrow.tmp")
+        with pa.OSFile(str(tmp), "wb") as sink:
+            with ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        os.replace(tmp, target)
+
+        population = name.split("_arq")[0] if "_arq" in name else name
+        manifest["tables"][name] = {
+            "source": _fingerprint(path),
+            "population": population,
+            "rows": table.num_rows,
+            "columns": table.column_names,
+        }
+        columns = manifest["columns"].setdefault(population, {})
+        for column in table.column_names:
+            # Shared keys (NU_ANO, CO_CURSO) resolve to the first file
+            columns.setdefault(column, name)
+
+    tmp = store_dir / f"{MANIFEST}.tmp"
+    tmp.write_text(json.dumps(manifest, indent=2))
+    os.replace(tmp, store_dir / MANIFEST)
+    return manifest
+
+
+def _is_current(manifest: dict, files: dict[str, Path], store_dir: Path) -> bool:
+    if manifest.get("version") != STORE_VERSION:
+        return False
+    if set(manifest["tables"]) != set(files):
+        return False
+    return all(
+        manifest["tables"][name]["source"] == _fingerprint(path)
+        and (store_dir / f"{name}.arrow").exists()
+        for name, path in files.items()
+    )
+
+
+class EnamedStore:
+    """
+    Read access to a store written by build_enamed_store().
+
+    Args:
+        store_dir: Directory holding manifest.json and the .arrow tables
+    """
+
+    def __init__(self, store_dir: Union[str, Path] = DEFAULT_STORE_DIR) -> None:
+        self.store_dir = Path(store_dir)
+        self.manifest = json.loads((self.store_dir / MANIFEST).read_text())
+
+    @property
+    def tables(self) -> list[str]:
+        return list(self.manifest["tables"])
+
+    def columns(self, population: str = "enade") -> list[str]:
+        """Columns available for a population ("enade", "demais" or "itens")."""
+        return list(self._column_map(population))
+
+    def _column_map(self, population: str) -> dict[str, str]:
+        columns = self.manifest["columns"].get(population)
+        if columns is None:
+            raise ValueError(
+                f"Unknown population {population!r}; "
+                f"expected one of {sorted(self.manifest['columns'])}"
+            )
+        return columns
+
+    def table_of(self, column: str, population: str = "enade") -> str:
+        """Store table holding a column."""
+        table = self._column_map(population).get(column)
+        if table is None:
+            raise KeyError(f"{column!r} is not an ENAMED {population} column")
+        return table
+
+    def path(self, table: str) -> Path:
+        return self.store_dir / f"{table}.arrow"
+
+    def arrow(self, table: str, columns: Optional[list[str]] = None) -> pa.Table:
+        """Memory-mapped Arrow table (zero-copy until converted)."""
+        result = ipc.open_file(pa.memory_map(str(self.path(table)))).read_all()
+        return result.select(columns) if columns is not None else result
+
+    def read(self, columns: list[str], population: str = "enade") -> pd.DataFrame:
+        """
+        Row-level frame of columns from one source file.
+
+        NU_ANO and CO_CURSO are present in every file and may accompany any
+        other column; asking for items that live in different files raises,
+        since their rows belong to differently ordered respondents.
+        """
+        column_map = self._column_map(population)
+        shared = {
+            column
+            for column in column_map
+            if all(
+                column in info["columns"]
+                for info in self.manifest["tables"].values()
+                if info["population"] == population
+            )
+        }
+        tables = {self.table_of(c, population) for c in columns if c not in shared}
+        if len(tables) > 1:
+            raise ValueError(
+                f"Columns {columns} span {sorted(tables)}, whose rows are "
+                "independently ordered; join them with by_course() instead"
+            )
+        table = tables.pop() if tables else self.table_of(columns[0], population)
+        return read_export(str(self.path(table)), columns=columns)
+
+    def column(self, name: str, population: str = "enade") -> pd.Series:
+        return self.read([name], population)[name]
+
+    def items(self) -> pd.DataFrame:
+        """Item parameters (Rasch difficulty, biserial, infit/outfit)."""
+        return read_export(str(self.path(ITEMS_TABLE)))
+
+    def by_course(self, columns: list[str]) -> pd.DataFrame:
+        """
+        Course-level profile of the Enade population, indexed by CO_CURSO.
+
+        Numeric columns become per-course means and coded answers one
+        share-of-respondents column per code ("QE_I01=A"), with missing
+        answers left out of the denominator; "n" counts respondents.
+        """
+        parts = []
+        for column in columns:
+            df = self.read([COURSE_KEY, column])
+            grouped = df.groupby(COURSE_KEY, observed=True)[column]
+            if isinstance(df[column].dtype, pd.CategoricalDtype):
+                shares = pd.crosstab(df[COURSE_KEY], df[column], normalize="index")
+                shares.columns = [f"{column}={code}" for code in shares.columns]
+                parts.append(shares.astype("float32"))
+            else:
+                parts.append(grouped.mean().astype("float32").rename(column))
+        counts = self.read([COURSE_KEY])[COURSE_KEY].value_counts().rename("n")
+        return pd.concat([counts.sort_index(), *parts], axis=1)
+
+
+def open_enamed(
+    store_dir: Union[str, Path] = DEFAULT_STORE_DIR,
+    source_dir: Union[str, Path, None] = None,
+    rebuild: bool = False,
+) -> EnamedStore:
+    """
+    Open the ENAMED store, converting the text files first if the store is
+    missing or older than its sources.
+
+    Args:
+        store_dir: Store directory
+        source_dir: DADOS directory of the microdata release
+        rebuild: Convert even if the store is current
+    """
+    store_dir = Path(store_dir)
+    manifest_path = store_dir / MANIFEST
+    if not rebuild and manifest_path.exists():
+        manifest = json.loads(manifest_path.read_text())
+        try:
+            files = source_files(source_dir)
+        except FileNotFoundError:
+            # Store shipped without its sources: serve it as is
+            return EnamedStore(store_dir)
+        if _is_current(manifest, files, store_dir):
+            return EnamedStore(store_dir)
+    build_enamed_store(source_dir, store_dir)
+    return EnamedStore(store_dir)
+
+
+if __name__ == "__main__":
+    import time
+
+    start = time.perf_counter()
+    store = open_enamed(rebuild=True)
+    print(f"Converted {len(store.tables)} files in {time.perf_counter() - start:.2f}s")
+    start = time.perf_counter()
+    sex = store.column("TP_SEXO")
+    print(f"Read TP_SEXO ({len(sex)} rows) in {time.perf_counter() - start:.4f}s")
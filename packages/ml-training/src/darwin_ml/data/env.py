@@ -0,0 +1,37 @@
+"""
+Environment Loading
+
+.env files are read explicitly rather than at import time, so importing
+darwin_ml never touches the working directory or os.environ. Client
+factories call load_env() before reading credentials.
+"""
+
+import os
+from typing import Optional
+
+_loaded: set[str] = set()
+
+
+def load_env(path: Optional[str] = None, override: bool = False) -> bool:
+    """
+    Load variables from a .env file into os.environ (once per file).
+
+    Args:
+        path: .env file to read (searched for if omitted)
+        override: Replace variables that are already set
+
+    Returns:
+        True if a file was loaded by this call
+    """
+    from dotenv import find_dotenv, load_dotenv
+
+    # Like the old import-time load_dotenv(): the cwd first, then upwards
+    # from the package (finds packages/ml-training/.env or the repo root's)
+    path = path or find_dotenv(usecwd=True) or find_dotenv()
+    if not path:
+        return False
+    path = os.path.abspath(path)
+    if path in _loaded and not override:
+        return False
+    _loaded.add(path)
+    return load_dotenv(path, override=override)
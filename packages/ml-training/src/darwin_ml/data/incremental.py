@@ -0,0 +1,303 @@
+"""
+Incremental Export Module
+
+Keeps a local, append-only copy of the training tables. Each run fetches
+only the rows past a per-table high-water mark and writes them as a new
+partition file; compact_dataset() later folds the partitions into one file
+and drops rows that were superseded by newer versions.
+
+Layout under output_dir:
+    watermarks.json                  per-dataset (cursor value, id) positions
+    <dataset>/part-<timestamp>.parquet
+"""
+
+from __future__ import annotations
+
+import glob
+import json
+import os
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Callable, Optional
+
+import pandas as pd
+
+from .backend import DataBackend, get_backend
+from .columnar import (
+    DEFAULT_FORMAT,
+    EXPORT_FORMATS,
+    ExportWriter,
+    read_export,
+    write_frame,
+)
+from .supabase_export import (
+    DEFAULT_PAGE_SIZE,
+    FLASHCARD_REVIEW_COLUMNS,
+    flatten_attempt_responses,
+    iter_keyset_pages,
+)
+
+WATERMARK_FILE = "watermarks.json"
+
+
+@dataclass(frozen=True)
+class IncrementalSpec:
+    """How one local dataset is pulled incrementally from a Supabase table."""
+
+    table: str
+    columns: str
+    cursor_column: str
+    key: tuple[str, ...]
+    days_back: Optional[int] = None
+    to_frame: Callable[[list[dict]], pd.DataFrame] = pd.DataFrame
+    apply_filters: Optional[Callable[[Any], Any]] = None
+    # Re-read this much before the watermark on every run
+    lookback: Optional[timedelta] = None
+
+
+INCREMENTAL_DATASETS: dict[str, IncrementalSpec] = {
+    # Responses are written when an attempt is completed, so the cursor is
+    # completed_at: an attempt started before the watermark but finished
+    # after it is still picked up. The lookback re-reads attempts whose
+    # responses land shortly after completed_at is set.
+    "irt_responses": IncrementalSpec(
+        table="exam_attempts",
+        columns="id, user_id, responses, completed_at",
+        cursor_column="completed_at",
+        key=("attempt_id", "question_id"),
+        days_back=365,
+        to_frame=lambda rows: flatten_attempt_responses(rows, include_attempt_id=True),
+        apply_filters=lambda q: q.not_.is_("responses", "null").not_.is_(
+            "completed_at", "null"
+        ),
+        lookback=timedelta(days=1),
+    ),
+    "flashcard_reviews": IncrementalSpec(
+        table="flashcard_reviews",
+        columns=FLASHCARD_REVIEW_COLUMNS,
+        cursor_column="reviewed_at",
+        key=("id",),
+        days_back=180,
+    ),
+    "knowledge_states": IncrementalSpec(
+        table="knowledge_states",
+        columns="*",
+        cursor_column="updated_at",
+        key=("id",),
+    ),
+}
+
+
+def _spec(dataset: str) -> IncrementalSpec:
+    try:
+        return INCREMENTAL_DATASETS[dataset]
+    except KeyError:
+        raise ValueError(
+            f"No incremental export for {dataset!r}; "
+            f"expected one of {sorted(INCREMENTAL_DATASETS)}"
+        ) from None
+
+
+def load_watermarks(output_dir: str) -> dict[str, dict]:
+    """Read the per-dataset high-water marks (empty if none saved yet)."""
+    path = os.path.join(output_dir, WATERMARK_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_watermark(output_dir: str, dataset: str, cursor: Any, row_id: Any) -> None:
+    """Atomically record the (cursor, id) position reached for a dataset."""
+    watermarks = load_watermarks(output_dir)
+    watermarks[dataset] = {
+        "column": _spec(dataset).cursor_column,
+        "cursor": cursor,
+        "id": row_id,
+        "saved_at": datetime.utcnow().isoformat(),
+    }
+    path = os.path.join(output_dir, WATERMARK_FILE)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(watermarks, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def list_partitions(dataset: str, output_dir: str = "data/exports") -> list[str]:
+    """Partition files of a local dataset, oldest first."""
+    parts = []
+    for ext in EXPORT_FORMATS.values():
+        parts.extend(glob.glob(os.path.join(output_dir, dataset, f"part-*{ext}")))
+    return sorted(parts, key=os.path.basename)
+
+
+def export_incremental(
+    dataset: str,
+    client: Optional[DataBackend] = None,
+    output_dir: str = "data/exports",
+    page_size: int = DEFAULT_PAGE_SIZE,
+    format: str = DEFAULT_FORMAT,
+    lookback: Optional[timedelta] = None,
+) -> Optional[str]:
+    """
+    Fetch rows past the dataset's watermark and append them as a partition.
+
+    The first run (no watermark yet, or one saved for a different cursor
+    column) falls back to the dataset's usual days_back window. Rows that
+    change after being exported are picked up again by their cursor (e.g.
+    knowledge_states.updated_at) and resolved by key at read/compaction
+    time, as are rows re-read by the lookback.
+
+    Args:
+        dataset: Key into INCREMENTAL_DATASETS
+        client: Data backend (get_backend() if not provided)
+        output_dir: Export root holding watermarks.json and partitions
+        page_size: Rows fetched per request
+        format: Partition file format ("parquet", "arrow" or "csv")
+        lookback: Re-read this much before the watermark (defaults to the
+            dataset's spec.lookback)
+
+    Returns:
+        Path of the new partition, or None if there were no new rows
+    """
+    spec = _spec(dataset)
+    client = client or get_backend()
+    mark = load_watermarks(output_dir).get(dataset)
+    if mark and mark.get("column") != spec.cursor_column:
+        mark = None
+    if lookback is None:
+        lookback = spec.lookback
+
+    since = None
+    after = None
+    if mark and lookback:
+        # Cursors are raw timestamptz strings, whose trailing fractional
+        # zeros Postgres drops (fromisoformat only takes 3 or 6 digits
+        # before Python 3.11)
+        since = (pd.Timestamp(mark["cursor"]) - lookback).isoformat()
+    elif mark:
+        after = (mark["cursor"], mark["id"])
+    elif spec.days_back is not None:
+        since = (datetime.utcnow() - timedelta(days=spec.days_back)).isoformat()
+
+    pages = iter_keyset_pages(
+        client,
+        spec.table,
+        columns=spec.columns,
+        cursor_column=spec.cursor_column,
+        page_size=page_size,
+        since=since,
+        apply_filters=spec.apply_filters,
+        after=after,
+    )
+
+    os.makedirs(os.path.join(output_dir, dataset), exist_ok=True)
+    timestamp = datetime.utcnow().strftime("%Y%m%d_%H%M%S_%f")
+    path = os.path.join(
+        output_dir, dataset, f"part-{timestamp}{EXPORT_FORMATS[format]}"
+    )
+
+    last = None
+    with ExportWriter(path, dataset) as writer:
+        for rows in pages:
+            writer.write(spec.to_frame(rows))
+            for row in reversed(rows):
+                if row.get(spec.cursor_column) is not None:
+                    last = (row[spec.cursor_column], row["id"])
+                    break
+
+    if writer.rows == 0:
+        return None
+
+    if last is not None:
+        save_watermark(output_dir, dataset, *last)
+    print(f"Appended {writer.rows} rows to {path}")
+    return path
+
+
+def read_dataset(
+    dataset: str,
+    output_dir: str = "data/exports",
+    columns: Optional[list[str]] = None,
+) -> pd.DataFrame:
+    """
+    Load all partitions of a local dataset, keeping the newest row per key.
+    """
+    parts = list_partitions(dataset, output_dir)
+    if not parts:
+        return pd.DataFrame()
+
+    key = list(_spec(dataset).key)
+    if columns is not None:
+        columns = list(dict.fromkeys(key + columns))
+
+    frames = [read_export(part, columns=columns) for part in parts]
+    df = pd.concat(frames, ignore_index=True)
+    if len(frames) > 1:
+        df = df.drop_duplicates(subset=key, keep="last", ignore_index=True)
+    return df
+
+
+def compact_dataset(dataset: str, output_dir: str = "data/exports") -> Optional[str]:
+    """
+    Merge all partitions of a local dataset into a single partition.
+
+    Superseded rows are dropped by key. The compacted file keeps the newest
+    partition's timestamp so later increments still sort after it.
+
+    Returns:
+        Path of the compacted partition (None if the dataset is empty)
+    """
+    parts = list_partitions(dataset, output_dir)
+    if len(parts) <= 1:
+        return parts[0] if parts else None
+
+    df = read_dataset(dataset, output_dir)
+    newest = os.path.basename(parts[-1])
+    stem, _ = os.path.splitext(newest)
+    ext = EXPORT_FORMATS[DEFAULT_FORMAT]
+    path = os.path.join(output_dir, dataset, f"{stem}{ext}")
+    tmp_path = os.path.join(output_dir, dataset, f".compact-{stem}{ext}")
+
+    # Move the compacted file into place before removing anything: a crash
+    # in between leaves superseded rows that read_dataset() drops by key
+    write_frame(df, tmp_path, dataset)
+    os.replace(tmp_path, path)
+    for part in parts:
+        if part != path:
+            os.remove(part)
+
+    print(
+        f"Compacted {len(parts)} partitions of {dataset} into {path} ({len(df)} rows)"
+    )
+    return path
+
+
+def export_all_incremental(
+    client: Optional[DataBackend] = None,
+    output_dir: str = "data/exports",
+    format: str = DEFAULT_FORMAT,
+    compact: bool = False,
+    lookback: Optional[timedelta] = None,
+) -> dict[str, str]:
+    """
+    Run export_incremental for every dataset, optionally compacting after.
+
+    lookback overrides each dataset's spec.lookback when given.
+
+    Returns:
+        Dictionary mapping dataset name to its dataset directory
+    """
+    client = client or get_backend()
+    exports = {}
+
+    for dataset in INCREMENTAL_DATASETS:
+        export_incremental(
+            dataset, client, output_dir, format=format, lookback=lookback
+        )
+        if compact:
+            compact_dataset(dataset, output_dir)
+        if list_partitions(dataset, output_dir):
+            exports[dataset] = os.path.join(output_dir, dataset)
+
+    return exports
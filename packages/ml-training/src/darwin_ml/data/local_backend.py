@@ -0,0 +1,534 @@
+"""
+Local SQLite Backend
+
+Offline stand-in for Supabase: tables live in a SQLite file (or in memory)
+and queries arrive through the same PostgREST builder as RestClient, so the
+exporters run unchanged. Filters, or=/and= logic trees, ordering with
+nulls placement and limit are translated to SQL; the feature view and RPCs
+the exporters call are re-implemented in SQLite. Inserts append to (or
+create) a table.
+
+Timestamps are stored as fixed-width UTC ISO strings so they compare
+correctly as text, booleans as 0/1 and JSONB columns as JSON text.
+"""
+
+import json
+import sqlite3
+import threading
+from typing import Any, Iterable, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+from .rest_client import _Query
+
+INSERT_BATCH_ROWS = 100_000
+
+_COMPARISONS = {"eq": "=", "neq": "<>", "gt": ">", "gte": ">=", "lt": "<", "lte": "<="}
+
+# Column kinds that need converting between pandas/JSON and SQLite
+_KINDS_TABLE = "_darwin_columns"
+
+_PASS_FEATURES_VIEW = """
+SELECT
+  ea.id AS attempt_id,
+  ea.user_id,
+  ea.theta,
+  ea.standard_error,
+  ea.scaled_score,
+  ea.theta - LAG(ea.theta) OVER (
+    PARTITION BY ea.user_id ORDER BY ea.started_at
+  ) AS theta_delta,
+  json_extract(ea.area_breakdown, '$.clinica_medica.percentage') AS clinica_medica_pct,
+  json_extract(ea.area_breakdown, '$.cirurgia.percentage') AS cirurgia_pct,
+  json_extract(ea.area_breakdown, '$.ginecologia_obstetricia.percentage') AS gine_pct,
+  json_extract(ea.area_breakdown, '$.pediatria.percentage') AS pediatria_pct,
+  json_extract(ea.area_breakdown, '$.saude_coletiva.percentage') AS saude_pct,
+  p.streak_days,
+  p.xp,
+  ea.passed AS target,
+  ea.completed_at
+FROM exam_attempts ea
+JOIN profiles p ON ea.user_id = p.id
+WHERE ea.completed_at IS NOT NULL
+"""
+
+# Mirrors get_pass_prediction_training_rows (migrations 023 and 024)
+_PASS_TRAINING_ROWS = f"""
+SELECT
+  attempt_id,
+  user_id,
+  theta,
+  standard_error,
+  scaled_score,
+  COALESCE(theta_delta, 0) AS theta_delta,
+  COALESCE(clinica_medica_pct, 0) AS clinica_medica_pct,
+  COALESCE(cirurgia_pct, 0) AS cirurgia_pct,
+  COALESCE(gine_pct, 0) AS gine_pct,
+  COALESCE(pediatria_pct, 0) AS pediatria_pct,
+  COALESCE(saude_pct, 0) AS saude_pct,
+  streak_days,
+  xp,
+  target,
+  completed_at
+FROM (
+  SELECT v.*, COUNT(*) OVER (PARTITION BY v.user_id) AS user_attempts
+  FROM ({_PASS_FEATURES_VIEW}) v
+) f
+WHERE f.user_attempts >= :p_min_attempts
+"""
+
+_PASS_KINDS = {"target": "bool", "completed_at": "timestamp"}
+
+# Views queryable as tables: name -> (sql, column kinds)
+VIEWS: dict[str, tuple[str, dict[str, str]]] = {
+    "ml_pass_prediction_features": (_PASS_FEATURES_VIEW, _PASS_KINDS),
+}
+
+# RPCs: name -> (sql with :named parameters, parameter defaults, column kinds)
+RPCS: dict[str, tuple[str, dict[str, Any], dict[str, str]]] = {
+    "get_pass_prediction_features": (_PASS_FEATURES_VIEW, {}, _PASS_KINDS),
+    "get_pass_prediction_training_rows": (
+        _PASS_TRAINING_ROWS,
+        {"p_min_attempts": 3},
+        _PASS_KINDS,
+    ),
+}
+
+
+def _ident(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _unquote(value: str) -> str:
+    """Undo the double-quoting used for values inside logic trees."""
+    if len(value) >= 2 and value[0] == '"' and value[-1] == '"':
+        return value[1:-1].replace('\\"', '"').replace("\\\\", "\\")
+    return value
+
+
+def _split_terms(expr: str) -> list[str]:
+    """Split a logic-tree body on top-level commas, respecting quotes."""
+    terms, depth, quoted, escaped, start = [], 0, False, False, 0
+    for i, char in enumerate(expr):
+        if escaped:
+            escaped = False
+        elif char == "\\":
+            escaped = True
+        elif char == '"':
+            quoted = not quoted
+        elif quoted:
+            continue
+        elif char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+        elif char == "," and depth == 0:
+            terms.append(expr[start:i])
+            start = i + 1
+    terms.append(expr[start:])
+    return [term for term in terms if term]
+
+
+def to_timestamp_text(values: pd.Series) -> pd.Series:
+    """Format timestamps as the fixed-width UTC strings stored in SQLite."""
+    stamps = pd.to_datetime(pd.Series(values), utc=True, format="ISO8601")
+    # datetime_as_string is ~50x faster than Series.dt.strftime
+    naive = stamps.dt.tz_localize(None).to_numpy(dtype="datetime64[us]")
+    text = np.char.add(np.datetime_as_string(naive, unit="us"), "+00:00")
+    text = text.astype(object)
+    text[stamps.isna().to_numpy()] = None
+    return pd.Series(text, index=stamps.index)
+
+
+def _json_text(value: Any) -> Optional[str]:
+    if isinstance(value, str):
+        return value
+    if value is None or (isinstance(value, float) and np.isnan(value)):
+        return None
+    return json.dumps(value)
+
+
+def _column_kind(series: pd.Series) -> Optional[str]:
+    if pd.api.types.is_datetime64_any_dtype(series.dtype):
+        return "timestamp"
+    if pd.api.types.is_bool_dtype(series.dtype):
+        return "bool"
+    if series.dtype == object:
+        first = series.dropna()
+        if len(first) and isinstance(first.iloc[0], (dict, list)):
+            return "json"
+    return None
+
+
+def _sql_type(series: pd.Series, kind: Optional[str]) -> str:
+    if kind == "bool" or pd.api.types.is_integer_dtype(series.dtype):
+        return "INTEGER"
+    if pd.api.types.is_float_dtype(series.dtype):
+        return "REAL"
+    return "TEXT"
+
+
+class LocalBackend:
+    """
+    SQLite-backed data backend with the PostgREST query-builder interface.
+
+    Safe to share between threads (queries are serialized), so it can also
+    stand in for RestClient in export_all_concurrent.
+
+    Args:
+        path: SQLite database file, or ":memory:"
+    """
+
+    def __init__(self, path: str = ":memory:") -> None:
+        self.path = path
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._materialized: dict[tuple, str] = {}
+        self.request_count = 0
+        self.retry_count = 0
+        with self._lock:
+            self._db.execute(
+                f"CREATE TABLE IF NOT EXISTS {_KINDS_TABLE} "
+                '("table" TEXT, "column" TEXT, kind TEXT, '
+                'PRIMARY KEY ("table", "column"))'
+            )
+
+    def __enter__(self) -> "LocalBackend":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._db.close()
+
+    def table(self, name: str) -> _Query:
+        return _Query(self, f"/{name}")
+
+    def rpc(self, name: str, params: Optional[dict] = None) -> _Query:
+        return _Query(self, f"/rpc/{name}", body=params or {})
+
+    def tables(self) -> list[str]:
+        rows = self._db.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name != ?",
+            (_KINDS_TABLE,),
+        ).fetchall()
+        return [name for (name,) in rows]
+
+    def load_table(
+        self,
+        name: str,
+        df: pd.DataFrame,
+        json_columns: Sequence[str] = (),
+        indexes: Iterable[Sequence[str]] = (),
+    ) -> int:
+        """
+        (Re)create a table from a DataFrame.
+
+        Args:
+            name: Table name
+            df: Rows; datetime columns become timestamps, dict/list columns JSON
+            json_columns: Columns already holding JSON text (e.g. responses)
+            indexes: Column tuples to index, e.g. [("started_at", "id")] for
+                keyset paging on started_at
+
+        Returns:
+            Number of rows loaded
+        """
+        kinds = {column: _column_kind(df[column]) for column in df.columns}
+        kinds.update({column: "json" for column in json_columns})
+        columns = ", ".join(
+            f"{_ident(column)} {_sql_type(df[column], kinds[column])}"
+            for column in df.columns
+        )
+        placeholders = ", ".join("?" for _ in df.columns)
+
+        with self._lock:
+            self._db.execute(f"DROP TABLE IF EXISTS {_ident(name)}")
+            self._db.execute(f"CREATE TABLE {_ident(name)} ({columns})")
+            self._db.execute(f'DELETE FROM {_KINDS_TABLE} WHERE "table" = ?', (name,))
+            self._db.executemany(
+                f"INSERT INTO {_KINDS_TABLE} VALUES (?, ?, ?)",
+                [(name, column, kind) for column, kind in kinds.items() if kind],
+            )
+            insert = f"INSERT INTO {_ident(name)} VALUES ({placeholders})"
+            for start in range(0, len(df), INSERT_BATCH_ROWS):
+                batch = df.iloc[start : start + INSERT_BATCH_ROWS]
+                self._db.executemany(insert, self._to_rows(batch, kinds))
+            for i, index in enumerate(indexes):
+                self._db.execute(
+                    f"CREATE INDEX {_ident(f'{name}_idx{i}')} ON {_ident(name)} "
+                    f"({', '.join(_ident(column) for column in index)})"
+                )
+            self._db.commit()
+            # Tables feed the views and RPCs, so drop their materializations
+            for temp in self._materialized.values():
+                self._db.execute(f"DROP TABLE IF EXISTS temp.{_ident(temp)}")
+            self._materialized.clear()
+        return len(df)
+
+    @staticmethod
+    def _to_rows(df: pd.DataFrame, kinds: dict[str, Optional[str]]) -> Iterable:
+        columns = []
+        for column in df.columns:
+            series, kind = df[column], kinds[column]
+            if kind == "timestamp":
+                values = to_timestamp_text(series).to_numpy(dtype=object)
+            elif kind == "json":
+                values = np.array(
+                    [_json_text(v) for v in series.to_numpy(dtype=object)],
+                    dtype=object,
+                )
+            else:
+                values = series.astype(object).where(series.notna(), None)
+                values = values.to_numpy(dtype=object)
+                if kind == "bool":
+                    values = np.array(
+                        [None if v is None else int(v) for v in values], dtype=object
+                    )
+            columns.append(values)
+        return zip(*(column.tolist() for column in columns))
+
+    def _kinds(self, name: str) -> dict[str, str]:
+        rows = self._db.execute(
+            f'SELECT "column", kind FROM {_KINDS_TABLE} WHERE "table" = ?', (name,)
+        ).fetchall()
+        return dict(rows)
+
+    def _materialize(self, sql: str, args: dict[str, Any]) -> str:
+        """Evaluate a view/RPC once into a temp table for all its pages."""
+        key = (sql, tuple(sorted(args.items())))
+        temp = self._materialized.get(key)
+        if temp is None:
+            temp = f"rpc_{len(self._materialized)}"
+            self._db.execute(f"CREATE TEMP TABLE {_ident(temp)} AS {sql}", args)
+            self._materialized[key] = temp
+        return f"temp.{_ident(temp)}"
+
+    def _relation(self, path: str, body: Optional[dict]) -> tuple[str, dict[str, str]]:
+        name = path.strip("/")
+        if name.startswith("rpc/"):
+            name = name[len("rpc/") :]
+            if name not in RPCS:
+                raise LookupError(f"Unknown RPC: {name}")
+            sql, defaults, kinds = RPCS[name]
+            unknown = set(body or {}) - set(defaults)
+            if unknown:
+                raise ValueError(f"Unknown parameters for {name}: {sorted(unknown)}")
+            return self._materialize(sql, {**defaults, **(body or {})}), kinds
+        if name in VIEWS:
+            sql, kinds = VIEWS[name]
+            return self._materialize(sql, {}), kinds
+        exists = self._db.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (name,)
+        ).fetchone()
+        if exists is None:
+            raise LookupError(f"Unknown table: {name}")
+        return _ident(name), self._kinds(name)
+
+    def _condition(
+        self, column: str, expr: str, kinds: dict[str, str], args: dict[str, Any]
+    ) -> str:
+        negate = expr.startswith("not.")
+        if negate:
+            expr = expr[len("not.") :]
+        operator, _, value = expr.partition(".")
+        value = _unquote(value)
+
+        if operator == "is":
+            literal = {"null": "NULL", "true": "1", "false": "0"}[value.lower()]
+            sql = f"{_ident(column)} IS {literal}"
+        elif operator in _COMPARISONS:
+            name = f"p{len(args)}"
+            args[name] = self._parameter(value, kinds.get(column))
+            sql = f"{_ident(column)} {_COMPARISONS[operator]} :{name}"
+        else:
+            raise ValueError(f"Unsupported filter operator: {operator}")
+        return f"NOT ({sql})" if negate else sql
+
+    def _tree(
+        self, operator: str, body: str, kinds: dict[str, str], args: dict[str, Any]
+    ) -> str:
+        parts = self._terms(body, kinds, args)
+        return f" {operator.upper()} ".join(parts)
+
+    def _terms(
+        self, body: str, kinds: dict[str, str], args: dict[str, Any]
+    ) -> list[str]:
+        parts = []
+        for term in _split_terms(body):
+            negate = term.startswith("not.") and term[4:].startswith(("and(", "or("))
+            if negate:
+                term = term[len("not.") :]
+            if term.startswith(("and(", "or(")):
+                sub_operator, _, inner = term.partition("(")
+                sql = self._tree(sub_operator, inner[:-1], kinds, args)
+            else:
+                column, _, expr = term.partition(".")
+                sql = self._condition(column, expr, kinds, args)
+            parts.append(f"NOT ({sql})" if negate else f"({sql})")
+        return parts
+
+    @staticmethod
+    def _parameter(value: str, kind: Optional[str]) -> Any:
+        if kind == "timestamp":
+            return to_timestamp_text(pd.Series([value])).iloc[0]
+        if kind == "bool":
+            return int(value.lower() == "true")
+        return value
+
+    @staticmethod
+    def _order_term(term: str) -> str:
+        column, *modifiers = term.split(".")
+        desc = "desc" in modifiers
+        if "nullsfirst" in modifiers:
+            nulls = "FIRST"
+        elif "nullslast" in modifiers:
+            nulls = "LAST"
+        else:
+            # PostgreSQL default; SQLite would put NULLs first when ascending
+            nulls = "FIRST" if desc else "LAST"
+        return f"{_ident(column)} {'DESC' if desc else 'ASC'} NULLS {nulls}"
+
+    def insert(
+        self, name: str, df: pd.DataFrame, on_conflict: Sequence[str] = ()
+    ) -> int:
+        """
+        Append rows to a table, creating it from the rows if it is missing.
+        Columns the table lacks are dropped, as PostgREST would reject them.
+        With on_conflict key columns, existing rows sharing a key with the
+        new ones are deleted first (an upsert).
+        """
+        if df.empty:
+            return 0
+        with self._lock:
+            exists = self._db.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?",
+                (name,),
+            ).fetchone()
+        if exists is None:
+            return self.load_table(name, df)
+
+        with self._lock:
+            names = [
+                row[1] for row in self._db.execute(f"PRAGMA table_info({_ident(name)})")
+            ]
+            df = df[[column for column in df.columns if column in names]]
+            kinds = self._kinds(name)
+            kinds = {
+                column: kinds.get(column) or _column_kind(df[column])
+                for column in df.columns
+            }
+            insert = (
+                f"INSERT INTO {_ident(name)} "
+                f"({', '.join(_ident(column) for column in df.columns)}) "
+                f"VALUES ({', '.join('?' for _ in df.columns)})"
+            )
+            if on_conflict:
+                key = list(on_conflict)
+                match = " AND ".join(f"{_ident(column)} IS ?" for column in key)
+                self._db.executemany(
+                    f"DELETE FROM {_ident(name)} WHERE {match}",
+                    self._to_rows(df[key], {column: kinds[column] for column in key}),
+                )
+            self._db.executemany(insert, self._to_rows(df, kinds))
+            self._db.commit()
+            for temp in self._materialized.values():
+                self._db.execute(f"DROP TABLE IF EXISTS temp.{_ident(temp)}")
+            self._materialized.clear()
+        return len(df)
+
+    def request(
+        self,
+        method: str,
+        path: str,
+        params: list[tuple[str, str]],
+        body: Union[dict, list[dict], None] = None,
+        headers: Optional[dict[str, str]] = None,
+        idempotent: bool = True,
+    ) -> list[dict]:
+        """
+        Answer one PostgREST request from SQLite and return its rows
+        (idempotent is accepted for RestClient parity; nothing is retried).
+        """
+        if method == "POST" and not path.strip("/").startswith("rpc/"):
+            upsert = "merge-duplicates" in (headers or {}).get("Prefer", "")
+            key = dict(params).get("on_conflict", "") if upsert else ""
+            self.insert(
+                path.strip("/"),
+                pd.DataFrame(body or []),
+                [c for c in key.split(",") if c],
+            )
+            return []
+        with self._lock:
+            self.request_count += 1
+            relation, kinds = self._relation(path, body)
+
+            select, where, order, limit = "*", [], [], ""
+            branches: list[str] = []
+            args: dict[str, Any] = {}
+            for key, value in params:
+                if key == "select":
+                    if value != "*":
+                        select = ", ".join(_ident(c) for c in value.split(","))
+                elif key == "order":
+                    order = [self._order_term(term) for term in value.split(",")]
+                elif key == "limit":
+                    limit = f" LIMIT {int(value)}"
+                elif key == "or" and not branches:
+                    branches = self._terms(value[1:-1], kinds, args)
+                elif key in ("or", "and"):
+                    where.append(f"({self._tree(key, value[1:-1], kinds, args)})")
+                else:
+                    where.append(self._condition(key, value, kinds, args))
+
+            order_by = " ORDER BY " + ", ".join(order) if order else ""
+            if branches and order and limit:
+                # Top-n of an OR is the top-n of the union of each branch's
+                # top-n. Each branch (e.g. the three arms of a keyset clause)
+                # is an index seek, where the OR as a whole would be a scan.
+                members = " UNION ".join(
+                    f"SELECT * FROM (SELECT rowid AS _rowid, * FROM {relation} "
+                    f"WHERE {' AND '.join([*where, branch])}{order_by}{limit})"
+                    for branch in branches
+                )
+                sql = f"SELECT {select} FROM ({members}){order_by}{limit}"
+            else:
+                if branches:
+                    where.append(f"({' OR '.join(branches)})")
+                sql = f"SELECT {select} FROM {relation}"
+                if where:
+                    sql += " WHERE " + " AND ".join(where)
+                sql += order_by + limit
+            cursor = self._db.execute(sql, args)
+            names = [description[0] for description in cursor.description]
+            rows = cursor.fetchall()
+            if names[0] == "_rowid":
+                names = names[1:]
+                rows = [row[1:] for row in rows]
+
+        decoders = {
+            i: kinds[name]
+            for i, name in enumerate(names)
+            if kinds.get(name) in ("bool", "json")
+        }
+        if not decoders:
+            return [dict(zip(names, row)) for row in rows]
+
+        out = []
+        for row in rows:
+            record = dict(zip(names, row))
+            for i, kind in decoders.items():
+                value = row[i]
+                if value is not None:
+                    record[names[i]] = (
+                        bool(value) if kind == "bool" else json.loads(value)
+                    )
+            out.append(record)
+        return out
+
+    def execute_sql(self, sql: str, args: Sequence[Any] = ()) -> list[tuple]:
+        """Run raw SQL against the database (for inspection and benchmarks)."""
+        with self._lock:
+            return self._db.execute(sql, args).fetchall()
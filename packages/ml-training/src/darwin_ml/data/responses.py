@@ -0,0 +1,441 @@
+"""
+Response Matrix
+
+Compact users x items storage of the long-format item responses exported by
+export_irt_item_responses() (user_id, question_id, correct,
+response_time_ms), shared by the IRT, CDM, BKT and DIF trainers so none of
+them pivots the rows itself.
+
+Responses are held in CSR order: an int64 row pointer per user, int32 item
+codes, int8 outcomes and optional int32 response times, with each user's
+entries in export (chronological) order. Cells that are not stored were not
+administered; mask() gives that missing-data pattern as a sparse boolean
+matrix. A CSC permutation is built on first per-item access. User and item
+codes are Vocabulary codes, so matrices built from frames or files that
+share vocabularies share one code space.
+
+Export files are read straight from Arrow: the dictionary indices of a
+memory-mapped .arrow file become the code arrays without a copy, and
+Parquet columns are decoded once without going through pandas.
+"""
+
+from functools import cached_property
+from typing import NamedTuple, Optional, Union
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import scipy.sparse as sp
+
+from .vocab import Vocabulary
+
+# response_times entry for a response without a recorded time
+MISSING_TIME = -1
+
+
+class Entries(NamedTuple):
+    """
+    Responses of one user (codes are item codes) or one item (codes are
+    user codes); times is None when the matrix has no response times.
+    """
+
+    codes: np.ndarray
+    outcomes: np.ndarray
+    times: Optional[np.ndarray]
+
+
+def _codes(column: pa.ChunkedArray) -> tuple[np.ndarray, pd.Index]:
+    """
+    Codes and labels of a dictionary column. Arrow IPC chunks written by
+    ExportWriter carry growing dictionaries that extend each other, so
+    their indices are used as-is; otherwise (e.g. Parquet row groups, which
+    each hold their own dictionary) the dictionaries are unified.
+    """
+    if not pa.types.is_dictionary(column.type):
+        column = column.dictionary_encode()
+    chunks = column.chunks
+    if not chunks:
+        return np.empty(0, np.int32), pd.Index([], dtype=object)
+    dictionary = max((chunk.dictionary for chunk in chunks), key=len)
+    if not all(
+        dictionary.slice(0, len(chunk.dictionary)).equals(chunk.dictionary)
+        for chunk in chunks
+    ):
+        chunks = pa.table({"c": column}).unify_dictionaries().column("c").chunks
+        dictionary = chunks[0].dictionary
+    indices = [chunk.indices for chunk in chunks]
+    if len(indices) == 1:
+        # Zero-copy view of the Arrow buffer (null keys were filtered out)
+        codes = indices[0].to_numpy(zero_copy_only=False)
+    else:
+        codes = pa.concat_arrays(indices).to_numpy(zero_copy_only=False)
+    return codes.astype(np.int32, copy=False), pd.Index(
+        dictionary.to_pylist(), dtype=object
+    )
+
+
+def _stable_order(codes: np.ndarray, n_codes: int) -> np.ndarray:
+    """
+    Stable argsort of non-negative codes. NumPy radix-sorts 16-bit keys
+    (a comparison sort otherwise), so wider codes take two radix passes,
+    low half first.
+    """
+    if n_codes <= 1 << 16:
+        return np.argsort(codes.astype(np.uint16), kind="stable")
+    low = np.argsort((codes & 0xFFFF).astype(np.uint16), kind="stable")
+    high = np.argsort((codes[low] >> 16).astype(np.uint16), kind="stable")
+    return low[high]
+
+
+def _vocabulary(labels, vocab: Optional[Vocabulary]) -> tuple[Vocabulary, np.ndarray]:
+    """Vocabulary for labels and the remap from label position to its code."""
+    if vocab is None:
+        return Vocabulary(labels), np.arange(len(labels), dtype=np.int32)
+    return vocab, vocab.encode(pd.Index(labels, dtype=object))
+
+
+class ResponseMatrix:
+    """
+    Users x items 0/1 responses in CSR order.
+
+    Args:
+        indptr: Row pointer, len(users) + 1 offsets into the entry arrays
+        indices: Item code per entry (int32)
+        outcomes: 1 for correct, 0 for incorrect per entry (int8)
+        times: Response time in ms per entry (int32, MISSING_TIME if
+            unknown), or None
+        users: Vocabulary of user IDs (row codes)
+        items: Vocabulary of item IDs (column codes)
+    """
+
+    def __init__(
+        self,
+        indptr: np.ndarray,
+        indices: np.ndarray,
+        outcomes: np.ndarray,
+        times: Optional[np.ndarray],
+        users: Vocabulary,
+        items: Vocabulary,
+    ) -> None:
+        if len(indptr) != len(users) + 1 or indptr[-1] != len(indices):
+            raise ValueError("indptr does not match the users and entries")
+        if len(outcomes) != len(indices) or (
+            times is not None and len(times) != len(indices)
+        ):
+            raise ValueError("indices, outcomes and times differ in length")
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.indices = np.asarray(indices, dtype=np.int32)
+        self.outcomes = np.asarray(outcomes, dtype=np.int8)
+        self.times = None if times is None else np.asarray(times, dtype=np.int32)
+        self.users = users
+        self.items = items
+
+    # -- construction -------------------------------------------------------
+
+    @classmethod
+    def from_codes(
+        cls,
+        user_codes: np.ndarray,
+        item_codes: np.ndarray,
+        outcomes: np.ndarray,
+        times: Optional[np.ndarray] = None,
+        users: Optional[Vocabulary] = None,
+        items: Optional[Vocabulary] = None,
+    ) -> "ResponseMatrix":
+        """
+        Build from per-response codes in export order.
+
+        The vocabularies default to the codes themselves as labels. Rows
+        with a missing (negative) user or item code are dropped.
+        """
+        user_codes = np.asarray(user_codes)
+        item_codes = np.asarray(item_codes)
+        valid = (user_codes >= 0) & (item_codes >= 0)
+        if not valid.all():
+            user_codes, item_codes = user_codes[valid], item_codes[valid]
+            outcomes = np.asarray(outcomes)[valid]
+            times = None if times is None else np.asarray(times)[valid]
+        n_users = int(user_codes.max(initial=-1)) + 1
+        n_items = int(item_codes.max(initial=-1)) + 1
+        users = users if users is not None else Vocabulary(map(str, range(n_users)))
+        items = items if items is not None else Vocabulary(map(str, range(n_items)))
+        if n_users > len(users) or n_items > len(items):
+            raise ValueError("codes exceed the given vocabularies")
+
+        counts = np.bincount(user_codes, minlength=len(users))
+        indptr = np.zeros(len(users) + 1, dtype=np.int64)
+        np.cumsum(counts, out=indptr[1:])
+        if np.all(user_codes[1:] >= user_codes[:-1]):
+            order = slice(None)
+        else:
+            # Stable, so each user's responses stay in export order
+            order = _stable_order(user_codes, len(users))
+        return cls(
+            indptr,
+            np.asarray(item_codes, dtype=np.int32)[order],
+            np.asarray(outcomes, dtype=np.int8)[order],
+            None if times is None else np.asarray(times, dtype=np.int32)[order],
+            users,
+            items,
+        )
+
+    @classmethod
+    def from_frame(
+        cls,
+        df: pd.DataFrame,
+        user_column: str = "user_id",
+        item_column: str = "question_id",
+        correct_column: str = "correct",
+        time_column: Optional[str] = "response_time_ms",
+        users: Optional[Vocabulary] = None,
+        items: Optional[Vocabulary] = None,
+    ) -> "ResponseMatrix":
+        """
+        Build from a long frame such as export_irt_item_responses().
+
+        Categorical ID columns are taken by their codes, so a frame encoded
+        against shared vocabularies is not re-factorized.
+
+        Args:
+            df: One row per response
+            time_column: Response time column (skipped if absent or None)
+            users: Vocabulary to encode user IDs with (extended in place)
+            items: Vocabulary to encode item IDs with (extended in place)
+        """
+        user_codes, users = cls._encode(df[user_column], users)
+        item_codes, items = cls._encode(df[item_column], items)
+        times = None
+        if time_column is not None and time_column in df.columns:
+            times = (
+                pd.to_numeric(df[time_column], errors="coerce")
+                .fillna(MISSING_TIME)
+                .to_numpy(dtype=np.int32)
+            )
+        outcomes = pd.to_numeric(df[correct_column]).to_numpy(dtype=np.int8)
+        return cls.from_codes(user_codes, item_codes, outcomes, times, users, items)
+
+    @staticmethod
+    def _encode(
+        series: pd.Series, vocab: Optional[Vocabulary]
+    ) -> tuple[np.ndarray, Vocabulary]:
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            vocab, remap = _vocabulary(series.cat.categories, vocab)
+            codes = series.cat.codes.to_numpy()
+            return np.where(codes >= 0, remap[codes], -1), vocab
+        vocab = vocab if vocab is not None else Vocabulary()
+        return vocab.encode(series), vocab
+
+    @classmethod
+    def from_arrow(
+        cls,
+        table: pa.Table,
+        user_column: str = "user_id",
+        item_column: str = "question_id",
+        correct_column: str = "correct",
+        time_column: Optional[str] = "response_time_ms",
+        users: Optional[Vocabulary] = None,
+        items: Optional[Vocabulary] = None,
+    ) -> "ResponseMatrix":
+        """Build from an Arrow table with the irt_responses schema."""
+        keys = pc.and_(
+            pc.is_valid(table.column(user_column)),
+            pc.is_valid(table.column(item_column)),
+        )
+        if not pc.all(keys).as_py():
+            table = table.filter(keys)
+
+        user_codes, user_labels = _codes(table.column(user_column))
+        item_codes, item_labels = _codes(table.column(item_column))
+        users, user_remap = _vocabulary(user_labels, users)
+        items, item_remap = _vocabulary(item_labels, items)
+        if not _is_identity(user_remap):
+            user_codes = user_remap[user_codes]
+        if not _is_identity(item_remap):
+            item_codes = item_remap[item_codes]
+
+        outcomes = _numpy(table.column(correct_column), 0, np.int8)
+        times = None
+        if time_column is not None and time_column in table.column_names:
+            times = _numpy(table.column(time_column), MISSING_TIME, np.int32)
+        return cls.from_codes(user_codes, item_codes, outcomes, times, users, items)
+
+    @classmethod
+    def from_export(cls, path: str, **kwargs) -> "ResponseMatrix":
+        """
+        Build from an irt_responses export file (.parquet or .arrow),
+        memory-mapped and without a pandas round trip.
+        """
+        import pyarrow.ipc as ipc
+        import pyarrow.parquet as pq
+
+        from .columnar import format_from_path
+
+        fmt = format_from_path(path)
+        if fmt == "parquet":
+            table = pq.read_table(path, memory_map=True)
+        elif fmt == "arrow":
+            table = ipc.open_file(pa.memory_map(path)).read_all()
+        else:
+            return cls.from_frame(pd.read_csv(path), **kwargs)
+        return cls.from_arrow(table, **kwargs)
+
+    # -- shape and access ---------------------------------------------------
+
+    @property
+    def shape(self) -> tuple[int, int]:
+        return len(self.users), len(self.items)
+
+    def __len__(self) -> int:
+        """Number of stored responses."""
+        return len(self.indices)
+
+    def __repr__(self) -> str:
+        return (
+            f"ResponseMatrix({self.shape[0]} users x {self.shape[1]} items, "
+            f"{len(self)} responses)"
+        )
+
+    @property
+    def user_counts(self) -> np.ndarray:
+        """Responses per user."""
+        return np.diff(self.indptr)
+
+    @property
+    def item_counts(self) -> np.ndarray:
+        """Responses per item."""
+        return np.bincount(self.indices, minlength=self.shape[1])
+
+    def user_codes(self) -> np.ndarray:
+        """User code of every entry (the CSR rows, expanded)."""
+        return np.repeat(np.arange(self.shape[0], dtype=np.int32), self.user_counts)
+
+    def _code(self, key: Union[int, str], vocab: Vocabulary) -> int:
+        if isinstance(key, (int, np.integer)):
+            return int(key)
+        if key not in vocab:
+            raise KeyError(key)
+        return vocab.add(key)
+
+    def user(self, user: Union[int, str]) -> Entries:
+        """A user's responses in export order (views, no copy)."""
+        code = self._code(user, self.users)
+        span = slice(self.indptr[code], self.indptr[code + 1])
+        times = None if self.times is None else self.times[span]
+        return Entries(self.indices[span], self.outcomes[span], times)
+
+    @cached_property
+    def _csc(self) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Column pointer, user code per entry and the CSR -> CSC order."""
+        order = _stable_order(self.indices, self.shape[1])
+        indptr = np.zeros(self.shape[1] + 1, dtype=np.int64)
+        np.cumsum(self.item_counts, out=indptr[1:])
+        return indptr, self.user_codes()[order], order
+
+    def item(self, item: Union[int, str]) -> Entries:
+        """An item's responses ordered by user code."""
+        code = self._code(item, self.items)
+        indptr, user_codes, order = self._csc
+        span = slice(indptr[code], indptr[code + 1])
+        entries = order[span]
+        times = None if self.times is None else self.times[entries]
+        return Entries(user_codes[span], self.outcomes[entries], times)
+
+    def user_rows(self, start: int, stop: int) -> "ResponseMatrix":
+        """Users [start, stop) as a matrix of their own (entry views)."""
+        span = slice(self.indptr[start], self.indptr[stop])
+        return ResponseMatrix(
+            self.indptr[start : stop + 1] - self.indptr[start],
+            self.indices[span],
+            self.outcomes[span],
+            None if self.times is None else self.times[span],
+            Vocabulary(self.users.values[start:stop]),
+            self.items,
+        )
+
+    # -- conversions --------------------------------------------------------
+
+    @property
+    def has_repeats(self) -> bool:
+        """Whether some user answered some item more than once."""
+        return len(self._unique) < len(self)
+
+    def unique(self) -> "ResponseMatrix":
+        """
+        One response per (user, item): the last one in export order, with
+        each user's entries sorted by item code (canonical CSR).
+        """
+        return self._unique
+
+    @cached_property
+    def _unique(self) -> "ResponseMatrix":
+        rows = self.user_codes()
+        # Sort by item, then stably by user: each cell's responses end up
+        # adjacent and still in export order, so the last of a run wins
+        by_item = _stable_order(self.indices, self.shape[1])
+        order = by_item[_stable_order(rows[by_item], self.shape[0])]
+        rows, columns = rows[order], self.indices[order]
+        last = np.ones(len(order), dtype=bool)
+        last[:-1] = (rows[1:] != rows[:-1]) | (columns[1:] != columns[:-1])
+        keep = order[last]
+        indptr = np.zeros(self.shape[0] + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows[last], minlength=self.shape[0]), out=indptr[1:])
+        return ResponseMatrix(
+            indptr,
+            columns[last],
+            self.outcomes[keep],
+            None if self.times is None else self.times[keep],
+            self.users,
+            self.items,
+        )
+
+    def to_csr(self, dtype=np.float32) -> sp.csr_matrix:
+        """
+        Users x items scipy CSR of the last response per cell; stored
+        entries (explicit zeros included) are the administered items.
+        """
+        matrix = self.unique()
+        return sp.csr_matrix(
+            (matrix.outcomes.astype(dtype), matrix.indices, matrix.indptr),
+            shape=self.shape,
+        )
+
+    def mask(self) -> sp.csr_matrix:
+        """Boolean users x items matrix of administered cells."""
+        matrix = self.to_csr(dtype=bool)
+        matrix.data[:] = True
+        return matrix
+
+    def to_dense(self) -> np.ndarray:
+        """Users x items float32 array, NaN where not administered."""
+        dense = np.full(self.shape, np.nan, dtype=np.float32)
+        matrix = self.unique()
+        dense[matrix.user_codes(), matrix.indices] = matrix.outcomes
+        return dense
+
+    def to_frame(self) -> pd.DataFrame:
+        """Long frame with the exported columns, IDs as vocabulary Categoricals."""
+        columns = {
+            "user_id": self.users.categorical(self.user_codes()),
+            "question_id": self.items.categorical(self.indices),
+            "correct": self.outcomes,
+        }
+        if self.times is not None:
+            times = pd.array(self.times, dtype="Int32")
+            times[self.times == MISSING_TIME] = pd.NA
+            columns["response_time_ms"] = times
+        return pd.DataFrame(columns)
+
+
+def _is_identity(remap: np.ndarray) -> bool:
+    return bool(np.array_equal(remap, np.arange(len(remap))))
+
+
+def _numpy(column: pa.ChunkedArray, fill, dtype) -> np.ndarray:
+    """Column as a NumPy array with nulls filled (zero-copy when possible)."""
+    if column.null_count:
+        column = pc.fill_null(column, fill)
+    array = column.combine_chunks() if column.num_chunks != 1 else column.chunk(0)
+    if pa.types.is_boolean(array.type):
+        array = array.cast(pa.int8())
+    return array.to_numpy(zero_copy_only=False).astype(dtype, copy=False)
@@ -0,0 +1,258 @@
+"""
+Pooled PostgREST Client
+
+A small thread-safe stand-in for the supabase-py query builder, covering
+the subset of the API the exporters use (select, range filters, or_,
+order, limit, rpc, insert, upsert). All requests share one pooled httpx.Client and are
+retried with exponential backoff on 429/5xx and transport errors, which
+makes it suitable for running many page fetches concurrently. Plain inserts
+are not idempotent, so they are only retried when the server cannot have
+processed them (connection failures and 429).
+"""
+
+import os
+import random
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Optional, Union
+
+import httpx
+
+from .env import load_env
+
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+# Failures that leave a non-idempotent request unprocessed: it was never
+# sent, or the server rejected it before doing any work
+UNSENT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+UNPROCESSED_STATUSES = frozenset({429})
+
+
+@dataclass
+class RestResponse:
+    """Mirrors the .data attribute of supabase-py's APIResponse."""
+
+    data: list[dict]
+
+
+class _Query:
+    """Chainable request builder for one table or RPC call."""
+
+    def __init__(self, client: "RestClient", path: str, body: Optional[dict] = None):
+        self._client = client
+        self._path = path
+        self._body: Union[dict, list[dict], None] = body
+        self._params: list[tuple[str, str]] = []
+        self._order: list[str] = []
+        self._negate = False
+        self._headers: dict[str, str] = {}
+        self._idempotent = True
+
+    def _filter(self, column: str, operator: str, value: Any) -> "_Query":
+        if self._negate:
+            operator = f"not.{operator}"
+            self._negate = False
+        self._params.append((column, f"{operator}.{value}"))
+        return self
+
+    @property
+    def not_(self) -> "_Query":
+        self._negate = True
+        return self
+
+    def select(self, columns: str = "*") -> "_Query":
+        self._params.append(("select", columns.replace(" ", "")))
+        return self
+
+    def eq(self, column: str, value: Any) -> "_Query":
+        return self._filter(column, "eq", value)
+
+    def gt(self, column: str, value: Any) -> "_Query":
+        return self._filter(column, "gt", value)
+
+    def gte(self, column: str, value: Any) -> "_Query":
+        return self._filter(column, "gte", value)
+
+    def lt(self, column: str, value: Any) -> "_Query":
+        return self._filter(column, "lt", value)
+
+    def is_(self, column: str, value: str) -> "_Query":
+        return self._filter(column, "is", value)
+
+    def or_(self, filters: str) -> "_Query":
+        self._params.append(("or", f"({filters})"))
+        return self
+
+    def order(
+        self, column: str, *, desc: bool = False, nullsfirst: Optional[bool] = None
+    ) -> "_Query":
+        term = f"{column}.{'desc' if desc else 'asc'}"
+        if nullsfirst is not None:
+            term += ".nullsfirst" if nullsfirst else ".nullslast"
+        self._order.append(term)
+        return self
+
+    def limit(self, size: int) -> "_Query":
+        self._params.append(("limit", str(size)))
+        return self
+
+    def insert(self, rows: list[dict]) -> "_Query":
+        """Insert rows (one bulk POST; the inserted rows are not returned)."""
+        self._body = rows
+        self._headers["Prefer"] = "return=minimal"
+        self._idempotent = False
+        return self
+
+    def upsert(self, rows: list[dict], *, on_conflict: str) -> "_Query":
+        """Insert rows, replacing those whose on_conflict key already exists."""
+        self._body = rows
+        self._params.append(("on_conflict", on_conflict.replace(" ", "")))
+        self._headers["Prefer"] = "resolution=merge-duplicates,return=minimal"
+        return self
+
+    def execute(self) -> RestResponse:
+        params = list(self._params)
+        if self._order:
+            params.append(("order", ",".join(self._order)))
+        method = "POST" if self._body is not None else "GET"
+        return RestResponse(
+            self._client.request(
+                method,
+                self._path,
+                params,
+                self._body,
+                self._headers or None,
+                idempotent=self._idempotent,
+            )
+        )
+
+
+class RestClient:
+    """
+    Thread-safe PostgREST client with connection pooling and retries.
+
+    Args:
+        url: Supabase project URL (the REST API lives under /rest/v1)
+        key: Service role key (sent as apikey and bearer token)
+        max_connections: Size of the shared connection pool
+        max_retries: Retries per request on 429/5xx or transport errors
+        backoff: Base delay in seconds, doubled on every retry
+        max_backoff: Upper bound for a single delay
+        timeout: Per-request timeout in seconds
+    """
+
+    def __init__(
+        self,
+        url: str,
+        key: str,
+        max_connections: int = 8,
+        max_retries: int = 5,
+        backoff: float = 0.5,
+        max_backoff: float = 30.0,
+        timeout: float = 60.0,
+    ) -> None:
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self._lock = threading.Lock()
+        self.request_count = 0
+        self.retry_count = 0
+        self._http = httpx.Client(
+            base_url=f"{url.rstrip('/')}/rest/v1",
+            headers={
+                "apikey": key,
+                "Authorization": f"Bearer {key}",
+                "Accept": "application/json",
+            },
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+            ),
+            timeout=timeout,
+        )
+
+    @classmethod
+    def from_env(cls, **kwargs) -> "RestClient":
+        """Create a client from SUPABASE_URL and SUPABASE_SERVICE_ROLE_KEY."""
+        load_env()
+        url = os.environ.get("SUPABASE_URL")
+        key = os.environ.get("SUPABASE_SERVICE_ROLE_KEY")
+        if not url or not key:
+            raise ValueError(
+                "SUPABASE_URL and SUPABASE_SERVICE_ROLE_KEY must be set in environment"
+            )
+        return cls(url, key, **kwargs)
+
+    def __enter__(self) -> "RestClient":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._http.close()
+
+    def table(self, name: str) -> _Query:
+        return _Query(self, f"/{name}")
+
+    def rpc(self, name: str, params: Optional[dict] = None) -> _Query:
+        return _Query(self, f"/rpc/{name}", body=params or {})
+
+    def _delay(self, attempt: int, response: Optional[httpx.Response]) -> float:
+        if response is not None:
+            retry_after = response.headers.get("Retry-After")
+            if retry_after and retry_after.isdigit():
+                return min(float(retry_after), self.max_backoff)
+        delay = min(self.backoff * 2**attempt, self.max_backoff)
+        # Full jitter so concurrent workers do not retry in lockstep
+        return random.uniform(0, delay)
+
+    def request(
+        self,
+        method: str,
+        path: str,
+        params: list[tuple[str, str]],
+        body: Union[dict, list[dict], None] = None,
+        headers: Optional[dict[str, str]] = None,
+        idempotent: bool = True,
+    ) -> list[dict]:
+        """
+        Send one request, retrying transient failures, and return its rows.
+
+        With idempotent=False (plain inserts) a request that may have reached
+        the server is never sent again: only UNSENT_ERRORS and
+        UNPROCESSED_STATUSES are retried.
+        """
+        for attempt in range(self.max_retries + 1):
+            with self._lock:
+                self.request_count += 1
+
+            response = None
+            try:
+                response = self._http.request(
+                    method, path, params=params, json=body, headers=headers
+                )
+            except httpx.TransportError as exc:
+                if attempt == self.max_retries:
+                    raise
+                if not idempotent and not isinstance(exc, UNSENT_ERRORS):
+                    raise
+            else:
+                if response.status_code not in RETRY_STATUSES:
+                    response.raise_for_status()
+                    if not response.content:
+                        return []
+                    data = response.json()
+                    return data if isinstance(data, list) else [data]
+                if attempt == self.max_retries:
+                    response.raise_for_status()
+                if not idempotent and (
+                    response.status_code not in UNPROCESSED_STATUSES
+                ):
+                    response.raise_for_status()
+
+            with self._lock:
+                self.retry_count += 1
+            time.sleep(self._delay(attempt, response))
+
+        raise RuntimeError("unreachable")
@@ -1,249 +1,817 @@
-"""
-Supabase Data Export Module
-
-Exports training data from Supabase for ML model training.
-Uses the feature engineering views defined in the database migrations.
-"""
-
-import os
-from datetime import datetime, timedelta
-from typing import Optional
-
-import pandas as pd
-from dotenv import load_dotenv
-from supabase import create_client, Client
-
-load_dotenv()
-
-
-def get_supabase_client() -> Client:
-    """Create an authenticated Supabase client using service role key."""
-    url = os.environ.get("SUPABASE_URL")
-    key = os.environ.get("SUPABASE_SERVICE_ROLE_KEY")
-    if not url or not key:
-        raise ValueError(
-            "SUPABASE_URL and SUPABASE_SERVICE_ROLE_KEY must be set in environment"
-        )
-    return create_client(url, key)
-
-
-def export_pass_prediction_features(
-    client: Optional[Client] = None,
-    min_attempts: int = 3,
-    output_path: Optional[str] = None,
-) -> pd.DataFrame:
-    """
-    Export pass prediction features from the ml_pass_prediction_features view.
-
-    Args:
-        client: Supabase client (created if not provided)
-        min_attempts: Minimum attempts per user to include (filters sparse data)
-        output_path: If provided, saves CSV to this path
-
-    Returns:
-        DataFrame with features for pass prediction model
-    """
-    client = client or get_supabase_client()
-
-    response = client.rpc("get_pass_prediction_features", {}).execute()
-    if not response.data:
-        # Fallback: query the view directly
-        response = client.table("ml_pass_prediction_features").select("*").execute()
-
-    df = pd.DataFrame(response.data)
-
-    if df.empty:
-        return df
-
-    # Filter users with minimum attempts
-    user_counts = df["user_id"].value_counts()
-    valid_users = user_counts[user_counts >= min_attempts].index
-    df = df[df["user_id"].isin(valid_users)]
-
-    # Fill NaN theta_delta for first attempts
-    df["theta_delta"] = df["theta_delta"].fillna(0)
-
-    # Fill NaN percentages
-    pct_cols = [
-        "clinica_medica_pct",
-        "cirurgia_pct",
-        "gine_pct",
-        "pediatria_pct",
-        "saude_pct",
-    ]
-    for col in pct_cols:
-        df[col] = df[col].fillna(0)
-
-    if output_path:
-        df.to_csv(output_path, index=False)
-        print(f"Exported {len(df)} rows to {output_path}")
-
-    return df
-
-
-def export_irt_item_responses(
-    client: Optional[Client] = None,
-    days_back: int = 365,
-    output_path: Optional[str] = None,
-) -> pd.DataFrame:
-    """
-    Export item response data for IRT parameter estimation.
-
-    Args:
-        client: Supabase client
-        days_back: Only include responses from the last N days
-        output_path: If provided, saves CSV to this path
-
-    Returns:
-        DataFrame with user_id, question_id, correct, response_time_ms
-    """
-    client = client or get_supabase_client()
-    since = (datetime.utcnow() - timedelta(days=days_back)).isoformat()
-
-    # Query exam_attempt_responses (responses are stored with each attempt)
-    # This assumes a join table or denormalized responses exist
-    response = (
-        client.table("exam_attempts")
-        .select("id, user_id, responses, started_at")
-        .gte("started_at", since)
-        .not_.is_("responses", "null")
-        .execute()
-    )
-
-    if not response.data:
-        return pd.DataFrame()
-
-    # Flatten responses JSONB into rows
-    rows = []
-    for attempt in response.data:
-        user_id = attempt["user_id"]
-        responses = attempt.get("responses") or {}
-        for question_id, resp in responses.items():
-            rows.append(
-                {
-                    "user_id": user_id,
-                    "question_id": question_id,
-                    "correct": resp.get("correct", False),
-                    "response_time_ms": resp.get("time_ms"),
-                }
-            )
-
-    df = pd.DataFrame(rows)
-
-    if output_path and not df.empty:
-        df.to_csv(output_path, index=False)
-        print(f"Exported {len(df)} item responses to {output_path}")
-
-    return df
-
-
-def export_knowledge_states(
-    client: Optional[Client] = None,
-    output_path: Optional[str] = None,
-) -> pd.DataFrame:
-    """
-    Export knowledge state data for BKT model training.
-
-    Args:
-        client: Supabase client
-        output_path: If provided, saves CSV to this path
-
-    Returns:
-        DataFrame with user_id, topic, mastery_probability, response_count
-    """
-    client = client or get_supabase_client()
-
-    response = client.table("knowledge_states").select("*").execute()
-    df = pd.DataFrame(response.data) if response.data else pd.DataFrame()
-
-    if output_path and not df.empty:
-        df.to_csv(output_path, index=False)
-        print(f"Exported {len(df)} knowledge states to {output_path}")
-
-    return df
-
-
-def export_flashcard_reviews(
-    client: Optional[Client] = None,
-    days_back: int = 180,
-    output_path: Optional[str] = None,
-) -> pd.DataFrame:
-    """
-    Export flashcard review history for spaced repetition analysis.
-
-    Args:
-        client: Supabase client
-        days_back: Only include reviews from the last N days
-        output_path: If provided, saves CSV to this path
-
-    Returns:
-        DataFrame with review history including quality ratings and intervals
-    """
-    client = client or get_supabase_client()
-    since = (datetime.utcnow() - timedelta(days=days_back)).isoformat()
-
-    response = (
-        client.table("flashcard_reviews")
-        .select(
-            "id, user_id, flashcard_id, quality, reviewed_at, "
-            "ease_factor_before, ease_factor_after, interval_before, interval_after"
-        )
-        .gte("reviewed_at", since)
-        .execute()
-    )
-
-    df = pd.DataFrame(response.data) if response.data else pd.DataFrame()
-
-    if output_path and not df.empty:
-        df.to_csv(output_path, index=False)
-        print(f"Exported {len(df)} flashcard reviews to {output_path}")
-
-    return df
-
-
-def export_all_training_data(output_dir: str = "data/exports") -> dict[str, str]:
-    """
-    Export all training datasets to the specified directory.
-
-    Args:
-        output_dir: Directory to save CSV files
-
-    Returns:
-        Dictionary mapping dataset name to file path
-    """
-    os.makedirs(output_dir, exist_ok=True)
-    timestamp = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
-
-    client = get_supabase_client()
-    exports = {}
-
-    # Pass prediction features
-    path = f"{output_dir}/pass_features_{timestamp}.csv"
-    df = export_pass_prediction_features(client, output_path=path)
-    if not df.empty:
-        exports["pass_prediction"] = path
-
-    # IRT item responses
-    path = f"{output_dir}/irt_responses_{timestamp}.csv"
-    df = export_irt_item_responses(client, output_path=path)
-    if not df.empty:
-        exports["irt_responses"] = path
-
-    # Knowledge states
-    path = f"{output_dir}/knowledge_states_{timestamp}.csv"
-    df = export_knowledge_states(client, output_path=path)
-    if not df.empty:
-        exports["knowledge_states"] = path
-
-    # Flashcard reviews
-    path = f"{output_dir}/flashcard_reviews_{timestamp}.csv"
-    df = export_flashcard_reviews(client, output_path=path)
-    if not df.empty:
-        exports["flashcard_reviews"] = path
-
-    print(f"\nExported {len(exports)} datasets to {output_dir}")
-    return exports
-
-
-if __name__ == "__main__":
-    export_all_training_data()
+"""
+Supabase Data Export Module
+
+Exports training data from Supabase for ML model training.
+Uses the feature engineering views defined in the database migrations.
+"""
+
+from __future__ import annotations
+
+import os
+from datetime import datetime, timedelta
+from itertools import chain
+from typing import TYPE_CHECKING, Any, Callable, Iterator, Optional, Union
+
+import httpx
+import numpy as np
+import pandas as pd
+
+from .columnar import (
+    DEFAULT_FORMAT,
+    EXPORT_FORMATS,
+    ExportWriter,
+    write_chunks,
+    write_frame,
+)
+from .backend import DataBackend, get_backend
+from .cache import ExportCache, resolve_cache
+from .dtypes import FrameCoercer
+from .env import load_env
+from .vocab import Vocabulary
+
+if TYPE_CHECKING:
+    from supabase import Client
+
+# PostgREST's default max-rows; larger pages are silently truncated server-side
+DEFAULT_PAGE_SIZE = 1000
+
+PASS_PCT_COLUMNS = [
+    "clinica_medica_pct",
+    "cirurgia_pct",
+    "gine_pct",
+    "pediatria_pct",
+    "saude_pct",
+]
+
+FLASHCARD_REVIEW_COLUMNS = (
+    "id, user_id, flashcard_id, quality, reviewed_at, "
+    "ease_factor_before, ease_factor_after, interval_before, interval_after"
+)
+
+STUDY_ACTIVITY_COLUMNS = "id, user_id, knowledge_component, correct, created_at"
+
+
+def get_supabase_client() -> Client:
+    """Create an authenticated Supabase client using service role key."""
+    from supabase import create_client
+
+    load_env()
+    url = os.environ.get("SUPABASE_URL")
+    key = os.environ.get("SUPABASE_SERVICE_ROLE_KEY")
+    if not url or not key:
+        raise ValueError(
+            "SUPABASE_URL and SUPABASE_SERVICE_ROLE_KEY must be set in environment"
+        )
+    return create_client(url, key)
+
+
+def _quote(value: Any) -> str:
+    """Quote a value for use inside a PostgREST logic tree (or=/and=)."""
+    return '"' + str(value).replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+def iter_keyset_pages(
+    client: DataBackend,
+    table: str,
+    columns: str = "*",
+    cursor_column: str = "id",
+    page_size: int = DEFAULT_PAGE_SIZE,
+    since: Optional[str] = None,
+    apply_filters=None,
+    after: Optional[tuple[Any, Any]] = None,
+    until: Optional[str] = None,
+    rpc_params: Optional[dict] = None,
+    id_column: str = "id",
+) -> Iterator[list[dict]]:
+    """
+    Page through a table ordered by (cursor_column, id) using keyset pagination.
+
+    Unlike a single .execute(), this is not capped by PostgREST's max-rows
+    setting and never holds more than one page in memory. Offsets are avoided
+    so pages stay O(page_size) regardless of how deep the scan goes.
+
+    Args:
+        client: Data backend (Supabase client, RestClient or LocalBackend)
+        table: Table or view name
+        columns: Column list for select(); must include cursor_column and id
+        cursor_column: Monotonic column to page by (timestamp or id)
+        page_size: Rows per request (keep <= the server's max-rows)
+        since: If provided, only rows with cursor_column >= since
+        apply_filters: Optional callable(query) -> query adding extra filters
+        after: Resume strictly after this (cursor value, id) position
+        until: If provided, only rows with cursor_column < until
+        rpc_params: If provided, `table` names a set-returning RPC that is
+            called with these arguments and paged like a table
+        id_column: Unique tiebreak column (the cursor itself if they match)
+
+    Yields:
+        Lists of row dicts, in (cursor_column, id) order
+    """
+    last = after
+
+    while True:
+        if rpc_params is not None:
+            query = client.rpc(table, rpc_params).select(columns)
+        else:
+            query = client.table(table).select(columns)
+        if since is not None:
+            query = query.gte(cursor_column, since)
+        if until is not None:
+            query = query.lt(cursor_column, until)
+        if apply_filters is not None:
+            query = apply_filters(query)
+
+        if last is not None:
+            last_cursor, last_id = last
+            if cursor_column == id_column:
+                query = query.gt(id_column, last_id)
+            elif last_cursor is None:
+                # NULL cursors sort last; only the id tiebreak remains
+                query = query.is_(cursor_column, "null").gt(id_column, last_id)
+            else:
+                query = query.or_(
+                    f"{cursor_column}.gt.{_quote(last_cursor)},"
+                    f"{cursor_column}.is.null,"
+                    f"and({cursor_column}.eq.{_quote(last_cursor)},"
+                    f"{id_column}.gt.{_quote(last_id)})"
+                )
+
+        query = query.order(cursor_column, nullsfirst=False)
+        if cursor_column != id_column:
+            query = query.order(id_column)
+        rows = query.limit(page_size).execute().data or []
+
+        if not rows:
+            return
+        yield rows
+        if len(rows) < page_size:
+            return
+
+        last = (rows[-1].get(cursor_column), rows[-1][id_column])
+
+
+def _concat(frames: list[pd.DataFrame]) -> pd.DataFrame:
+    """
+    Concatenate chunks, keeping Categorical columns categorical.
+
+    Chunks encoded with a shared Vocabulary have prefix-extended categories,
+    so the last chunk's categories are valid for every earlier chunk's codes.
+    """
+    if len(frames) == 1:
+        return frames[0]
+
+    last = frames[-1]
+    categorical = [
+        column
+        for column in last.columns
+        if isinstance(last[column].dtype, pd.CategoricalDtype)
+    ]
+    df = pd.concat([f.drop(columns=categorical) for f in frames], ignore_index=True)
+    for column in categorical:
+        codes = np.concatenate([f[column].cat.codes.to_numpy() for f in frames])
+        df[column] = pd.Categorical.from_codes(
+            codes, categories=last[column].cat.categories
+        )
+    return df[last.columns]
+
+
+def _collect(chunks: Iterator[pd.DataFrame]) -> pd.DataFrame:
+    """Concatenate streamed chunks into a single DataFrame."""
+    frames = [chunk for chunk in chunks if not chunk.empty]
+    if not frames:
+        return pd.DataFrame()
+    return _concat(frames)
+
+
+def _rechunk(chunks: Iterator[pd.DataFrame], chunksize: int) -> Iterator[pd.DataFrame]:
+    """Regroup a stream of frames into frames of at most chunksize rows."""
+    buffer: list[pd.DataFrame] = []
+    buffered = 0
+    for chunk in chunks:
+        if chunk.empty:
+            continue
+        buffer.append(chunk)
+        buffered += len(chunk)
+        while buffered >= chunksize:
+            merged = _concat(buffer)
+            yield merged.iloc[:chunksize].reset_index(drop=True)
+            rest = merged.iloc[chunksize:].reset_index(drop=True)
+            buffer = [rest] if not rest.empty else []
+            buffered = len(rest)
+    if buffered:
+        yield _concat(buffer)
+
+
+def _stream_to_file(
+    chunks: Iterator[pd.DataFrame], output_path: str, dataset: str
+) -> Iterator[pd.DataFrame]:
+    """Write each chunk to output_path as it passes through."""
+    with ExportWriter(output_path, dataset) as writer:
+        for chunk in chunks:
+            writer.write(chunk)
+            yield chunk
+
+
+def source_watermark(
+    client: DataBackend, table: str, cursor_column: str, id_column: str = "id"
+) -> Optional[list]:
+    """Newest (cursor, id) position in a table, used to key the export cache."""
+    rows = (
+        client.table(table)
+        .select(f"{cursor_column},{id_column}")
+        .order(cursor_column, desc=True, nullsfirst=False)
+        .order(id_column, desc=True)
+        .limit(1)
+        .execute()
+        .data
+    )
+    return [rows[0][cursor_column], rows[0][id_column]] if rows else None
+
+
+CacheLoader = Callable[[Callable[[], pd.DataFrame]], pd.DataFrame]
+
+
+def _export_cache(
+    cache: Union[ExportCache, bool, None],
+    client: DataBackend,
+    dataset: str,
+    params: dict[str, Any],
+    source: tuple[str, str],
+) -> Optional[CacheLoader]:
+    """
+    Wrap a full-frame load in the export cache, if one is configured.
+
+    The watermark of the source table is only queried when the wrapper runs,
+    so streamed (chunksize=) exports never pay for it.
+    """
+    export_cache = resolve_cache(cache)
+    if export_cache is None:
+        return None
+
+    def cached(load: Callable[[], pd.DataFrame]) -> pd.DataFrame:
+        watermark = source_watermark(client, *source)
+        return export_cache.get_or_load(dataset, params, watermark, load)
+
+    return cached
+
+
+def _finish_export(
+    chunks: Iterator[pd.DataFrame],
+    output_path: Optional[str],
+    chunksize: Optional[int],
+    dataset: str,
+    label: str,
+    cached: Optional[CacheLoader] = None,
+) -> Union[pd.DataFrame, Iterator[pd.DataFrame]]:
+    """Shared tail of the export_* functions: coerce, stream or collect, save."""
+    coercer = FrameCoercer(dataset)
+    chunks = map(coercer, chunks)
+    if chunksize is not None:
+        chunks = _rechunk(chunks, chunksize)
+        return _stream_to_file(chunks, output_path, dataset) if output_path else chunks
+
+    df = cached(lambda: _collect(chunks)) if cached else _collect(chunks)
+    if coercer.report.rows:
+        print(f"Compacted {label}: {coercer.report}")
+
+    if output_path and not df.empty:
+        write_frame(df, output_path, dataset)
+        print(f"Exported {len(df)} {label} to {output_path}")
+
+    return df
+
+
+def _legacy_pass_prediction_features(
+    client: DataBackend,
+    min_attempts: int,
+    columns: Optional[list[str]],
+) -> pd.DataFrame:
+    """Download the full feature view and filter/fill it in pandas."""
+    response = client.rpc("get_pass_prediction_features", {}).execute()
+    if not response.data:
+        # Fallback: query the view directly
+        response = client.table("ml_pass_prediction_features").select("*").execute()
+
+    df = pd.DataFrame(response.data)
+
+    if df.empty:
+        return df
+
+    # Filter users with minimum attempts
+    user_counts = df["user_id"].value_counts()
+    valid_users = user_counts[user_counts >= min_attempts].index
+    df = df[df["user_id"].isin(valid_users)]
+
+    # Fill NaN theta_delta for first attempts
+    df["theta_delta"] = df["theta_delta"].fillna(0)
+
+    # Fill NaN percentages
+    for col in PASS_PCT_COLUMNS:
+        df[col] = df[col].fillna(0)
+
+    if columns is not None:
+        df = df[columns]
+    return df
+
+
+def _fetch_pass_prediction_features(
+    client: DataBackend,
+    min_attempts: int,
+    columns: Optional[list[str]],
+    server_side: bool,
+    page_size: int,
+) -> pd.DataFrame:
+    from postgrest.exceptions import APIError
+
+    if server_side:
+        select = "*"
+        if columns is not None:
+            # attempt_id is the paging cursor and must always be selected
+            select = ",".join(dict.fromkeys(["attempt_id", *columns]))
+        try:
+            pages = iter_keyset_pages(
+                client,
+                "get_pass_prediction_training_rows",
+                columns=select,
+                cursor_column="attempt_id",
+                id_column="attempt_id",
+                page_size=page_size,
+                rpc_params={"p_min_attempts": min_attempts},
+            )
+            df = pd.DataFrame([row for page in pages for row in page])
+        except (APIError, httpx.HTTPStatusError) as err:
+            print(f"Server-side pass features unavailable ({err}); filtering locally")
+        else:
+            if columns is not None and not df.empty:
+                df = df[columns]
+            return df
+
+    return _legacy_pass_prediction_features(client, min_attempts, columns)
+
+
+def export_pass_prediction_features(
+    client: Optional[DataBackend] = None,
+    min_attempts: int = 3,
+    output_path: Optional[str] = None,
+    columns: Optional[list[str]] = None,
+    server_side: bool = True,
+    page_size: int = DEFAULT_PAGE_SIZE,
+    cache: Union[ExportCache, bool, None] = None,
+) -> pd.DataFrame:
+    """
+    Export pass prediction features from the ml_pass_prediction_features view.
+
+    By default the min_attempts filter, NaN defaults and column projection
+    run in the get_pass_prediction_training_rows RPC (migration 023), so
+    only training-ready rows cross the wire, paged by attempt_id. If that
+    RPC is not deployed, falls back to the client-side path.
+
+    Args:
+        client: Data backend (get_backend() if not provided)
+        min_attempts: Minimum attempts per user to include (filters sparse data)
+        output_path: If provided, saves to this path (.parquet, .arrow or .csv)
+        columns: Subset of feature columns to return (default: all)
+        server_side: Set False to force the legacy client-side filtering
+        page_size: Rows fetched per request on the server-side path
+        cache: ExportCache to serve repeated calls from (see resolve_cache)
+
+    Returns:
+        DataFrame with features for pass prediction model
+    """
+    client = client or get_backend()
+
+    def load() -> pd.DataFrame:
+        coercer = FrameCoercer("pass_prediction")
+        df = coercer(
+            _fetch_pass_prediction_features(
+                client, min_attempts, columns, server_side, page_size
+            )
+        )
+        if coercer.report.rows:
+            print(f"Compacted pass features: {coercer.report}")
+        return df
+
+    params = {
+        "min_attempts": min_attempts,
+        "columns": columns,
+        "server_side": server_side,
+    }
+    cached = _export_cache(
+        cache, client, "pass_prediction", params, ("exam_attempts", "completed_at")
+    )
+    df = cached(load) if cached else load()
+
+    if df.empty:
+        return df
+
+    if output_path:
+        write_frame(df, output_path, "pass_prediction")
+        print(f"Exported {len(df)} rows to {output_path}")
+
+    return df
+
+
+def flatten_attempt_responses(
+    attempts: list[dict],
+    users: Optional[Vocabulary] = None,
+    questions: Optional[Vocabulary] = None,
+    include_attempt_id: bool = False,
+) -> pd.DataFrame:
+    """
+    Flatten the responses JSONB of a page of attempts into item rows.
+
+    Builds the output columns directly as arrays (no per-response dicts).
+    user_id and question_id come back as Categoricals whose codes are the
+    users/questions vocabulary codes, so passing the same vocabularies for
+    every page yields frames that share one code space.
+
+    Args:
+        attempts: Rows with id, user_id and the responses JSONB
+        users: Vocabulary to encode user IDs with (extended in place)
+        questions: Vocabulary to encode question IDs with (extended in place)
+        include_attempt_id: Also emit the source attempt_id per row
+
+    Returns:
+        DataFrame with user_id, question_id, correct (int8) and
+        response_time_ms (nullable Int32)
+    """
+    users = users if users is not None else Vocabulary()
+    questions = questions if questions is not None else Vocabulary()
+
+    responses = [attempt.get("responses") or {} for attempt in attempts]
+    counts = np.fromiter(map(len, responses), dtype=np.int64, count=len(responses))
+    n = int(counts.sum())
+
+    question_ids = np.fromiter(chain.from_iterable(responses), dtype=object, count=n)
+    entries = list(chain.from_iterable(r.values() for r in responses))
+    correct = np.fromiter(
+        (bool(e.get("correct", False)) for e in entries), dtype=np.int8, count=n
+    )
+    times = np.fromiter((e.get("time_ms") for e in entries), dtype=object, count=n)
+    time_missing = pd.isna(times)
+    time_ms = np.where(time_missing, 0, times).astype(np.int32)
+
+    user_ids = np.array([attempt["user_id"] for attempt in attempts], dtype=object)
+    data = {
+        "user_id": users.categorical(np.repeat(users.encode(user_ids), counts)),
+        "question_id": questions.categorical(questions.encode(question_ids)),
+        "correct": correct,
+        "response_time_ms": pd.arrays.IntegerArray(time_ms, time_missing),
+    }
+    if include_attempt_id:
+        attempt_ids = np.array([attempt["id"] for attempt in attempts], dtype=object)
+        data["attempt_id"] = np.repeat(attempt_ids, counts)
+    return pd.DataFrame(data)
+
+
+def iter_irt_item_responses(
+    client: Optional[DataBackend] = None,
+    days_back: int = 365,
+    page_size: int = DEFAULT_PAGE_SIZE,
+    users: Optional[Vocabulary] = None,
+    questions: Optional[Vocabulary] = None,
+) -> Iterator[pd.DataFrame]:
+    """
+    Stream item responses for IRT estimation, one page of attempts at a time.
+
+    Args:
+        client: Data backend (get_backend() if not provided)
+        days_back: Only include responses from the last N days
+        page_size: Attempts fetched per request
+        users: Shared user vocabulary (a fresh one is used if omitted)
+        questions: Shared question vocabulary (a fresh one is used if omitted)
+
+    Yields:
+        DataFrames with user_id, question_id, correct, response_time_ms
+    """
+    client = client or get_backend()
+    since = (datetime.utcnow() - timedelta(days=days_back)).isoformat()
+
+    # Query exam_attempt_responses (responses are stored with each attempt)
+    # This assumes a join table or denormalized responses exist
+    pages = iter_keyset_pages(
+        client,
+        "exam_attempts",
+        columns="id, user_id, responses, started_at",
+        cursor_column="started_at",
+        page_size=page_size,
+        since=since,
+        apply_filters=lambda q: q.not_.is_("responses", "null"),
+    )
+    users = users if users is not None else Vocabulary()
+    questions = questions if questions is not None else Vocabulary()
+    for attempts in pages:
+        yield flatten_attempt_responses(attempts, users, questions)
+
+
+def export_irt_item_responses(
+    client: Optional[DataBackend] = None,
+    days_back: int = 365,
+    output_path: Optional[str] = None,
+    page_size: int = DEFAULT_PAGE_SIZE,
+    chunksize: Optional[int] = None,
+    users: Optional[Vocabulary] = None,
+    questions: Optional[Vocabulary] = None,
+    cache: Union[ExportCache, bool, None] = None,
+) -> Union[pd.DataFrame, Iterator[pd.DataFrame]]:
+    """
+    Export item response data for IRT parameter estimation.
+
+    user_id and question_id are Categoricals over the users/questions
+    vocabularies, so df["user_id"].cat.codes and df["question_id"].cat.codes
+    index straight into a persons x items matrix.
+
+    Args:
+        client: Data backend (get_backend() if not provided)
+        days_back: Only include responses from the last N days
+        output_path: If provided, saves to this path (.parquet, .arrow or .csv)
+        page_size: Attempts fetched per request
+        chunksize: If provided, return an iterator of DataFrames instead of
+            one frame (written to output_path as they are consumed)
+        users: Shared user vocabulary (a fresh one is used if omitted)
+        questions: Shared question vocabulary (a fresh one is used if omitted)
+        cache: ExportCache to serve repeated calls from (see resolve_cache)
+
+    Returns:
+        DataFrame with user_id, question_id, correct, response_time_ms
+    """
+    client = client or get_backend()
+    chunks = iter_irt_item_responses(client, days_back, page_size, users, questions)
+    cached = _export_cache(
+        cache,
+        client,
+        "irt_responses",
+        {"days_back": days_back},
+        # Responses are written when an attempt completes, possibly after
+        # later attempts started
+        ("exam_attempts", "completed_at"),
+    )
+    df = _finish_export(
+        chunks, output_path, chunksize, "irt_responses", "item responses", cached
+    )
+    if chunksize is None and cached and not df.empty:
+        # A cache hit carries its own categories; re-express them in the
+        # caller's vocabularies so codes stay comparable across exports
+        for column, vocab in (("user_id", users), ("question_id", questions)):
+            if vocab is not None:
+                df[column] = vocab.categorical(vocab.encode(df[column]))
+    return df
+
+
+def iter_knowledge_states(
+    client: Optional[DataBackend] = None,
+    page_size: int = DEFAULT_PAGE_SIZE,
+) -> Iterator[pd.DataFrame]:
+    """
+    Stream knowledge states for BKT training in pages ordered by updated_at.
+
+    Args:
+        client: Data backend (get_backend() if not provided)
+        page_size: Rows fetched per request
+
+    Yields:
+        DataFrames with user_id, topic, mastery_probability, response_count
+    """
+    client = client or get_backend()
+
+    pages = iter_keyset_pages(
+        client,
+        "knowledge_states",
+        cursor_column="updated_at",
+        page_size=page_size,
+    )
+    for rows in pages:
+        yield pd.DataFrame(rows)
+
+
+def export_knowledge_states(
+    client: Optional[DataBackend] = None,
+    output_path: Optional[str] = None,
+    page_size: int = DEFAULT_PAGE_SIZE,
+    chunksize: Optional[int] = None,
+    cache: Union[ExportCache, bool, None] = None,
+) -> Union[pd.DataFrame, Iterator[pd.DataFrame]]:
+    """
+    Export knowledge state data for BKT model training.
+
+    Args:
+        client: Data backend (get_backend() if not provided)
+        output_path: If provided, saves to this path (.parquet, .arrow or .csv)
+        page_size: Rows fetched per request
+        chunksize: If provided, return an iterator of DataFrames instead of
+            one frame (written to output_path as they are consumed)
+        cache: ExportCache to serve repeated calls from (see resolve_cache)
+
+    Returns:
+        DataFrame with user_id, topic, mastery_probability, response_count
+    """
+    client = client or get_backend()
+    chunks = iter_knowledge_states(client, page_size)
+    cached = _export_cache(
+        cache, client, "knowledge_states", {}, ("knowledge_states", "updated_at")
+    )
+    return _finish_export(
+        chunks, output_path, chunksize, "knowledge_states", "knowledge states", cached
+    )
+
+
+def iter_flashcard_reviews(
+    client: Optional[DataBackend] = None,
+    days_back: int = 180,
+    page_size: int = DEFAULT_PAGE_SIZE,
+) -> Iterator[pd.DataFrame]:
+    """
+    Stream flashcard review history in pages ordered by reviewed_at.
+
+    Args:
+        client: Data backend (get_backend() if not provided)
+        days_back: Only include reviews from the last N days
+        page_size: Rows fetched per request
+
+    Yields:
+        DataFrames with review history including quality ratings and intervals
+    """
+    client = client or get_backend()
+    since = (datetime.utcnow() - timedelta(days=days_back)).isoformat()
+
+    pages = iter_keyset_pages(
+        client,
+        "flashcard_reviews",
+        columns=FLASHCARD_REVIEW_COLUMNS,
+        cursor_column="reviewed_at",
+        page_size=page_size,
+        since=since,
+    )
+    for rows in pages:
+        yield pd.DataFrame(rows)
+
+
+def export_flashcard_reviews(
+    client: Optional[DataBackend] = None,
+    days_back: int = 180,
+    output_path: Optional[str] = None,
+    page_size: int = DEFAULT_PAGE_SIZE,
+    chunksize: Optional[int] = None,
+    cache: Union[ExportCache, bool, None] = None,
+) -> Union[pd.DataFrame, Iterator[pd.DataFrame]]:
+    """
+    Export flashcard review history for spaced repetition analysis.
+
+    Args:
+        client: Data backend (get_backend() if not provided)
+        days_back: Only include reviews from the last N days
+        output_path: If provided, saves to this path (.parquet, .arrow or .csv)
+        page_size: Rows fetched per request
+        chunksize: If provided, return an iterator of DataFrames instead of
+            one frame (written to output_path as they are consumed)
+        cache: ExportCache to serve repeated calls from (see resolve_cache)
+
+    Returns:
+        DataFrame with review history including quality ratings and intervals
+    """
+    client = client or get_backend()
+    chunks = iter_flashcard_reviews(client, days_back, page_size)
+    cached = _export_cache(
+        cache,
+        client,
+        "flashcard_reviews",
+        {"days_back": days_back},
+        ("flashcard_reviews", "reviewed_at"),
+    )
+    return _finish_export(
+        chunks, output_path, chunksize, "flashcard_reviews", "flashcard reviews", cached
+    )
+
+
+def iter_study_activity(
+    client: Optional[DataBackend] = None,
+    days_back: int = 365,
+    page_size: int = DEFAULT_PAGE_SIZE,
+) -> Iterator[pd.DataFrame]:
+    """
+    Stream knowledge-component practice in pages ordered by created_at.
+
+    Args:
+        client: Data backend (get_backend() if not provided)
+        days_back: Only include activity from the last N days
+        page_size: Rows fetched per request
+
+    Yields:
+        DataFrames with user_id, knowledge_component, correct, created_at
+    """
+    client = client or get_backend()
+    since = (datetime.utcnow() - timedelta(days=days_back)).isoformat()
+
+    pages = iter_keyset_pages(
+        client,
+        "study_activity_log",
+        columns=STUDY_ACTIVITY_COLUMNS,
+        cursor_column="created_at",
+        page_size=page_size,
+        since=since,
+        apply_filters=lambda q: q.not_.is_("knowledge_component", "null"),
+    )
+    for rows in pages:
+        yield pd.DataFrame(rows)
+
+
+def export_study_activity(
+    client: Optional[DataBackend] = None,
+    days_back: int = 365,
+    output_path: Optional[str] = None,
+    page_size: int = DEFAULT_PAGE_SIZE,
+    chunksize: Optional[int] = None,
+    cache: Union[ExportCache, bool, None] = None,
+) -> Union[pd.DataFrame, Iterator[pd.DataFrame]]:
+    """
+    Export knowledge-component observations for BKT training (the rows the
+    web app's BKT mastery route traces).
+
+    Args:
+        client: Data backend (get_backend() if not provided)
+        days_back: Only include activity from the last N days
+        output_path: If provided, saves to this path (.parquet, .arrow or .csv)
+        page_size: Rows fetched per request
+        chunksize: If provided, return an iterator of DataFrames instead of
+            one frame (written to output_path as they are consumed)
+        cache: ExportCache to serve repeated calls from (see resolve_cache)
+
+    Returns:
+        DataFrame with user_id, knowledge_component, correct, created_at
+    """
+    client = client or get_backend()
+    chunks = iter_study_activity(client, days_back, page_size)
+    cached = _export_cache(
+        cache,
+        client,
+        "study_activity",
+        {"days_back": days_back},
+        ("study_activity_log", "created_at"),
+    )
+    return _finish_export(
+        chunks, output_path, chunksize, "study_activity", "study activity", cached
+    )
+
+
+def export_all_training_data(
+    output_dir: str = "data/exports",
+    format: str = DEFAULT_FORMAT,
+    incremental: bool = False,
+    compact: bool = False,
+) -> dict[str, str]:
+    """
+    Export all training datasets to the specified directory.
+
+    Args:
+        output_dir: Directory to save export files
+        format: "parquet" (default), "arrow" (Arrow IPC) or "csv"
+        incremental: Append only rows past each table's watermark to the
+            local datasets under output_dir (see darwin_ml.data.incremental)
+        compact: With incremental, merge each dataset's partitions afterwards
+
+    Returns:
+        Dictionary mapping dataset name to file path
+    """
+    if format not in EXPORT_FORMATS:
+        raise ValueError(f"format must be one of {sorted(EXPORT_FORMATS)}")
+    ext = EXPORT_FORMATS[format]
+
+    os.makedirs(output_dir, exist_ok=True)
+    timestamp = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
+
+    client = get_backend()
+    exports = {}
+
+    # Pass prediction features
+    path = f"{output_dir}/pass_features_{timestamp}{ext}"
+    df = export_pass_prediction_features(client, output_path=path)
+    if not df.empty:
+        exports["pass_prediction"] = path
+
+    if incremental:
+        from .incremental import export_all_incremental
+
+        exports.update(export_all_incremental(client, output_dir, format, compact))
+        print(f"\nExported {len(exports)} datasets to {output_dir}")
+        return exports
+
+    # Streamed exports are written page by page so memory stays constant
+    streamed = [
+        ("irt_responses", export_irt_item_responses),
+        ("knowledge_states", export_knowledge_states),
+        ("flashcard_reviews", export_flashcard_reviews),
+    ]
+    for name, export_fn in streamed:
+        path = f"{output_dir}/{name}_{timestamp}{ext}"
+        chunks = export_fn(client, chunksize=DEFAULT_PAGE_SIZE)
+        count = write_chunks(chunks, path, dataset=name)
+        if count:
+            print(f"Exported {count} rows to {path}")
+            exports[name] = path
+
+    print(f"\nExported {len(exports)} datasets to {output_dir}")
+    return exports
+
+
+if __name__ == "__main__":
+    export_all_training_data()
@@ -0,0 +1,408 @@
+"""
+Synthetic Training Data
+
+Generates exam_attempts, flashcard_reviews and knowledge_states (plus the
+profiles the pass-prediction view joins) with plausible structure: latent
+user abilities drive 3PL item responses, exam scores and pass labels,
+flashcard recall and topic mastery. Output is deterministic for a given
+SyntheticSpec and end time, so export throughput can be benchmarked
+reproducibly against a LocalBackend.
+
+Usage:
+    python -m darwin_ml.data.synthetic --rows 1000000 --db data/synthetic.sqlite --bench
+"""
+
+import argparse
+import json
+import math
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from .local_backend import LocalBackend
+
+AREAS = (
+    "clinica_medica",
+    "cirurgia",
+    "ginecologia_obstetricia",
+    "pediatria",
+    "saude_coletiva",
+)
+
+# Keyset cursors of the exporters, indexed so paging stays O(page)
+CURSOR_INDEXES: dict[str, list[tuple[str, ...]]] = {
+    "exam_attempts": [("started_at", "id"), ("completed_at", "id")],
+    "flashcard_reviews": [("reviewed_at", "id")],
+    "knowledge_states": [("updated_at", "id")],
+    "profiles": [("id",)],
+}
+
+
+@dataclass(frozen=True)
+class SyntheticSpec:
+    """
+    Sizes of the generated tables.
+
+    exam_attempts holds n_attempts rows of questions_per_attempt responses
+    each, so the flattened IRT export has n_attempts * questions_per_attempt
+    rows.
+    """
+
+    n_users: int = 500
+    n_questions: int = 400
+    questions_per_attempt: int = 50
+    n_attempts: int = 2_000
+    n_flashcards: int = 1_000
+    n_reviews: int = 20_000
+    n_topics: int = 40
+    days: int = 180
+    incomplete_rate: float = 0.05
+    seed: int = 0
+
+    @classmethod
+    def for_rows(cls, rows: int, seed: int = 0) -> "SyntheticSpec":
+        """Size each exported dataset at roughly `rows` rows (10k to 10M)."""
+        n_users = max(50, rows // 200)
+        questions_per_attempt = 50
+        return cls(
+            n_users=n_users,
+            n_questions=int(min(5_000, max(200, rows // 100))),
+            questions_per_attempt=questions_per_attempt,
+            n_attempts=max(1, rows // questions_per_attempt),
+            n_flashcards=int(min(100_000, max(500, rows // 20))),
+            n_reviews=rows,
+            n_topics=max(1, rows // n_users),
+            seed=seed,
+        )
+
+
+def _uuids(rng: np.random.Generator, n: int) -> np.ndarray:
+    """Random version-4-style UUID strings."""
+    digits = rng.bytes(16 * n).hex()
+    return np.array(
+        [
+            f"{digits[i:i + 8]}-{digits[i + 8:i + 12]}-4{digits[i + 13:i + 16]}-"
+            f"a{digits[i + 17:i + 20]}-{digits[i + 20:i + 32]}"
+            for i in range(0, 32 * n, 32)
+        ],
+        dtype=object,
+    )
+
+
+def _timestamps(
+    rng: np.random.Generator, n: int, end: pd.Timestamp, days: int
+) -> pd.DatetimeIndex:
+    offsets = rng.uniform(0, days * 86_400, size=n)
+    return end - pd.to_timedelta(np.round(offsets * 1e6).astype(np.int64), unit="us")
+
+
+def _sigmoid(x: np.ndarray) -> np.ndarray:
+    return 1.0 / (1.0 + np.exp(-x))
+
+
+def generate_profiles(
+    spec: SyntheticSpec, rng: np.random.Generator
+) -> tuple[pd.DataFrame, np.ndarray]:
+    """Profiles plus each user's latent ability (theta)."""
+    theta = rng.normal(0.0, 1.0, size=spec.n_users)
+    profiles = pd.DataFrame(
+        {
+            "id": _uuids(rng, spec.n_users),
+            "streak_days": rng.poisson(np.exp(1.5 + 0.3 * theta)).astype(np.int32),
+            "xp": np.round(rng.gamma(2.0, 800.0, size=spec.n_users)).astype(np.int32),
+        }
+    )
+    return profiles, theta
+
+
+def generate_exam_attempts(
+    spec: SyntheticSpec,
+    rng: np.random.Generator,
+    user_ids: np.ndarray,
+    theta: np.ndarray,
+    end: pd.Timestamp,
+) -> pd.DataFrame:
+    """
+    Exam attempts with 3PL item responses in the exporters' JSON layout.
+
+    responses is JSON text ({question_id: {"correct", "time_ms"}}) and is
+    null, like the scores, for attempts that were never completed.
+    """
+    n, k = spec.n_attempts, min(spec.questions_per_attempt, spec.n_questions)
+    question_ids = _uuids(rng, spec.n_questions)
+    area = rng.integers(0, len(AREAS), size=spec.n_questions)
+    a = rng.lognormal(0.0, 0.3, size=spec.n_questions)
+    b = rng.normal(0.0, 1.0, size=spec.n_questions)
+    c = np.full(spec.n_questions, 0.2)
+
+    # Attempts sit fixed exams drawn from the bank, like the app's simulados
+    n_exams = max(1, math.ceil(4 * spec.n_questions / k))
+    exams = np.stack(
+        [rng.choice(spec.n_questions, size=k, replace=False) for _ in range(n_exams)]
+    )
+    exam_ids = _uuids(rng, n_exams)
+
+    user = rng.integers(0, spec.n_users, size=n)
+    exam = rng.integers(0, n_exams, size=n)
+    items = exams[exam]
+    ability = theta[user][:, None]
+    p = c[items] + (1 - c[items]) * _sigmoid(1.7 * a[items] * (ability - b[items]))
+    correct = rng.random((n, k)) < p
+    time_ms = np.round(rng.lognormal(np.log(60_000), 0.5, size=(n, k))).astype(np.int64)
+
+    started_at = _timestamps(rng, n, end, spec.days)
+    duration = pd.to_timedelta(time_ms.sum(axis=1), unit="ms")
+    completed = rng.random(n) >= spec.incomplete_rate
+
+    # Per-area breakdown of each attempt
+    area_items = area[items]
+    area_total = np.zeros((n, len(AREAS)), dtype=np.int64)
+    area_correct = np.zeros((n, len(AREAS)), dtype=np.int64)
+    rows = np.repeat(np.arange(n), k)
+    np.add.at(area_total, (rows, area_items.ravel()), 1)
+    np.add.at(area_correct, (rows, area_items.ravel()), correct.ravel())
+
+    theta_hat = theta[user] + rng.normal(0.0, 0.3, size=n)
+    scaled = np.clip(np.round(500 + 100 * theta_hat), 0, 1000).astype(np.int64)
+
+    responses, breakdown = [], []
+    flags = np.where(correct, "true", "false")
+    for i in range(n):
+        if not completed[i]:
+            responses.append(None)
+            breakdown.append(None)
+            continue
+        ids, flag, ms = question_ids[items[i]], flags[i], time_ms[i]
+        responses.append(
+            "{"
+            + ",".join(
+                f'"{ids[j]}":{{"correct":{flag[j]},"time_ms":{ms[j]}}}'
+                for j in range(k)
+            )
+            + "}"
+        )
+        breakdown.append(
+            json.dumps(
+                {
+                    name: {
+                        "correct": int(area_correct[i, j]),
+                        "total": int(area_total[i, j]),
+                        "percentage": (
+                            round(100 * area_correct[i, j] / area_total[i, j], 1)
+                            if area_total[i, j]
+                            else 0.0
+                        ),
+                    }
+                    for j, name in enumerate(AREAS)
+                }
+            )
+        )
+
+    df = pd.DataFrame(
+        {
+            "id": _uuids(rng, n),
+            "exam_id": exam_ids[exam],
+            "user_id": user_ids[user],
+            "responses": responses,
+            "theta": np.round(theta_hat, 3),
+            "standard_error": np.round(rng.uniform(0.25, 0.4, size=n), 3),
+            "scaled_score": scaled,
+            "passed": scaled >= 600,
+            "correct_count": correct.sum(axis=1),
+            "area_breakdown": breakdown,
+            "started_at": started_at,
+            "completed_at": (started_at + duration).where(completed),
+        }
+    )
+    for column in ("theta", "standard_error", "scaled_score", "correct_count"):
+        df[column] = df[column].where(completed)
+    df["scaled_score"] = df["scaled_score"].astype("Int64")
+    df["correct_count"] = df["correct_count"].astype("Int64")
+    df["passed"] = df["passed"].astype("boolean").where(completed)
+    return df
+
+
+def generate_flashcard_reviews(
+    spec: SyntheticSpec,
+    rng: np.random.Generator,
+    user_ids: np.ndarray,
+    theta: np.ndarray,
+    end: pd.Timestamp,
+) -> pd.DataFrame:
+    """SM-2 reviews whose recall depends on user ability and card difficulty."""
+    n = spec.n_reviews
+    card_ids = _uuids(rng, spec.n_flashcards)
+    difficulty = rng.normal(0.0, 1.0, size=spec.n_flashcards)
+
+    user = rng.integers(0, spec.n_users, size=n)
+    card = rng.integers(0, spec.n_flashcards, size=n)
+    interval_before = rng.integers(0, 60, size=n)
+    # Longer gaps since the last review make recall less likely
+    logit = 1.0 + theta[user] - difficulty[card] - 0.03 * interval_before
+    recalled = rng.random(n) < _sigmoid(logit)
+    quality = np.where(recalled, rng.integers(3, 6, size=n), rng.integers(0, 3, size=n))
+
+    ease_before = np.clip(rng.normal(2.5, 0.2, size=n), 1.3, 3.0)
+    lapse = 5 - quality
+    ease_after = np.maximum(1.3, ease_before + 0.1 - lapse * (0.08 + lapse * 0.02))
+    interval_after = np.where(
+        quality >= 3, np.round(np.maximum(interval_before, 1) * ease_after), 1
+    )
+
+    return pd.DataFrame(
+        {
+            "id": _uuids(rng, n),
+            "user_id": user_ids[user],
+            "flashcard_id": card_ids[card],
+            "quality": quality.astype(np.int16),
+            "reviewed_at": _timestamps(rng, n, end, spec.days),
+            "ease_factor_before": np.round(ease_before, 2),
+            "ease_factor_after": np.round(ease_after, 2),
+            "interval_before": interval_before.astype(np.int32),
+            "interval_after": interval_after.astype(np.int32),
+        }
+    )
+
+
+def generate_knowledge_states(
+    spec: SyntheticSpec,
+    rng: np.random.Generator,
+    user_ids: np.ndarray,
+    theta: np.ndarray,
+    end: pd.Timestamp,
+) -> pd.DataFrame:
+    """One BKT state per sampled (user, topic) pair."""
+    pairs = rng.permutation(spec.n_users * spec.n_topics)
+    user, topic = np.divmod(pairs, spec.n_topics)
+    n = len(pairs)
+    topic_names = np.array(
+        [f"topic-{t:04d}" for t in range(spec.n_topics)], dtype=object
+    )
+
+    response_count = rng.poisson(20, size=n).astype(np.int32)
+    mastery = _sigmoid(theta[user] + rng.normal(0.0, 1.0, size=n))
+    updated_at = _timestamps(rng, n, end, spec.days)
+    since_correct = pd.to_timedelta(rng.exponential(3, size=n), unit="D")
+    since_incorrect = pd.to_timedelta(rng.exponential(3, size=n), unit="D")
+
+    return pd.DataFrame(
+        {
+            "id": _uuids(rng, n),
+            "user_id": user_ids[user],
+            "topic": topic_names[topic],
+            "mastery_probability": np.round(mastery, 4),
+            "response_count": response_count,
+            "last_correct_at": (updated_at - since_correct).where(mastery > 0.1),
+            "last_incorrect_at": (updated_at - since_incorrect).where(mastery < 0.9),
+            "updated_at": updated_at,
+        }
+    )
+
+
+def generate_synthetic_tables(
+    spec: SyntheticSpec = SyntheticSpec(), end: Optional[datetime] = None
+) -> dict[str, pd.DataFrame]:
+    """
+    Generate all synthetic tables.
+
+    Args:
+        spec: Table sizes and random seed
+        end: Latest timestamp (defaults to now, so days_back windows apply)
+
+    Returns:
+        Table name -> DataFrame
+    """
+    rng = np.random.default_rng(spec.seed)
+    end_ts = pd.Timestamp(end or datetime.utcnow(), tz="UTC").floor("s")
+    profiles, theta = generate_profiles(spec, rng)
+    user_ids = profiles["id"].to_numpy()
+    return {
+        "profiles": profiles,
+        "exam_attempts": generate_exam_attempts(spec, rng, user_ids, theta, end_ts),
+        "flashcard_reviews": generate_flashcard_reviews(
+            spec, rng, user_ids, theta, end_ts
+        ),
+        "knowledge_states": generate_knowledge_states(
+            spec, rng, user_ids, theta, end_ts
+        ),
+    }
+
+
+def build_local_backend(
+    spec: SyntheticSpec = SyntheticSpec(),
+    path: str = ":memory:",
+    end: Optional[datetime] = None,
+) -> LocalBackend:
+    """Generate synthetic tables and load them into a LocalBackend."""
+    backend = LocalBackend(path)
+    for name, df in generate_synthetic_tables(spec, end).items():
+        backend.load_table(
+            name,
+            df,
+            json_columns=(
+                ("responses", "area_breakdown") if name == "exam_attempts" else ()
+            ),
+            indexes=CURSOR_INDEXES.get(name, ()),
+        )
+    return backend
+
+
+def benchmark_exports(backend: LocalBackend) -> pd.DataFrame:
+    """Time each full-frame export against a backend (rows per second)."""
+    from .supabase_export import (
+        export_flashcard_reviews,
+        export_irt_item_responses,
+        export_knowledge_states,
+        export_pass_prediction_features,
+    )
+
+    exports = {
+        "irt_responses": export_irt_item_responses,
+        "knowledge_states": export_knowledge_states,
+        "flashcard_reviews": export_flashcard_reviews,
+        "pass_prediction": export_pass_prediction_features,
+    }
+    results = []
+    for name, export_fn in exports.items():
+        requests = backend.request_count
+        start = time.perf_counter()
+        df = export_fn(backend, cache=False)
+        seconds = time.perf_counter() - start
+        results.append(
+            {
+                "dataset": name,
+                "rows": len(df),
+                "requests": backend.request_count - requests,
+                "seconds": round(seconds, 3),
+                "rows_per_sec": round(len(df) / seconds) if seconds else 0,
+            }
+        )
+    return pd.DataFrame(results)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--db", default="data/synthetic.sqlite")
+    parser.add_argument("--bench", action="store_true", help="time the exporters")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    backend = build_local_backend(SyntheticSpec.for_rows(args.rows, args.seed), args.db)
+    print(f"Seeded {args.db} in {time.perf_counter() - start:.1f}s")
+    for name in backend.tables():
+        (count,) = backend.execute_sql(f'SELECT COUNT(*) FROM "{name}"')[0]
+        print(f"  {name}: {count} rows")
+
+    if args.bench:
+        print(benchmark_exports(backend).to_string(index=False))
+    backend.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+ID Vocabulary
+
+Append-only mapping from string IDs (user_id, question_id, ...) to dense
+int32 codes. Codes never change once assigned, so frames encoded in
+separate chunks share one code space and can be stacked straight into
+IRT/BKT matrices without re-factorizing.
+"""
+
+from typing import Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+
+class Vocabulary:
+    """
+    Dense int32 codes for string IDs, in order of first appearance.
+
+    Args:
+        values: Optional initial IDs (e.g. a vocabulary saved by a prior run)
+    """
+
+    def __init__(self, values: Iterable[str] = ()) -> None:
+        self._codes: dict[str, int] = {}
+        self._values: list[str] = []
+        self._index: Optional[pd.Index] = None
+        for value in values:
+            self.add(value)
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def __contains__(self, value: object) -> bool:
+        return value in self._codes
+
+    @property
+    def values(self) -> list[str]:
+        """IDs in code order (values[code] -> ID)."""
+        return self._values
+
+    @property
+    def index(self) -> pd.Index:
+        """IDs as a pandas Index, cached until the vocabulary grows."""
+        if self._index is None or len(self._index) != len(self._values):
+            self._index = pd.Index(self._values, dtype=object)
+        return self._index
+
+    def add(self, value: str) -> int:
+        """Return the code for value, assigning the next one if it is new."""
+        key = str(value)
+        code = self._codes.get(key)
+        if code is None:
+            code = len(self._values)
+            self._codes[key] = code
+            self._values.append(key)
+        return code
+
+    def encode(self, values) -> np.ndarray:
+        """
+        Encode an array-like of IDs to int32 codes (-1 for missing values).
+
+        Only the distinct values go through Python; the per-row mapping is a
+        single NumPy gather.
+        """
+        local_codes, uniques = pd.factorize(values, use_na_sentinel=True)
+        if len(uniques) == 0:
+            return local_codes.astype(np.int32)
+
+        remap = np.fromiter(
+            (self.add(value) for value in uniques), dtype=np.int32, count=len(uniques)
+        )
+        codes = remap[local_codes]
+        codes[local_codes < 0] = -1
+        return codes
+
+    def decode(self, codes: np.ndarray) -> np.ndarray:
+        """Map codes back to their IDs (object array)."""
+        return self.index.to_numpy()[codes]
+
+    def categorical(self, codes: np.ndarray) -> pd.Categorical:
+        """Wrap codes as a Categorical whose codes are the vocabulary codes."""
+        return pd.Categorical.from_codes(codes, categories=self.index)
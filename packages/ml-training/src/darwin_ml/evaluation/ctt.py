@@ -0,0 +1,613 @@
+"""
+Classical Test Theory
+
+Vectorized item analysis for a persons x items matrix of scored (0/1)
+responses: p-values, point-biserial and corrected item-total correlations,
+Cronbach's alpha (overall and with each item deleted), and Rasch infit and
+outfit mean-squares against given item difficulties.
+
+Complete matrices go through dense NumPy column reductions. Matrices with
+missing responses (NaN in a dense array, a ResponseMatrix, or a
+scipy.sparse matrix whose stored entries are the administered items,
+explicit zeros included) go
+through a sparse path that only touches administered entries. In both, the
+total score is the number correct over the items a person answered.
+
+compare_with_official() lines the results up against the INEP item
+parameters file (EnamedStore.items()).
+
+Usage:
+    python -m darwin_ml.evaluation.ctt --persons 100000 --items 200
+"""
+
+import argparse
+import time
+from dataclasses import dataclass
+from typing import Callable, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from scipy.linalg.blas import ssyrk
+from scipy.special import expit
+
+from ..data.responses import ResponseMatrix
+
+ResponseInput = Union[np.ndarray, sp.spmatrix, sp.sparray, ResponseMatrix]
+
+# Winsteps-style adjustment so zero and perfect scores get finite abilities
+EXTREME_SCORE_ADJUSTMENT = 0.3
+# Rows per block when evaluating the dense Rasch residuals
+FIT_CHUNK_ROWS = 16_384
+GRAM_CHUNK_ROWS = 16_384
+# Below this share of administered cells, item pairs are counted sparsely
+SPARSE_GRAM_DENSITY = 0.05
+# Largest ability-levels x items grid for the grouped dense fit statistics
+GROUPED_FIT_CELLS = 4_000_000
+# Logits are clipped so response variances never underflow to zero
+LOGIT_CLIP = 30.0
+
+
+@dataclass(frozen=True)
+class CTTReport:
+    """Item statistics (one row per item) and test-level reliability."""
+
+    items: pd.DataFrame
+    alpha: float
+    n_persons: int
+
+
+def _to_sparse(responses: ResponseInput) -> sp.csr_matrix:
+    """CSR of administered entries; NaN cells of a dense array are dropped."""
+    if isinstance(responses, ResponseMatrix):
+        return responses.to_csr()
+    if sp.issparse(responses):
+        matrix = responses.tocsr().astype(np.float32, copy=False)
+        matrix.sum_duplicates()
+        return matrix
+    dense = np.asarray(responses, dtype=np.float32)
+    present = ~np.isnan(dense)
+    # Row-major order of the flat positions is already CSR order
+    flat = np.flatnonzero(present)
+    indptr = np.concatenate([[0], np.cumsum(present.sum(axis=1))])
+    indices = (flat % dense.shape[1]).astype(np.int32)
+    return sp.csr_matrix(
+        (dense.ravel()[flat], indices, indptr), shape=dense.shape, dtype=np.float32
+    )
+
+
+def _prepare(responses: ResponseInput) -> Union[np.ndarray, sp.csr_matrix]:
+    """Dense float32 array if complete, else the administered-entry CSR."""
+    if sp.issparse(responses) or isinstance(responses, ResponseMatrix):
+        matrix = _to_sparse(responses)
+        if matrix.nnz < matrix.shape[0] * matrix.shape[1]:
+            return matrix
+        return matrix.toarray()
+    dense = np.asarray(responses, dtype=np.float32)
+    return _to_sparse(dense) if np.isnan(dense).any() else dense
+
+
+def _entry_rows(matrix: sp.csr_matrix) -> np.ndarray:
+    return np.repeat(np.arange(matrix.shape[0], dtype=np.int64), np.diff(matrix.indptr))
+
+
+def _row_sums(matrix: sp.csr_matrix, values: np.ndarray) -> np.ndarray:
+    """Per-person sums of per-entry values (a CSR reduction, no scatter)."""
+    summed = sp.csr_matrix((values, matrix.indices, matrix.indptr), shape=matrix.shape)
+    return np.asarray(summed.sum(axis=1), dtype=np.float64).ravel()
+
+
+def _column_sums(matrix: sp.csr_matrix, values: np.ndarray) -> np.ndarray:
+    """Per-item sums of per-entry values, accumulated in float64."""
+    summed = sp.csr_matrix(
+        (values.astype(np.float64), matrix.indices, matrix.indptr),
+        shape=matrix.shape,
+    )
+    return np.asarray(summed.sum(axis=0)).ravel()
+
+
+def _sigmoid_(z: np.ndarray) -> np.ndarray:
+    """In-place logistic of a float32 array (np.exp is SIMD, expit is not)."""
+    np.clip(z, -LOGIT_CLIP, LOGIT_CLIP, out=z)
+    np.negative(z, out=z)
+    np.exp(z, out=z)
+    z += 1
+    return np.reciprocal(z, out=z)
+
+
+def _entry_probabilities(
+    theta: np.ndarray,
+    rows: np.ndarray,
+    b_entry: np.ndarray,
+    a_entry: Optional[np.ndarray] = None,
+    c_entry: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    """P(correct) per administered entry, in float32 (Rasch unless the
+    per-entry discrimination and guessing are given)."""
+    p = theta.astype(np.float32)[rows]
+    p -= b_entry
+    if a_entry is not None:
+        p *= a_entry
+    p = _sigmoid_(p)
+    # Steep items saturate float32; keep P(1 - P) away from zero
+    np.clip(p, 1e-7, 1 - 1e-7, out=p)
+    if c_entry is not None:
+        p *= 1 - c_entry
+        p += c_entry
+    return p
+
+
+def _pair_moments(x: sp.csr_matrix) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Pairwise-complete item sums: persons administered both items (n), of
+    them correct on the row item (x), and correct on both (xx).
+
+    Dense-ish matrices are densified in row blocks and reduced with a
+    symmetric rank-k BLAS update of [X | M]; a sparse product would cost
+    the sum of squared items per person instead.
+    """
+    n_persons, n_items = x.shape
+    mask = x.copy()
+    mask.data = np.ones_like(mask.data)
+    if x.nnz < SPARSE_GRAM_DENSITY * n_persons * n_items:
+        return (
+            (mask.T @ mask).toarray().astype(np.float64),
+            (x.T @ mask).toarray().astype(np.float64),
+            (x.T @ x).toarray().astype(np.float64),
+        )
+    gram = np.zeros((2 * n_items, 2 * n_items))
+    for start in range(0, n_persons, GRAM_CHUNK_ROWS):
+        stop = start + GRAM_CHUNK_ROWS
+        block = np.empty((min(stop, n_persons) - start, 2 * n_items), np.float32)
+        block[:, :n_items] = x[start:stop].toarray()
+        block[:, n_items:] = mask[start:stop].toarray()
+        # The transposed view is Fortran-ordered, so syrk needs no copy
+        gram += ssyrk(1.0, block.T, trans=0)
+    gram = np.triu(gram) + np.triu(gram, 1).T
+    return (
+        gram[n_items:, n_items:],
+        gram[:n_items, n_items:],
+        gram[:n_items, :n_items],
+    )
+
+
+def _safe_divide(numerator: np.ndarray, denominator: np.ndarray) -> np.ndarray:
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(denominator > 0, numerator / denominator, np.nan)
+
+
+def _correlations(
+    p: np.ndarray, cov_xt: np.ndarray, var_t: np.ndarray
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Point-biserial, corrected item-total and rest-score variance."""
+    var_x = p * (1 - p)
+    point_biserial = _safe_divide(cov_xt, np.sqrt(var_x * var_t))
+    # Item against the total without itself: cov(X, T - X), var(T - X)
+    var_rest = var_t - 2 * cov_xt + var_x
+    item_total = _safe_divide(cov_xt - var_x, np.sqrt(var_x * var_rest))
+    return point_biserial, item_total, var_rest
+
+
+def _alpha(n_items: int, item_variance: float, total_variance: float) -> float:
+    if n_items < 2 or total_variance <= 0:
+        return float("nan")
+    return n_items / (n_items - 1) * (1 - item_variance / total_variance)
+
+
+def _dense_statistics(x: np.ndarray) -> tuple[pd.DataFrame, float]:
+    n_persons, n_items = x.shape
+    totals = x.sum(axis=1)
+    centered = (totals - totals.mean()).astype(np.float32)
+
+    p = x.mean(axis=0, dtype=np.float64)
+    cov_xt = (x.T @ centered).astype(np.float64) / n_persons
+    var_t = float(centered @ centered) / n_persons
+    point_biserial, item_total, var_rest = _correlations(p, cov_xt, var_t)
+
+    var_x = p * (1 - p)
+    alpha = _alpha(n_items, var_x.sum(), var_t)
+    alpha_deleted = np.array(
+        [
+            _alpha(n_items - 1, var_x.sum() - var_x[i], var_rest[i])
+            for i in range(n_items)
+        ]
+    )
+    frame = pd.DataFrame(
+        {
+            "n": np.full(n_items, n_persons),
+            "p_value": p,
+            "point_biserial": point_biserial,
+            "item_total": item_total,
+            "alpha_if_deleted": alpha_deleted,
+        }
+    )
+    return frame, alpha
+
+
+def _sparse_statistics(x: sp.csr_matrix) -> tuple[pd.DataFrame, float]:
+    n_persons, n_items = x.shape
+    values = x.data.astype(np.float64)
+    totals = _row_sums(x, values)
+    answered = np.diff(x.indptr) > 0
+    centered = totals - totals[answered].mean() if answered.any() else totals
+
+    # Per-item moments over the persons who were administered the item
+    t = centered[_entry_rows(x)]
+    n = np.bincount(x.indices, minlength=n_items).astype(np.float64)
+    p = _safe_divide(_column_sums(x, values), n)
+    mean_t = _safe_divide(_column_sums(x, t), n)
+    var_t = _safe_divide(_column_sums(x, t * t), n) - mean_t**2
+    cov_xt = _safe_divide(_column_sums(x, values * t), n) - p * mean_t
+    point_biserial, item_total, _ = _correlations(p, cov_xt, var_t)
+
+    # Alpha from the pairwise-complete item covariance matrix
+    pair_n, pair_x, pair_xx = _pair_moments(x)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cov = np.where(
+            pair_n > 0,
+            pair_xx / pair_n - (pair_x / pair_n) * (pair_x.T / pair_n),
+            0.0,
+        )
+    trace, total = np.trace(cov), cov.sum()
+    alpha = _alpha(n_items, trace, total)
+    diagonal, row_sums = np.diag(cov), cov.sum(axis=1)
+    alpha_deleted = np.array(
+        [
+            _alpha(
+                n_items - 1,
+                trace - diagonal[i],
+                total - 2 * row_sums[i] + diagonal[i],
+            )
+            for i in range(n_items)
+        ]
+    )
+    frame = pd.DataFrame(
+        {
+            "n": n.astype(np.int64),
+            "p_value": p,
+            "point_biserial": point_biserial,
+            "item_total": item_total,
+            "alpha_if_deleted": alpha_deleted,
+        }
+    )
+    return frame, alpha
+
+
+def _adjusted_scores(scores: np.ndarray, counts: np.ndarray) -> np.ndarray:
+    adjustment = EXTREME_SCORE_ADJUSTMENT
+    return np.clip(scores, adjustment, np.maximum(counts - adjustment, adjustment))
+
+
+def _newton_theta(
+    targets: np.ndarray,
+    moments: Callable[[np.ndarray], tuple[np.ndarray, np.ndarray]],
+    start: np.ndarray,
+    max_iter: int,
+    tol: float,
+) -> np.ndarray:
+    """Solve expected score == target score, one Newton step per pass."""
+    theta = start
+    for _ in range(max_iter):
+        expected, information = moments(theta)
+        step = np.clip(_safe_divide(targets - expected, information), -1.0, 1.0)
+        step = np.nan_to_num(step)
+        theta = theta + step
+        if np.abs(step).max(initial=0.0) < tol:
+            break
+    return theta
+
+
+def rasch_theta(
+    responses: ResponseInput,
+    difficulty: Sequence[float],
+    max_iter: int = 50,
+    tol: float = 1e-4,
+) -> np.ndarray:
+    """
+    Maximum-likelihood Rasch abilities for fixed item difficulties.
+
+    Zero and perfect scores are pulled in by 0.3 points so every person gets
+    a finite estimate. Items with a NaN difficulty (e.g. dropped from the
+    official calibration) are ignored; persons with no usable item get NaN.
+
+    Args:
+        responses: Persons x items 0/1 matrix (see module docstring)
+        difficulty: Rasch b per item
+    """
+    b = np.asarray(difficulty, dtype=np.float64)
+    usable = np.isfinite(b)
+    x = _prepare(responses)
+
+    if isinstance(x, np.ndarray):
+        # Complete data: the raw score is sufficient, so solve once per score
+        scores = x @ usable.astype(np.float32)
+        b = b[usable]
+        n_items = len(b)
+        targets = _adjusted_scores(
+            np.arange(n_items + 1, dtype=np.float64), np.full(n_items + 1, n_items)
+        )
+
+        def score_moments(theta):
+            p = expit(theta[:, None] - b[None, :])
+            return p.sum(axis=1), (p * (1 - p)).sum(axis=1)
+
+        start = np.log(targets / (n_items - targets)) + b.mean()
+        table = _newton_theta(targets, score_moments, start, max_iter, tol)
+        return table[scores.astype(np.int64)]
+
+    rows = _entry_rows(x)
+    b_entry = np.nan_to_num(b).astype(np.float32)[x.indices]
+    weight = usable[x.indices].astype(np.float32)
+    counts = _row_sums(x, weight)
+    targets = _adjusted_scores(_row_sums(x, x.data * weight), counts)
+
+    def person_moments(theta):
+        p = _entry_probabilities(theta, rows, b_entry)
+        p *= weight
+        return _row_sums(x, p), _row_sums(x, p * (1 - p))
+
+    mean_b = _safe_divide(_row_sums(x, b_entry * weight), counts)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        start = np.nan_to_num(np.log(targets / (counts - targets)) + mean_b)
+    theta = _newton_theta(targets, person_moments, start, max_iter, tol)
+    return np.where(counts > 0, theta, np.nan)
+
+
+def _dense_residuals(
+    x: np.ndarray,
+    rows: np.ndarray,
+    theta: np.ndarray,
+    b: np.ndarray,
+    a: np.ndarray,
+    c: np.ndarray,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Per-item sums of squared standardized residuals, squared residuals
+    and response variances over the given rows of a complete matrix."""
+    levels, group = np.unique(theta[rows], return_inverse=True)
+    if len(levels) * len(b) <= GROUPED_FIT_CELLS:
+        # Persons sharing an ability (e.g. a raw score under rasch_theta())
+        # share every expected probability: sum their responses per level
+        # and evaluate the residuals on the small levels x items grid
+        members = sp.csr_matrix(
+            (np.ones(len(rows), np.float32), (group, rows)),
+            shape=(len(levels), len(x)),
+        )
+        correct = np.asarray(members @ x, dtype=np.float64)
+        counts = np.bincount(group, minlength=len(levels))[:, None].astype(np.float64)
+        p = c + (1 - c) * expit(a * (levels[:, None] - b[None, :]))
+        wrong = counts - correct
+        return (
+            (correct * (1 - p) / p + wrong * p / (1 - p)).sum(axis=0),
+            (correct * (1 - p) ** 2 + wrong * p**2).sum(axis=0),
+            (counts * p * (1 - p)).sum(axis=0),
+        )
+
+    b32, a32, c32 = (v.astype(np.float32) for v in (b, a, c))
+    squared_z, squared_residual, variance = (np.zeros(len(b)) for _ in range(3))
+    for start in range(0, len(rows), FIT_CHUNK_ROWS):
+        chunk = rows[start : start + FIT_CHUNK_ROWS]
+        p = _sigmoid_((theta[chunk, None].astype(np.float32) - b32) * a32)
+        np.clip(p, 1e-7, 1 - 1e-7, out=p)
+        p = c32 + (1 - c32) * p
+        w = p * (1 - p)
+        r2 = (x[chunk] - p) ** 2
+        squared_z += (r2 / w).sum(axis=0, dtype=np.float64)
+        squared_residual += r2.sum(axis=0, dtype=np.float64)
+        variance += w.sum(axis=0, dtype=np.float64)
+    return squared_z, squared_residual, variance
+
+
+def fit_statistics(
+    responses: ResponseInput,
+    difficulty: Sequence[float],
+    theta: Optional[Sequence[float]] = None,
+    discrimination: Optional[Sequence[float]] = None,
+    guessing: Optional[Sequence[float]] = None,
+) -> pd.DataFrame:
+    """
+    Infit and outfit mean-squares per item.
+
+    Outfit is the mean squared standardized residual; infit weights the
+    squared residuals by the response variance, so it is less sensitive to
+    off-target persons. Persons with zero or perfect scores carry no misfit
+    information and are left out, as in Winsteps.
+
+    Args:
+        responses: Persons x items 0/1 matrix
+        difficulty: b per item (NaN items get NaN fit)
+        theta: Person abilities (rasch_theta() if not provided; required
+            with discrimination or guessing)
+        discrimination: 2PL/3PL a per item (1 if not provided)
+        guessing: 3PL c per item (0 if not provided)
+    """
+    b = np.asarray(difficulty, dtype=np.float64)
+    x = _prepare(responses)
+    n_items = x.shape[1]
+    a = np.ones(n_items) if discrimination is None else np.asarray(discrimination)
+    c = np.zeros(n_items) if guessing is None else np.asarray(guessing)
+    if theta is None:
+        if discrimination is not None or guessing is not None:
+            raise ValueError("theta is required to fit 2PL/3PL parameters")
+        theta = rasch_theta(x, b)
+    theta = np.asarray(theta, dtype=np.float64)
+    a, c = np.nan_to_num(a.astype(np.float64)), np.nan_to_num(c.astype(np.float64))
+    usable = np.isfinite(b)
+
+    if isinstance(x, np.ndarray):
+        scores = x @ usable.astype(np.float32)
+        informative = (scores > 0) & (scores < usable.sum()) & np.isfinite(theta)
+        rows = np.flatnonzero(informative)
+        squared_z, squared_residual, variance = _dense_residuals(
+            x, rows, theta, np.nan_to_num(b), a, c
+        )
+        n = np.full(n_items, float(len(rows)))
+    else:
+        weight = usable[x.indices].astype(np.float32)
+        counts = _row_sums(x, weight)
+        scores = _row_sums(x, x.data * weight)
+        informative = (scores > 0) & (scores < counts) & np.isfinite(theta)
+        rows = _entry_rows(x)
+        weight *= informative[rows]
+
+        b_entry = np.nan_to_num(b).astype(np.float32)[x.indices]
+        a_entry = None if discrimination is None else a.astype(np.float32)[x.indices]
+        c_entry = None if guessing is None else c.astype(np.float32)[x.indices]
+        p = _entry_probabilities(np.nan_to_num(theta), rows, b_entry, a_entry, c_entry)
+        w = p * (1 - p)
+        r2 = (x.data - p) ** 2
+        squared_z = _column_sums(x, weight * r2 / w)
+        squared_residual = _column_sums(x, weight * r2)
+        variance = _column_sums(x, weight * w)
+        n = _column_sums(x, weight)
+
+    outfit = _safe_divide(squared_z, n)
+    infit = _safe_divide(squared_residual, variance)
+    return pd.DataFrame(
+        {
+            "infit": np.where(usable, infit, np.nan),
+            "outfit": np.where(usable, outfit, np.nan),
+        }
+    )
+
+
+def item_statistics(
+    responses: ResponseInput,
+    items: Optional[Sequence] = None,
+    difficulty: Optional[Sequence[float]] = None,
+    theta: Optional[Sequence[float]] = None,
+) -> CTTReport:
+    """
+    Classical item analysis of a scored response matrix.
+
+    Args:
+        responses: Persons x items 0/1 matrix; NaN (dense) or unstored
+            (sparse) cells are missing
+        items: Item labels for the result index (e.g. NU_ITEM_PROVA_1)
+        difficulty: Rasch b per item; adds infit/outfit columns
+        theta: Person abilities for the fit statistics
+
+    Returns:
+        CTTReport whose items frame has n, p_value, point_biserial,
+        item_total (corrected item-total correlation), alpha_if_deleted and,
+        with difficulty, infit and outfit
+    """
+    x = _prepare(responses)
+    if isinstance(x, np.ndarray):
+        frame, alpha = _dense_statistics(x)
+    else:
+        frame, alpha = _sparse_statistics(x)
+    if difficulty is not None:
+        fit = fit_statistics(x, difficulty, theta)
+        frame = pd.concat([frame, fit], axis=1)
+    if items is not None:
+        frame.index = pd.Index(items, name="item")
+    return CTTReport(items=frame, alpha=alpha, n_persons=x.shape[0])
+
+
+def official_difficulty(
+    official: pd.DataFrame, item_column: str = "NU_ITEM_PROVA_1"
+) -> pd.Series:
+    """PARAMETRO_B by item number, NaN for items INEP did not keep."""
+    kept = official["ITEM_MANTIDO"] == 1
+    b = official["PARAMETRO_B"].astype("float64").where(kept)
+    return pd.Series(b.to_numpy(), index=official[item_column].to_numpy(), name="b")
+
+
+def compare_with_official(
+    report: CTTReport,
+    official: pd.DataFrame,
+    item_column: str = "NU_ITEM_PROVA_1",
+    correlation_tolerance: float = 0.05,
+    fit_tolerance: float = 0.1,
+) -> pd.DataFrame:
+    """
+    Line item statistics up against the INEP parameters file.
+
+    report.items must be indexed by the item numbers in item_column.
+    COR_BISSERIAL is compared with point_biserial, INFIT/OUTFIT with
+    infit/outfit (when computed); items INEP dropped are skipped.
+
+    Returns:
+        One row per kept item with official, computed and delta columns and
+        an "agrees" flag for deltas within tolerance
+    """
+    kept = official[official["ITEM_MANTIDO"] == 1].set_index(item_column)
+    ours = report.items.reindex(kept.index)
+    pairs = [("point_biserial", "COR_BISSERIAL", correlation_tolerance)]
+    if "infit" in ours:
+        pairs += [
+            ("infit", "INFIT", fit_tolerance),
+            ("outfit", "OUTFIT", fit_tolerance),
+        ]
+
+    out = pd.DataFrame(index=kept.index)
+    agrees = pd.Series(True, index=kept.index)
+    for column, official_column, tolerance in pairs:
+        expected = kept[official_column].astype("float64")
+        actual = ours[column].astype("float64")
+        delta = actual - expected
+        out[f"official_{column}"] = expected
+        out[column] = actual
+        out[f"delta_{column}"] = delta
+        agrees &= delta.abs() <= tolerance
+    out["agrees"] = agrees
+    return out
+
+
+def simulate_rasch(
+    n_persons: int,
+    difficulty: Sequence[float],
+    missing: float = 0.0,
+    seed: int = 0,
+) -> np.ndarray:
+    """Dense 0/1 Rasch responses (NaN for a `missing` share of cells)."""
+    rng = np.random.default_rng(seed)
+    b = np.nan_to_num(np.asarray(difficulty, dtype=np.float32))
+    theta = rng.standard_normal(n_persons, dtype=np.float32)
+    p = expit(theta[:, None] - b[None, :])
+    x = (rng.random(p.shape, dtype=np.float32) < p).astype(np.float32)
+    if missing:
+        x[rng.random(x.shape, dtype=np.float32) < missing] = np.nan
+    return x
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the CTT engine")
+    parser.add_argument("--persons", type=int, default=100_000)
+    parser.add_argument("--items", type=int, default=200)
+    parser.add_argument("--missing", type=float, default=0.5)
+    parser.add_argument(
+        "--official",
+        action="store_true",
+        help="Also check Rasch responses simulated from the INEP difficulties "
+        "against the official fit statistics",
+    )
+    args = parser.parse_args()
+
+    b = np.random.default_rng(1).normal(0, 1, args.items)
+    for missing in (0.0, args.missing):
+        x = simulate_rasch(args.persons, b, missing=missing)
+        start = time.perf_counter()
+        report = item_statistics(x, difficulty=b)
+        elapsed = time.perf_counter() - start
+        print(
+            f"{args.persons} x {args.items}, {missing:.0%} missing: "
+            f"{elapsed:.3f}s, alpha={report.alpha:.3f}, "
+            f"mean infit={report.items['infit'].mean():.3f}"
+        )
+
+    if args.official:
+        from ..data.enamed import open_enamed
+
+        official = open_enamed().items()
+        b = official_difficulty(official)
+        x = simulate_rasch(args.persons, b.to_numpy())
+        report = item_statistics(x, items=b.index, difficulty=b.to_numpy())
+        comparison = compare_with_official(report, official)
+        deltas = comparison.filter(like="delta_").abs()
+        print(f"Official items: {len(comparison)} kept")
+        print(deltas.describe().loc[["mean", "50%", "max"]].round(3).to_string())
+
+
+if __name__ == "__main__":
+    main()
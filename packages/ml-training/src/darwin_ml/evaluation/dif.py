@@ -0,0 +1,633 @@
+"""
+Differential Item Functioning
+
+Vectorized Mantel-Haenszel DIF screening, matching analyzeDIF() in
+packages/shared/src/calculators/dif.ts. Each item's reference and focal
+responders are stratified into N_STRATA equal-width bands over their own
+total-score range, and one bincount of the response entries per split
+fills the splits x items x strata x group x outcome count tensor: the
+2x2xK tables of every item for every split at once. The MH
+common odds ratio, ETS delta, continuity-corrected chi-square, ETS A/B/C
+class and analyzeDIF()'s Lord chi-square proxy are then reductions over
+the strata axis.
+
+screen_dif() screens every split of every grouping variable (reference
+group vs each other group) in that single pass. Group codes follow the
+ENAMED microdata (CO_REGIAO_CURSO, CO_CATEGAD, TP_SEXO; see ENAMED_SPLITS),
+and enamed_reference_groups() picks each variable's reference group as its
+largest group in the ENAMED population. The release does not link item
+responses to examinees, so the responses screened are the platform's
+(export_irt_item_responses) with group codes supplied per user.
+
+Usage:
+    python -m darwin_ml.evaluation.dif --groups data/user_groups.parquet
+"""
+
+import argparse
+import json
+import os
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from scipy.special import erfc
+
+from ..data.responses import ResponseMatrix
+from .ctt import ResponseInput, _to_sparse
+
+# computeMantelHaenszel() defaults and analyzeDIF()'s minimum group size
+N_STRATA = 5
+MIN_GROUP_SIZE = 10
+# ETS delta scale: delta_MH = -2.35 ln(alpha_MH), alpha floored at MIN_ALPHA
+DELTA_SCALE = -2.35
+MIN_ALPHA = 0.001
+# DIF_THRESHOLDS of types/dif.ts
+NEGLIGIBLE_DELTA = 1.0
+MODERATE_DELTA = 1.5
+SIGNIFICANCE_LEVEL = 0.05
+# |delta_MH| beyond which analyzeDIF() reports a direction
+DIRECTION_DELTA = 0.5
+# computeLordChiSquare()'s assumed standard errors of the differences
+LORD_SE_DIFFICULTY = 0.3
+LORD_SE_DISCRIMINATION = 0.15
+LORD_DF = 2
+# Floor of 1 - p in analyzeDIF()'s group difficulty adjustment
+LORD_MIN_ODDS_DENOMINATOR = 0.01
+
+# Grouping variable (DIFGroupVariable where one exists) -> ENAMED column and
+# INEP code -> group label
+ENAMED_SPLITS = {
+    "region": (
+        "CO_REGIAO_CURSO",
+        {1: "norte", 2: "nordeste", 3: "sudeste", 4: "sul", 5: "centro_oeste"},
+    ),
+    "institution_category": (
+        "CO_CATEGAD",
+        {
+            1: "publica",
+            2: "publica",
+            3: "publica",
+            4: "privada",
+            5: "privada",
+            6: "privada",
+            7: "especial",
+            8: "privada",
+            9: "privada",
+        },
+    ),
+    "gender": ("TP_SEXO", {"F": "feminino", "M": "masculino"}),
+}
+
+DEFAULT_OUTPUT = "artifacts/dif_analysis.json"
+
+# Outcome/group cells of the count tensor: tables[item, stratum, group, outcome]
+FOCAL, REFERENCE = 1, 0
+
+
+@dataclass(frozen=True)
+class DIFSplit:
+    """A DIFGroupDefinition: one focal group against a reference group."""
+
+    variable: str
+    reference: str
+    focal: str
+
+    def to_json(self) -> dict:
+        return {
+            "variable": self.variable,
+            "referenceGroup": self.reference,
+            "focalGroup": self.focal,
+        }
+
+
+@dataclass(frozen=True)
+class DIFResult:
+    """
+    MH (and Lord) statistics of every analyzed item for one split.
+
+    items has one row per item with both groups at MIN_GROUP_SIZE or more,
+    sorted by |delta_mh| as analyzeDIF() sorts; tables holds their counts
+    (items x strata x [reference, focal] x [incorrect, correct]) and
+    score_ranges their band bounds (items x strata x 2).
+    """
+
+    split: DIFSplit
+    items: pd.DataFrame
+    tables: np.ndarray
+    score_ranges: np.ndarray
+    sample_size: int
+
+    def summary(self) -> dict:
+        """computeDIFSummary()."""
+        counts = self.items["ets"].value_counts()
+        classes = {c: int(counts.get(c, 0)) for c in "ABC"}
+        n = len(self.items)
+        dif_rate = (classes["B"] + classes["C"]) / n if n else 0.0
+        if dif_rate > 0.20 or classes["C"] > 3:
+            fairness = "serious_concern"
+        elif dif_rate > 0.10 or classes["C"] > 0:
+            fairness = "moderate_concern"
+        else:
+            fairness = "fair"
+        return {
+            "totalItems": n,
+            "classificationCounts": classes,
+            "difRate": dif_rate,
+            "meanAbsDelta": float(self.items["delta_mh"].abs().mean()) if n else 0.0,
+            "totalSampleSize": self.sample_size,
+            "overallFairness": fairness,
+        }
+
+    def _item_json(self, k: int, row) -> dict:
+        tables = [
+            {
+                "stratum": s,
+                "scoreRange": self.score_ranges[k, s].tolist(),
+                "focalCorrect": int(cells[FOCAL, 1]),
+                "focalIncorrect": int(cells[FOCAL, 0]),
+                "referenceCorrect": int(cells[REFERENCE, 1]),
+                "referenceIncorrect": int(cells[REFERENCE, 0]),
+                "total": int(cells.sum()),
+            }
+            for s, cells in enumerate(self.tables[k])
+            if cells.sum() > 0
+        ]
+        result = {
+            "itemId": str(row.Index),
+            "mh": {
+                "alphaMH": row.alpha_mh,
+                "deltaMH": row.delta_mh,
+                "chiSquare": row.chi_square,
+                "pValue": row.p_value,
+                "strataCount": len(tables),
+                "contingencyTables": tables,
+            },
+            "etsClassification": row.ets,
+            "flagged": row.flagged,
+            "direction": row.direction,
+            "sampleSizeFocal": int(row.n_focal),
+            "sampleSizeReference": int(row.n_reference),
+        }
+        if "lord_chi_square" in self.items and not np.isnan(row.lord_chi_square):
+            result["lord"] = {
+                "chiSquare": row.lord_chi_square,
+                "pValue": row.lord_p_value,
+                "df": LORD_DF,
+                "paramDifferences": {
+                    "difficultyDiff": row.lord_difficulty_diff,
+                    "discriminationDiff": 0.0,
+                    "guessingDiff": 0.0,
+                },
+            }
+        return result
+
+    def to_json(self) -> dict:
+        """DIFAnalysis of types/dif.ts (flaggedItems lists the C items)."""
+        results = [
+            self._item_json(k, row) for k, row in enumerate(self.items.itertuples())
+        ]
+        return {
+            "groupDefinition": self.split.to_json(),
+            "itemResults": results,
+            "flaggedItems": [r for r in results if r["flagged"]],
+            "summary": self.summary(),
+            "analyzedAt": datetime.now(timezone.utc).isoformat(),
+        }
+
+
+def total_scores(x: sp.csr_matrix) -> np.ndarray:
+    """Number correct over the administered items (DIFResponseData.totalScore)."""
+    return np.asarray(x.sum(axis=1), dtype=np.float64).ravel()
+
+
+def stratify(
+    scores: np.ndarray, items: np.ndarray, n_items: int, n_strata: int = N_STRATA
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    stratifyByScore() of every item: equal-width bands over the score range
+    of that item's responders.
+
+    Args:
+        scores: Total score behind each response
+        items: Item of each response, sorted
+        n_items: Number of items
+        n_strata: Score bands
+
+    Returns:
+        (stratum per response, items x n_strata x 2 band [low, high) bounds)
+    """
+    counts = np.bincount(items, minlength=n_items)
+    answered = counts > 0
+    starts = (np.cumsum(counts) - counts)[answered]
+    low, high = np.zeros(n_items), np.zeros(n_items)
+    if answered.any():
+        low[answered] = np.minimum.reduceat(scores, starts)
+        high[answered] = np.maximum.reduceat(scores, starts)
+    width = (high - low) / n_strata
+    # A single score band (high == low) puts every response in stratum 0
+    spread = (width > 0)[items]
+    offset = (scores - low[items]) / np.where(spread, width[items], 1.0)
+    strata = np.where(spread, np.minimum(n_strata - 1, offset.astype(np.int64)), 0)
+    edges = low[:, None] + width[:, None] * np.arange(n_strata + 1)
+    return strata, np.stack([edges[:, :-1], edges[:, 1:]], axis=-1)
+
+
+def contingency_tables(
+    x: sp.csr_matrix,
+    membership: np.ndarray,
+    scores: Optional[np.ndarray] = None,
+    n_strata: int = N_STRATA,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Count tensor of the 2x2xK tables of every item for every split.
+
+    As analyzeDIF() groups responses by item, each item's focal and
+    reference responders are banded over their own score range, so an
+    examinee can fall in different strata for different items. The
+    responses are taken item-major from the CSC of x, and one bincount per
+    split over their (item, stratum, group, outcome) cells counts all of
+    that split's tables.
+
+    Args:
+        x: Persons x items CSR of administered 0/1 entries
+        membership: Persons x splits of FOCAL, REFERENCE or -1 (neither)
+        scores: Total score per person (total_scores(x) if omitted)
+        n_strata: Score bands
+
+    Returns:
+        (splits x items x strata x [reference, focal] x [incorrect, correct]
+        int64 tensor, splits x items x strata x 2 band bounds)
+    """
+    n_splits = membership.shape[1]
+    n_items = x.shape[1]
+    scores = total_scores(x) if scores is None else np.asarray(scores, np.float64)
+    by_item = x.tocsc()
+    by_item.sort_indices()
+    persons = by_item.indices
+    items = np.repeat(np.arange(n_items), np.diff(by_item.indptr))
+    correct = (by_item.data > 0).astype(np.int64)
+    entry_scores = scores[persons]
+
+    tables = np.zeros((n_splits, n_items, n_strata, 2, 2), dtype=np.int64)
+    ranges = np.zeros((n_splits, n_items, n_strata, 2))
+    for k in range(n_splits):
+        group = membership[persons, k]
+        kept = group >= 0
+        strata, ranges[k] = stratify(entry_scores[kept], items[kept], n_items, n_strata)
+        cells = ((items[kept] * n_strata + strata) * 2 + group[kept]) * 2
+        tables[k] = np.bincount(
+            cells + correct[kept], minlength=n_items * n_strata * 4
+        ).reshape(n_items, n_strata, 2, 2)
+    return tables, ranges
+
+
+def chi_square_p_value(chi_square: np.ndarray, df: int = 1) -> np.ndarray:
+    """
+    chiSquarePValue(): 2 (1 - Phi(sqrt(chi2 / df))), the 1-df tail of
+    chi2 / df; computeLordChiSquare() passes chi2 / df with df = 2.
+    """
+    chi_square = np.asarray(chi_square, dtype=np.float64)
+    p = erfc(np.sqrt(np.maximum(chi_square, 0) / (2 * df)))
+    return np.where(chi_square > 0, p, 1.0)
+
+
+def mantel_haenszel(tables: np.ndarray) -> pd.DataFrame:
+    """
+    computeMantelHaenszel() for every item of a count tensor: alpha_mh,
+    delta_mh, chi_square (continuity corrected), p_value, strata_count and
+    the group sizes.
+    """
+    t = tables.astype(np.float64)
+    a, b = t[:, :, FOCAL, 1], t[:, :, FOCAL, 0]
+    c, d = t[:, :, REFERENCE, 1], t[:, :, REFERENCE, 0]
+    total = a + b + c + d
+    present = total > 0
+    safe = np.where(present, total, 1.0)
+
+    sum_ad = np.sum(a * d / safe, axis=1)
+    sum_bc = np.sum(b * c / safe, axis=1)
+    alpha = np.divide(sum_ad, sum_bc, out=np.ones_like(sum_ad), where=sum_bc > 0)
+    delta = DELTA_SCALE * np.log(np.maximum(alpha, MIN_ALPHA))
+
+    n1, n2, m1, m0 = a + b, c + d, a + c, b + d
+    deviation = np.sum(a - n1 * m1 / safe, axis=1)
+    # (T - 1 || 1): a stratum of one examinee divides by 1
+    dof = np.where(total - 1 != 0, total - 1, 1.0)
+    variance = np.sum(n1 * n2 * m1 * m0 / (safe * safe * dof), axis=1)
+    corrected = np.maximum(0, np.abs(deviation) - 0.5)
+    chi = np.divide(
+        corrected**2, variance, out=np.zeros_like(variance), where=variance > 0
+    )
+    return pd.DataFrame(
+        {
+            "n_focal": n1.sum(axis=1).astype(np.int64),
+            "n_reference": n2.sum(axis=1).astype(np.int64),
+            "alpha_mh": alpha,
+            "delta_mh": delta,
+            "chi_square": chi,
+            "p_value": chi_square_p_value(chi),
+            "strata_count": present.sum(axis=1),
+        }
+    )
+
+
+def ets_classification(delta: np.ndarray, chi_square: np.ndarray) -> np.ndarray:
+    """classifyDIF(): C, B or A per item."""
+    significant = chi_square_p_value(chi_square) < SIGNIFICANCE_LEVEL
+    size = np.abs(delta)
+    return np.select(
+        [
+            (size >= MODERATE_DELTA) & significant,
+            (size >= NEGLIGIBLE_DELTA) & significant,
+        ],
+        ["C", "B"],
+        "A",
+    )
+
+
+def lord_chi_square(
+    difficulty: np.ndarray, p_focal: np.ndarray, p_reference: np.ndarray
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    analyzeDIF()'s Lord chi-square: group difficulties shifted by the
+    logit of each group's proportion correct, compared under
+    computeLordChiSquare()'s assumed standard errors (the discrimination
+    difference is zero, the overall parameters being shared).
+
+    Returns:
+        (difficulty difference, chi-square, p-value)
+    """
+
+    def adjusted(p):
+        # log(p / max(1 - p, 0.01)); p = 0 is floored to keep it finite
+        odds = np.maximum(p, 1e-12) / np.maximum(1 - p, LORD_MIN_ODDS_DENOMINATOR)
+        return difficulty - np.log(odds)
+
+    diff = adjusted(p_focal) - adjusted(p_reference)
+    chi = (diff / LORD_SE_DIFFICULTY) ** 2 + (0.0 / LORD_SE_DISCRIMINATION) ** 2
+    return diff, chi, chi_square_p_value(chi, LORD_DF)
+
+
+def _membership(labels: np.ndarray, split: DIFSplit) -> np.ndarray:
+    membership = np.full(len(labels), -1, dtype=np.int64)
+    membership[labels == split.reference] = REFERENCE
+    membership[labels == split.focal] = FOCAL
+    return membership
+
+
+def _split_result(
+    split: DIFSplit,
+    tables: np.ndarray,
+    ranges: np.ndarray,
+    items: pd.Index,
+    difficulty: Optional[np.ndarray],
+    min_group_size: int,
+) -> DIFResult:
+    """analyzeDIF()'s per-item results from one split's count tensor."""
+    stats = mantel_haenszel(tables)
+    stats.index = items
+    stats.index.name = "item"
+    stats["ets"] = ets_classification(stats["delta_mh"], stats["chi_square"])
+    stats["flagged"] = stats["ets"] == "C"
+    stats["direction"] = np.select(
+        [
+            stats["delta_mh"] > DIRECTION_DELTA,
+            stats["delta_mh"] < -DIRECTION_DELTA,
+        ],
+        ["favors_reference", "favors_focal"],
+        "none",
+    )
+    if difficulty is not None:
+        right = tables[:, :, :, 1].sum(axis=1)
+        n = np.maximum(tables.sum(axis=(1, 3)), 1)
+        diff, chi, p = lord_chi_square(
+            np.asarray(difficulty, dtype=np.float64),
+            right[:, FOCAL] / n[:, FOCAL],
+            right[:, REFERENCE] / n[:, REFERENCE],
+        )
+        stats["lord_difficulty_diff"] = diff
+        stats["lord_chi_square"] = chi
+        stats["lord_p_value"] = p
+
+    analyzed = (stats["n_focal"] >= min_group_size) & (
+        stats["n_reference"] >= min_group_size
+    )
+    order = np.argsort(-stats["delta_mh"].abs().to_numpy()[analyzed], kind="stable")
+    kept = np.flatnonzero(analyzed.to_numpy())[order]
+    return DIFResult(
+        split=split,
+        items=stats.iloc[kept],
+        tables=tables[kept],
+        score_ranges=ranges[kept],
+        sample_size=int(tables.sum()),
+    )
+
+
+def analyze_split(
+    x: sp.csr_matrix,
+    labels: np.ndarray,
+    split: DIFSplit,
+    items: Optional[pd.Index] = None,
+    scores: Optional[np.ndarray] = None,
+    difficulty: Optional[np.ndarray] = None,
+    n_strata: int = N_STRATA,
+    min_group_size: int = MIN_GROUP_SIZE,
+) -> DIFResult:
+    """
+    analyzeDIF() for one split over all items at once.
+
+    Args:
+        x: Persons x items CSR of administered 0/1 entries
+        labels: Group label per person (object array; anything else is
+            outside the split)
+        split: Reference and focal group
+        items: Item IDs (column positions if omitted)
+        scores: Total score per person
+        difficulty: IRT difficulty per item, for the Lord chi-square
+        n_strata: Score bands
+        min_group_size: Responses needed from each group to analyze an item
+    """
+    membership = _membership(labels, split)[:, None]
+    tables, ranges = contingency_tables(x, membership, scores, n_strata)
+    items = items if items is not None else pd.RangeIndex(x.shape[1])
+    return _split_result(
+        split, tables[0], ranges[0], pd.Index(items), difficulty, min_group_size
+    )
+
+
+def default_splits(
+    groups: pd.DataFrame, reference: Optional[dict[str, str]] = None
+) -> list[DIFSplit]:
+    """
+    Reference group (given, else the variable's largest group) against
+    each other group of every variable.
+    """
+    splits = []
+    for variable in groups.columns:
+        counts = groups[variable].dropna().astype(str).value_counts()
+        if counts.empty:
+            continue
+        ref = (reference or {}).get(variable) or counts.index[0]
+        splits.extend(
+            DIFSplit(variable, ref, focal) for focal in counts.index if focal != ref
+        )
+    return splits
+
+
+def screen_dif(
+    responses: ResponseInput,
+    groups: pd.DataFrame,
+    splits: Optional[Sequence[DIFSplit]] = None,
+    reference: Optional[dict[str, str]] = None,
+    items: Optional[Sequence] = None,
+    difficulty: Optional[np.ndarray] = None,
+    n_strata: int = N_STRATA,
+    min_group_size: int = MIN_GROUP_SIZE,
+) -> list[DIFResult]:
+    """
+    Mantel-Haenszel DIF of every item for every split, all splits counted
+    in one contingency_tables() pass.
+
+    Args:
+        responses: Persons x items responses (ResponseMatrix, dense array
+            with NaN for missing, or sparse matrix of administered entries)
+        groups: One column of group labels per grouping variable, aligned
+            with the response rows (NaN outside every group)
+        splits: Splits to screen (default_splits(groups, reference))
+        reference: Reference group per variable for default_splits()
+        items: Item IDs (the ResponseMatrix vocabulary by default)
+        difficulty: IRT difficulty per item, to add the Lord chi-square
+        n_strata: Score bands
+        min_group_size: Responses needed from each group to analyze an item
+    """
+    if items is None and isinstance(responses, ResponseMatrix):
+        items = responses.items.index
+    x = _to_sparse(responses)
+    if len(groups) != x.shape[0]:
+        raise ValueError(f"{len(groups)} group rows for {x.shape[0]} examinees")
+    splits = list(splits) if splits is not None else default_splits(groups, reference)
+    if not splits:
+        return []
+    labels = {
+        variable: groups[variable].astype("string").to_numpy(object, na_value=None)
+        for variable in {s.variable for s in splits}
+    }
+    membership = np.column_stack([_membership(labels[s.variable], s) for s in splits])
+    tables, ranges = contingency_tables(x, membership, n_strata=n_strata)
+    items = pd.Index(items) if items is not None else pd.RangeIndex(x.shape[1])
+    return [
+        _split_result(split, tables[k], ranges[k], items, difficulty, min_group_size)
+        for k, split in enumerate(splits)
+    ]
+
+
+def enamed_groups(codes: pd.DataFrame) -> pd.DataFrame:
+    """
+    Group labels from INEP-coded columns (any of the ENAMED_SPLITS source
+    columns, or columns already named after the variables).
+    """
+    groups = {}
+    for variable, (column, labels) in ENAMED_SPLITS.items():
+        source = column if column in codes else variable
+        if source in codes:
+            raw = codes[source]
+            if raw.dtype == object or isinstance(raw.dtype, pd.CategoricalDtype):
+                raw = raw.astype(object)
+            groups[variable] = raw.map(
+                lambda v: labels.get(v, labels.get(str(v))) if pd.notna(v) else None
+            )
+    return pd.DataFrame(groups, index=codes.index)
+
+
+def enamed_reference_groups(store=None) -> dict[str, str]:
+    """Largest ENAMED (Enade population) group of each ENAMED_SPLITS variable."""
+    from ..data.enamed import open_enamed
+
+    store = store or open_enamed()
+    reference = {}
+    for variable, (column, _) in ENAMED_SPLITS.items():
+        labels = enamed_groups(store.read([column]))[variable].dropna()
+        if not labels.empty:
+            reference[variable] = labels.value_counts().index[0]
+    return reference
+
+
+def write_analysis(results: Sequence[DIFResult], path: str = DEFAULT_OUTPUT) -> str:
+    """Write the DIFAnalysis of every split to path (atomically)."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump([r.to_json() for r in results], f, indent=2, default=float)
+    os.replace(tmp, path)
+    return path
+
+
+def main(argv: Union[Sequence[str], None] = None) -> None:
+    parser = argparse.ArgumentParser(description="Mantel-Haenszel DIF screening")
+    parser.add_argument(
+        "--input", help="Exported item responses (default: export from the backend)"
+    )
+    parser.add_argument(
+        "--groups",
+        required=True,
+        help="Export with user_id and INEP-coded group columns "
+        f"({', '.join(c for c, _ in ENAMED_SPLITS.values())})",
+    )
+    parser.add_argument(
+        "--calibration", help="IRT calibration JSON, to add the Lord chi-square"
+    )
+    parser.add_argument("--output", default=DEFAULT_OUTPUT)
+    parser.add_argument("--strata", type=int, default=N_STRATA)
+    parser.add_argument(
+        "--no-enamed-reference",
+        action="store_true",
+        help="Use each variable's largest group here, not in ENAMED",
+    )
+    args = parser.parse_args(argv)
+
+    from ..data.columnar import read_export
+
+    if args.input:
+        matrix = ResponseMatrix.from_export(args.input)
+    else:
+        from ..data.supabase_export import export_irt_item_responses
+
+        matrix = ResponseMatrix.from_frame(export_irt_item_responses())
+    if len(matrix) == 0:
+        print("No item responses to screen.")
+        return
+    codes = read_export(args.groups).drop_duplicates("user_id", keep="last")
+    codes = codes.set_index(codes["user_id"].astype(str))
+    groups = enamed_groups(codes.reindex(matrix.users.index.astype(str)))
+    reference = None if args.no_enamed_reference else enamed_reference_groups()
+
+    difficulty = None
+    if args.calibration:
+        from ..models.irt_calibration import read_calibration
+
+        calibration, _ = read_calibration(args.calibration)
+        difficulty = calibration.items["difficulty"].reindex(matrix.items.index)
+
+    results = screen_dif(
+        matrix,
+        groups,
+        reference=reference,
+        difficulty=None if difficulty is None else difficulty.to_numpy(),
+        n_strata=args.strata,
+    )
+    path = write_analysis(results, args.output)
+    for result in results:
+        summary = result.summary()
+        split = result.split
+        print(
+            f"{split.variable}: {split.focal} vs {split.reference}: "
+            f"{summary['classificationCounts']} -> {summary['overallFairness']}"
+        )
+    print(f"Wrote {len(results)} splits to {path}")
+
+
+if __name__ == "__main__":
+    main()
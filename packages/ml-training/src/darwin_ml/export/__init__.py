@@ -0,0 +1,62 @@
+"""
+Model export: serialized artifacts and the versioned model registry.
+
+Like darwin_ml.data, the public names below are resolved from their
+submodules on first attribute access, so importing the package does not
+pull in numpy, onnx or onnxruntime.
+"""
+
+import importlib
+from typing import TYPE_CHECKING, Any
+
+# Public name -> defining submodule
+_EXPORTS = {
+    "json_bytes": ".artifacts",
+    "npz_bytes": ".artifacts",
+    "read_npz": ".artifacts",
+    "content_hash": ".artifacts",
+    "load_artifact": ".artifacts",
+    "measure_latency": ".artifacts",
+    "ArtifactEntry": ".registry",
+    "ModelRegistry": ".registry",
+    "MODELS": ".registry",
+    "publish_artifacts": ".registry",
+}
+
+__all__ = [
+    "json_bytes",
+    "npz_bytes",
+    "read_npz",
+    "content_hash",
+    "load_artifact",
+    "measure_latency",
+    "ArtifactEntry",
+    "ModelRegistry",
+    "MODELS",
+    "publish_artifacts",
+]
+
+if TYPE_CHECKING:
+    from .artifacts import (
+        content_hash,
+        json_bytes,
+        load_artifact,
+        measure_latency,
+        npz_bytes,
+        read_npz,
+    )
+    from .registry import MODELS, ArtifactEntry, ModelRegistry, publish_artifacts
+
+
+def __getattr__(name: str) -> Any:
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    # Cache on the package so later lookups skip __getattr__
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted([*globals(), *__all__])
@@ -0,0 +1,149 @@
+"""
+Model Artifacts
+
+Serializers for the files the model registry stores. Tree and logistic
+models are already ONNX graphs; parameter models (IRT, MIRT, BKT, FSRS,
+HLR) are stored as compact JSON, and the per-user FSRS weights as an NPZ
+of dense arrays. Every serializer is deterministic, so the SHA-256 of an
+artifact's bytes changes only when the model does.
+
+JSON content hashes ignore VOLATILE_KEYS (run timestamps, durations,
+generated batch names), which change on every run even when the fitted
+parameters do not.
+"""
+
+import hashlib
+import io
+import json
+import time
+import zipfile
+from typing import Any, Union
+
+import numpy as np
+
+FORMATS = ("onnx", "json", "npz")
+VOLATILE_KEYS = frozenset({"updatedAt", "durationMs", "batch_name", "estimated_at"})
+
+# Fixed member timestamp (the zip epoch) so NPZ bytes are reproducible
+_ZIP_DATE = (1980, 1, 1, 0, 0, 0)
+
+LATENCY_BATCH_ROWS = 1_024
+LATENCY_CALLS = 50
+
+
+def json_bytes(payload: Any) -> bytes:
+    """Compact JSON: no indentation, minimal separators, keys sorted."""
+    return json.dumps(
+        payload, separators=(",", ":"), sort_keys=True, default=float
+    ).encode()
+
+
+def _strip_volatile(payload: Any) -> Any:
+    if isinstance(payload, dict):
+        return {
+            key: _strip_volatile(value)
+            for key, value in payload.items()
+            if key not in VOLATILE_KEYS
+        }
+    if isinstance(payload, list):
+        return [_strip_volatile(value) for value in payload]
+    return payload
+
+
+def npz_bytes(arrays: dict[str, np.ndarray]) -> bytes:
+    """Deflated .npz archive of arrays, byte-for-byte reproducible."""
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        for name in sorted(arrays):
+            member = zipfile.ZipInfo(f"{name}.npy", date_time=_ZIP_DATE)
+            member.compress_type = zipfile.ZIP_DEFLATED
+            array = io.BytesIO()
+            np.lib.format.write_array(array, np.asarray(arrays[name]))
+            archive.writestr(member, array.getvalue())
+    return buffer.getvalue()
+
+
+def read_npz(data: bytes) -> dict[str, np.ndarray]:
+    with np.load(io.BytesIO(data), allow_pickle=False) as archive:
+        return {name: archive[name] for name in archive.files}
+
+
+def fsrs_user_arrays(payload: dict) -> dict[str, np.ndarray]:
+    """The UserWeights JSON of models.fsrs as aligned per-user arrays."""
+    users = sorted(payload.get("users", {}))
+    rows = [payload["users"][user] for user in users]
+    n_weights = len(payload["globalWeights"])
+    return {
+        "global_weights": np.asarray(payload["globalWeights"], dtype=np.float32),
+        "users": np.asarray(users, dtype=str),
+        "weights": np.asarray(
+            [row["weights"] for row in rows], dtype=np.float32
+        ).reshape(len(rows), n_weights),
+        "reviews": np.asarray([row["reviews"] for row in rows], dtype=np.int64),
+        "log_loss": np.asarray([row["logLoss"] for row in rows], dtype=np.float32),
+        "default_log_loss": np.asarray(
+            [row["defaultLogLoss"] for row in rows], dtype=np.float32
+        ),
+    }
+
+
+def content_hash(data: bytes, fmt: str) -> str:
+    """SHA-256 of an artifact's content, ignoring VOLATILE_KEYS for JSON."""
+    if fmt == "json":
+        data = json_bytes(_strip_volatile(json.loads(data)))
+    return hashlib.sha256(data).hexdigest()
+
+
+def load_artifact(data: bytes, fmt: str) -> Any:
+    """Parse artifact bytes: an onnx.ModelProto, a JSON value or NPZ arrays."""
+    if fmt == "onnx":
+        import onnx
+
+        return onnx.load_from_string(data)
+    if fmt == "json":
+        return json.loads(data)
+    if fmt == "npz":
+        return read_npz(data)
+    raise ValueError(f"Unknown artifact format {fmt!r} (expected one of {FORMATS})")
+
+
+def measure_latency(data: bytes, fmt: str) -> dict[str, Union[float, int]]:
+    """
+    Cold-load time of an artifact and, for ONNX graphs, scoring cost on
+    zero-filled inputs: median single-row latency and batched throughput.
+    """
+    begin = time.perf_counter()
+    if fmt != "onnx":
+        load_artifact(data, fmt)
+        return {"loadMs": round(1e3 * (time.perf_counter() - begin), 3)}
+
+    import onnxruntime as ort
+
+    session = ort.InferenceSession(data, providers=["CPUExecutionProvider"])
+    load_ms = 1e3 * (time.perf_counter() - begin)
+
+    def feed(rows: int) -> dict[str, np.ndarray]:
+        return {
+            node.name: np.zeros(
+                [rows if not isinstance(d, int) else d for d in node.shape],
+                dtype=np.float32,
+            )
+            for node in session.get_inputs()
+        }
+
+    single, batch = feed(1), feed(LATENCY_BATCH_ROWS)
+    session.run(None, single)  # warm-up
+    calls = np.empty(LATENCY_CALLS)
+    for k in range(LATENCY_CALLS):
+        begin = time.perf_counter()
+        session.run(None, single)
+        calls[k] = time.perf_counter() - begin
+    begin = time.perf_counter()
+    for _ in range(LATENCY_CALLS):
+        session.run(None, batch)
+    batched = time.perf_counter() - begin
+    return {
+        "loadMs": round(load_ms, 3),
+        "p50RowUs": round(1e6 * float(np.median(calls)), 3),
+        "rowsPerSecond": round(LATENCY_CALLS * LATENCY_BATCH_ROWS / batched),
+    }
@@ -0,0 +1,226 @@
+"""
+Serving Optimization
+
+Post-export step for ONNX models before they are published. The graph is
+first rewritten offline by onnxruntime's optimizer (constant folding,
+redundant Identity/Cast elimination, node fusions), which is lossless and
+saves the work at every cold load. Dynamic int8 quantization is then tried:
+weights of MatMul/Gemm nodes become int8 and activations are quantized on
+the fly. The quantized graph replaces the float one only if it has
+quantized nodes and its held-out AUC and log-loss stay within the given
+tolerances.
+
+Tree ensembles (the pass predictor) have no quantizable operators, so for
+them the step reduces to the graph optimization; the report records why
+the float graph was kept.
+"""
+
+import os
+import tempfile
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+from sklearn.metrics import log_loss, roc_auc_score
+
+OPTIMIZATION_LEVEL = "extended"
+MAX_AUC_DROP = 0.002
+MAX_LOG_LOSS_INCREASE = 0.005
+
+# Operators emitted by quantize_dynamic
+QUANTIZED_OPS = frozenset(
+    {
+        "DynamicQuantizeLinear",
+        "DynamicQuantizeMatMul",
+        "MatMulInteger",
+        "ConvInteger",
+        "QGemm",
+        "QAttention",
+    }
+)
+EVAL_BATCH_ROWS = 1_024
+LATENCY_CALLS = 50
+
+
+def _session(data: bytes, options=None):
+    import onnxruntime as ort
+
+    return ort.InferenceSession(data, options, providers=["CPUExecutionProvider"])
+
+
+def optimize_graph(data: bytes, level: str = OPTIMIZATION_LEVEL) -> bytes:
+    """The graph as rewritten by onnxruntime ("basic", "extended" or "all")."""
+    import onnxruntime as ort
+
+    levels = {
+        "basic": ort.GraphOptimizationLevel.ORT_ENABLE_BASIC,
+        "extended": ort.GraphOptimizationLevel.ORT_ENABLE_EXTENDED,
+        "all": ort.GraphOptimizationLevel.ORT_ENABLE_ALL,
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        options = ort.SessionOptions()
+        options.graph_optimization_level = levels[level]
+        options.optimized_model_filepath = os.path.join(tmp, "optimized.onnx")
+        _session(data, options)
+        with open(options.optimized_model_filepath, "rb") as f:
+            return f.read()
+
+
+def quantize_int8(data: bytes) -> bytes:
+    """Dynamic int8 quantization (weights QInt8, activations at run time)."""
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    with tempfile.TemporaryDirectory() as tmp:
+        source, target = os.path.join(tmp, "float.onnx"), os.path.join(tmp, "q.onnx")
+        with open(source, "wb") as f:
+            f.write(data)
+        quantize_dynamic(source, target, weight_type=QuantType.QInt8)
+        with open(target, "rb") as f:
+            return f.read()
+
+
+def quantized_nodes(data: bytes) -> int:
+    import onnx
+
+    graph = onnx.load_from_string(data).graph
+    return sum(node.op_type in QUANTIZED_OPS for node in graph.node)
+
+
+def _positive_probability(outputs: list) -> np.ndarray:
+    """P(y = 1) from a model's last output: (N,), (N, 1) or (N, 2)."""
+    p = np.asarray(outputs[-1], dtype=np.float64)
+    if p.ndim == 2:
+        p = p[:, -1]
+    return p
+
+
+def evaluate(data: bytes, x: np.ndarray, y: np.ndarray) -> dict:
+    """
+    Held-out AUC and log-loss of an ONNX binary classifier, its cold-load
+    time, median single-row latency and batched throughput.
+    """
+    x = np.ascontiguousarray(x, dtype=np.float32)
+    begin = time.perf_counter()
+    session = _session(data)
+    load_ms = 1e3 * (time.perf_counter() - begin)
+    name = session.get_inputs()[0].name
+
+    p = np.concatenate(
+        [
+            _positive_probability(session.run(None, {name: x[k : k + EVAL_BATCH_ROWS]}))
+            for k in range(0, len(x), EVAL_BATCH_ROWS)
+        ]
+    )
+    calls = np.empty(LATENCY_CALLS)
+    for k in range(LATENCY_CALLS):
+        row = x[k % len(x) : k % len(x) + 1]
+        begin = time.perf_counter()
+        session.run(None, {name: row})
+        calls[k] = time.perf_counter() - begin
+    batch = np.resize(x, (EVAL_BATCH_ROWS, x.shape[1]))
+    begin = time.perf_counter()
+    for _ in range(LATENCY_CALLS):
+        session.run(None, {name: batch})
+    batched = time.perf_counter() - begin
+    both = len(np.unique(y)) == 2
+    return {
+        "auc": float(roc_auc_score(y, p)) if both else float("nan"),
+        "logLoss": float(log_loss(y, np.clip(p, 1e-7, 1 - 1e-7), labels=[0, 1])),
+        "loadMs": round(load_ms, 3),
+        "p50RowUs": round(1e6 * float(np.median(calls)), 3),
+        "rowsPerSecond": round(LATENCY_CALLS * EVAL_BATCH_ROWS / batched),
+        "bytes": len(data),
+    }
+
+
+@dataclass(frozen=True)
+class ServingReport:
+    """Float vs int8 comparison behind optimize_for_serving()'s choice."""
+
+    kept: str
+    reason: str
+    float_metrics: dict
+    int8_metrics: Optional[dict]
+    quantized_nodes: int
+    auc_delta: Optional[float]
+    log_loss_delta: Optional[float]
+
+    def to_json(self) -> dict:
+        return {
+            "kept": self.kept,
+            "reason": self.reason,
+            "float": self.float_metrics,
+            "int8": self.int8_metrics,
+            "quantizedNodes": self.quantized_nodes,
+            "aucDelta": self.auc_delta,
+            "logLossDelta": self.log_loss_delta,
+        }
+
+    @property
+    def metrics(self) -> dict:
+        """Metrics of the kept variant."""
+        if self.kept == "int8":
+            return self.int8_metrics
+        return self.float_metrics
+
+
+def optimize_for_serving(
+    data: bytes,
+    x: np.ndarray,
+    y: np.ndarray,
+    max_auc_drop: float = MAX_AUC_DROP,
+    max_log_loss_increase: float = MAX_LOG_LOSS_INCREASE,
+    level: str = OPTIMIZATION_LEVEL,
+) -> tuple[bytes, ServingReport]:
+    """
+    Optimize an ONNX classifier and quantize it when that costs little
+    accuracy on held-out data. A check that cannot be computed (e.g. AUC
+    when the held-out labels are all one class) counts as failed, so the
+    float model is kept.
+
+    Args:
+        data: Exported float model
+        x: Held-out features (float32 matrix the model takes)
+        y: Held-out binary labels
+        max_auc_drop: Largest tolerated AUC decrease of the int8 model
+        max_log_loss_increase: Largest tolerated log-loss increase
+        level: onnxruntime graph optimization level
+
+    Returns:
+        (the bytes to serve, ServingReport)
+    """
+    optimized = optimize_graph(data, level)
+    float_metrics = evaluate(optimized, x, y)
+    quantized = quantize_int8(optimized)
+    n_quantized = quantized_nodes(quantized)
+    if n_quantized == 0:
+        report = ServingReport(
+            "float", "no quantizable operators", float_metrics, None, 0, None, None
+        )
+        return optimized, report
+
+    int8_metrics = evaluate(quantized, x, y)
+    auc_delta = int8_metrics["auc"] - float_metrics["auc"]
+    log_loss_delta = int8_metrics["logLoss"] - float_metrics["logLoss"]
+    if not np.isfinite(auc_delta):
+        kept, reason = "float", "AUC undefined on the held-out labels"
+    elif not np.isfinite(log_loss_delta):
+        kept, reason = "float", "log-loss undefined on the held-out labels"
+    elif -auc_delta > max_auc_drop:
+        kept, reason = "float", f"AUC drop {-auc_delta:.4f} > {max_auc_drop}"
+    elif log_loss_delta > max_log_loss_increase:
+        kept = "float"
+        reason = f"log-loss increase {log_loss_delta:.4f} > {max_log_loss_increase}"
+    else:
+        kept, reason = "int8", "within accuracy tolerance"
+    report = ServingReport(
+        kept,
+        reason,
+        float_metrics,
+        int8_metrics,
+        n_quantized,
+        round(auc_delta, 6) if np.isfinite(auc_delta) else None,
+        round(log_loss_delta, 6) if np.isfinite(log_loss_delta) else None,
+    )
+    return (quantized if kept == "int8" else optimized), report
@@ -0,0 +1,460 @@
+"""
+Model Registry
+
+Versioned, content-hashed store for the models train_all_models.sh
+produces. Each published artifact is written once as
+<root>/<model>/<model>-v<version>-<hash>.<format> and described in
+<root>/manifest.json: its SHA-256, size, training-data watermark, metrics
+and load/scoring latency. Publishing a model whose content hash matches
+its latest version is a no-op, so the web app can read the manifest, load
+the newest version of each model and skip the ones it already has.
+
+publish_artifacts() registers the files the model modules write to
+artifacts/ (see MODELS). The watermark of each model is the source
+watermark of the newest export-cache entry of the datasets it trains on.
+ONNX models go through export.optimize first: the optimized graph, or its
+int8 quantization when that stays within the accuracy tolerances on the
+model's held-out split, is what gets published, and the comparison is
+recorded under "serving".
+
+Versions and the skip-unchanged check come from the manifest, so the
+registry root must outlive the run: the scheduled workflow restores the
+previous run's artifacts/ (registry included) before training.
+
+Usage:
+    python -m darwin_ml.export.registry --artifacts artifacts
+"""
+
+import argparse
+import hashlib
+import json
+import os
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Callable, Optional, Sequence, Union
+
+from .artifacts import (
+    FORMATS,
+    content_hash,
+    fsrs_user_arrays,
+    json_bytes,
+    load_artifact,
+    measure_latency,
+    npz_bytes,
+    read_npz,
+)
+from .optimize import MAX_AUC_DROP, MAX_LOG_LOSS_INCREASE
+
+MANIFEST = "manifest.json"
+SCHEMA_VERSION = 1
+# Versions kept on disk per model; older files are deleted on publish
+KEEP_VERSIONS = 5
+HASH_CHARS = 12
+
+DEFAULT_ARTIFACTS = "artifacts"
+DEFAULT_ROOT = "artifacts/registry"
+
+
+@dataclass(frozen=True)
+class ArtifactEntry:
+    """One published version of a model, as recorded in the manifest."""
+
+    name: str
+    version: int
+    file: str
+    format: str
+    sha256: str
+    content_hash: str
+    size: int
+    created_at: str
+    watermark: dict[str, Any] = field(default_factory=dict)
+    metrics: dict[str, Any] = field(default_factory=dict)
+    latency: dict[str, Any] = field(default_factory=dict)
+    serving: Optional[dict] = None
+
+    def to_json(self) -> dict:
+        return {
+            "version": self.version,
+            "file": self.file,
+            "format": self.format,
+            "sha256": self.sha256,
+            "contentHash": self.content_hash,
+            "bytes": self.size,
+            "createdAt": self.created_at,
+            "watermark": self.watermark,
+            "metrics": self.metrics,
+            "latency": self.latency,
+            **({"serving": self.serving} if self.serving else {}),
+        }
+
+    @classmethod
+    def from_json(cls, name: str, payload: dict) -> "ArtifactEntry":
+        return cls(
+            name=name,
+            version=payload["version"],
+            file=payload["file"],
+            format=payload["format"],
+            sha256=payload["sha256"],
+            content_hash=payload["contentHash"],
+            size=payload["bytes"],
+            created_at=payload["createdAt"],
+            watermark=payload.get("watermark", {}),
+            metrics=payload.get("metrics", {}),
+            latency=payload.get("latency", {}),
+            serving=payload.get("serving"),
+        )
+
+
+class ModelRegistry:
+    """
+    Directory of model artifacts plus their manifest.
+
+    Args:
+        root: Registry directory (created on first publish)
+        keep: Versions of each model kept on disk
+    """
+
+    def __init__(self, root: str = DEFAULT_ROOT, keep: int = KEEP_VERSIONS) -> None:
+        self.root = root
+        self.keep = keep
+
+    @property
+    def manifest_path(self) -> str:
+        return os.path.join(self.root, MANIFEST)
+
+    def manifest(self) -> dict:
+        try:
+            with open(self.manifest_path) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {"schemaVersion": SCHEMA_VERSION, "updatedAt": None, "models": {}}
+
+    def _write_manifest(self, manifest: dict) -> None:
+        manifest["updatedAt"] = datetime.now(timezone.utc).isoformat()
+        tmp = f"{self.manifest_path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(manifest, f, indent=2, default=str)
+        os.replace(tmp, self.manifest_path)
+
+    def versions(self, name: str) -> list[ArtifactEntry]:
+        """Recorded versions of a model, oldest first."""
+        model = self.manifest()["models"].get(name, {})
+        return [ArtifactEntry.from_json(name, v) for v in model.get("versions", [])]
+
+    def latest(self, name: str) -> Optional[ArtifactEntry]:
+        versions = self.versions(name)
+        return versions[-1] if versions else None
+
+    def path(self, entry: ArtifactEntry) -> str:
+        return os.path.join(self.root, entry.file)
+
+    def load(self, name: str, version: Optional[int] = None) -> Any:
+        """Parsed artifact of a model version (the latest by default)."""
+        entries = self.versions(name)
+        entry = next(
+            (e for e in reversed(entries) if version in (None, e.version)), None
+        )
+        if entry is None:
+            raise KeyError(f"Model {name!r} has no version {version or ''}".rstrip())
+        with open(self.path(entry), "rb") as f:
+            return load_artifact(f.read(), entry.format)
+
+    def publish(
+        self,
+        name: str,
+        data: bytes,
+        fmt: str,
+        metrics: Optional[dict] = None,
+        watermark: Optional[dict] = None,
+        latency: Optional[dict] = None,
+        serving: Optional[dict] = None,
+    ) -> tuple[ArtifactEntry, bool]:
+        """
+        Store data as the next version of a model unless its content is
+        unchanged. Returns the latest entry and whether it is new.
+
+        Args:
+            name: Model name (directory and manifest key)
+            data: Serialized artifact
+            fmt: One of FORMATS
+            metrics: Evaluation metrics to record
+            watermark: Training-data watermark per source dataset
+            latency: Load/scoring latency (measured here if omitted)
+            serving: ServingReport.to_json() of the optimization step
+        """
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown artifact format {fmt!r} (expected {FORMATS})")
+        digest = content_hash(data, fmt)
+        latest = self.latest(name)
+        if latest is not None and latest.content_hash == digest:
+            return latest, False
+
+        version = latest.version + 1 if latest else 1
+        sha256 = hashlib.sha256(data).hexdigest()
+        file = os.path.join(name, f"{name}-v{version}-{sha256[:HASH_CHARS]}.{fmt}")
+        entry = ArtifactEntry(
+            name=name,
+            version=version,
+            file=file,
+            format=fmt,
+            sha256=sha256,
+            content_hash=digest,
+            size=len(data),
+            created_at=datetime.now(timezone.utc).isoformat(),
+            watermark=watermark or {},
+            metrics=metrics or {},
+            latency=latency if latency is not None else measure_latency(data, fmt),
+            serving=serving,
+        )
+        os.makedirs(os.path.join(self.root, name), exist_ok=True)
+        tmp = f"{self.path(entry)}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, self.path(entry))
+
+        manifest = self.manifest()
+        model = manifest["models"].setdefault(name, {"versions": []})
+        model["versions"].append(entry.to_json())
+        for stale in model["versions"][: -self.keep]:
+            try:
+                os.remove(os.path.join(self.root, stale["file"]))
+            except FileNotFoundError:
+                pass
+        model["versions"] = model["versions"][-self.keep :]
+        model["latest"] = version
+        self._write_manifest(manifest)
+        return entry, True
+
+
+def _pick(*paths: str) -> Callable[[dict], dict]:
+    """Metrics extractor reading dotted key paths; the last key names it."""
+
+    def pick(payload: dict) -> dict:
+        metrics = {}
+        for path in paths:
+            value: Any = payload
+            for key in path.split("."):
+                value = value.get(key) if isinstance(value, dict) else None
+            if value is not None:
+                metrics[path.rsplit(".", 1)[-1]] = value
+        return metrics
+
+    return pick
+
+
+def _bkt_metrics(payload: dict) -> dict:
+    components = payload.get("components", {}).values()
+    return {
+        "components": len(components),
+        "converged": sum(c["converged"] for c in components),
+        "observations": sum(c["nObservations"] for c in components),
+    }
+
+
+@dataclass(frozen=True)
+class ModelSpec:
+    """How to register one model's output file."""
+
+    file: str
+    format: str
+    datasets: tuple[str, ...]
+    metrics: Callable[[dict], dict]
+    # Sidecar JSON the metrics are read from (default: the artifact itself)
+    metadata: Optional[str] = None
+    # JSON payload -> artifact bytes (default: compact JSON)
+    convert: Optional[Callable[[dict], bytes]] = None
+    # Held-out split (NPZ with x and y) to check optimized ONNX graphs on
+    evaluation: Optional[str] = None
+
+
+MODELS = {
+    "pass_predictor": ModelSpec(
+        "pass_predictor.onnx",
+        "onnx",
+        ("pass_prediction",),
+        _pick(
+            "metrics.calibrated.auc",
+            "metrics.calibrated.brier",
+            "metrics.calibrated.log_loss",
+            "metrics.calibrated.ece",
+            "split.test",
+        ),
+        metadata="pass_predictor.json",
+        evaluation="pass_predictor_eval.npz",
+    ),
+    "irt_calibration": ModelSpec(
+        "irt_calibration.json",
+        "json",
+        ("irt_responses",),
+        _pick("model", "converged", "n_persons", "batch.log_likelihood"),
+    ),
+    "mirt": ModelSpec(
+        "mirt_items.json",
+        "json",
+        ("irt_responses",),
+        _pick("converged", "iterations", "n_persons", "n_responses"),
+    ),
+    "cdm_dina": ModelSpec(
+        "cdm_dina.json",
+        "json",
+        ("irt_responses",),
+        _pick("em_converged", "em_iterations", "calibration_n", "fit_indices.bic"),
+    ),
+    "cdm_gdina": ModelSpec(
+        "cdm_gdina.json",
+        "json",
+        ("irt_responses",),
+        _pick("em_converged", "em_iterations", "calibration_n", "fit_indices.bic"),
+    ),
+    "bkt": ModelSpec("bkt_params.json", "json", ("study_activity",), _bkt_metrics),
+    "fsrs": ModelSpec(
+        "fsrs_weights.json",
+        "json",
+        ("flashcard_reviews",),
+        _pick("logLoss", "defaultLogLoss", "improvementRatio", "trainingSamples"),
+    ),
+    "fsrs_user": ModelSpec(
+        "fsrs_user_weights.json",
+        "npz",
+        ("flashcard_reviews",),
+        lambda payload: {"users": len(payload.get("users", {}))},
+        convert=lambda payload: npz_bytes(fsrs_user_arrays(payload)),
+    ),
+    "hlr": ModelSpec(
+        "hlr_weights.json",
+        "json",
+        ("flashcard_reviews",),
+        _pick("trainingLoss", "validationLoss", "trainingCount", "epochs"),
+    ),
+}
+
+
+def _read_json(path: str) -> dict:
+    with open(path) as f:
+        return json.load(f)
+
+
+def _serving_variant(
+    data: bytes, evaluation: Optional[str], tolerances: dict
+) -> tuple[bytes, dict, Optional[dict]]:
+    """Optimized (and maybe quantized) ONNX bytes, the report, latency."""
+    from .optimize import optimize_for_serving, optimize_graph
+
+    if evaluation is None or not os.path.exists(evaluation):
+        serving = {"kept": "float", "reason": "no held-out data to compare on"}
+        return optimize_graph(data), serving, None
+    with open(evaluation, "rb") as f:
+        held_out = read_npz(f.read())
+    data, report = optimize_for_serving(
+        data, held_out["x"], held_out["y"], **tolerances
+    )
+    latency = {k: report.metrics[k] for k in ("loadMs", "p50RowUs", "rowsPerSecond")}
+    return data, report.to_json(), latency
+
+
+def publish_artifacts(
+    artifacts: str = DEFAULT_ARTIFACTS,
+    registry: Optional[ModelRegistry] = None,
+    watermarks: Optional[dict[str, Any]] = None,
+    models: Optional[Sequence[str]] = None,
+    optimize: bool = True,
+    max_auc_drop: float = MAX_AUC_DROP,
+    max_log_loss_increase: float = MAX_LOG_LOSS_INCREASE,
+) -> dict[str, tuple[ArtifactEntry, bool]]:
+    """
+    Register every model file present in the artifacts directory.
+
+    Args:
+        artifacts: Directory the model modules wrote to
+        registry: Target registry (default: <artifacts>/registry)
+        watermarks: Source watermark per dataset (default: from the export
+            cache in DARWIN_ML_CACHE_DIR, if any)
+        models: Subset of MODELS to publish
+        optimize: Run ONNX models through export.optimize
+        max_auc_drop: AUC loss tolerated from int8 quantization
+        max_log_loss_increase: Log-loss increase tolerated from it
+    """
+    registry = registry or ModelRegistry(os.path.join(artifacts, "registry"))
+    if watermarks is None:
+        from ..data.cache import resolve_cache
+
+        cache = resolve_cache(None)
+        watermarks = cache.watermarks() if cache else {}
+
+    tolerances = {
+        "max_auc_drop": max_auc_drop,
+        "max_log_loss_increase": max_log_loss_increase,
+    }
+    published = {}
+    for name in models or MODELS:
+        spec = MODELS[name]
+        path = os.path.join(artifacts, spec.file)
+        if not os.path.exists(path):
+            continue
+        payload = None
+        if spec.file.endswith(".json"):
+            payload = _read_json(path)
+            data = (spec.convert or json_bytes)(payload)
+        else:
+            with open(path, "rb") as f:
+                data = f.read()
+        if spec.metadata:
+            metadata = os.path.join(artifacts, spec.metadata)
+            payload = _read_json(metadata) if os.path.exists(metadata) else {}
+        serving = latency = None
+        if optimize and spec.format == "onnx":
+            evaluation = spec.evaluation and os.path.join(artifacts, spec.evaluation)
+            data, serving, latency = _serving_variant(data, evaluation, tolerances)
+        published[name] = registry.publish(
+            name,
+            data,
+            spec.format,
+            metrics=spec.metrics(payload or {}),
+            watermark={d: watermarks[d] for d in spec.datasets if d in watermarks},
+            latency=latency,
+            serving=serving,
+        )
+    return published
+
+
+def main(argv: Union[Sequence[str], None] = None) -> None:
+    parser = argparse.ArgumentParser(description="Publish trained model artifacts")
+    parser.add_argument("--artifacts", default=DEFAULT_ARTIFACTS)
+    parser.add_argument(
+        "--registry", help="Registry directory (default: <artifacts>/registry)"
+    )
+    parser.add_argument("--model", action="append", choices=sorted(MODELS))
+    parser.add_argument("--keep", type=int, default=KEEP_VERSIONS)
+    parser.add_argument(
+        "--no-optimize",
+        action="store_true",
+        help="Publish ONNX models as exported (no graph optimization/int8)",
+    )
+    parser.add_argument("--max-auc-drop", type=float, default=MAX_AUC_DROP)
+    parser.add_argument(
+        "--max-log-loss-increase", type=float, default=MAX_LOG_LOSS_INCREASE
+    )
+    args = parser.parse_args(argv)
+
+    root = args.registry or os.path.join(args.artifacts, "registry")
+    if not os.path.exists(os.path.join(root, MANIFEST)):
+        print(f"No manifest in {root}; starting a new registry (all models at v1).")
+    published = publish_artifacts(
+        args.artifacts,
+        ModelRegistry(root, keep=args.keep),
+        models=args.model,
+        optimize=not args.no_optimize,
+        max_auc_drop=args.max_auc_drop,
+        max_log_loss_increase=args.max_log_loss_increase,
+    )
+    if not published:
+        print(f"No model artifacts found in {args.artifacts}.")
+    for name, (entry, changed) in published.items():
+        status = "published" if changed else "unchanged"
+        print(f"{name}: v{entry.version} {status} ({entry.size} bytes) -> {entry.file}")
+        if changed and entry.serving:
+            print(f"  serving {entry.serving['kept']}: {entry.serving['reason']}")
+
+
+if __name__ == "__main__":
+    main()
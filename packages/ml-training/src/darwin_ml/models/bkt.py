@@ -0,0 +1,503 @@
+"""
+Bayesian Knowledge Tracing
+
+Per-knowledge-component BKT parameters (pInit, pTransit, pSlip, pGuess) for
+the web app's calculators/bkt.ts, fitted by Baum-Welch EM on the study
+activity log, replacing estimateBKTParams' per-sequence loops.
+
+Every student x component sequence is packed into one ragged, step-major
+array: with sequences sorted by length, those still running at step t are
+a prefix, so the scaled forward and backward passes are one vectorized
+update per step for all sequences of all components. Expected counts per
+component are bincounts over the flat arrays. Parameters stay within the
+web app's bounds, components with too few observations keep the defaults,
+and groups of components can be fitted in a process pool.
+
+The fitted parameters are written as BKTParameters JSON, and each user's
+final mastery per component (traced with those parameters, as
+computeMasteryState does) is upserted into knowledge_states.
+
+Usage:
+    python -m darwin_ml.models.bkt --output artifacts/bkt_params.json
+"""
+
+import argparse
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Iterator, NamedTuple, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+from ..data.backend import DataBackend, get_backend, insert_rows
+
+PARAMS = ("pInit", "pTransit", "pSlip", "pGuess")
+# DEFAULT_BKT_PARAMS in packages/shared/src/types/bkt.ts
+DEFAULT_PARAMS = (0.1, 0.15, 0.05, 0.25)
+# Clamps of estimateBKTParams (slip and guess below 0.5 keep the states
+# distinguishable)
+BOUNDS = ((0.01, 0.99), (0.01, 0.99), (0.01, 0.40), (0.01, 0.40))
+MAX_ITER = 100
+# Summed absolute parameter change, as in DEFAULT_BKT_EM_CONFIG
+TOL = 1e-3
+MIN_OBSERVATIONS = 20
+# Component groups per worker, so a slow group does not hold up the pool
+GROUPS_PER_WORKER = 4
+
+KNOWLEDGE_STATES_TABLE = "knowledge_states"
+KNOWLEDGE_STATES_KEY = "user_id,topic"
+DEFAULT_OUTPUT = "artifacts/bkt_params.json"
+
+
+class _Packed(NamedTuple):
+    """
+    Sequences in step-major layout: step t holds entries
+    offsets[t]:offsets[t + 1], one per sequence longer than t, in order of
+    decreasing length.
+    """
+
+    seq_skill: np.ndarray
+    seq_user: np.ndarray
+    offsets: np.ndarray
+    correct: np.ndarray  # step-major
+    skill: np.ndarray  # component code per step-major entry
+    has_next: np.ndarray  # step-major entry is followed by another step
+
+    @property
+    def active(self) -> np.ndarray:
+        return np.diff(self.offsets)
+
+
+def _pack(skill: np.ndarray, user: np.ndarray, correct: np.ndarray) -> _Packed:
+    """Pack observations sorted by (skill, user, time) into sequences."""
+    n = len(skill)
+    start = np.flatnonzero(
+        np.r_[True, (skill[1:] != skill[:-1]) | (user[1:] != user[:-1])]
+    )
+    lengths = np.diff(np.r_[start, n])
+    seq = np.repeat(np.arange(len(start)), lengths)
+    position = np.arange(n) - start[seq]
+
+    by_length = np.argsort(-lengths, kind="stable")
+    rank = np.empty(len(start), dtype=np.int64)
+    rank[by_length] = np.arange(len(start))
+    # Sequences longer than t, for every step t
+    active = np.cumsum(np.bincount(lengths - 1)[::-1])[::-1]
+    offsets = np.r_[0, np.cumsum(active)]
+    flat = offsets[position] + rank[seq]
+
+    packed_correct = np.empty(n, dtype=bool)
+    packed_correct[flat] = correct
+    seq_skill = skill[start][by_length]
+    steps = np.repeat(np.arange(len(active)), active)
+    within = np.arange(n) - offsets[steps]
+    next_active = np.r_[active[1:], 0]
+    return _Packed(
+        seq_skill=seq_skill,
+        seq_user=user[start][by_length],
+        offsets=offsets,
+        correct=packed_correct,
+        skill=seq_skill[within],
+        has_next=within < next_active[steps],
+    )
+
+
+def _emissions(packed: _Packed, params: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """P(observation | learned) and P(observation | unlearned) per entry."""
+    slip = params[packed.skill, 2]
+    guess = params[packed.skill, 3]
+    learned = np.where(packed.correct, 1 - slip, slip)
+    unlearned = np.where(packed.correct, guess, 1 - guess)
+    return learned, unlearned
+
+
+def _forward(
+    packed: _Packed, params: np.ndarray, learned: np.ndarray, unlearned: np.ndarray
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Scaled forward pass: filtered P(L_t | o_1..t) and P(o_t | o_1..t-1) per
+    entry, plus every sequence's mastery after its last update.
+    """
+    offsets, active = packed.offsets, packed.active
+    transit = params[packed.seq_skill, 1]
+    mastery = params[packed.seq_skill, 0].copy()
+    filtered = np.empty(len(packed.correct))
+    scale = np.empty(len(packed.correct))
+    for t, n_t in enumerate(active):
+        step = slice(offsets[t], offsets[t + 1])
+        prior = mastery[:n_t]
+        joint = prior * learned[step]
+        evidence = joint + (1 - prior) * unlearned[step]
+        posterior = joint / evidence
+        filtered[step] = posterior
+        scale[step] = evidence
+        mastery[:n_t] = posterior + (1 - posterior) * transit[:n_t]
+    return filtered, scale, mastery
+
+
+def _e_step(packed: _Packed, params: np.ndarray, n_skills: int) -> tuple:
+    """Expected counts per component and their log-likelihoods."""
+    learned, unlearned = _emissions(packed, params)
+    filtered, scale, _ = _forward(packed, params, learned, unlearned)
+    offsets, active = packed.offsets, packed.active
+    transit = params[packed.seq_skill, 1]
+
+    # Backward pass on scaled betas; sequences ending at t keep beta = 1
+    beta_learned = np.ones(len(packed.seq_skill))
+    beta_unlearned = np.ones(len(packed.seq_skill))
+    gamma = np.empty(len(packed.correct))
+    learning = np.zeros(len(packed.correct))
+    for t in range(len(active) - 1, -1, -1):
+        n_t = active[t]
+        if t + 1 < len(active):
+            n_next = active[t + 1]
+            following = slice(offsets[t + 1], offsets[t + 1] + n_next)
+            to_learned = learned[following] * beta_learned[:n_next] / scale[following]
+            to_unlearned = (
+                unlearned[following] * beta_unlearned[:n_next] / scale[following]
+            )
+            t_next = transit[:n_next]
+            current = slice(offsets[t], offsets[t] + n_next)
+            learning[current] = (1 - filtered[current]) * t_next * to_learned
+            beta_unlearned[:n_next] = (1 - t_next) * to_unlearned + t_next * to_learned
+            beta_learned[:n_next] = to_learned
+        step = slice(offsets[t], offsets[t] + n_t)
+        gamma[step] = filtered[step] * beta_learned[:n_t]
+
+    def total(weights: np.ndarray, where: Optional[np.ndarray] = None) -> np.ndarray:
+        skill = packed.skill if where is None else packed.skill[where]
+        weights = weights if where is None else weights[where]
+        return np.bincount(skill, weights=weights, minlength=n_skills)
+
+    first = slice(0, active[0])
+    unknown = 1 - gamma
+    counts = {
+        "init": np.bincount(packed.seq_skill, weights=gamma[first], minlength=n_skills),
+        "sequences": np.bincount(packed.seq_skill, minlength=n_skills),
+        "learning": total(learning),
+        "unlearned_before": total(unknown, packed.has_next),
+        "slips": total(gamma * ~packed.correct),
+        "learned": total(gamma),
+        "guesses": total(unknown * packed.correct),
+        "unlearned": total(unknown),
+    }
+    return counts, total(np.log(scale))
+
+
+def _m_step(counts: dict, params: np.ndarray) -> np.ndarray:
+    def ratio(num: str, den: str, column: int) -> np.ndarray:
+        den_values = counts[den]
+        return np.where(
+            den_values > 0,
+            counts[num] / np.maximum(den_values, 1e-300),
+            params[:, column],
+        )
+
+    updated = np.column_stack(
+        [
+            ratio("init", "sequences", 0),
+            ratio("learning", "unlearned_before", 1),
+            ratio("slips", "learned", 2),
+            ratio("guesses", "unlearned", 3),
+        ]
+    )
+    bounds = np.asarray(BOUNDS)
+    return np.clip(updated, bounds[:, 0], bounds[:, 1])
+
+
+def _fit_group(
+    skill: np.ndarray,
+    user: np.ndarray,
+    correct: np.ndarray,
+    n_skills: int,
+    max_iter: int,
+    tol: float,
+    min_observations: int,
+) -> dict[str, np.ndarray]:
+    """EM for the components in one sorted slice (runs in pool workers)."""
+    packed = _pack(skill, user, correct)
+    params = np.tile(np.asarray(DEFAULT_PARAMS, dtype=np.float64), (n_skills, 1))
+    observations = np.bincount(skill, minlength=n_skills)
+    fitting = observations >= min_observations
+    converged = np.zeros(n_skills, dtype=bool)
+    iterations = np.zeros(n_skills, dtype=np.int64)
+    for _ in range(max_iter):
+        open_ = fitting & ~converged
+        if not open_.any():
+            break
+        counts, _ = _e_step(packed, params, n_skills)
+        updated = _m_step(counts, params)
+        change = np.abs(updated - params).sum(axis=1)
+        # Converged components are frozen, so results do not depend on how
+        # components are grouped
+        params[open_] = updated[open_]
+        iterations[open_] += 1
+        converged |= open_ & (change < tol)
+    _, log_likelihood = _e_step(packed, params, n_skills)
+    learned, unlearned = _emissions(packed, params)
+    _, _, mastery = _forward(packed, params, learned, unlearned)
+    return {
+        "params": params,
+        "log_likelihood": log_likelihood,
+        "iterations": iterations,
+        "converged": converged,
+        "observations": observations,
+        "seq_skill": packed.seq_skill,
+        "seq_user": packed.seq_user,
+        "mastery": mastery,
+    }
+
+
+def _skill_groups(skill: np.ndarray, n_groups: int) -> list[tuple[int, int]]:
+    """Contiguous row ranges of whole components with similar row counts."""
+    starts = np.flatnonzero(np.r_[True, skill[1:] != skill[:-1]])
+    cuts = np.searchsorted(starts, np.linspace(0, len(skill), n_groups + 1))
+    bounds = np.unique(np.r_[starts, len(skill)][np.clip(cuts, 0, len(starts))])
+    bounds[0] = 0
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+@dataclass(frozen=True)
+class BKTResult:
+    """
+    Fitted BKT parameters and the resulting mastery states.
+
+    params is indexed by knowledge component with pInit, pTransit, pSlip,
+    pGuess, n_observations, n_sequences, log_likelihood, iterations and
+    converged. mastery has one row per user and component with the final
+    P(L), response_count, correct_count and (when the observations carry
+    times) last_correct_at / last_incorrect_at.
+    """
+
+    params: pd.DataFrame
+    mastery: pd.DataFrame
+
+    def to_json(self) -> dict:
+        """BKTParameters per component, plus the fit summary."""
+        return {
+            "components": {
+                str(kc): {
+                    **{name: round(float(row[name]), 4) for name in PARAMS},
+                    "nObservations": int(row["n_observations"]),
+                    "logLikelihood": float(row["log_likelihood"]),
+                    "iterations": int(row["iterations"]),
+                    "converged": bool(row["converged"]),
+                }
+                for kc, row in self.params.iterrows()
+            },
+        }
+
+
+def fit_bkt(
+    observations: pd.DataFrame,
+    skill_column: str = "knowledge_component",
+    user_column: str = "user_id",
+    correct_column: str = "correct",
+    time_column: Optional[str] = "created_at",
+    max_iter: int = MAX_ITER,
+    tol: float = TOL,
+    min_observations: int = MIN_OBSERVATIONS,
+    workers: int = 1,
+) -> BKTResult:
+    """
+    Fit per-component BKT parameters by EM over all sequences at once.
+
+    Args:
+        observations: One row per practice opportunity
+        skill_column: Knowledge component of each row
+        user_column: Student of each row
+        correct_column: Whether the response was correct
+        time_column: Orders each sequence (row order is kept without it)
+        max_iter: EM iterations per component
+        tol: Stop a component once its parameters move less than this
+            (summed absolute change)
+        min_observations: Components with fewer rows keep DEFAULT_PARAMS
+        workers: Processes to fit component groups in (1 fits in-process)
+    """
+    df = observations[observations[skill_column].notna()]
+    has_time = time_column is not None and time_column in df.columns
+    skills, skill_labels = pd.factorize(df[skill_column], sort=True)
+    users, user_labels = pd.factorize(df[user_column])
+    skill_labels, user_labels = pd.Index(skill_labels), pd.Index(user_labels)
+    correct = df[correct_column].fillna(False).to_numpy(dtype=bool)
+    keys = [users, skills]
+    if has_time:
+        times = pd.to_datetime(df[time_column], utc=True)
+        keys.insert(0, times.to_numpy(dtype="datetime64[ns]").view(np.int64))
+    order = np.lexsort(keys)
+    skill, user, correct = skills[order], users[order], correct[order]
+    n_skills = len(skill_labels)
+
+    args = (n_skills, max_iter, tol, min_observations)
+    if len(skill) == 0:
+        parts = []
+    elif workers > 1:
+        groups = _skill_groups(skill, workers * GROUPS_PER_WORKER)
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [
+                pool.submit(
+                    _fit_group, skill[lo:hi], user[lo:hi], correct[lo:hi], *args
+                )
+                for lo, hi in groups
+            ]
+            parts = [future.result() for future in futures]
+    else:
+        parts = [_fit_group(skill, user, correct, *args)]
+
+    params = np.tile(np.asarray(DEFAULT_PARAMS, dtype=np.float64), (n_skills, 1))
+    summary = {
+        key: np.zeros(n_skills, dtype=dtype)
+        for key, dtype in (
+            ("log_likelihood", np.float64),
+            ("iterations", np.int64),
+            ("converged", bool),
+            ("observations", np.int64),
+        )
+    }
+    for part in parts:
+        mine = part["observations"] > 0
+        params[mine] = part["params"][mine]
+        for key, values in summary.items():
+            values[mine] = part[key][mine]
+
+    def cat(key: str) -> np.ndarray:
+        return np.concatenate([part[key] for part in parts]) if parts else np.empty(0)
+
+    seq_skill = cat("seq_skill").astype(np.int64)
+    seq_user = cat("seq_user").astype(np.int64)
+    params_frame = pd.DataFrame(
+        params,
+        columns=list(PARAMS),
+        index=pd.Index(skill_labels, name="knowledge_component"),
+    )
+    params_frame["n_observations"] = summary["observations"]
+    params_frame["n_sequences"] = np.bincount(seq_skill, minlength=n_skills)
+    params_frame["log_likelihood"] = summary["log_likelihood"]
+    params_frame["iterations"] = summary["iterations"]
+    params_frame["converged"] = summary["converged"]
+
+    # Per-sequence counts and last times, keyed like the packed sequences
+    key = skill.astype(np.int64) * max(len(user_labels), 1) + user
+    seq_key = seq_skill * max(len(user_labels), 1) + seq_user
+    per_seq = pd.DataFrame({"key": key, "correct": correct})
+    if has_time:
+        per_seq["time"] = times.to_numpy()[order]
+    grouped = per_seq.groupby("key")
+    stats = pd.DataFrame(
+        {
+            "response_count": grouped.size(),
+            "correct_count": grouped["correct"].sum(),
+        }
+    )
+    if has_time:
+        last = per_seq.groupby(["key", "correct"])["time"].max().unstack()
+        stats["last_correct_at"] = last.get(True)
+        stats["last_incorrect_at"] = last.get(False)
+    mastery = pd.DataFrame(
+        {
+            "user_id": user_labels.to_numpy(dtype=object)[seq_user],
+            "knowledge_component": skill_labels.to_numpy(dtype=object)[seq_skill],
+            "mastery": cat("mastery"),
+        }
+    )
+    mastery = pd.concat(
+        [mastery, stats.reindex(seq_key).reset_index(drop=True)], axis=1
+    )
+    return BKTResult(params=params_frame, mastery=mastery)
+
+
+def knowledge_state_rows(
+    result: BKTResult, updated_at: Optional[datetime] = None
+) -> Iterator[dict]:
+    """knowledge_states rows (one per user and component) for a fit."""
+    stamp = (updated_at or datetime.now(timezone.utc)).isoformat()
+    mastery = result.mastery
+
+    def iso(column: str) -> list:
+        if column not in mastery.columns:
+            return [None] * len(mastery)
+        values = pd.to_datetime(mastery[column], utc=True)
+        return [None if pd.isna(v) else v.isoformat() for v in values]
+
+    columns = zip(
+        mastery["user_id"].tolist(),
+        mastery["knowledge_component"].tolist(),
+        np.round(mastery["mastery"].to_numpy(), 3).tolist(),
+        mastery["response_count"].astype(int).tolist(),
+        iso("last_correct_at"),
+        iso("last_incorrect_at"),
+    )
+    for user, topic, value, count, last_correct, last_incorrect in columns:
+        yield {
+            "user_id": user,
+            "topic": topic,
+            "mastery_probability": value,
+            "response_count": count,
+            "last_correct_at": last_correct,
+            "last_incorrect_at": last_incorrect,
+            "updated_at": stamp,
+        }
+
+
+def write_knowledge_states(
+    result: BKTResult, client: Optional[DataBackend] = None
+) -> int:
+    """Upsert knowledge_state_rows() on (user_id, topic); returns rows written."""
+    client = client or get_backend()
+    return insert_rows(
+        client,
+        KNOWLEDGE_STATES_TABLE,
+        knowledge_state_rows(result),
+        on_conflict=KNOWLEDGE_STATES_KEY,
+    )
+
+
+def write_params(result: BKTResult, path: str = DEFAULT_OUTPUT) -> str:
+    """Write result.to_json() to path (atomically)."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(result.to_json(), f, indent=2)
+    os.replace(tmp, path)
+    return path
+
+
+def main(argv: Union[Sequence[str], None] = None) -> None:
+    parser = argparse.ArgumentParser(description="Fit BKT parameters per component")
+    parser.add_argument(
+        "--input", help="Exported study activity (default: export from the backend)"
+    )
+    parser.add_argument("--output", default=DEFAULT_OUTPUT)
+    parser.add_argument("--days-back", type=int, default=365)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument(
+        "--dry-run", action="store_true", help="Do not write to knowledge_states"
+    )
+    args = parser.parse_args(argv)
+
+    if args.input:
+        from ..data.columnar import read_export
+
+        activity = read_export(args.input)
+    else:
+        from ..data.supabase_export import export_study_activity
+
+        activity = export_study_activity(days_back=args.days_back)
+    if activity.empty:
+        print("No study activity to fit.")
+        return
+
+    result = fit_bkt(activity, workers=args.workers)
+    path = write_params(result, args.output)
+    fitted = int(result.params["iterations"].gt(0).sum())
+    print(f"Fitted {fitted}/{len(result.params)} components -> {path}")
+    if not args.dry_run:
+        written = write_knowledge_states(result)
+        print(f"Wrote {written} rows to {KNOWLEDGE_STATES_TABLE}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,690 @@
+"""
+Cognitive Diagnosis (DINA / G-DINA)
+
+EM (MMLE) calibration of the web app's cognitive diagnostic models
+(packages/shared/src/calculators/cdm.ts). The 2^K latent classes (bit k of
+class c is mastery of attribute k, as enumerateLatentClasses() orders them)
+and the Q-matrix are arrays, so every item's success probability in every
+class is one items x classes table:
+
+    DINA:    P_jc = 1 - s_j if class c masters all of item j's attributes,
+             g_j otherwise
+    G-DINA:  P_jc = sum of delta_jS over the subsets S of the attributes
+             class c masters among item j's (identity link)
+
+The E-step is one sparse x dense product per block of respondents,
+[correct | incorrect] responses x [log P; log(1 - P)], plus the log class
+priors and a logsumexp over classes; only administered items enter each
+respondent's likelihood. The same blocks give the M-step's expected
+counts as (responses)' x posteriors. DINA's slip and guessing are ratios of
+those counts, and G-DINA's deltas are the Moebius transform of the
+reduced-class success rates (the closed-form solution of cdm.ts's
+buildGDINADesignMatrix() / solveOLS() system). Up to MAX_ATTRIBUTES
+attributes are supported.
+
+Parameters are exported as cdm_parameters rows (item_parameters holding
+DINAItemParameters / GDINAItemParameters, class_priors, fit_indices), the
+shape /api/cdm/classify reads back.
+
+Usage:
+    python -m darwin_ml.models.cdm --model both --dry-run
+"""
+
+import argparse
+import json
+import os
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Iterable, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from scipy.special import logsumexp
+from scipy.stats import chi2
+
+from ..data.backend import DataBackend, get_backend, insert_rows
+from ..data.responses import ResponseMatrix
+
+# CDM_ATTRIBUTES in packages/shared/src/types/cdm.ts, in bit order
+ATTRIBUTES = (
+    "data_gathering",
+    "diagnostic_reasoning",
+    "clinical_judgment",
+    "therapeutic_decision",
+    "preventive_medicine",
+    "emergency_management",
+)
+# 2^8 = 256 classes; posteriors are BATCH_ROWS x 256 float64 blocks
+MAX_ATTRIBUTES = 8
+MODELS = ("dina", "gdina")
+
+# DEFAULT_CDM_EM_CONFIG
+MAX_ITER = 500
+TOL = 1e-6
+SLIP_GUESS_BOUNDS = (0.001, 0.499)
+MIN_CLASS_PRIOR = 1e-6
+# initializeDINA()
+INITIAL_SLIP = 0.1
+INITIAL_GUESSING = 0.2
+# Probability clamp of dinaProbability() / gdinaProbabilityIdentity()
+PROB_FLOOR = 1e-10
+
+# Respondents per E-step block
+BATCH_ROWS = 8_192
+
+Q_MATRIX_TABLE = "question_q_matrix"
+PARAMETERS_TABLE = "cdm_parameters"
+DEFAULT_OUTPUT_DIR = "artifacts"
+
+
+def latent_classes(n_attributes: int) -> np.ndarray:
+    """2^K x K 0/1 mastery patterns; row c has bit k of c in column k."""
+    if not 1 <= n_attributes <= MAX_ATTRIBUTES:
+        raise ValueError(
+            f"{n_attributes} attributes; between 1 and {MAX_ATTRIBUTES} supported"
+        )
+    codes = np.arange(1 << n_attributes)
+    return ((codes[:, None] >> np.arange(n_attributes)) & 1).astype(np.int8)
+
+
+def q_matrix_from_rows(
+    rows: Union[pd.DataFrame, Iterable[dict]],
+    attributes: Sequence[str] = ATTRIBUTES,
+) -> pd.DataFrame:
+    """
+    Items x attributes 0/1 frame from question_q_matrix rows (question_id,
+    attribute_id), as buildQMatrixFromRows() builds it; unknown attributes
+    are ignored.
+    """
+    frame = pd.DataFrame(rows, columns=["question_id", "attribute_id"])
+    frame = frame[frame["attribute_id"].isin(attributes)]
+    q = pd.crosstab(frame["question_id"].astype(str), frame["attribute_id"])
+    q = q.reindex(columns=list(attributes), fill_value=0).clip(upper=1)
+    q.index.name = "item"
+    q.columns.name = None
+    return q.astype(np.int8)
+
+
+def _moebius(values: np.ndarray) -> np.ndarray:
+    """
+    Subset (Moebius) inversion over the last axis, of length 2^m: the
+    coefficients delta with values[l] = sum of delta[S] over subsets S of l.
+    """
+    out = values.astype(np.float64, copy=True)
+    size = out.shape[-1]
+    bit = 1
+    while bit < size:
+        has = (np.arange(size) & bit) > 0
+        out[..., has] -= out[..., ~has]
+        bit <<= 1
+    return out
+
+
+def _zeta(delta: np.ndarray) -> np.ndarray:
+    """Inverse of _moebius(): sums of delta over the subsets of each index."""
+    out = delta.astype(np.float64, copy=True)
+    size = out.shape[-1]
+    bit = 1
+    while bit < size:
+        has = (np.arange(size) & bit) > 0
+        out[..., has] += out[..., ~has]
+        bit <<= 1
+    return out
+
+
+@dataclass(frozen=True)
+class _Structure:
+    """Q-matrix derived tables shared by both models."""
+
+    q: np.ndarray  # items x K (0/1)
+    classes: np.ndarray  # 2^K x K
+    eta: np.ndarray  # items x 2^K, class masters all required attributes
+    reduced: np.ndarray  # items x 2^K, reduced class index (cdm.ts order)
+    n_required: np.ndarray  # K_j* per item
+
+    @classmethod
+    def from_q(cls, q: np.ndarray) -> "_Structure":
+        q = np.asarray(q, dtype=np.int64)
+        classes = latent_classes(q.shape[1]).astype(np.int64)
+        n_required = q.sum(axis=1)
+        eta = (classes @ q.T).T == n_required[:, None]
+        # Required attribute k of item j is bit (its rank among them) of the
+        # reduced index, as reducedClassIndex() packs them
+        rank = np.cumsum(q, axis=1) - 1
+        weights = np.where(q > 0, 1 << np.maximum(rank, 0), 0)
+        reduced = (classes @ weights.T).T
+        return cls(q, classes, eta, reduced, n_required)
+
+    @property
+    def n_reduced(self) -> int:
+        """Width of the padded reduced-class axis, 2^max K_j*."""
+        return 1 << int(self.n_required.max())
+
+
+def _dina_probabilities(
+    structure: _Structure, slip: np.ndarray, guessing: np.ndarray
+) -> np.ndarray:
+    """buildDINAProbMatrix(): items x classes."""
+    p = np.where(structure.eta, (1 - slip)[:, None], guessing[:, None])
+    return np.clip(p, PROB_FLOOR, 1 - PROB_FLOOR)
+
+
+def _gdina_probabilities(structure: _Structure, delta: np.ndarray) -> np.ndarray:
+    """buildGDINAProbMatrix() from padded items x 2^max K_j* deltas."""
+    reduced_p = _zeta(delta)
+    p = np.take_along_axis(reduced_p, structure.reduced, axis=1)
+    return np.clip(p, PROB_FLOOR, 1 - PROB_FLOOR)
+
+
+def _design(x: sp.csr_matrix) -> sp.csr_matrix:
+    """Persons x 2 items CSR: [correct indicators | incorrect indicators]."""
+    # Every response lands in exactly one half, so the row pointer is x's
+    columns = np.where(x.data > 0, x.indices, x.indices + x.shape[1])
+    return sp.csr_matrix(
+        (np.ones(x.nnz), columns, x.indptr.copy()),
+        shape=(x.shape[0], 2 * x.shape[1]),
+    )
+
+
+def _blocks(x: sp.csr_matrix, batch_rows: int) -> list[sp.csr_matrix]:
+    """_design(x) split into blocks of batch_rows respondents (sliced once)."""
+    design = _design(x)
+    return [
+        design[start : start + batch_rows]
+        for start in range(0, design.shape[0], batch_rows)
+    ]
+
+
+def _log_posteriors(
+    block: sp.csr_matrix, log_table: np.ndarray, log_prior: np.ndarray
+) -> tuple[np.ndarray, np.ndarray]:
+    """(block x classes normalized log posteriors, per-person log marginals)."""
+    joint = block @ log_table
+    joint += log_prior
+    marginal = logsumexp(joint, axis=1)
+    joint -= marginal[:, None]
+    return joint, marginal
+
+
+def _e_step(
+    blocks: list[sp.csr_matrix], p: np.ndarray, priors: np.ndarray
+) -> tuple[np.ndarray, np.ndarray, np.ndarray, float]:
+    """
+    Posterior class memberships of all respondents, in blocks.
+
+    Returns:
+        (expected correct counts items x classes, expected answered counts
+        items x classes, posterior class totals, log-likelihood)
+    """
+    n_items = p.shape[0]
+    log_table = np.vstack([np.log(p), np.log1p(-p)])
+    log_prior = np.log(np.maximum(priors, 1e-300))
+    counts = np.zeros_like(log_table)
+    class_totals = np.zeros(p.shape[1])
+    log_likelihood = 0.0
+    for block in blocks:
+        log_post, marginal = _log_posteriors(block, log_table, log_prior)
+        posterior = np.exp(log_post, out=log_post)
+        counts += block.T @ posterior
+        class_totals += posterior.sum(axis=0)
+        log_likelihood += float(marginal.sum())
+    right = counts[:n_items]
+    return right, right + counts[n_items:], class_totals, log_likelihood
+
+
+def _m_step_dina(
+    structure: _Structure, right: np.ndarray, answered: np.ndarray
+) -> tuple[np.ndarray, np.ndarray]:
+    """mStepDINA(): slip and guessing from the expected counts."""
+    eta = structure.eta
+    masters = np.where(eta, answered, 0).sum(axis=1) + 1e-10
+    slips = np.where(eta, answered - right, 0).sum(axis=1)
+    others = np.where(eta, 0, answered).sum(axis=1) + 1e-10
+    guesses = np.where(eta, 0, right).sum(axis=1)
+    return (
+        np.clip(slips / masters, *SLIP_GUESS_BOUNDS),
+        np.clip(guesses / others, *SLIP_GUESS_BOUNDS),
+    )
+
+
+def _m_step_gdina(
+    structure: _Structure, right: np.ndarray, answered: np.ndarray
+) -> np.ndarray:
+    """
+    mStepGDINA(): deltas solving S_j delta_j = P_j for the success rates
+    P_j of each item's reduced classes (padded to 2^max K_j*).
+    """
+    n_items, width = len(structure.q), structure.n_reduced
+    cells = (np.arange(n_items)[:, None] * width + structure.reduced).ravel()
+    n = np.bincount(cells, weights=answered.ravel(), minlength=n_items * width)
+    r = np.bincount(cells, weights=right.ravel(), minlength=n_items * width)
+    n, r = n.reshape(n_items, width), r.reshape(n_items, width)
+    rates = np.divide(r, n, out=np.full_like(r, 0.5), where=n > 1e-10)
+    return _moebius(rates)
+
+
+def _update_priors(class_totals: np.ndarray) -> np.ndarray:
+    priors = np.maximum(MIN_CLASS_PRIOR, class_totals / class_totals.sum())
+    return priors / priors.sum()
+
+
+def model_fit(
+    x: sp.csr_matrix,
+    p: np.ndarray,
+    priors: np.ndarray,
+    log_likelihood: float,
+    n_parameters: int,
+    batch_rows: int = BATCH_ROWS,
+) -> dict:
+    """
+    computeModelFit() as CDMFit JSON: AIC/BIC and the limited-information
+    G2 over univariate and bivariate margins, RMSEA and SRMR. Margins are
+    taken over the respondents who answered the item (pair), and SRMR uses
+    every item pair rather than the first 20.
+    """
+    n_persons, n_items = x.shape
+    # [correct | incorrect]' x [correct | incorrect] in dense blocks: every
+    # pair's 2x2 counts in one BLAS product per block (exact in float32)
+    gram = np.zeros((2 * n_items, 2 * n_items))
+    for block in _blocks(x, batch_rows):
+        dense = block.toarray().astype(np.float32)
+        gram += dense.T @ dense
+    counts = np.diagonal(gram)
+    n_item = counts[:n_items] + counts[n_items:]
+    observed = counts[:n_items] / np.maximum(n_item, 1)
+
+    marginal = np.clip(p @ priors, PROB_FLOOR, 1 - PROB_FLOOR)
+    o = np.clip(observed, PROB_FLOOR, 1 - PROB_FLOOR)
+    g_squared = float(
+        np.sum(
+            2
+            * n_item
+            * (o * np.log(o / marginal) + (1 - o) * np.log((1 - o) / (1 - marginal)))
+        )
+    )
+
+    # 2x2 tables of every item pair (j1 < j2): 11, 10, 01, 00; the model's
+    # under local independence given the class
+    pairs = np.triu_indices(n_items, 1)
+    q = 1 - p
+    observed_cells, model_cells = [], []
+    for a, pa in ((0, p), (n_items, q)):
+        for b, pb in ((0, p), (n_items, q)):
+            observed_cells.append(gram[a : a + n_items, b : b + n_items][pairs])
+            model_cells.append(((pa * priors) @ pb.T)[pairs])
+    n_pair = sum(observed_cells)
+    for obs, expected in zip(observed_cells, model_cells):
+        expected_n = np.maximum(expected, PROB_FLOOR) * n_pair
+        positive = obs > 0
+        g_squared += float(
+            2 * np.sum(obs[positive] * np.log(obs[positive] / expected_n[positive]))
+        )
+
+    df = max(1, n_items + n_items * (n_items - 1) // 2 - n_parameters)
+    rmsea = float(np.sqrt(max(0.0, (g_squared - df) / (n_persons * df))))
+
+    both = n_pair > 0
+    n11, n10, n01 = (cells[both] for cells in observed_cells[:3])
+    total = n_pair[both]
+    mean1, mean2 = (n11 + n10) / total, (n11 + n01) / total
+    observed_cov = n11 / total - mean1 * mean2
+    model_cov = model_cells[0][both] - (
+        marginal[pairs[0][both]] * marginal[pairs[1][both]]
+    )
+    denominator = np.sqrt(mean1 * (1 - mean1) * mean2 * (1 - mean2))
+    usable = denominator > 1e-10
+    residuals = (observed_cov - model_cov)[usable] / denominator[usable]
+    srmr = float(np.sqrt(np.mean(residuals**2))) if usable.any() else 0.0
+
+    return {
+        "logLikelihood": log_likelihood,
+        "numParameters": n_parameters,
+        "numObservations": n_persons,
+        "aic": -2 * log_likelihood + 2 * n_parameters,
+        "bic": -2 * log_likelihood + n_parameters * np.log(n_persons),
+        "gSquared": g_squared,
+        "df": df,
+        "rmsea": rmsea,
+        "srmr": srmr,
+        "pValue": float(chi2.sf(g_squared, df)) if g_squared > 0 else 1.0,
+    }
+
+
+@dataclass(frozen=True)
+class CDMResult:
+    """
+    Calibrated DINA or G-DINA model.
+
+    items is indexed by item ID with required_attributes (0-based indices),
+    slip and guessing (DINA) or delta (G-DINA coefficients, length
+    2^K_j*), and n_responses. probabilities is the items x classes success
+    table the estimates imply.
+    """
+
+    model: str
+    attributes: tuple[str, ...]
+    items: pd.DataFrame
+    class_priors: np.ndarray
+    probabilities: np.ndarray
+    log_likelihood: float
+    iterations: int
+    converged: bool
+    fit: dict
+    n_persons: int
+    n_responses: int
+
+    def item_parameters(self) -> list[dict]:
+        """DINAItemParameters / GDINAItemParameters of every item."""
+        rows = []
+        for item, row in self.items.iterrows():
+            required = [int(k) for k in row["required_attributes"]]
+            if self.model == "dina":
+                rows.append(
+                    {
+                        "itemId": str(item),
+                        "slip": float(row["slip"]),
+                        "guessing": float(row["guessing"]),
+                        "requiredAttributes": required,
+                    }
+                )
+            else:
+                rows.append(
+                    {
+                        "itemId": str(item),
+                        "deltaCoeffs": [float(d) for d in row["delta"]],
+                        "numRequiredAttributes": len(required),
+                        "requiredAttributes": required,
+                        "linkFunction": "identity",
+                    }
+                )
+        return rows
+
+    def to_json(self) -> dict:
+        """A cdm_parameters row."""
+        return {
+            "model_type": self.model,
+            "link_function": "identity",
+            "item_parameters": self.item_parameters(),
+            "class_priors": self.class_priors.tolist(),
+            "em_iterations": self.iterations,
+            "em_converged": self.converged,
+            "final_log_likelihood": round(self.log_likelihood, 4),
+            "fit_indices": self.fit,
+            "calibration_n": self.n_persons,
+            "calibration_items": len(self.items),
+            "estimated_at": datetime.now(timezone.utc).isoformat(),
+        }
+
+
+def item_probabilities(payload: dict, n_attributes: int = len(ATTRIBUTES)):
+    """
+    Items x classes success table of a cdm_parameters row, computed from
+    its item_parameters the way cdm.ts evaluates them.
+    """
+    items = payload["item_parameters"]
+    q = np.zeros((len(items), n_attributes), dtype=np.int64)
+    for j, item in enumerate(items):
+        q[j, item["requiredAttributes"]] = 1
+    structure = _Structure.from_q(q)
+    if payload["model_type"] == "dina":
+        slip = np.array([item["slip"] for item in items])
+        guessing = np.array([item["guessing"] for item in items])
+        return _dina_probabilities(structure, slip, guessing)
+    delta = np.zeros((len(items), structure.n_reduced))
+    for j, item in enumerate(items):
+        delta[j, : len(item["deltaCoeffs"])] = item["deltaCoeffs"]
+    return _gdina_probabilities(structure, delta)
+
+
+def _prepare(
+    responses: ResponseMatrix, q_matrix: pd.DataFrame
+) -> tuple[sp.csr_matrix, pd.DataFrame, np.ndarray]:
+    """Responses to the Q-matrix items that require some attribute."""
+    q = q_matrix[q_matrix.sum(axis=1) > 0]
+    codes = pd.Index(responses.items.values, dtype=object).get_indexer(
+        q.index.astype(str)
+    )
+    q = q[codes >= 0]
+    x = responses.to_csr()[:, codes[codes >= 0]]
+    answered = np.diff(x.indptr) > 0
+    return x[answered], q, answered
+
+
+def calibrate_cdm(
+    responses: ResponseMatrix,
+    q_matrix: pd.DataFrame,
+    model: str = "dina",
+    max_iter: int = MAX_ITER,
+    tol: float = TOL,
+    batch_rows: int = BATCH_ROWS,
+    verbose: bool = False,
+) -> CDMResult:
+    """
+    Estimate DINA or G-DINA item parameters and class priors by EM.
+
+    Args:
+        responses: Users x items responses
+        q_matrix: Items x attributes 0/1 frame indexed by item ID (at most
+            MAX_ATTRIBUTES columns, e.g. q_matrix_from_rows()); items
+            without a required attribute or without responses are left out
+        model: "dina" or "gdina"
+        max_iter: EM cycle limit
+        tol: Stop once the log-likelihood changes by less than this
+        batch_rows: Respondents per E-step block
+    """
+    if model not in MODELS:
+        raise ValueError(f"Unknown model {model!r}; expected one of {MODELS}")
+    x, q, _ = _prepare(responses, q_matrix)
+    if x.shape[1] == 0:
+        raise ValueError("No responses to Q-matrix items")
+    structure = _Structure.from_q(q.to_numpy())
+    blocks = _blocks(x, batch_rows)
+    n_classes = len(structure.classes)
+    priors = np.full(n_classes, 1 / n_classes)
+    n_items = x.shape[1]
+    if model == "dina":
+        slip = np.full(n_items, INITIAL_SLIP)
+        guessing = np.full(n_items, INITIAL_GUESSING)
+        p = _dina_probabilities(structure, slip, guessing)
+    else:
+        # Start from initializeDINA()'s values rather than initializeGDINA()'s
+        # 1 / 2^K_j* everywhere: with every class alike, EM never separates
+        # them
+        full = (1 << structure.n_required)[:, None] - 1
+        rates = np.where(
+            np.arange(structure.n_reduced) == full,
+            1 - INITIAL_SLIP,
+            INITIAL_GUESSING,
+        )
+        delta = _moebius(rates)
+        p = _gdina_probabilities(structure, delta)
+
+    previous = -np.inf
+    converged = False
+    iteration = 0
+    for iteration in range(1, max_iter + 1):
+        right, answered, class_totals, log_likelihood = _e_step(blocks, p, priors)
+        if verbose and iteration % 25 == 0:
+            print(f"  iteration {iteration}: log-likelihood={log_likelihood:.4f}")
+        # The likelihood is that of the current parameters, which are kept
+        if abs(log_likelihood - previous) < tol:
+            converged = True
+            break
+        previous = log_likelihood
+        if model == "dina":
+            slip, guessing = _m_step_dina(structure, right, answered)
+            p = _dina_probabilities(structure, slip, guessing)
+        else:
+            delta = _m_step_gdina(structure, right, answered)
+            p = _gdina_probabilities(structure, delta)
+        priors = _update_priors(class_totals)
+
+    frame = pd.DataFrame(index=pd.Index(q.index.astype(str), name="item"))
+    frame["required_attributes"] = [list(np.flatnonzero(row)) for row in structure.q]
+    if model == "dina":
+        frame["slip"] = slip
+        frame["guessing"] = guessing
+        n_parameters = 2 * n_items + n_classes - 1
+    else:
+        widths = 1 << structure.n_required
+        frame["delta"] = [list(d[:w]) for d, w in zip(delta, widths)]
+        n_parameters = int(widths.sum()) + n_classes - 1
+    frame["n_responses"] = np.bincount(x.indices, minlength=n_items)
+    return CDMResult(
+        model=model,
+        attributes=tuple(q.columns),
+        items=frame,
+        class_priors=priors,
+        probabilities=p,
+        log_likelihood=log_likelihood,
+        iterations=iteration,
+        converged=converged,
+        fit=model_fit(x, p, priors, log_likelihood, n_parameters, batch_rows),
+        n_persons=x.shape[0],
+        n_responses=int(x.nnz),
+    )
+
+
+def classify(
+    responses: ResponseMatrix, result: CDMResult, batch_rows: int = BATCH_ROWS
+) -> pd.DataFrame:
+    """
+    Batched classifyStudentDINA() / classifyStudentGDINA() for all users.
+
+    Returns:
+        Frame indexed by user_id with latent_class (MAP), eap_<attribute>
+        marginal mastery probabilities, posterior_entropy (bits) and
+        n_responses; users with no responses to calibrated items are left out
+    """
+    q = pd.DataFrame(
+        [
+            np.isin(np.arange(len(result.attributes)), k).astype(np.int8)
+            for k in result.items["required_attributes"]
+        ],
+        index=result.items.index,
+        columns=list(result.attributes),
+    )
+    x, _, answered = _prepare(responses, q)
+    p = result.probabilities
+    log_table = np.vstack([np.log(p), np.log1p(-p)])
+    log_prior = np.log(np.maximum(result.class_priors, 1e-300))
+    classes = latent_classes(len(result.attributes))
+
+    latent, eap, entropy = [], [], []
+    for block in _blocks(x, batch_rows):
+        log_post, _ = _log_posteriors(block, log_table, log_prior)
+        posterior = np.exp(log_post)
+        latent.append(log_post.argmax(axis=1))
+        eap.append(posterior @ classes)
+        entropy.append(-(posterior * log_post).sum(axis=1) / np.log(2))
+
+    frame = pd.DataFrame(
+        np.vstack(eap),
+        columns=[f"eap_{a}" for a in result.attributes],
+        index=pd.Index(
+            np.asarray(responses.users.values, dtype=object)[answered], name="user_id"
+        ),
+    )
+    frame.insert(0, "latent_class", np.concatenate(latent))
+    frame["posterior_entropy"] = np.concatenate(entropy)
+    frame["n_responses"] = np.diff(x.indptr)
+    return frame
+
+
+def write_parameters(result: CDMResult, path: str) -> str:
+    """Write result.to_json() to path (atomically)."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(result.to_json(), f, indent=2, default=float)
+    os.replace(tmp, path)
+    return path
+
+
+def insert_parameters(result: CDMResult, client: Optional[DataBackend] = None) -> int:
+    """Insert result.to_json() into cdm_parameters."""
+    client = client or get_backend()
+    return insert_rows(client, PARAMETERS_TABLE, [result.to_json()])
+
+
+def _q_matrix(client=None) -> pd.DataFrame:
+    from ..data.supabase_export import iter_keyset_pages
+
+    client = client or get_backend()
+    rows = [
+        row
+        for page in iter_keyset_pages(
+            client, Q_MATRIX_TABLE, "id, question_id, attribute_id"
+        )
+        for row in page
+    ]
+    return q_matrix_from_rows(rows)
+
+
+def main(argv: Union[Sequence[str], None] = None) -> None:
+    parser = argparse.ArgumentParser(description="Calibrate the DINA/G-DINA models")
+    parser.add_argument("--model", choices=[*MODELS, "both"], default="both")
+    parser.add_argument(
+        "--input", help="Exported item responses (default: export from the backend)"
+    )
+    parser.add_argument(
+        "--q-matrix",
+        help="Export of question_q_matrix rows (default: read from the backend)",
+    )
+    parser.add_argument("--output-dir", default=DEFAULT_OUTPUT_DIR)
+    parser.add_argument("--days-back", type=int, default=365)
+    parser.add_argument("--max-iter", type=int, default=MAX_ITER)
+    parser.add_argument("--batch-rows", type=int, default=BATCH_ROWS)
+    parser.add_argument(
+        "--dry-run", action="store_true", help="Do not insert into cdm_parameters"
+    )
+    args = parser.parse_args(argv)
+
+    if args.input:
+        matrix = ResponseMatrix.from_export(args.input)
+    else:
+        from ..data.supabase_export import export_irt_item_responses
+
+        matrix = ResponseMatrix.from_frame(
+            export_irt_item_responses(days_back=args.days_back)
+        )
+    if args.q_matrix:
+        from ..data.columnar import read_export
+
+        q_matrix = q_matrix_from_rows(read_export(args.q_matrix))
+    else:
+        q_matrix = _q_matrix()
+    if len(matrix) == 0 or q_matrix.empty:
+        print("No item responses or Q-matrix rows to calibrate.")
+        return
+
+    models = MODELS if args.model == "both" else (args.model,)
+    results = {}
+    for model in models:
+        result = calibrate_cdm(
+            matrix,
+            q_matrix,
+            model=model,
+            max_iter=args.max_iter,
+            batch_rows=args.batch_rows,
+            verbose=True,
+        )
+        path = write_parameters(
+            result, os.path.join(args.output_dir, f"cdm_{model}.json")
+        )
+        if not args.dry_run:
+            insert_parameters(result)
+        results[model] = result
+        print(
+            f"{model}: {len(result.items)} items, {result.n_persons} users, "
+            f"{result.iterations} iterations (converged={result.converged}), "
+            f"AIC={result.fit['aic']:.1f} BIC={result.fit['bic']:.1f} -> {path}"
+        )
+    if len(results) == 2:
+        delta_bic = results["gdina"].fit["bic"] - results["dina"].fit["bic"]
+        print(f"BIC(G-DINA) - BIC(DINA) = {delta_bic:.1f}")
+
+
+if __name__ == "__main__":
+    main()
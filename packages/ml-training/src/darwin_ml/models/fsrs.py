@@ -0,0 +1,803 @@
+"""
+FSRS Optimizer
+
+Fits the 21-weight FSRS-6 vector (the `w` array of the web app's
+calculators/fsrs.ts) to flashcard review history by minimizing the same
+log-loss as optimizeParameters: every card is replayed with
+simulateCardHistory's update rules and the retrievability predicted before
+each review is scored against recall (rating >= 2).
+
+optimizeParameters differentiates numerically, replaying every history 42
+times per step. Here reviews are grouped into card histories once and
+packed step-major (cards sorted by history length, so those with a t-th
+review are a prefix), each mini-batch replays all its cards together, and
+the gradient is exact: the derivatives of difficulty and stability with
+respect to the weights are carried forward alongside the states.
+Adam with bound projection and a cosine-annealed step size does the rest.
+
+personalize() then fits every heavy user separately in a process pool,
+starting from the global weights and pulled back towards them by an L2
+penalty, so a few hundred reviews only move the weights their history
+supports. Per-user results are cached with the review count and latest
+review they were fit on, and a rerun with the same options and global
+weights that have not drifted far only refits users whose reviews changed. They stay in that
+artifact: user_fsrs_weights belongs to /api/flashcards/optimize, which fits
+from the FSRS ratings of flashcard_review_logs rather than SM-2 quality.
+
+Usage:
+    python -m darwin_ml.models.fsrs --output artifacts/fsrs_weights.json
+    python -m darwin_ml.models.fsrs --per-user --workers 4
+"""
+
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import NamedTuple, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+# DEFAULT_FSRS_WEIGHTS and DEFAULT_FSRS_PARAMETER_BOUNDS in
+# packages/shared/src/calculators/fsrs.ts
+DEFAULT_WEIGHTS = np.array(
+    [
+        0.4072, 1.1829, 3.1262, 15.4722, 7.2102, 0.5316, 1.0651, 0.0234,
+        1.616, 0.1544, 1.0824, 1.9813, 0.0953, 0.2975, 2.2042, 0.2407,
+        2.9466, 0.5034, 0.6567, 0.0, 1.0,
+    ]
+)  # fmt: skip
+LOWER_BOUNDS = np.array(
+    [
+        0.01, 0.01, 0.01, 0.01, 1.0, 0.0, 0.0, 0.0, -1.0, 0.0, 0.0,
+        0.01, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.5,
+    ]
+)  # fmt: skip
+UPPER_BOUNDS = np.array(
+    [
+        100.0, 100.0, 100.0, 100.0, 10.0, 5.0, 5.0, 1.0, 5.0, 3.0, 5.0,
+        10.0, 3.0, 2.0, 5.0, 3.0, 5.0, 5.0, 5.0, 1.0, 2.0,
+    ]
+)  # fmt: skip
+N_WEIGHTS = len(DEFAULT_WEIGHTS)
+
+# SM-2 quality (0-5) of flashcard_reviews -> FSRS rating (Again .. Easy)
+QUALITY_TO_RATING = np.array([1, 1, 1, 2, 3, 4], dtype=np.int8)
+
+EPS = 1e-7
+MIN_STABILITY = 0.01
+LEARNING_RATE = 0.04
+EPOCHS = 5
+BATCH_CARDS = 2_048
+# Stop once an epoch improves the full-data loss by less than this
+TOL = 1e-5
+# Data checks and acceptance rule of optimizeParameters
+MIN_REVIEWS = 50
+MIN_CARDS = 10
+MAX_SKEW = 0.95
+MIN_IMPROVEMENT = 0.001
+
+# Per-user fits: users need this many reviews, and the penalty pulls their
+# weights towards the global ones (summed log-loss per squared bound range)
+MIN_USER_REVIEWS = 400
+REGULARIZATION = 100.0
+# One user's cards fill few batches; smaller ones give Adam more steps
+USER_BATCH_CARDS = 32
+USER_EPOCHS = 10
+# Per-user fits keep the prior they were fit towards until a global weight
+# drifts from it by more than this fraction of its bound range; the weekly
+# refit on a rolling window moves every weight a little
+PRIOR_DRIFT = 0.02
+GROUPS_PER_WORKER = 4
+
+DEFAULT_OUTPUT = "artifacts/fsrs_weights.json"
+DEFAULT_USER_OUTPUT = "artifacts/fsrs_user_weights.json"
+
+
+@dataclass(frozen=True)
+class ReviewHistories:
+    """
+    Reviews grouped into chronological per-card histories.
+
+    Card c's reviews are ratings[starts[c]:starts[c + 1]] with elapsed days
+    since the previous review of that card (0 for its first review);
+    card_user holds the user code of each card in users and last_reviewed
+    each user's latest review time.
+    """
+
+    ratings: np.ndarray
+    elapsed: np.ndarray
+    starts: np.ndarray
+    card_user: np.ndarray
+    users: pd.Index
+    last_reviewed: Optional[np.ndarray] = None
+
+    @classmethod
+    def from_frame(
+        cls,
+        reviews: pd.DataFrame,
+        user_column: str = "user_id",
+        card_column: str = "flashcard_id",
+        time_column: str = "reviewed_at",
+    ) -> "ReviewHistories":
+        """
+        Group a flashcard_reviews export (SM-2 quality) or a review-log
+        frame (FSRS rating, optionally elapsed_days) by user and card.
+        """
+        df = reviews[reviews[card_column].notna()]
+        users, user_labels = pd.factorize(df[user_column])
+        cards, _ = pd.factorize(df[card_column])
+        times = pd.to_datetime(df[time_column], utc=True).to_numpy("datetime64[ns]")
+        order = np.lexsort((times.view(np.int64), cards, users))
+        if "rating" in df.columns:
+            ratings = df["rating"].to_numpy(dtype=np.int8)
+        else:
+            quality = df["quality"].to_numpy(dtype=np.int64)
+            ratings = QUALITY_TO_RATING[np.clip(quality, 0, 5)]
+        ratings, users, cards, times = (
+            ratings[order],
+            users[order],
+            cards[order],
+            times[order],
+        )
+        first = np.r_[True, (cards[1:] != cards[:-1]) | (users[1:] != users[:-1])]
+        if "elapsed_days" in df.columns:
+            elapsed = df["elapsed_days"].fillna(0).to_numpy(dtype=np.float64)[order]
+        else:
+            # Whole days between reviews, rounded as daysBetween() does
+            gaps = np.diff(times.view(np.int64), prepend=times[:1].view(np.int64))
+            elapsed = np.maximum(np.round(gaps / 86_400e9), 0)
+        elapsed[first] = 0
+        starts = np.r_[np.flatnonzero(first), len(ratings)]
+        # Rows are grouped by user, so each user's latest review is a reduceat
+        user_starts = np.flatnonzero(np.r_[True, users[1:] != users[:-1]])
+        last_reviewed = np.maximum.reduceat(times, user_starts) if len(times) else times
+        return cls(
+            ratings=ratings,
+            elapsed=elapsed.astype(np.float64),
+            starts=starts,
+            card_user=users[starts[:-1]],
+            users=pd.Index(user_labels),
+            last_reviewed=last_reviewed,
+        )
+
+    @property
+    def lengths(self) -> np.ndarray:
+        return np.diff(self.starts)
+
+    @property
+    def n_cards(self) -> int:
+        return len(self.starts) - 1
+
+    @property
+    def n_reviews(self) -> int:
+        return len(self.ratings)
+
+    @property
+    def training_samples(self) -> int:
+        """Reviews after each card's first (the ones the loss scores)."""
+        return self.n_reviews - self.n_cards
+
+    def user_reviews(self) -> np.ndarray:
+        """Review count of each user in users."""
+        return np.bincount(
+            self.card_user, weights=self.lengths, minlength=len(self.users)
+        ).astype(np.int64)
+
+    def for_user(self, code: int) -> "ReviewHistories":
+        """The histories of one user (cards are grouped by user)."""
+        lo, hi = np.searchsorted(self.card_user, [code, code + 1])
+        starts = self.starts[lo : hi + 1]
+        span = slice(starts[0], starts[-1])
+        return ReviewHistories(
+            ratings=self.ratings[span],
+            elapsed=self.elapsed[span],
+            starts=starts - starts[0],
+            card_user=np.zeros(hi - lo, dtype=self.card_user.dtype),
+            users=self.users[code : code + 1],
+            last_reviewed=(
+                None
+                if self.last_reviewed is None
+                else self.last_reviewed[code : code + 1]
+            ),
+        )
+
+    def user_last_review(self, code: int) -> Optional[str]:
+        """ISO timestamp of a user's latest review (None if unknown)."""
+        if self.last_reviewed is None:
+            return None
+        return pd.Timestamp(self.last_reviewed[code], tz="UTC").isoformat()
+
+    def recall_rate(self) -> float:
+        scored = np.ones(self.n_reviews, dtype=bool)
+        scored[self.starts[:-1]] = False
+        return float((self.ratings[scored] >= 2).mean()) if scored.any() else 0.0
+
+
+class _Packed(NamedTuple):
+    """A set of cards in step-major layout (see the module docstring)."""
+
+    offsets: np.ndarray
+    ratings: np.ndarray
+    elapsed: np.ndarray
+
+
+def _pack(histories: ReviewHistories, cards: np.ndarray) -> _Packed:
+    lengths = histories.lengths[cards]
+    by_length = np.argsort(-lengths, kind="stable")
+    cards, lengths = cards[by_length], lengths[by_length]
+    active = np.cumsum(np.bincount(lengths - 1)[::-1])[::-1]
+    offsets = np.r_[0, np.cumsum(active)]
+    rank = np.repeat(np.arange(len(cards)), lengths)
+    step = np.arange(len(rank)) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    source = histories.starts[cards][rank] + step
+    flat = offsets[step] + rank
+    ratings = np.empty(len(rank), dtype=np.int8)
+    elapsed = np.empty(len(rank))
+    ratings[flat] = histories.ratings[source]
+    elapsed[flat] = histories.elapsed[source]
+    return _Packed(offsets, ratings, elapsed)
+
+
+def _replay(
+    packed: _Packed, w: np.ndarray, gradient: bool = False
+) -> tuple[float, int, Optional[np.ndarray]]:
+    """
+    Summed log-loss, number of scored reviews and (optionally) the exact
+    gradient of the summed loss, replaying all cards of a batch together.
+    """
+    offsets = packed.offsets
+    n = offsets[1]
+    first = packed.ratings[:n].astype(np.int64)
+    grow = np.exp(w[5] * (first - 1))
+    d = w[4] - grow + 1
+    d_free = (d > 1) & (d < 10)
+    d = np.clip(d, 1, 10)
+    s = np.maximum(w[first - 1], 0.1)
+    total, count = 0.0, 0
+    grad = np.zeros(N_WEIGHTS) if gradient else None
+    if gradient:
+        # Derivatives of each card's difficulty and stability
+        dd = np.zeros((n, N_WEIGHTS))
+        dd[:, 4] = d_free
+        dd[:, 5] = -(first - 1) * grow * d_free
+        ds = np.zeros((n, N_WEIGHTS))
+        ds[np.arange(n), first - 1] = w[first - 1] > 0.1
+
+    for t in range(1, len(offsets) - 1):
+        block = slice(offsets[t], offsets[t + 1])
+        m = offsets[t + 1] - offsets[t]
+        rating = packed.ratings[block].astype(np.int64)
+        elapsed = packed.elapsed[block]
+        d_t, s_t = d[:m], s[:m]
+        recalled = rating >= 2
+
+        ratio = elapsed / (9 * s_t)
+        r = 1 / (1 + ratio)
+        clipped = np.clip(r, EPS, 1 - EPS)
+        total -= float(np.log(np.where(recalled, clipped, 1 - clipped)).sum())
+        count += m
+
+        nd = d_t + w[6] * (rating - 3)
+        reverted = w[7] * w[4] + (1 - w[7]) * nd
+        d_new = np.clip(reverted, 1, 10)
+
+        core = np.exp(w[8]) * (11 - d_new) * s_t ** -w[9]
+        hard = np.where(rating == 2, w[15], 1.0)
+        easy = np.where(rating == 4, w[16], 1.0)
+        grow_r = np.exp(w[10] * (1 - r))
+        inc = core * hard * easy * (grow_r - 1)
+        s_recall = s_t * (1 + inc)
+
+        power = (s_t + 1) ** w[13]
+        a = d_new ** -w[12]
+        b = power - 1
+        c = np.exp(w[14] * (1 - r))
+        s_forget = w[11] * a * b * c
+        s_new = np.where(recalled, s_recall, s_forget)
+        s_free = s_new > MIN_STABILITY
+        s_new = np.maximum(s_new, MIN_STABILITY)
+
+        if gradient:
+            dd_t, ds_t = dd[:m], ds[:m]
+            # d loss / d R (zero where the prediction was clipped)
+            dloss = np.where(recalled, -1 / clipped, 1 / (1 - clipped)) * (r == clipped)
+            dr = (r * r * ratio / s_t)[:, None] * ds_t
+            grad += dloss @ dr
+
+            dd_new = (1 - w[7]) * dd_t
+            dd_new[:, 4] += w[7]
+            dd_new[:, 6] += (1 - w[7]) * (rating - 3)
+            dd_new[:, 7] += w[4] - nd
+            dd_new *= ((reverted > 1) & (reverted < 10))[:, None]
+
+            dcore = -dd_new / (11 - d_new)[:, None] - (w[9] / s_t)[:, None] * ds_t
+            dcore[:, 8] += 1
+            dcore[:, 9] -= np.log(s_t)
+            dcore *= core[:, None]
+            dbase = (hard * easy)[:, None] * dcore
+            dbase[:, 15] += core * easy * (rating == 2)
+            dbase[:, 16] += core * hard * (rating == 4)
+            dgrow = -w[10] * dr
+            dgrow[:, 10] += 1 - r
+            dgrow *= grow_r[:, None]
+            dinc = (grow_r - 1)[:, None] * dbase + (core * hard * easy)[:, None] * dgrow
+            ds_recall = (1 + inc)[:, None] * ds_t + s_t[:, None] * dinc
+
+            da = -(w[12] / d_new)[:, None] * dd_new
+            da[:, 12] -= np.log(d_new)
+            da *= a[:, None]
+            db = (w[13] / (s_t + 1))[:, None] * ds_t
+            db[:, 13] += np.log(s_t + 1)
+            db *= power[:, None]
+            dc = -w[14] * dr
+            dc[:, 14] += 1 - r
+            dc *= c[:, None]
+            ds_forget = w[11] * (
+                (b * c)[:, None] * da + (a * c)[:, None] * db + (a * b)[:, None] * dc
+            )
+            ds_forget[:, 11] += a * b * c
+
+            ds[:m] = np.where(recalled[:, None], ds_recall, ds_forget)
+            ds[:m] *= s_free[:, None]
+            dd[:m] = dd_new
+
+        d[:m] = d_new
+        s[:m] = s_new
+    return total, count, grad
+
+
+def _batches(
+    histories: ReviewHistories, batch_cards: int, rng: np.random.Generator
+) -> list[_Packed]:
+    """Cards with at least one scored review, shuffled into packed batches."""
+    cards = np.flatnonzero(histories.lengths > 1)
+    cards = cards[rng.permutation(len(cards))]
+    return [
+        _pack(histories, cards[start : start + batch_cards])
+        for start in range(0, len(cards), batch_cards)
+    ]
+
+
+def log_loss(
+    histories: ReviewHistories,
+    weights: Sequence[float] = DEFAULT_WEIGHTS,
+    batches: Optional[list] = None,
+) -> float:
+    """Mean log-loss of a weight vector (computeLogLoss in fsrs.ts)."""
+    batches = (
+        batches
+        if batches is not None
+        else _batches(histories, BATCH_CARDS, np.random.default_rng(0))
+    )
+    w = np.asarray(weights, dtype=np.float64)
+    total, count = 0.0, 0
+    for packed in batches:
+        loss, n, _ = _replay(packed, w)
+        total += loss
+        count += n
+    return total / count if count else 0.0
+
+
+def loss_gradient(
+    histories: ReviewHistories, weights: Sequence[float] = DEFAULT_WEIGHTS
+) -> tuple[float, np.ndarray]:
+    """Mean log-loss and its exact gradient over all histories."""
+    w = np.asarray(weights, dtype=np.float64)
+    total, count, grad = 0.0, 0, np.zeros(N_WEIGHTS)
+    for packed in _batches(histories, BATCH_CARDS, np.random.default_rng(0)):
+        loss, n, g = _replay(packed, w, gradient=True)
+        total += loss
+        count += n
+        grad += g
+    return (total / count, grad / count) if count else (0.0, grad)
+
+
+@dataclass(frozen=True)
+class FSRSResult:
+    """Optimizer outcome, with the fields of FSRSOptimizerResult."""
+
+    weights: np.ndarray
+    log_loss: float
+    default_log_loss: float
+    iterations: int
+    converged: bool
+    training_samples: int
+    unique_cards: int
+    duration_ms: int
+
+    @property
+    def improvement_ratio(self) -> float:
+        if self.default_log_loss <= 0:
+            return 0.0
+        return max(0.0, 1 - self.log_loss / self.default_log_loss)
+
+    def to_json(self) -> dict:
+        """FSRSOptimizerResult JSON (weights is the TS `w` array)."""
+        return {
+            "weights": [round(float(v), 4) for v in self.weights],
+            "logLoss": self.log_loss,
+            "defaultLogLoss": self.default_log_loss,
+            "improvementRatio": self.improvement_ratio,
+            "iterations": self.iterations,
+            "converged": self.converged,
+            "trainingSamples": self.training_samples,
+            "uniqueCards": self.unique_cards,
+            "durationMs": self.duration_ms,
+        }
+
+    @classmethod
+    def from_json(cls, payload: dict) -> "FSRSResult":
+        return cls(
+            weights=np.asarray(payload["weights"], dtype=np.float64),
+            log_loss=payload["logLoss"],
+            default_log_loss=payload["defaultLogLoss"],
+            iterations=payload["iterations"],
+            converged=payload["converged"],
+            training_samples=payload["trainingSamples"],
+            unique_cards=payload["uniqueCards"],
+            duration_ms=payload["durationMs"],
+        )
+
+
+def optimize_weights(
+    histories: ReviewHistories,
+    initial: Optional[Sequence[float]] = None,
+    epochs: int = EPOCHS,
+    batch_cards: int = BATCH_CARDS,
+    learning_rate: float = LEARNING_RATE,
+    tol: float = TOL,
+    seed: int = 0,
+    min_reviews: int = MIN_REVIEWS,
+    min_cards: int = MIN_CARDS,
+    prior: Optional[Sequence[float]] = None,
+    regularization: float = REGULARIZATION,
+) -> FSRSResult:
+    """
+    Fit FSRS weights by mini-batch Adam on the exact log-loss gradient.
+
+    Mirrors optimizeParameters: too little or too one-sided data returns
+    the baseline, and fitted weights are only kept if they beat the
+    baseline's log-loss by MIN_IMPROVEMENT. The baseline is DEFAULT_WEIGHTS,
+    or prior when one is given.
+
+    Args:
+        histories: Card histories (ReviewHistories.from_frame)
+        initial: Starting weights (the baseline if omitted)
+        epochs: Passes over the cards
+        batch_cards: Cards per mini-batch
+        learning_rate: Initial Adam step size (cosine-annealed to 0)
+        tol: Stop early once an epoch improves the loss by less than this
+        seed: Seed for the batch shuffles
+        prior: Weights to regularize towards (no penalty if omitted)
+        regularization: Strength of the L2 penalty towards prior, per
+            squared bound range and relative to the summed log-loss
+    """
+    started = time.perf_counter()
+    rng = np.random.default_rng(seed)
+    baseline = np.asarray(DEFAULT_WEIGHTS if prior is None else prior, dtype=float)
+    evaluation = _batches(histories, batch_cards, np.random.default_rng(seed))
+    default_loss = log_loss(histories, baseline, evaluation)
+
+    def result(weights, loss, iterations, converged) -> FSRSResult:
+        return FSRSResult(
+            weights=np.asarray(weights, dtype=np.float64),
+            log_loss=loss,
+            default_log_loss=default_loss,
+            iterations=iterations,
+            converged=converged,
+            training_samples=histories.training_samples,
+            unique_cards=histories.n_cards,
+            duration_ms=int((time.perf_counter() - started) * 1000),
+        )
+
+    recall = histories.recall_rate()
+    if (
+        histories.n_reviews < min_reviews
+        or histories.n_cards < min_cards
+        or max(recall, 1 - recall) > MAX_SKEW
+    ):
+        return result(baseline, default_loss, 0, False)
+
+    # Penalty on the mean loss (its weight shrinks as the history grows)
+    scale = np.zeros(N_WEIGHTS)
+    if prior is not None:
+        scale = regularization / (UPPER_BOUNDS - LOWER_BOUNDS) ** 2
+        scale /= max(histories.training_samples, 1)
+
+    def objective(w: np.ndarray) -> tuple[float, float]:
+        loss = log_loss(histories, w, evaluation)
+        return loss, loss + float(scale @ (w - baseline) ** 2)
+
+    w = np.clip(
+        np.asarray(baseline if initial is None else initial, dtype=np.float64),
+        LOWER_BOUNDS,
+        UPPER_BOUNDS,
+    )
+    best_w = w.copy()
+    best_loss, best_objective = objective(w)
+    moment, second = np.zeros(N_WEIGHTS), np.zeros(N_WEIGHTS)
+    total_steps = epochs * len(evaluation)
+    step, converged = 0, False
+    for _ in range(epochs):
+        previous = best_objective
+        for packed in _batches(histories, batch_cards, rng):
+            loss, n, grad = _replay(packed, w, gradient=True)
+            grad = grad / max(n, 1) + 2 * scale * (w - baseline)
+            if not np.all(np.isfinite(grad)):
+                continue
+            step += 1
+            moment = 0.9 * moment + 0.1 * grad
+            second = 0.999 * second + 0.001 * grad**2
+            rate = learning_rate * 0.5 * (1 + np.cos(np.pi * step / total_steps))
+            w -= (
+                rate
+                * (moment / (1 - 0.9**step))
+                / (np.sqrt(second / (1 - 0.999**step)) + 1e-8)
+            )
+            np.clip(w, LOWER_BOUNDS, UPPER_BOUNDS, out=w)
+        loss, penalized = objective(w)
+        if np.isfinite(penalized) and penalized < best_objective:
+            best_w, best_loss, best_objective = w.copy(), loss, penalized
+        if previous - best_objective < tol:
+            converged = True
+            break
+
+    if best_loss < default_loss - MIN_IMPROVEMENT:
+        return result(best_w, best_loss, step, converged)
+    return result(baseline, default_loss, step, converged)
+
+
+@dataclass(frozen=True)
+class UserWeights:
+    """
+    Per-user fits, the review count and latest review time (watermark)
+    each was fit on, and the prior and options they were fit with.
+
+    refit lists the users fitted by the run that produced this; the rest
+    were carried over from the cache.
+    """
+
+    global_weights: np.ndarray
+    results: dict[str, FSRSResult]
+    reviews: dict[str, int]
+    refit: tuple[str, ...] = field(default=())
+    last_reviewed: dict[str, Optional[str]] = field(default_factory=dict)
+    regularization: Optional[float] = None
+    min_reviews: Optional[int] = None
+
+    def to_json(self) -> dict:
+        return {
+            "globalWeights": [round(float(v), 4) for v in self.global_weights],
+            "regularization": self.regularization,
+            "minReviews": self.min_reviews,
+            "users": {
+                user: {
+                    "reviews": self.reviews[user],
+                    "lastReviewedAt": self.last_reviewed.get(user),
+                    **result.to_json(),
+                }
+                for user, result in self.results.items()
+            },
+        }
+
+    @classmethod
+    def from_json(cls, payload: dict) -> "UserWeights":
+        users = payload.get("users", {})
+        return cls(
+            global_weights=np.asarray(payload["globalWeights"], dtype=np.float64),
+            results={user: FSRSResult.from_json(v) for user, v in users.items()},
+            reviews={user: int(v["reviews"]) for user, v in users.items()},
+            last_reviewed={user: v.get("lastReviewedAt") for user, v in users.items()},
+            regularization=payload.get("regularization"),
+            min_reviews=payload.get("minReviews"),
+        )
+
+    def fit_with(
+        self, global_weights: np.ndarray, regularization: float, min_reviews: int
+    ) -> bool:
+        """
+        Whether these fits used the given options and a prior within
+        PRIOR_DRIFT of global_weights.
+        """
+        if (
+            self.regularization != regularization
+            or self.min_reviews != min_reviews
+            or self.global_weights.shape != global_weights.shape
+        ):
+            return False
+        drift = np.abs(global_weights - self.global_weights)
+        return bool(np.all(drift <= PRIOR_DRIFT * (UPPER_BOUNDS - LOWER_BOUNDS)))
+
+
+def _fit_users(
+    users: list[tuple[str, ReviewHistories]], prior: np.ndarray, options: dict
+) -> list[tuple[str, FSRSResult]]:
+    return [
+        (user, optimize_weights(histories, prior=prior, **options))
+        for user, histories in users
+    ]
+
+
+def personalize(
+    histories: ReviewHistories,
+    global_weights: Sequence[float] = DEFAULT_WEIGHTS,
+    min_reviews: int = MIN_USER_REVIEWS,
+    regularization: float = REGULARIZATION,
+    cache: Optional[UserWeights] = None,
+    workers: int = 1,
+    epochs: int = USER_EPOCHS,
+    batch_cards: int = USER_BATCH_CARDS,
+    seed: int = 0,
+) -> UserWeights:
+    """
+    Fit FSRS weights for every user with at least min_reviews reviews.
+
+    Each fit starts from global_weights and is regularized towards them.
+    Users found in cache with the same review count and latest review keep
+    their cached result; only users whose reviews changed are refit. With
+    days_back windows old reviews age out while new ones arrive, so the
+    count alone could stay the same. While global_weights stay within
+    PRIOR_DRIFT of the cache's prior, new fits keep that prior too, so
+    cached and new fits share one target. The whole cache is ignored once
+    the global weights drift further, or when it was fit with other
+    regularization or min_reviews.
+
+    Args:
+        histories: Card histories of all users (ReviewHistories.from_frame)
+        global_weights: Warm start and regularization target
+        min_reviews: Users with fewer reviews are not fitted
+        regularization: See optimize_weights
+        cache: A previous run's UserWeights (e.g. UserWeights.from_json)
+        workers: Worker processes (1 fits in this process)
+        epochs, batch_cards, seed: See optimize_weights
+    """
+    prior = np.clip(np.asarray(global_weights, dtype=float), LOWER_BOUNDS, UPPER_BOUNDS)
+    if cache is not None and cache.fit_with(prior, regularization, min_reviews):
+        prior = cache.global_weights
+    else:
+        cache = None
+    counts = histories.user_reviews()
+    labels = [str(user) for user in histories.users]
+    eligible = np.flatnonzero(counts >= min_reviews)
+
+    results: dict[str, FSRSResult] = {}
+    reviews: dict[str, int] = {}
+    last_reviewed: dict[str, Optional[str]] = {}
+    pending = []
+    for code in eligible:
+        user, count = labels[code], int(counts[code])
+        reviews[user] = count
+        last_reviewed[user] = last = histories.user_last_review(code)
+        if (
+            cache is not None
+            and cache.reviews.get(user) == count
+            and last is not None
+            and cache.last_reviewed.get(user) == last
+        ):
+            results[user] = cache.results[user]
+        else:
+            pending.append(code)
+
+    options = dict(
+        epochs=epochs,
+        batch_cards=batch_cards,
+        seed=seed,
+        regularization=regularization,
+    )
+    # Largest histories first, so the pool is not left waiting on one user
+    pending.sort(key=lambda code: -counts[code])
+    tasks = [(labels[code], histories.for_user(code)) for code in pending]
+    if workers > 1 and len(tasks) > 1:
+        n_groups = min(len(tasks), workers * GROUPS_PER_WORKER)
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [
+                pool.submit(_fit_users, tasks[k::n_groups], prior, options)
+                for k in range(n_groups)
+            ]
+            fitted = [pair for future in futures for pair in future.result()]
+    else:
+        fitted = _fit_users(tasks, prior, options)
+    results.update(fitted)
+
+    return UserWeights(
+        global_weights=prior,
+        results={user: results[user] for user in reviews},
+        reviews=reviews,
+        refit=tuple(user for user, _ in fitted),
+        last_reviewed=last_reviewed,
+        regularization=regularization,
+        min_reviews=min_reviews,
+    )
+
+
+def load_user_weights(path: str = DEFAULT_USER_OUTPUT) -> Optional[UserWeights]:
+    """A previous personalize() run written by write_weights, if any."""
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return UserWeights.from_json(json.load(f))
+
+
+def write_weights(
+    result: Union[FSRSResult, UserWeights], path: str = DEFAULT_OUTPUT
+) -> str:
+    """Write result.to_json() to path (atomically)."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(result.to_json(), f, indent=2)
+    os.replace(tmp, path)
+    return path
+
+
+def main(argv: Union[Sequence[str], None] = None) -> None:
+    parser = argparse.ArgumentParser(description="Optimize FSRS-6 weights")
+    parser.add_argument(
+        "--input", help="Exported flashcard reviews (default: export from the backend)"
+    )
+    parser.add_argument("--output", default=DEFAULT_OUTPUT)
+    parser.add_argument("--days-back", type=int, default=365)
+    parser.add_argument("--epochs", type=int, default=EPOCHS)
+    parser.add_argument("--batch-cards", type=int, default=BATCH_CARDS)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--per-user",
+        action="store_true",
+        help="Also fit heavy users, regularized towards the global weights",
+    )
+    parser.add_argument(
+        "--user-output",
+        default=DEFAULT_USER_OUTPUT,
+        help="Per-user results; also read back as the refit cache",
+    )
+    parser.add_argument("--min-user-reviews", type=int, default=MIN_USER_REVIEWS)
+    parser.add_argument("--regularization", type=float, default=REGULARIZATION)
+    parser.add_argument("--workers", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    if args.input:
+        from ..data.columnar import read_export
+
+        reviews = read_export(args.input)
+    else:
+        from ..data.supabase_export import export_flashcard_reviews
+
+        reviews = export_flashcard_reviews(days_back=args.days_back)
+    if reviews.empty:
+        print("No flashcard reviews to fit.")
+        return
+
+    histories = ReviewHistories.from_frame(reviews)
+    result = optimize_weights(
+        histories, epochs=args.epochs, batch_cards=args.batch_cards, seed=args.seed
+    )
+    path = write_weights(result, args.output)
+    print(
+        f"Log-loss {result.log_loss:.4f} (defaults {result.default_log_loss:.4f}) "
+        f"over {result.training_samples} reviews of {result.unique_cards} cards "
+        f"-> {path}"
+    )
+    if not args.per_user:
+        return
+
+    fits = personalize(
+        histories,
+        result.weights,
+        min_reviews=args.min_user_reviews,
+        regularization=args.regularization,
+        cache=load_user_weights(args.user_output),
+        workers=args.workers,
+        seed=args.seed,
+    )
+    path = write_weights(fits, args.user_output)
+    print(
+        f"Refit {len(fits.refit)} of {len(fits.results)} users "
+        f"with {args.min_user_reviews}+ reviews -> {path}"
+    )
+
+
+if __name__ == "__main__":
+    main()
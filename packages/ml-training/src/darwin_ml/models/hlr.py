@@ -0,0 +1,438 @@
+"""
+Half-Life Regression Trainer
+
+Trains the half-life regression model of the web app's calculators/hlr.ts
+(Settles & Meeder, 2016) on the flashcard review export:
+
+    h = clip(2^(w . x), MIN_HALF_LIFE, MAX_HALF_LIFE),  p = 2^(-delta / h)
+
+Every review after a card's first is one observation. x holds the six
+extractFeatures() values computed from that card's earlier reviews, plus
+sparse indicator columns for the card (lexeme) and its topic. The
+indicator weights are additive offsets to w . x that absorb per-card and
+per-topic difficulty.
+
+trainWeights() loops over observations one at a time. Here the count
+features are a dense float32 block, the indicators a CSR matrix, and
+training runs vectorized mini-batches with AdaGrad on the same squared
+error loss and L2 penalty, so tens of millions of reviews fit in memory
+and an epoch is a few thousand matrix products. The most recent reviews
+are held out, and training stops once their loss stops improving.
+
+Usage:
+    python -m darwin_ml.models.hlr --output artifacts/hlr_weights.json
+"""
+
+import argparse
+import json
+import math
+import os
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Mapping, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+# HLR_FEATURE_NAMES and DEFAULT_HLR_WEIGHTS in packages/shared/src/types/hlr.ts
+FEATURE_NAMES = [
+    "intercept",
+    "sqrtHistoryCount",
+    "logLastLag",
+    "correctStreak",
+    "normalizedDifficulty",
+    "failCount",
+]
+DEFAULT_WEIGHTS = np.array([2.0, 0.5, -0.3, 0.4, -1.0, -0.5])
+
+# DEFAULT_HLR_CONFIG
+L2_LAMBDA = 0.001
+MIN_HALF_LIFE = 0.5
+MAX_HALF_LIFE = 365.0
+
+# SM-2 quality of flashcard_reviews counted as recalled
+RECALL_QUALITY = 3
+
+LEARNING_RATE = 0.1
+BATCH_SIZE = 8_192
+EPOCHS = 20
+# Epochs without a lower held-out loss before stopping
+PATIENCE = 2
+# Fraction of reviews (the most recent) held out for early stopping
+HOLDOUT = 0.1
+ADAGRAD_EPS = 1e-8
+
+DEFAULT_OUTPUT = "artifacts/hlr_weights.json"
+
+
+@dataclass(frozen=True)
+class HLRDataset:
+    """
+    HLR observations: dense extractFeatures() columns (FEATURE_NAMES) and
+    indicator columns (one per lexeme, then one per topic).
+    """
+
+    dense: np.ndarray
+    indicators: sp.csr_matrix
+    recalled: np.ndarray
+    delta: np.ndarray
+    reviewed_at: np.ndarray
+    lexemes: pd.Index
+    topics: pd.Index
+
+    def __len__(self) -> int:
+        return len(self.recalled)
+
+    def take(self, rows: np.ndarray) -> "HLRDataset":
+        return HLRDataset(
+            dense=self.dense[rows],
+            indicators=self.indicators[rows],
+            recalled=self.recalled[rows],
+            delta=self.delta[rows],
+            reviewed_at=self.reviewed_at[rows],
+            lexemes=self.lexemes,
+            topics=self.topics,
+        )
+
+
+def build_dataset(
+    reviews: pd.DataFrame,
+    topics: Optional[Mapping] = None,
+    difficulty: Optional[Mapping] = None,
+    user_column: str = "user_id",
+    card_column: str = "flashcard_id",
+    time_column: str = "reviewed_at",
+) -> HLRDataset:
+    """
+    Turn a flashcard_reviews export into HLR observations.
+
+    Args:
+        reviews: Reviews with SM-2 `quality` (or a boolean `correct`)
+        topics: flashcard id -> topic (a `topic` column is used if absent)
+        difficulty: flashcard id -> IRT b; cards without one get
+            normalizeDifficulty(0), as the web app does
+    """
+    df = reviews[reviews[card_column].notna()]
+    users, _ = pd.factorize(df[user_column])
+    cards, lexemes = pd.factorize(df[card_column])
+    times = pd.to_datetime(df[time_column], utc=True).to_numpy("datetime64[ns]")
+    times = times.view(np.int64)
+    if "correct" in df.columns:
+        recalled = df["correct"].to_numpy(dtype=bool)
+    else:
+        recalled = df["quality"].to_numpy() >= RECALL_QUALITY
+    if topics is not None:
+        topic_of = pd.Series(topics).reindex(lexemes)
+    elif "topic" in df.columns:
+        topic_of = df["topic"].groupby(cards).first().set_axis(lexemes)
+    else:
+        topic_of = pd.Series(np.nan, index=lexemes, dtype=object)
+    # Chronological, then (stably) by user and card
+    order = np.argsort(times, kind="stable")
+    pairs, _ = pd.factorize(users.astype(np.int64) * len(lexemes) + cards)
+    order = order[np.argsort(pairs[order], kind="stable")]
+    pairs, cards, times, recalled = (
+        pairs[order],
+        cards[order],
+        times[order],
+        recalled[order],
+    )
+
+    n = len(order)
+    index = np.arange(n)
+    first = np.r_[True, pairs[1:] != pairs[:-1]]
+    start = np.maximum.accumulate(np.where(first, index, 0))
+    failed = ~recalled
+    fails = np.cumsum(failed)
+    fail_count = fails - failed - (fails - failed)[start]
+    # Position of the latest failure so far (start - 1 if none yet)
+    last_fail = np.maximum.accumulate(np.where(failed, index, start - 1))
+    streak = np.zeros(n, dtype=np.int64)
+    streak[1:] = index[1:] - 1 - last_fail[:-1]
+    delta = np.zeros(n)
+    delta[1:] = (times[1:] - times[:-1]) / 86_400e9
+
+    keep = ~first
+    b = np.zeros(len(lexemes))
+    if difficulty is not None:
+        b = pd.Series(difficulty).reindex(lexemes).fillna(0).to_numpy(float)
+    dense = np.empty((int(keep.sum()), len(FEATURE_NAMES)), dtype=np.float32)
+    dense[:, 0] = 1
+    dense[:, 1] = np.sqrt((index - start)[keep])
+    dense[:, 2] = np.log(np.maximum(delta[keep], 0) + 1)
+    dense[:, 3] = streak[keep]
+    dense[:, 4] = np.clip((b[cards[keep]] + 4) / 8, 0, 1)
+    dense[:, 5] = fail_count[keep]
+
+    topic_codes, topic_labels = pd.factorize(topic_of)
+    indicators = _indicators(
+        cards[keep], topic_codes[cards[keep]], len(lexemes), len(topic_labels)
+    )
+
+    return HLRDataset(
+        dense=dense,
+        indicators=indicators,
+        recalled=recalled[keep].astype(np.float32),
+        delta=delta[keep].astype(np.float32),
+        reviewed_at=times[keep],
+        lexemes=pd.Index(lexemes),
+        topics=pd.Index(topic_labels),
+    )
+
+
+def _indicators(
+    lexeme: np.ndarray, topic: np.ndarray, n_lexemes: int, n_topics: int
+) -> sp.csr_matrix:
+    """CSR rows with a 1 in the lexeme column and (if any) the topic column."""
+    has_topic = topic >= 0
+    columns = np.column_stack([lexeme, n_lexemes + topic]).ravel()
+    stored = np.column_stack([np.ones_like(has_topic), has_topic]).ravel()
+    indptr = np.r_[0, np.cumsum(1 + has_topic)]
+    columns = columns[stored].astype(np.int32)
+    return sp.csr_matrix(
+        (np.ones(len(columns), dtype=np.float32), columns, indptr),
+        shape=(len(lexeme), n_lexemes + n_topics),
+    )
+
+
+def _forward(
+    dense: np.ndarray,
+    indicators: sp.csr_matrix,
+    delta: np.ndarray,
+    w: np.ndarray,
+    offsets: np.ndarray,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Half-lives and predicted recall (computeHalfLife, predictRetention)."""
+    z = dense @ w.astype(np.float32) + indicators @ offsets
+    h = np.clip(np.exp2(z), MIN_HALF_LIFE, MAX_HALF_LIFE)
+    p = np.where(delta > 0, np.exp2(-delta / h), 1.0)
+    return h, p
+
+
+def _mean_loss(
+    data: HLRDataset, w: np.ndarray, offsets: np.ndarray, batch_size: int
+) -> float:
+    total = 0.0
+    for lo in range(0, len(data), batch_size):
+        hi = lo + batch_size
+        _, p = _forward(
+            data.dense[lo:hi], data.indicators[lo:hi], data.delta[lo:hi], w, offsets
+        )
+        total += float(np.sum((p - data.recalled[lo:hi]) ** 2))
+    return total / max(len(data), 1)
+
+
+@dataclass(frozen=True)
+class HLRResult:
+    """Trained weights; to_json() gives HLRWeights."""
+
+    weights: np.ndarray
+    lexeme_weights: pd.Series
+    topic_weights: pd.Series
+    training_count: int
+    training_loss: float
+    validation_loss: float
+    epochs: int
+    stopped_early: bool
+
+    def predict(self, data: HLRDataset) -> tuple[np.ndarray, np.ndarray]:
+        """Half-lives and predicted recall for data's observations."""
+        offsets = np.r_[
+            self.lexeme_weights.reindex(data.lexemes).fillna(0).to_numpy(),
+            self.topic_weights.reindex(data.topics).fillna(0).to_numpy(),
+        ].astype(np.float32)
+        return _forward(data.dense, data.indicators, data.delta, self.weights, offsets)
+
+    def to_json(self) -> dict:
+        """
+        HLRWeights JSON. `values` is what computeHalfLife takes; the lexeme
+        and topic offsets are added to w . x when the card is known.
+        """
+        return {
+            "values": [float(v) for v in self.weights],
+            "trainingCount": self.training_count,
+            "trainingLoss": self.training_loss,
+            "updatedAt": datetime.now(timezone.utc).isoformat(),
+            "featureNames": FEATURE_NAMES,
+            "validationLoss": self.validation_loss,
+            "epochs": self.epochs,
+            "lexemeWeights": {
+                str(k): round(float(v), 4) for k, v in self.lexeme_weights.items()
+            },
+            "topicWeights": {
+                str(k): round(float(v), 4) for k, v in self.topic_weights.items()
+            },
+        }
+
+
+def train_hlr(
+    data: HLRDataset,
+    initial: Optional[Sequence[float]] = None,
+    learning_rate: float = LEARNING_RATE,
+    l2: float = L2_LAMBDA,
+    batch_size: int = BATCH_SIZE,
+    epochs: int = EPOCHS,
+    patience: int = PATIENCE,
+    holdout: float = HOLDOUT,
+    seed: int = 0,
+    verbose: bool = False,
+) -> HLRResult:
+    """
+    Fit HLR weights by mini-batch AdaGrad with early stopping.
+
+    Minimizes mean (p - recalled)^2 + l2 * ||w||^2 like trainWeights, with
+    the same gradient (the half-life clip is passed straight through). An
+    indicator's weight is only updated and penalized in batches where it
+    occurs.
+
+    Args:
+        data: Observations (build_dataset)
+        initial: Starting dense weights (DEFAULT_WEIGHTS if omitted)
+        learning_rate: AdaGrad step size
+        l2: L2 penalty on all weights
+        batch_size: Observations per update
+        epochs: Maximum passes over the training reviews
+        patience: Stop after this many epochs without a better held-out loss
+        holdout: Fraction of the most recent reviews held out
+        seed: Seed for the shuffles
+    """
+    rng = np.random.default_rng(seed)
+    n_holdout = int(len(data) * holdout)
+    by_time = np.argsort(data.reviewed_at, kind="stable")
+    valid = data.take(np.sort(by_time[len(data) - n_holdout :]))
+    # Shuffle the training rows once; epochs then visit batches in new orders
+    train = data.take(rng.permutation(by_time[: len(data) - n_holdout]))
+
+    w = np.asarray(DEFAULT_WEIGHTS if initial is None else initial, dtype=float)
+    w = w.copy()
+    offsets = np.zeros(data.indicators.shape[1], dtype=np.float32)
+    grad_sq = np.zeros(len(w))
+    offset_grad_sq = np.zeros(len(offsets), dtype=np.float32)
+    scale = 2 * math.log(2) ** 2
+
+    best = (w.copy(), offsets.copy())
+    best_loss = _mean_loss(valid, w, offsets, batch_size) if n_holdout else np.inf
+    stale, epoch, stopped = 0, 0, False
+    starts = np.arange(0, len(train), batch_size)
+    for epoch in range(1, epochs + 1):
+        for lo in rng.permutation(starts):
+            hi = lo + batch_size
+            dense, indicators = train.dense[lo:hi], train.indicators[lo:hi]
+            delta = train.delta[lo:hi]
+            h, p = _forward(dense, indicators, delta, w, offsets)
+            # d(p - y)^2 / dz, averaged over the batch
+            dz = scale * (p - train.recalled[lo:hi]) * p * delta / h / len(delta)
+
+            grad = dense.T @ dz + 2 * l2 * w
+            grad_sq += grad**2
+            w -= learning_rate * grad / (np.sqrt(grad_sq) + ADAGRAD_EPS)
+
+            touched = np.unique(indicators.indices)
+            offset_grad = (indicators.T @ dz.astype(np.float32))[touched]
+            offset_grad += 2 * l2 * offsets[touched]
+            offset_grad_sq[touched] += offset_grad**2
+            offsets[touched] -= (
+                learning_rate
+                * offset_grad
+                / (np.sqrt(offset_grad_sq[touched]) + ADAGRAD_EPS)
+            )
+
+        if not n_holdout:
+            best = (w.copy(), offsets.copy())
+            continue
+        loss = _mean_loss(valid, w, offsets, batch_size)
+        if verbose:
+            print(f"Epoch {epoch}: held-out loss {loss:.5f}")
+        if loss < best_loss:
+            best, best_loss, stale = (w.copy(), offsets.copy()), loss, 0
+        else:
+            stale += 1
+            if stale >= patience:
+                stopped = True
+                break
+
+    w, offsets = best
+    n_lexemes = len(data.lexemes)
+    return HLRResult(
+        weights=w,
+        lexeme_weights=pd.Series(offsets[:n_lexemes], index=data.lexemes),
+        topic_weights=pd.Series(offsets[n_lexemes:], index=data.topics),
+        training_count=len(train),
+        training_loss=_mean_loss(train, w, offsets, batch_size),
+        validation_loss=float(best_loss) if n_holdout else float("nan"),
+        epochs=epoch,
+        stopped_early=stopped,
+    )
+
+
+def write_weights(result: HLRResult, path: str = DEFAULT_OUTPUT) -> str:
+    """Write result.to_json() to path (atomically)."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(result.to_json(), f, indent=2)
+    os.replace(tmp, path)
+    return path
+
+
+def _flashcard_topics(client=None) -> pd.Series:
+    from ..data.backend import get_backend
+    from ..data.supabase_export import iter_keyset_pages
+
+    client = client or get_backend()
+    rows = [
+        row
+        for page in iter_keyset_pages(client, "flashcards", "id, area, topic")
+        for row in page
+    ]
+    return pd.Series(
+        {row["id"]: row.get("topic") or row.get("area") for row in rows}, name="topic"
+    )
+
+
+def main(argv: Union[Sequence[str], None] = None) -> None:
+    parser = argparse.ArgumentParser(description="Train half-life regression")
+    parser.add_argument(
+        "--input", help="Exported flashcard reviews (default: export from the backend)"
+    )
+    parser.add_argument("--output", default=DEFAULT_OUTPUT)
+    parser.add_argument("--days-back", type=int, default=365)
+    parser.add_argument("--epochs", type=int, default=EPOCHS)
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--no-topics", action="store_true", help="Skip the flashcards topic lookup"
+    )
+    args = parser.parse_args(argv)
+
+    if args.input:
+        from ..data.columnar import read_export
+
+        reviews = read_export(args.input)
+    else:
+        from ..data.supabase_export import export_flashcard_reviews
+
+        reviews = export_flashcard_reviews(days_back=args.days_back)
+    if reviews.empty:
+        print("No flashcard reviews to fit.")
+        return
+
+    topics = None if args.no_topics else _flashcard_topics()
+    data = build_dataset(reviews, topics=topics)
+    result = train_hlr(
+        data,
+        batch_size=args.batch_size,
+        epochs=args.epochs,
+        seed=args.seed,
+        verbose=True,
+    )
+    path = write_weights(result, args.output)
+    print(
+        f"Trained on {result.training_count} reviews: loss {result.training_loss:.4f}, "
+        f"held-out {result.validation_loss:.4f} ({result.epochs} epochs) -> {path}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,698 @@
+"""
+IRT Calibration
+
+Marginal maximum-likelihood item calibration (Bock-Aitkin EM) for the
+Rasch, 1PL, 2PL and 3PL models, from the item responses exported by
+darwin_ml.data.export_irt_item_responses().
+
+Abilities are integrated out over a fixed quadrature grid. Each EM cycle
+runs the E-step over chunks of persons as one sparse x dense product per
+chunk (responses x log-probability table, float32) and accumulates the
+expected correct/incorrect counts per item and node; the M-step is a
+Fisher-scoring step for every item at once on those counts. Slopes and
+guessing get the BILOG-style lognormal and beta priors, and standard errors
+come from the per-item information at convergence.
+
+Output rows follow irt_parameter_history (difficulty, discrimination,
+guessing, infit, outfit) plus standard errors; the batch summary follows
+irt_calibration_batches.
+
+Usage:
+    python -m darwin_ml.models.irt_calibration --model 3pl
+"""
+
+import argparse
+import json
+import os
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from scipy.special import expit, logit
+
+from ..data.responses import ResponseMatrix
+from ..evaluation.ctt import ResponseInput, fit_statistics
+
+MODELS = ("rasch", "1pl", "2pl", "3pl")
+# irt_calibration_batches.model_type for each model
+MODEL_TYPES = {"rasch": "1PL", "1pl": "1PL", "2pl": "2PL", "3pl": "3PL"}
+
+DEFAULT_NODES = 31
+NODE_RANGE = 5.0
+DEFAULT_CHUNK_SIZE = 65_536
+# BILOG-MG defaults: log(a) ~ N(0, 0.5), c ~ Beta(5, 15) (mean 0.25, as
+# assumed for 4-option items elsewhere in the platform)
+SLOPE_PRIOR = (0.0, 0.5)
+GUESSING_PRIOR = (5.0, 15.0)
+SLOPE_BOUNDS = (0.05, 8.0)
+INTERCEPT_BOUNDS = (-30.0, 30.0)
+GUESSING_LOGIT_BOUNDS = (float(logit(1e-4)), float(logit(0.5)))
+MAX_STEP = 1.0
+
+DEFAULT_OUTPUT = "artifacts/irt_calibration.json"
+
+
+@dataclass(frozen=True)
+class CalibrationResult:
+    """
+    Calibrated item parameters and the run that produced them.
+
+    items is indexed by item label with difficulty, discrimination, guessing
+    and their standard errors (difficulty_se, ...), n_responses, p_value,
+    infit and outfit.
+    """
+
+    items: pd.DataFrame
+    model: str
+    log_likelihood: float
+    iterations: int
+    converged: bool
+    tolerance: float
+    n_persons: int
+    n_responses: int
+    latent_sd: float = 1.0
+    theta: Optional[np.ndarray] = field(default=None, repr=False)
+
+    def batch_record(self, batch_name: Optional[str] = None) -> dict:
+        """Row for irt_calibration_batches."""
+        return {
+            "batch_name": batch_name
+            or f"mml_{self.model}_{datetime.now(timezone.utc):%Y%m%dT%H%M%SZ}",
+            "responses_count": self.n_responses,
+            "questions_calibrated": len(self.items),
+            "model_type": MODEL_TYPES[self.model],
+            "estimation_method": "marginal_ml",
+            "convergence_criterion": self.tolerance,
+            "iterations": self.iterations,
+            "log_likelihood": self.log_likelihood,
+        }
+
+    def to_json(self, batch_name: Optional[str] = None) -> dict:
+        """Batch record plus one IRTParameters-shaped entry per item."""
+        items = self.items.reset_index().rename(columns={"item": "question_id"})
+        items = items.astype(object).where(items.notna(), None)
+        return {
+            "batch": self.batch_record(batch_name),
+            "model": self.model,
+            "converged": self.converged,
+            "n_persons": self.n_persons,
+            "latent_sd": self.latent_sd,
+            "items": items.to_dict(orient="records"),
+        }
+
+    @classmethod
+    def from_json(cls, payload: dict) -> "CalibrationResult":
+        """Inverse of to_json() (abilities are not stored)."""
+        batch = payload["batch"]
+        items = pd.DataFrame(payload["items"]).set_index("question_id")
+        items.index.name = "item"
+        return cls(
+            items=items.apply(pd.to_numeric),
+            model=payload["model"],
+            log_likelihood=batch["log_likelihood"],
+            iterations=batch["iterations"],
+            converged=payload["converged"],
+            tolerance=batch["convergence_criterion"],
+            n_persons=payload["n_persons"],
+            n_responses=batch["responses_count"],
+            latent_sd=payload["latent_sd"],
+        )
+
+
+def quadrature(n_nodes: int = DEFAULT_NODES, bound: float = NODE_RANGE):
+    """Equally spaced nodes on [-bound, bound] with N(0, 1) log-weights."""
+    nodes = np.linspace(-bound, bound, n_nodes)
+    log_weights = -0.5 * nodes**2
+    log_weights -= np.logaddexp.reduce(log_weights)
+    return nodes, log_weights
+
+
+def _as_csr(responses: ResponseInput) -> sp.csr_matrix:
+    if isinstance(responses, ResponseMatrix):
+        return responses.to_csr()
+    if sp.issparse(responses):
+        matrix = responses.tocsr().astype(np.float32, copy=False)
+        matrix.sum_duplicates()
+        return matrix
+    dense = np.asarray(responses, dtype=np.float32)
+    present = ~np.isnan(dense)
+    flat = np.flatnonzero(present)
+    indptr = np.concatenate([[0], np.cumsum(present.sum(axis=1))])
+    return sp.csr_matrix(
+        (dense.ravel()[flat], (flat % dense.shape[1]).astype(np.int32), indptr),
+        shape=dense.shape,
+    )
+
+
+def _outcome_matrix(x: sp.csr_matrix) -> sp.csr_matrix:
+    """
+    Persons x 2*items indicator: column i for a wrong answer to item i,
+    column n_items + i for a right one. One product with the stacked
+    [log(1 - P); log(P)] table then gives every person's log-likelihood
+    per node, and its transpose the expected wrong/right counts.
+    """
+    n_items = x.shape[1]
+    indices = x.indices + n_items * (x.data > 0.5)
+    return sp.csr_matrix(
+        (np.ones(x.nnz, np.float32), indices.astype(np.int32), x.indptr.copy()),
+        shape=(x.shape[0], 2 * n_items),
+    )
+
+
+@dataclass
+class _Params:
+    """Slope-intercept form: P = c + (1 - c) * sigmoid(a * theta + d)."""
+
+    slope: np.ndarray
+    intercept: np.ndarray
+    guessing_logit: np.ndarray
+
+    @property
+    def guessing(self) -> np.ndarray:
+        return expit(self.guessing_logit)
+
+    def probabilities(self, nodes: np.ndarray) -> np.ndarray:
+        """Items x nodes P(correct)."""
+        p = expit(self.slope[:, None] * nodes[None, :] + self.intercept[:, None])
+        c = self.guessing[:, None]
+        return c + (1 - c) * p
+
+    def vector(self) -> np.ndarray:
+        """All parameters, for the convergence check (no guessing -> 0)."""
+        g = self.guessing_logit
+        return np.concatenate(
+            [self.slope, self.intercept, np.where(np.isfinite(g), g, 0)]
+        )
+
+
+def _log_table(params: _Params, nodes: np.ndarray) -> np.ndarray:
+    p = np.clip(params.probabilities(nodes), 1e-7, 1 - 1e-7)
+    return np.vstack([np.log1p(-p), np.log(p)]).astype(np.float32)
+
+
+def _chunks(outcomes: sp.csr_matrix, chunk_size: int) -> list[sp.csr_matrix]:
+    """Row blocks of the outcome matrix, sliced once for every EM cycle."""
+    return [
+        outcomes[start : start + chunk_size]
+        for start in range(0, outcomes.shape[0], chunk_size)
+    ]
+
+
+def _e_step(
+    blocks: Sequence[sp.csr_matrix],
+    table: np.ndarray,
+    log_prior: np.ndarray,
+    nodes: Optional[np.ndarray] = None,
+) -> tuple[np.ndarray, np.ndarray, float, Optional[np.ndarray]]:
+    """
+    Expected (2*items) x nodes outcome counts, posterior mass per node and
+    the marginal log-likelihood; with nodes, also each person's EAP.
+    """
+    counts = np.zeros(table.shape, dtype=np.float64)
+    mass = np.zeros(table.shape[1], dtype=np.float64)
+    log_likelihood = 0.0
+    eap = [] if nodes is not None else None
+    prior32 = log_prior.astype(np.float32)
+    for block in blocks:
+        log_post = block @ table
+        log_post += prior32
+        peak = log_post.max(axis=1, keepdims=True)
+        np.subtract(log_post, peak, out=log_post)
+        posterior = np.exp(log_post, out=log_post)
+        total = posterior.sum(axis=1, keepdims=True)
+        posterior /= total
+        log_likelihood += float(np.log(total).sum() + peak.sum())
+        counts += block.T @ posterior
+        mass += posterior.sum(axis=0, dtype=np.float64)
+        if eap is not None:
+            eap.append(posterior @ nodes.astype(np.float32))
+    if eap is not None:
+        eap = np.concatenate(eap).astype(np.float64)
+    return counts, mass, log_likelihood, eap
+
+
+def _score_and_information(
+    params: _Params,
+    wrong: np.ndarray,
+    right: np.ndarray,
+    nodes: np.ndarray,
+    free: Sequence[str],
+    slope_prior: Optional[tuple[float, float]],
+    guessing_prior: Optional[tuple[float, float]],
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Per-item gradient (items x k) and Fisher information (items x k x k) of
+    the expected complete-data log-likelihood plus log-priors, for the free
+    parameters in order (subset of "slope", "intercept", "guessing").
+    """
+    z = params.slope[:, None] * nodes[None, :] + params.intercept[:, None]
+    p_star = expit(z)
+    c = params.guessing[:, None]
+    p = np.clip(c + (1 - c) * p_star, 1e-9, 1 - 1e-9)
+    n = wrong + right
+    scale = 1.0 / (p * (1 - p))
+    residual = (right - n * p) * scale
+
+    dz = (1 - c) * p_star * (1 - p_star)
+    derivatives = {
+        "slope": dz * nodes[None, :],
+        "intercept": dz,
+        "guessing": (1 - p_star) * c * (1 - c),
+    }
+    d = np.stack([derivatives[name] for name in free], axis=-1)
+    gradient = np.einsum("iq,iqk->ik", residual, d)
+    information = np.einsum("iq,iqk,iql->ikl", n * scale, d, d)
+
+    for k, name in enumerate(free):
+        if name == "slope" and slope_prior is not None:
+            mu, sigma = slope_prior
+            a = params.slope
+            gradient[:, k] -= ((np.log(a) - mu) / sigma**2 + 1) / a
+            information[:, k, k] += 1 / (sigma**2 * a**2)
+        elif name == "guessing" and guessing_prior is not None:
+            alpha, beta = guessing_prior
+            g = params.guessing
+            gradient[:, k] += (alpha - 1) * (1 - g) - (beta - 1) * g
+            information[:, k, k] += (alpha + beta - 2) * g * (1 - g)
+    return gradient, information
+
+
+def _solve(information: np.ndarray, gradient: np.ndarray) -> np.ndarray:
+    ridge = 1e-8 * np.eye(information.shape[-1])
+    step = np.linalg.solve(information + ridge, gradient[..., None])[..., 0]
+    return np.clip(step, -MAX_STEP, MAX_STEP)
+
+
+def _free_parameters(model: str) -> list[str]:
+    return {
+        "rasch": ["intercept"],
+        "1pl": ["intercept"],
+        "2pl": ["slope", "intercept"],
+        "3pl": ["slope", "intercept", "guessing"],
+    }[model]
+
+
+def _m_step(
+    params: _Params,
+    counts: np.ndarray,
+    nodes: np.ndarray,
+    model: str,
+    slope_prior: Optional[tuple[float, float]],
+    guessing_prior: Optional[tuple[float, float]],
+) -> None:
+    """One Fisher-scoring step for every item, in place."""
+    n_items = len(params.slope)
+    wrong, right = counts[:n_items], counts[n_items:]
+    free = _free_parameters(model)
+    gradient, information = _score_and_information(
+        params, wrong, right, nodes, free, slope_prior, guessing_prior
+    )
+    step = _solve(information, gradient)
+    for k, name in enumerate(free):
+        if name == "slope":
+            params.slope = np.clip(params.slope + step[:, k], *SLOPE_BOUNDS)
+        elif name == "intercept":
+            params.intercept = np.clip(params.intercept + step[:, k], *INTERCEPT_BOUNDS)
+        else:
+            params.guessing_logit = np.clip(
+                params.guessing_logit + step[:, k], *GUESSING_LOGIT_BOUNDS
+            )
+
+    if model == "1pl":
+        # One slope shared by all items: a scalar scoring step on the sums
+        gradient, information = _score_and_information(
+            params, wrong, right, nodes, ["slope"], None, None
+        )
+        step = gradient.sum() / max(information.sum(), 1e-12)
+        slope = np.clip(
+            params.slope[0] + np.clip(step, -MAX_STEP, MAX_STEP), *SLOPE_BOUNDS
+        )
+        params.slope = np.full(n_items, slope)
+
+
+def _standard_errors(
+    params: _Params,
+    counts: np.ndarray,
+    nodes: np.ndarray,
+    model: str,
+    slope_prior: Optional[tuple[float, float]],
+    guessing_prior: Optional[tuple[float, float]],
+) -> dict[str, np.ndarray]:
+    """SEs of difficulty, discrimination and guessing from each item's
+    information block (the delta method maps slope-intercept to a, b)."""
+    n_items = len(params.slope)
+    wrong, right = counts[:n_items], counts[n_items:]
+    free = ["slope", "intercept", "guessing"]
+    free = free[:2] if model == "2pl" else free if model == "3pl" else ["intercept"]
+    _, information = _score_and_information(
+        params, wrong, right, nodes, free, slope_prior, guessing_prior
+    )
+    ridge = 1e-10 * np.eye(len(free))
+    covariance = np.linalg.inv(information + ridge)
+    a, d = params.slope, params.intercept
+    nan = np.full(n_items, np.nan)
+
+    if model in ("rasch", "1pl"):
+        var_d = covariance[:, 0, 0]
+        var_a = 0.0
+        if model == "1pl":
+            _, slope_info = _score_and_information(
+                params, wrong, right, nodes, ["slope"], None, None
+            )
+            var_a = 1.0 / max(slope_info.sum(), 1e-12)
+        # b = -d / a, treating the shared slope as independent of d
+        var_b = var_d / a**2 + var_a * (d / a**2) ** 2
+        return {
+            "difficulty_se": np.sqrt(var_b),
+            "discrimination_se": np.full(n_items, np.sqrt(var_a)) if var_a else nan,
+            "guessing_se": nan,
+        }
+
+    # b = -d / a: gradient (d / a^2, -1 / a) in (slope, intercept)
+    jac = np.stack([d / a**2, -1 / a], axis=-1)
+    block = covariance[:, :2, :2]
+    var_b = np.einsum("ik,ikl,il->i", jac, block, jac)
+    guessing_se = nan
+    if model == "3pl":
+        g = params.guessing
+        guessing_se = g * (1 - g) * np.sqrt(covariance[:, 2, 2])
+    return {
+        "difficulty_se": np.sqrt(var_b),
+        "discrimination_se": np.sqrt(covariance[:, 0, 0]),
+        "guessing_se": guessing_se,
+    }
+
+
+def _fisher_theta(
+    x: sp.csr_matrix,
+    discrimination: np.ndarray,
+    difficulty: np.ndarray,
+    guessing: Optional[np.ndarray],
+    start: Optional[np.ndarray],
+    prior_sd: Optional[float],
+    max_iter: int,
+    tol: float,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Fisher scoring for every person's ability at once, with a N(0, prior_sd)
+    prior (MAP) or none (ML). Per-response terms are float32; bounded to the
+    quadrature range.
+
+    Returns:
+        (theta, test information at theta, prior included)
+    """
+    rows = np.repeat(np.arange(x.shape[0], dtype=np.int32), np.diff(x.indptr))
+    a = np.asarray(discrimination, dtype=np.float32)[x.indices]
+    b = np.asarray(difficulty, dtype=np.float32)[x.indices]
+    c = (
+        np.zeros_like(a)
+        if guessing is None
+        else np.asarray(guessing, dtype=np.float32)[x.indices]
+    )
+    theta = np.zeros(x.shape[0]) if start is None else np.array(start, dtype=float)
+    theta = np.clip(np.nan_to_num(theta), -NODE_RANGE, NODE_RANGE)
+    precision = 0.0 if prior_sd is None else 1.0 / prior_sd**2
+
+    def person_sum(values: np.ndarray) -> np.ndarray:
+        summed = sp.csr_matrix((values, x.indices, x.indptr), shape=x.shape)
+        return np.asarray(summed.sum(axis=1, dtype=np.float64)).ravel()
+
+    def score_and_information(theta: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        # P* = sigmoid(a (theta - b)); P = c + (1 - c) P*
+        star = theta.astype(np.float32)[rows]
+        star -= b
+        star *= -a
+        np.exp(star, out=star)
+        star += 1
+        np.reciprocal(star, out=star)
+        np.clip(star, 1e-7, 1 - 1e-7, out=star)
+        p = c + (1 - c) * star
+        # Score a P*/P (x - P), information a^2 (1 - c) P*^2 (1 - P*) / P
+        weight = a * star / p
+        score = person_sum(weight * (x.data - p)) - precision * theta
+        information = person_sum(weight * a * (1 - c) * star * (1 - star))
+        return score, information + precision
+
+    for _ in range(max_iter):
+        score, information = score_and_information(theta)
+        step = np.clip(score / np.maximum(information, 1e-12), -MAX_STEP, MAX_STEP)
+        updated = np.clip(theta + step, -NODE_RANGE, NODE_RANGE)
+        # Persons held at a bound no longer move
+        moved = np.abs(updated - theta).max(initial=0.0)
+        theta = updated
+        if moved < tol:
+            break
+    return theta, score_and_information(theta)[1]
+
+
+def ml_theta(
+    responses: ResponseInput,
+    discrimination: np.ndarray,
+    difficulty: np.ndarray,
+    guessing: Optional[np.ndarray] = None,
+    start: Optional[np.ndarray] = None,
+    max_iter: int = 15,
+    tol: float = 1e-3,
+) -> np.ndarray:
+    """
+    Maximum-likelihood abilities for fixed item parameters, by Fisher
+    scoring over every person at once; bounded to the quadrature range, so
+    zero and perfect scores end at the bounds. Start from EAPs to converge
+    in a few steps.
+    """
+    theta, _ = _fisher_theta(
+        _as_csr(responses),
+        discrimination,
+        difficulty,
+        guessing,
+        start,
+        prior_sd=None,
+        max_iter=max_iter,
+        tol=tol,
+    )
+    return theta
+
+
+def _initial_params(x: sp.csr_matrix, model: str) -> _Params:
+    n_items = x.shape[1]
+    n = np.bincount(x.indices, minlength=n_items)
+    right = np.bincount(x.indices, weights=x.data, minlength=n_items)
+    p = np.clip((right + 0.5) / (n + 1.0), 0.02, 0.98)
+    g0 = GUESSING_PRIOR[0] / sum(GUESSING_PRIOR)
+    if model == "3pl":
+        p = np.clip((p - g0) / (1 - g0), 0.02, 0.98)
+    guessing = np.full(n_items, logit(g0) if model == "3pl" else -np.inf)
+    return _Params(
+        slope=np.ones(n_items),
+        intercept=logit(p),
+        guessing_logit=guessing,
+    )
+
+
+def calibrate(
+    responses: ResponseInput,
+    model: str = "2pl",
+    items: Optional[Sequence] = None,
+    n_nodes: int = DEFAULT_NODES,
+    max_iter: int = 500,
+    tol: float = 1e-4,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    min_responses: int = 1,
+    slope_prior: Optional[tuple[float, float]] = SLOPE_PRIOR,
+    guessing_prior: Optional[tuple[float, float]] = GUESSING_PRIOR,
+    verbose: bool = False,
+) -> CalibrationResult:
+    """
+    Calibrate item parameters by marginal maximum likelihood (EM).
+
+    Abilities follow N(0, 1), except under "rasch", where slopes are fixed
+    at 1 and the ability SD is estimated instead.
+
+    Args:
+        responses: Persons x items 0/1 matrix (or a ResponseMatrix); NaN
+            (dense) or unstored (sparse) cells were not administered
+        model: "rasch", "1pl" (one common slope), "2pl" or "3pl"
+        items: Item labels (e.g. question IDs) for the result index;
+            a ResponseMatrix supplies its item IDs
+        n_nodes: Quadrature nodes on [-5, 5]
+        max_iter: EM cycle limit
+        tol: Stop once no parameter moves by more than this in a cycle
+        chunk_size: Persons per E-step block
+        min_responses: Items answered fewer times are left out (NaN rows)
+        slope_prior: (mean, sd) of log(a) for 2PL/3PL, None for plain ML
+        guessing_prior: Beta(alpha, beta) on c for 3PL, None for plain ML
+    """
+    if model not in MODELS:
+        raise ValueError(f"Unknown model {model!r}; expected one of {MODELS}")
+    if items is None and isinstance(responses, ResponseMatrix):
+        items = responses.items.index
+    x = _as_csr(responses)
+    n_items_total = x.shape[1]
+    n_responses_per_item = np.bincount(x.indices, minlength=n_items_total)
+    kept = np.flatnonzero(n_responses_per_item >= min_responses)
+    if len(kept) < n_items_total:
+        x = x[:, kept]
+    answered = np.diff(x.indptr) > 0
+    x = x[answered]
+
+    blocks = _chunks(_outcome_matrix(x), chunk_size)
+    base_nodes, log_prior = quadrature(n_nodes)
+    params = _initial_params(x, model)
+    latent_sd = 1.0
+    if model in ("rasch", "1pl"):
+        params.slope[:] = 1.0
+
+    converged = False
+    log_likelihood = -np.inf
+    iteration = 0
+    for iteration in range(1, max_iter + 1):
+        nodes = base_nodes * latent_sd
+        table = _log_table(params, nodes)
+        counts, mass, log_likelihood, _ = _e_step(blocks, table, log_prior)
+        before = params.vector()
+        _m_step(params, counts, nodes, model, slope_prior, guessing_prior)
+        change = float(np.abs(params.vector() - before).max())
+        if model == "rasch":
+            # EM update of the ability variance around a mean fixed at 0
+            new_sd = float(np.sqrt(mass @ nodes**2 / mass.sum()))
+            change = max(change, abs(new_sd - latent_sd))
+            latent_sd = new_sd
+        if verbose:
+            print(f"  cycle {iteration}: logL={log_likelihood:.2f} change={change:.2e}")
+        if change < tol:
+            converged = True
+            break
+
+    nodes = base_nodes * latent_sd
+    counts, _, log_likelihood, eap = _e_step(
+        blocks, _log_table(params, nodes), log_prior, nodes
+    )
+    errors = _standard_errors(params, counts, nodes, model, slope_prior, guessing_prior)
+
+    a, d = params.slope, params.intercept
+    b = -d / a
+    c = params.guessing if model == "3pl" else np.zeros(len(a))
+    # Fit is judged against ML abilities: shrunken EAPs understate misfit
+    fit = fit_statistics(
+        x,
+        b,
+        theta=ml_theta(x, a, b, c, start=eap),
+        discrimination=a,
+        guessing=c if model == "3pl" else None,
+    )
+    n = np.bincount(x.indices, minlength=x.shape[1])
+    right = np.bincount(x.indices, weights=x.data, minlength=x.shape[1])
+    frame = pd.DataFrame(
+        {
+            "difficulty": b,
+            "discrimination": a,
+            "guessing": c,
+            **errors,
+            "n_responses": n,
+            "p_value": right / np.maximum(n, 1),
+            "infit": fit["infit"].to_numpy(),
+            "outfit": fit["outfit"].to_numpy(),
+        }
+    )
+    if len(kept) < n_items_total:
+        frame.index = kept
+        frame = frame.reindex(np.arange(n_items_total))
+        frame["n_responses"] = n_responses_per_item
+    if items is not None:
+        frame.index = pd.Index(items, name="item")
+    else:
+        frame.index.name = "item"
+
+    theta = np.full(len(answered), np.nan)
+    theta[answered] = eap
+    return CalibrationResult(
+        items=frame,
+        model=model,
+        log_likelihood=log_likelihood,
+        iterations=iteration,
+        converged=converged,
+        tolerance=tol,
+        n_persons=int(answered.sum()),
+        n_responses=int(x.nnz),
+        latent_sd=latent_sd,
+        theta=theta,
+    )
+
+
+def calibrate_frame(
+    df: pd.DataFrame,
+    model: str = "2pl",
+    person_column: str = "user_id",
+    item_column: str = "question_id",
+    **kwargs,
+) -> CalibrationResult:
+    """calibrate() on a long frame such as export_irt_item_responses()."""
+    matrix = ResponseMatrix.from_frame(df, person_column, item_column)
+    return calibrate(matrix, model=model, **kwargs)
+
+
+def write_calibration(
+    result: CalibrationResult,
+    path: str = DEFAULT_OUTPUT,
+    batch_name: Optional[str] = None,
+) -> str:
+    """Write result.to_json() to path (atomically)."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(result.to_json(batch_name), f, indent=2, default=float)
+    os.replace(tmp, path)
+    return path
+
+
+def read_calibration(path: str = DEFAULT_OUTPUT) -> tuple[CalibrationResult, str]:
+    """Load a file written by write_calibration(): (result, batch name)."""
+    with open(path) as f:
+        payload = json.load(f)
+    return CalibrationResult.from_json(payload), payload["batch"]["batch_name"]
+
+
+def main(argv: Union[Sequence[str], None] = None) -> None:
+    parser = argparse.ArgumentParser(description="Calibrate IRT item parameters")
+    parser.add_argument("--model", choices=MODELS, default="3pl")
+    parser.add_argument(
+        "--input", help="Exported item responses (default: export from the backend)"
+    )
+    parser.add_argument("--output", default=DEFAULT_OUTPUT)
+    parser.add_argument("--days-back", type=int, default=365)
+    parser.add_argument("--min-responses", type=int, default=30)
+    parser.add_argument("--nodes", type=int, default=DEFAULT_NODES)
+    args = parser.parse_args(argv)
+
+    if args.input:
+        matrix = ResponseMatrix.from_export(args.input)
+    else:
+        from ..data.supabase_export import export_irt_item_responses
+
+        df = export_irt_item_responses(days_back=args.days_back)
+        matrix = ResponseMatrix.from_frame(df)
+    if len(matrix) == 0:
+        print("No item responses to calibrate.")
+        return
+
+    result = calibrate(
+        matrix,
+        model=args.model,
+        n_nodes=args.nodes,
+        min_responses=args.min_responses,
+        verbose=True,
+    )
+    path = write_calibration(result, args.output)
+    calibrated = result.items["difficulty"].notna().sum()
+    print(
+        f"Calibrated {calibrated} items ({result.model}, "
+        f"{result.n_responses} responses, {result.iterations} cycles, "
+        f"converged={result.converged}) -> {path}"
+    )
+
+
+if __name__ == "__main__":
+    main()
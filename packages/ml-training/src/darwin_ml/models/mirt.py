@@ -0,0 +1,578 @@
+"""
+Multidimensional IRT
+
+Calibration and scoring for the web app's 5-dimension compensatory model
+(packages/shared/src/calculators/mirt.ts):
+
+    P(X = 1 | theta) = c + (1 - c) * logistic(a'theta + d),  theta ~ N(0, I)
+
+with one dimension per ENAMED area. Each item loads primarily on its area
+(lognormal prior on that loading) and has cross-loadings on the other four
+shrunk towards zero (normal prior), which also pins down the rotation.
+Guessing is held fixed, as the web app does.
+
+Item parameters are estimated by Metropolis-Hastings Robbins-Monro (Cai,
+2010): every cycle draws one imputation of all abilities with a vectorized
+random-walk Metropolis step, then takes a stochastic Fisher-scoring step
+for all items from the complete-data gradients and information. Those come
+from two sparse x dense products per cycle, (responses weighted by the
+per-response score or information)' x (ability products). Standard errors
+use the Louis identity on the averages of the last stage.
+
+MAP scoring (score_mirt) is batched Newton over all users with the same
+per-response kernels, replacing the one-user-at-a-time estimateMIRT_MAP.
+Item parameters are exported as MIRTItemParameters JSON (the toMIRTItem()
+shape: itemId, discriminations, intercept, guessing, primaryDimension).
+
+Usage:
+    python -m darwin_ml.models.mirt --output artifacts/mirt_items.json
+"""
+
+import argparse
+import json
+import os
+from dataclasses import dataclass
+from typing import Mapping, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+from ..data.responses import ResponseMatrix
+
+# MIRT_DIMENSIONS in packages/shared/src/types/mirt.ts, in order
+DIMENSIONS = (
+    "clinica_medica",
+    "cirurgia",
+    "ginecologia_obstetricia",
+    "pediatria",
+    "saude_coletiva",
+)
+N_DIM = len(DIMENSIONS)
+LOADING_COLUMNS = [f"a_{dim}" for dim in DIMENSIONS]
+
+# log(a_primary) ~ N(0, 0.5); cross-loadings ~ N(0, 0.3) (the web app's
+# default cross-loading is 0.3)
+PRIMARY_PRIOR = (0.0, 0.5)
+CROSS_PRIOR_SD = 0.3
+PRIMARY_BOUNDS = (0.05, 8.0)
+INTERCEPT_BOUNDS = (-30.0, 30.0)
+MAX_STEP = 1.0
+
+# MHRM stages: burn-in (imputation only), fixed-gain updates, then
+# Robbins-Monro gains 1 / k^GAIN_DECAY until parameters settle
+BURN_IN = 50
+SEM_CYCLES = 50
+MAX_CYCLES = 2_000
+GAIN_DECAY = 0.75
+TARGET_ACCEPTANCE = (0.2, 0.4)
+
+# DEFAULT_MIRT_CONFIG in packages/shared/src/types/mirt.ts
+MAP_MAX_ITER = 25
+MAP_TOL = 1e-3
+
+DEFAULT_OUTPUT = "artifacts/mirt_items.json"
+
+
+@dataclass(frozen=True)
+class MIRTResult:
+    """
+    Calibrated MIRT item parameters.
+
+    items is indexed by item ID with a_<dimension> loadings, intercept,
+    guessing, primary_dimension, their standard errors (se_a_<dimension>,
+    se_intercept) and n_responses.
+    """
+
+    items: pd.DataFrame
+    iterations: int
+    converged: bool
+    n_persons: int
+    n_responses: int
+
+    def to_json(self) -> dict:
+        """Run summary plus MIRTItemParameters for every item."""
+        return {
+            "dimensions": list(DIMENSIONS),
+            "iterations": self.iterations,
+            "converged": self.converged,
+            "n_persons": self.n_persons,
+            "n_responses": self.n_responses,
+            "items": [
+                {
+                    "itemId": str(item),
+                    "discriminations": row[LOADING_COLUMNS].astype(float).tolist(),
+                    "intercept": float(row["intercept"]),
+                    "guessing": float(row["guessing"]),
+                    "primaryDimension": row["primary_dimension"],
+                    "standardErrors": {
+                        "discriminations": row[
+                            [f"se_{c}" for c in LOADING_COLUMNS]
+                        ].tolist(),
+                        "intercept": row["se_intercept"],
+                    },
+                }
+                for item, row in self.items.iterrows()
+                if np.isfinite(row["intercept"])
+            ],
+        }
+
+
+def items_from_json(payload: dict) -> pd.DataFrame:
+    """Item frame (as in MIRTResult.items) from MIRTItemParameters JSON."""
+    items = payload["items"] if isinstance(payload, dict) else payload
+    loadings = np.array([item["discriminations"] for item in items], dtype=float)
+    frame = pd.DataFrame(
+        loadings.reshape(-1, N_DIM),
+        columns=LOADING_COLUMNS,
+        index=pd.Index([item["itemId"] for item in items], name="item", dtype=object),
+    )
+    frame["intercept"] = [item["intercept"] for item in items]
+    frame["guessing"] = [item["guessing"] for item in items]
+    frame["primary_dimension"] = [item["primaryDimension"] for item in items]
+    return frame
+
+
+# -- per-response kernels (shared by calibration and scoring) ---------------
+
+
+def _entry_eta(
+    rows: np.ndarray,
+    items: np.ndarray,
+    theta: np.ndarray,
+    loadings: np.ndarray,
+    intercept: np.ndarray,
+) -> np.ndarray:
+    """a_j'theta_i + d_j for every stored response, in float32."""
+    eta = intercept.astype(np.float32)[items]
+    for k in range(theta.shape[1]):
+        eta += (
+            loadings[:, k].astype(np.float32)[items]
+            * theta[:, k].astype(np.float32)[rows]
+        )
+    return eta
+
+
+def _probabilities(eta: np.ndarray, guessing: np.ndarray) -> tuple:
+    """(P*, P) per response for P = c + (1 - c) P*, P* = logistic(eta)."""
+    star = np.clip(eta, -30, 30)
+    np.negative(star, out=star)
+    np.exp(star, out=star)
+    star += 1
+    np.reciprocal(star, out=star)
+    np.clip(star, 1e-7, 1 - 1e-7, out=star)
+    return star, guessing + (1 - guessing) * star
+
+
+def _eta_terms(
+    eta: np.ndarray, guessing: np.ndarray, outcomes: np.ndarray
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Per-response score and Fisher information of the linear predictor:
+    (x - P) P*/P and (1 - c) P*^2 (1 - P*) / P.
+    """
+    star, p = _probabilities(eta, guessing)
+    ratio = star / p
+    return (outcomes - p) * ratio, (1 - guessing) * star * (1 - star) * ratio
+
+
+def _entry_log_likelihood(
+    eta: np.ndarray, guessing: np.ndarray, outcomes: np.ndarray
+) -> np.ndarray:
+    _, p = _probabilities(eta, guessing)
+    return np.where(outcomes > 0, np.log(p), np.log1p(-p))
+
+
+def _weighted(x: sp.csr_matrix, values: np.ndarray) -> sp.csr_matrix:
+    """The response pattern of x carrying per-response values."""
+    return sp.csr_matrix((values, x.indices, x.indptr), shape=x.shape)
+
+
+def _person_sums(x: sp.csr_matrix, values: np.ndarray) -> np.ndarray:
+    return np.asarray(_weighted(x, values).sum(axis=1), dtype=np.float64).ravel()
+
+
+_PAIRS = np.triu_indices(N_DIM + 1)
+
+
+def _pair_products(z: np.ndarray) -> np.ndarray:
+    """Upper-triangle products z_k z_l per row (for batched Gram blocks)."""
+    return z[:, _PAIRS[0]] * z[:, _PAIRS[1]]
+
+
+def _from_pairs(pairs: np.ndarray, size: int) -> np.ndarray:
+    """Symmetric (n, size, size) matrices from their upper-triangle rows."""
+    upper = np.triu_indices(size)
+    out = np.zeros((len(pairs), size, size))
+    out[:, upper[0], upper[1]] = pairs
+    out[:, upper[1], upper[0]] = pairs
+    return out
+
+
+# -- calibration ------------------------------------------------------------
+
+
+@dataclass
+class _Items:
+    loadings: np.ndarray  # items x N_DIM
+    intercept: np.ndarray
+    guessing: np.ndarray
+    primary: np.ndarray  # primary dimension index per item
+
+    def vector(self) -> np.ndarray:
+        return np.column_stack([self.loadings, self.intercept])
+
+
+def _prior_terms(items: _Items) -> tuple[np.ndarray, np.ndarray]:
+    """Gradient and information of the loading priors, items x (N_DIM + 1)."""
+    n = len(items.intercept)
+    gradient = np.zeros((n, N_DIM + 1))
+    information = np.zeros((n, N_DIM + 1))
+    a = items.loadings
+    gradient[:, :N_DIM] = -a / CROSS_PRIOR_SD**2
+    information[:, :N_DIM] = 1 / CROSS_PRIOR_SD**2
+    # Lognormal on the primary loading
+    rows = np.arange(n)
+    primary = a[rows, items.primary]
+    mu, sd = PRIMARY_PRIOR
+    gradient[rows, items.primary] = -(np.log(primary) - mu) / (sd**2 * primary) - (
+        1 / primary
+    )
+    information[rows, items.primary] = 1 / (sd * primary) ** 2
+    return gradient, information
+
+
+def _item_gradient_information(
+    x: sp.csr_matrix,
+    score: np.ndarray,
+    information: np.ndarray,
+    theta: np.ndarray,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Complete-data gradient (items x 6) and information (items x 6 x 6) of
+    (loadings, intercept), summed over each item's respondents as
+    (weighted responses)' x [theta, 1] products.
+    """
+    z = np.column_stack([theta, np.ones(len(theta))]).astype(np.float32)
+    gradient = np.asarray(_weighted(x, score).T @ z, dtype=np.float64)
+    pairs = np.asarray(_weighted(x, information).T @ _pair_products(z))
+    return gradient, _from_pairs(pairs.astype(np.float64), N_DIM + 1)
+
+
+def _step(gradient: np.ndarray, information: np.ndarray) -> np.ndarray:
+    ridge = 1e-6 * np.eye(information.shape[-1])
+    step = np.linalg.solve(information + ridge, gradient[..., None])[..., 0]
+    return np.clip(step, -MAX_STEP, MAX_STEP)
+
+
+def _constrain(items: _Items) -> None:
+    rows = np.arange(len(items.intercept))
+    items.loadings[rows, items.primary] = np.clip(
+        items.loadings[rows, items.primary], *PRIMARY_BOUNDS
+    )
+    np.clip(items.intercept, *INTERCEPT_BOUNDS, out=items.intercept)
+
+
+def _initial_items(
+    x: sp.csr_matrix, primary: np.ndarray, guessing: np.ndarray
+) -> _Items:
+    n = np.bincount(x.indices, minlength=x.shape[1])
+    right = np.bincount(x.indices, weights=x.data, minlength=x.shape[1])
+    p = (right + 0.5) / (n + 1.0)
+    p = np.clip((p - guessing) / (1 - guessing), 0.02, 0.98)
+    loadings = np.zeros((x.shape[1], N_DIM))
+    loadings[np.arange(x.shape[1]), primary] = 1.0
+    return _Items(loadings, np.log(p / (1 - p)), guessing, primary)
+
+
+def _aligned(values, labels: pd.Index, name: str) -> pd.Series:
+    if isinstance(values, (Mapping, pd.Series)):
+        return pd.Series(values).reindex(labels)
+    return pd.Series(values, index=labels, name=name)
+
+
+def calibrate_mirt(
+    responses: ResponseMatrix,
+    areas: Union[Mapping, pd.Series],
+    guessing: Union[float, Mapping, pd.Series] = 0.0,
+    burn_in: int = BURN_IN,
+    sem_cycles: int = SEM_CYCLES,
+    max_cycles: int = MAX_CYCLES,
+    tol: float = 1e-3,
+    window: int = 3,
+    seed: int = 0,
+    verbose: bool = False,
+) -> MIRTResult:
+    """
+    Estimate 5-D loadings and intercepts by MHRM.
+
+    Args:
+        responses: Users x items responses
+        areas: ENAMED area (one of DIMENSIONS) per item ID; items without a
+            known area are left out (NaN rows)
+        guessing: Fixed c, as one value or per item ID (missing -> 0)
+        burn_in: Cycles of ability imputation before any update
+        sem_cycles: Cycles of full Fisher-scoring steps (gain 1)
+        max_cycles: Limit on the Robbins-Monro cycles that follow
+        tol: Stop once no parameter moves by more than this for window
+            consecutive Robbins-Monro cycles
+        seed: Seed for the Metropolis draws
+    """
+    labels = responses.items.index
+    area = _aligned(areas, labels, "area")
+    dimension = area.map({dim: k for k, dim in enumerate(DIMENSIONS)})
+    kept = np.flatnonzero(dimension.notna().to_numpy())
+    x = responses.to_csr()[:, kept]
+    answered = np.diff(x.indptr) > 0
+    x = x[answered]
+    rows = np.repeat(np.arange(x.shape[0], dtype=np.int32), np.diff(x.indptr))
+    guess = _aligned(guessing, labels, "guessing").fillna(0.0).to_numpy()[kept]
+    items = _initial_items(x, dimension.to_numpy()[kept].astype(int), guess)
+    c_entry = items.guessing.astype(np.float32)[x.indices]
+
+    rng = np.random.default_rng(seed)
+    n_persons = x.shape[0]
+    theta = np.zeros((n_persons, N_DIM))
+    scale = 2.4 / np.sqrt(N_DIM)
+
+    def log_likelihood(theta: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        eta = _entry_eta(rows, x.indices, theta, items.loadings, items.intercept)
+        return eta, _person_sums(x, _entry_log_likelihood(eta, c_entry, x.data))
+
+    eta, current = log_likelihood(theta)
+    gain_matrix = None
+    averages: dict[str, np.ndarray] = {}
+    settled = 0
+    converged = False
+    total = burn_in + sem_cycles + max_cycles
+    cycle = 0
+    for cycle in range(1, total + 1):
+        # Metropolis step for every person's ability vector at once
+        proposal = theta + scale * rng.standard_normal(theta.shape)
+        proposal_eta, proposed = log_likelihood(proposal)
+        log_ratio = (
+            proposed
+            - current
+            - 0.5 * ((proposal**2).sum(axis=1) - (theta**2).sum(axis=1))
+        )
+        accept = np.log(rng.random(n_persons)) < log_ratio
+        theta[accept] = proposal[accept]
+        current = np.where(accept, proposed, current)
+        eta = np.where(accept[rows], proposal_eta, eta)
+        if cycle <= burn_in:
+            rate = accept.mean()
+            if rate < TARGET_ACCEPTANCE[0]:
+                scale *= 0.9
+            elif rate > TARGET_ACCEPTANCE[1]:
+                scale *= 1.1
+            continue
+
+        score, information = _eta_terms(eta, c_entry, x.data)
+        gradient, info = _item_gradient_information(x, score, information, theta)
+        prior_gradient, prior_information = _prior_terms(items)
+        gradient += prior_gradient
+        info[:, np.arange(N_DIM + 1), np.arange(N_DIM + 1)] += prior_information
+
+        stage = cycle - burn_in - sem_cycles
+        if stage <= 0:
+            step = _step(gradient, info)
+        else:
+            gain = 1.0 / stage**GAIN_DECAY
+            gain_matrix = info if gain_matrix is None else gain_matrix
+            gain_matrix = gain_matrix + gain * (info - gain_matrix)
+            step = gain * _step(gradient, gain_matrix)
+            # Running averages for the Louis standard errors
+            outer = gradient[:, :, None] * gradient[:, None, :]
+            for key, value in (("g", gradient), ("gg", outer), ("h", info)):
+                averages[key] = (
+                    averages.get(key, value)
+                    + (value - averages.get(key, value)) / stage
+                )
+
+        before = items.vector()
+        items.loadings += step[:, :N_DIM]
+        items.intercept += step[:, N_DIM]
+        _constrain(items)
+        change = float(np.abs(items.vector() - before).max())
+        # Abilities were imputed under the old parameters
+        eta, current = log_likelihood(theta)
+        if verbose and cycle % 25 == 0:
+            print(f"  cycle {cycle}: change={change:.2e} accept={accept.mean():.2f}")
+        if stage > 0:
+            settled = settled + 1 if change < tol else 0
+            if settled >= window:
+                converged = True
+                break
+
+    errors = _standard_errors(averages)
+    frame = pd.DataFrame(items.loadings, columns=LOADING_COLUMNS)
+    frame["intercept"] = items.intercept
+    frame["guessing"] = items.guessing
+    frame["primary_dimension"] = [DIMENSIONS[k] for k in items.primary]
+    for k, column in enumerate([*LOADING_COLUMNS, "intercept"]):
+        frame[f"se_{column}"] = errors[:, k]
+    frame["n_responses"] = np.bincount(x.indices, minlength=x.shape[1])
+    frame.index = kept
+    frame = frame.reindex(np.arange(len(labels)))
+    frame.index = pd.Index(labels, name="item")
+    return MIRTResult(
+        items=frame,
+        iterations=cycle,
+        converged=converged,
+        n_persons=int(answered.sum()),
+        n_responses=int(x.nnz),
+    )
+
+
+def _standard_errors(averages: dict[str, np.ndarray]) -> np.ndarray:
+    """
+    Per-item SEs from the Louis identity: observed information = E[complete
+    information] - Var[complete score]. Items whose estimate is not
+    positive definite fall back to the complete-data information.
+    """
+    if not averages:
+        return np.full((0, N_DIM + 1), np.nan)
+    g = averages["g"]
+    observed = averages["h"] - (averages["gg"] - g[:, :, None] * g[:, None, :])
+    positive = np.linalg.eigvalsh(observed)[:, 0] > 0
+    observed[~positive] = averages["h"][~positive]
+    covariance = np.linalg.inv(observed)
+    return np.sqrt(np.diagonal(covariance, axis1=1, axis2=2))
+
+
+# -- scoring ----------------------------------------------------------------
+
+
+def score_mirt(
+    responses: ResponseMatrix,
+    items: pd.DataFrame,
+    prior_covariance: Optional[np.ndarray] = None,
+    max_iter: int = MAP_MAX_ITER,
+    tol: float = MAP_TOL,
+) -> pd.DataFrame:
+    """
+    Batched MAP abilities (all users at once) under N(0, prior_covariance).
+
+    Args:
+        responses: Users x items responses
+        items: MIRT item parameters indexed by item ID (MIRTResult.items or
+            items_from_json()); responses to other items are ignored
+        prior_covariance: 5 x 5 prior covariance (identity by default)
+
+    Returns:
+        Frame indexed by user_id with theta_<dimension> and se_<dimension>
+        per dimension, n_responses and converged
+    """
+    params = items.reindex(pd.Index(responses.items.values, dtype=object))
+    usable = np.flatnonzero(params["intercept"].notna().to_numpy())
+    params = params.iloc[usable]
+    x = responses.to_csr()[:, usable]
+    rows = np.repeat(np.arange(x.shape[0], dtype=np.int32), np.diff(x.indptr))
+    loadings = params[LOADING_COLUMNS].to_numpy(dtype=np.float64)
+    intercept = params["intercept"].to_numpy(dtype=np.float64)
+    c_entry = params["guessing"].to_numpy(dtype=np.float32)[x.indices]
+    precision = np.linalg.inv(
+        np.eye(N_DIM) if prior_covariance is None else np.asarray(prior_covariance)
+    )
+    # Upper-triangle products of the loadings, in _from_pairs order
+    upper = np.triu_indices(N_DIM)
+    loading_pairs = (loadings[:, upper[0]] * loadings[:, upper[1]]).astype(np.float32)
+    loadings32 = loadings.astype(np.float32)
+
+    theta = np.zeros((x.shape[0], N_DIM))
+    active = np.ones(x.shape[0], dtype=bool)
+    information = np.tile(precision, (x.shape[0], 1, 1))
+    for _ in range(max_iter):
+        eta = _entry_eta(rows, x.indices, theta, loadings, intercept)
+        score, info = _eta_terms(eta, c_entry, x.data)
+        gradient = np.asarray(_weighted(x, score) @ loadings32, dtype=np.float64)
+        gradient -= theta @ precision
+        pairs = np.asarray(_weighted(x, info) @ loading_pairs, dtype=np.float64)
+        information = _from_pairs(pairs, N_DIM) + precision
+        step = np.linalg.solve(information, gradient[..., None])[..., 0]
+        # Cap each person's step length, as the web app's step halving does
+        norm = np.linalg.norm(step, axis=1, keepdims=True)
+        step *= np.minimum(1.0, MAX_STEP / np.maximum(norm, 1e-12))
+        step[~active] = 0
+        theta += step
+        active = np.abs(step).max(axis=1) >= tol
+        if not active.any():
+            break
+
+    covariance = np.linalg.inv(information)
+    se = np.sqrt(np.diagonal(covariance, axis1=1, axis2=2))
+    frame = pd.DataFrame(
+        np.column_stack([theta, se]),
+        columns=[f"theta_{d}" for d in DIMENSIONS] + [f"se_{d}" for d in DIMENSIONS],
+        index=pd.Index(responses.users.values, name="user_id", dtype=object),
+    )
+    frame["n_responses"] = np.diff(x.indptr)
+    frame["converged"] = ~active
+    return frame
+
+
+def write_mirt(result: MIRTResult, path: str = DEFAULT_OUTPUT) -> str:
+    """Write result.to_json() to path (atomically)."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(result.to_json(), f, indent=2, default=float)
+    os.replace(tmp, path)
+    return path
+
+
+def _question_areas(client=None) -> pd.Series:
+    from ..data.backend import get_backend
+    from ..data.supabase_export import iter_keyset_pages
+
+    client = client or get_backend()
+    rows = [
+        row
+        for page in iter_keyset_pages(client, "questions", "id, area")
+        for row in page
+    ]
+    return pd.Series({row["id"]: row["area"] for row in rows}, name="area")
+
+
+def main(argv: Union[Sequence[str], None] = None) -> None:
+    parser = argparse.ArgumentParser(description="Calibrate the 5-D MIRT model")
+    parser.add_argument(
+        "--input", help="Exported item responses (default: export from the backend)"
+    )
+    parser.add_argument("--output", default=DEFAULT_OUTPUT)
+    parser.add_argument(
+        "--calibration", help="Unidimensional calibration JSON to take guessing from"
+    )
+    parser.add_argument("--days-back", type=int, default=365)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    if args.input:
+        matrix = ResponseMatrix.from_export(args.input)
+    else:
+        from ..data.supabase_export import export_irt_item_responses
+
+        matrix = ResponseMatrix.from_frame(
+            export_irt_item_responses(days_back=args.days_back)
+        )
+    if len(matrix) == 0:
+        print("No item responses to calibrate.")
+        return
+    guessing: Union[float, pd.Series] = 0.0
+    if args.calibration:
+        from .irt_calibration import read_calibration
+
+        guessing = read_calibration(args.calibration)[0].items["guessing"]
+
+    result = calibrate_mirt(
+        matrix, _question_areas(), guessing=guessing, seed=args.seed, verbose=True
+    )
+    path = write_mirt(result, args.output)
+    print(
+        f"Calibrated {len(result.to_json()['items'])} items "
+        f"({result.iterations} cycles, converged={result.converged}) -> {path}"
+    )
+
+
+if __name__ == "__main__":
+    main()
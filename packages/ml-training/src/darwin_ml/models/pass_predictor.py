@@ -0,0 +1,539 @@
+"""
+Pass Predictor
+
+Predicts whether a user passes their next exam from the features of their
+latest completed attempt (the ml_pass_prediction_features export: ability,
+theta_delta, the per-area percentages and engagement). Each attempt is
+labelled with the outcome of the same user's following attempt; the
+attempt's own `target` is decided by its score and would leak.
+
+Splits are by time (when the labelling attempt completed): the newest
+TEST_FRACTION of examples are held out for evaluation, and the newest
+CALIBRATION_FRACTION of the rest both stop LightGBM's boosting early and
+fit a Platt scaling of its log-odds. The booster and the calibration are
+exported as one ONNX graph whose output is the calibrated pass
+probability, and PassScorer runs it through onnxruntime in large batches
+so every user's latest attempt is scored in one pass.
+
+Usage:
+    python -m darwin_ml.models.pass_predictor --output artifacts/pass_predictor.onnx
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Iterator, Optional, Sequence, Union
+
+import lightgbm as lgb
+import numpy as np
+import onnx
+import pandas as pd
+from onnx import TensorProto, helper
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import brier_score_loss, log_loss, roc_auc_score
+
+from ..data.backend import DataBackend, get_backend, insert_rows
+from ..data.supabase_export import PASS_PCT_COLUMNS
+
+# Columns of ml_pass_prediction_features fed to the model. scaled_score is
+# left out: it is a monotone transform of theta.
+FEATURES = [
+    "theta",
+    "standard_error",
+    "theta_delta",
+    *PASS_PCT_COLUMNS,
+    "streak_days",
+    "xp",
+]
+TIME_COLUMN = "completed_at"
+
+TEST_FRACTION = 0.2
+CALIBRATION_FRACTION = 0.2
+LGBM_PARAMS = {
+    "objective": "binary",
+    "learning_rate": 0.05,
+    "num_leaves": 15,
+    "min_child_samples": 20,
+    "subsample": 0.8,
+    "subsample_freq": 1,
+    "colsample_bytree": 0.8,
+    "reg_lambda": 1.0,
+    "verbose": -1,
+}
+MAX_ROUNDS = 1_000
+EARLY_STOPPING_ROUNDS = 50
+CALIBRATION_BINS = 10
+
+# Rows per onnxruntime call; the whole user base fits in a few batches
+SCORE_BATCH_ROWS = 65_536
+LATENCY_BATCH_SIZES = (1, 64, 1_024, SCORE_BATCH_ROWS)
+ONNX_OPSET = 13
+ONNX_INPUT = "features"
+ONNX_OUTPUT = "pass_probability"
+
+PREDICTIONS_TABLE = "user_predictions"
+PREDICTIONS_KEY = "user_id,prediction_type,model_version"
+PREDICTION_TYPE = "pass_probability"
+
+DEFAULT_OUTPUT = "artifacts/pass_predictor.onnx"
+# Held-out split saved beside the model for the registry's serving checks
+EVAL_SUFFIX = "_eval.npz"
+
+
+@dataclass(frozen=True)
+class PassExamples:
+    """
+    Labelled examples (one per attempt followed by another attempt of the
+    same user) and the latest attempt of every user, to score.
+    """
+
+    train: pd.DataFrame
+    latest: pd.DataFrame
+
+    @classmethod
+    def from_frame(cls, features: pd.DataFrame) -> "PassExamples":
+        if TIME_COLUMN not in features.columns or features[TIME_COLUMN].isna().all():
+            raise ValueError(
+                f"Pass features need {TIME_COLUMN} for the time split "
+                "(migration 024_pass_prediction_completed_at)"
+            )
+        df = features[features[TIME_COLUMN].notna()].copy()
+        df[TIME_COLUMN] = pd.to_datetime(df[TIME_COLUMN], utc=True)
+        df["user_id"] = df["user_id"].astype(str)
+        df = df.sort_values(["user_id", TIME_COLUMN], kind="stable")
+        following = df.groupby("user_id", sort=False)
+        df["label"] = following["target"].shift(-1)
+        df["label_at"] = following[TIME_COLUMN].shift(-1)
+        last = df["label_at"].isna()
+        train = df[~last & df["label"].notna()].copy()
+        train["label"] = train["label"].astype(bool)
+        return cls(
+            train=train.sort_values("label_at", kind="stable").reset_index(drop=True),
+            latest=df[last].reset_index(drop=True),
+        )
+
+
+def feature_matrix(frame: pd.DataFrame) -> np.ndarray:
+    """FEATURES as the float32 matrix the model and the ONNX graph take."""
+    return (
+        frame[FEATURES]
+        .apply(pd.to_numeric, errors="coerce")
+        .fillna(0)
+        .to_numpy(dtype=np.float32)
+    )
+
+
+def _metrics(y: np.ndarray, p: np.ndarray) -> dict:
+    """AUC, Brier score, log-loss and expected calibration error."""
+    bins = np.minimum((p * CALIBRATION_BINS).astype(int), CALIBRATION_BINS - 1)
+    counts = np.bincount(bins, minlength=CALIBRATION_BINS)
+    gap = np.abs(
+        np.bincount(bins, weights=p, minlength=CALIBRATION_BINS)
+        - np.bincount(bins, weights=y, minlength=CALIBRATION_BINS)
+    )
+    both = len(np.unique(y)) == 2
+    return {
+        "auc": float(roc_auc_score(y, p)) if both else float("nan"),
+        "brier": float(brier_score_loss(y, p)),
+        "log_loss": float(log_loss(y, np.clip(p, 1e-7, 1 - 1e-7), labels=[0, 1])),
+        "ece": float(gap.sum() / max(counts.sum(), 1)),
+    }
+
+
+@dataclass(frozen=True)
+class PassPredictor:
+    """A trained booster, its Platt scaling and held-out metrics."""
+
+    booster: lgb.Booster
+    slope: float
+    intercept: float
+    metrics: dict
+    split: dict
+    latency: list = field(default_factory=list)
+
+    def log_odds(self, x: np.ndarray) -> np.ndarray:
+        return self.booster.predict(x, raw_score=True)
+
+    def predict_proba(self, x: np.ndarray) -> np.ndarray:
+        """Calibrated pass probabilities (what the ONNX graph computes)."""
+        z = self.slope * self.log_odds(x) + self.intercept
+        return 1 / (1 + np.exp(-z))
+
+    def to_json(self) -> dict:
+        importance = self.booster.feature_importance("gain")
+        return {
+            "features": FEATURES,
+            "calibration": {"slope": self.slope, "intercept": self.intercept},
+            "bestIteration": self.booster.best_iteration,
+            "featureImportance": dict(zip(FEATURES, np.round(importance, 3).tolist())),
+            "metrics": self.metrics,
+            "split": self.split,
+            "latency": self.latency,
+        }
+
+
+def train_pass_predictor(
+    examples: PassExamples,
+    test_fraction: float = TEST_FRACTION,
+    calibration_fraction: float = CALIBRATION_FRACTION,
+    params: Optional[dict] = None,
+    seed: int = 0,
+) -> PassPredictor:
+    """
+    Fit LightGBM on the oldest examples and calibrate it on the next ones.
+
+    Args:
+        examples: PassExamples.from_frame(export)
+        test_fraction: Newest share of examples held out for the metrics
+        calibration_fraction: Newest share of the remaining examples used
+            for early stopping and Platt scaling
+        params: Overrides of LGBM_PARAMS
+        seed: LightGBM seed
+    """
+    train = examples.train
+    n = len(train)
+    n_test = int(n * test_fraction)
+    n_calibration = int((n - n_test) * calibration_fraction)
+    n_fit = n - n_test - n_calibration
+    if min(n_fit, n_calibration, n_test) == 0:
+        raise ValueError(f"Too few labelled attempts ({n}) for a time split")
+    x, y = feature_matrix(train), train["label"].to_numpy(dtype=np.int8)
+    fit, calibrate = slice(0, n_fit), slice(n_fit, n - n_test)
+    test = slice(n - n_test, n)
+
+    booster = lgb.train(
+        {**LGBM_PARAMS, "seed": seed, **(params or {})},
+        lgb.Dataset(x[fit], y[fit], feature_name=FEATURES),
+        num_boost_round=MAX_ROUNDS,
+        valid_sets=[lgb.Dataset(x[calibrate], y[calibrate], feature_name=FEATURES)],
+        callbacks=[lgb.early_stopping(EARLY_STOPPING_ROUNDS, verbose=False)],
+    )
+    margin = booster.predict(x[calibrate], raw_score=True)
+    if len(np.unique(y[calibrate])) == 2:
+        platt = LogisticRegression(C=1e6).fit(margin[:, None], y[calibrate])
+        slope, intercept = float(platt.coef_[0, 0]), float(platt.intercept_[0])
+    else:
+        slope, intercept = 1.0, 0.0
+
+    raw = 1 / (1 + np.exp(-booster.predict(x[test], raw_score=True)))
+    model = PassPredictor(booster, slope, intercept, {}, {})
+    label_at = train["label_at"]
+    return PassPredictor(
+        booster=booster,
+        slope=slope,
+        intercept=intercept,
+        metrics={
+            "raw": _metrics(y[test], raw),
+            "calibrated": _metrics(y[test], model.predict_proba(x[test])),
+            "base_rate": float(y[test].mean()),
+        },
+        split={
+            "fit": n_fit,
+            "calibration": n_calibration,
+            "test": n_test,
+            "calibration_from": label_at.iloc[n_fit].isoformat(),
+            "test_from": label_at.iloc[n - n_test].isoformat(),
+        },
+    )
+
+
+def to_onnx(model: PassPredictor) -> onnx.ModelProto:
+    """
+    The booster as an ONNX TreeEnsembleClassifier followed by the Platt
+    scaling: input `features` (N x len(FEATURES) float32), output
+    `pass_probability` (N).
+    """
+    from onnxmltools import convert_lightgbm
+    from onnxmltools.convert.common.data_types import FloatTensorType
+
+    trees = convert_lightgbm(
+        model.booster,
+        initial_types=[(ONNX_INPUT, FloatTensorType([None, len(FEATURES)]))],
+        zipmap=False,
+    )
+    graph = trees.graph
+    probabilities = next(o.name for o in graph.output if o.name != "label")
+
+    def constant(name: str, value) -> onnx.TensorProto:
+        return helper.make_tensor(name, TensorProto.FLOAT, [], [float(value)])
+
+    eps = 1e-7
+    nodes = [
+        helper.make_node(
+            "Gather", [probabilities, "platt_class"], ["platt_p_raw"], axis=1
+        ),
+        helper.make_node(
+            "Clip", ["platt_p_raw", "platt_p_min", "platt_p_max"], ["platt_p"]
+        ),
+        helper.make_node("Sub", ["platt_one", "platt_p"], ["platt_q"]),
+        helper.make_node("Log", ["platt_p"], ["platt_log_p"]),
+        helper.make_node("Log", ["platt_q"], ["platt_log_q"]),
+        helper.make_node("Sub", ["platt_log_p", "platt_log_q"], ["platt_log_odds"]),
+        helper.make_node("Mul", ["platt_log_odds", "platt_slope"], ["platt_scaled"]),
+        helper.make_node(
+            "Add", ["platt_scaled", "platt_intercept"], ["platt_calibrated"]
+        ),
+        helper.make_node("Sigmoid", ["platt_calibrated"], [ONNX_OUTPUT]),
+    ]
+    initializers = [
+        helper.make_tensor("platt_class", TensorProto.INT64, [], [1]),
+        constant("platt_p_min", eps),
+        constant("platt_p_max", 1 - eps),
+        constant("platt_one", 1.0),
+        constant("platt_slope", model.slope),
+        constant("platt_intercept", model.intercept),
+    ]
+    combined = helper.make_graph(
+        list(graph.node) + nodes,
+        "pass_predictor",
+        list(graph.input),
+        [helper.make_tensor_value_info(ONNX_OUTPUT, TensorProto.FLOAT, [None])],
+        initializer=list(graph.initializer) + initializers,
+    )
+    opsets = [o for o in trees.opset_import if o.domain not in ("", "ai.onnx")]
+    opsets.append(helper.make_opsetid("", ONNX_OPSET))
+    exported = helper.make_model(combined, opset_imports=opsets)
+    exported.ir_version = trees.ir_version
+    exported.producer_name = "darwin_ml.models.pass_predictor"
+    onnx.checker.check_model(exported)
+    return exported
+
+
+class PassScorer:
+    """
+    onnxruntime session over an exported pass predictor.
+
+    Args:
+        model: Path to the .onnx file, its bytes or an onnx.ModelProto
+        threads: Intra-op threads (onnxruntime's default if omitted)
+    """
+
+    def __init__(
+        self,
+        model: Union[str, bytes, onnx.ModelProto],
+        threads: Optional[int] = None,
+    ) -> None:
+        import onnxruntime as ort
+
+        if isinstance(model, onnx.ModelProto):
+            model = model.SerializeToString()
+        options = ort.SessionOptions()
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(
+            model, options, providers=["CPUExecutionProvider"]
+        )
+
+    def score(
+        self,
+        features: Union[pd.DataFrame, np.ndarray],
+        batch_size: int = SCORE_BATCH_ROWS,
+    ) -> np.ndarray:
+        """Calibrated pass probabilities, batch_size rows per call."""
+        x = features if isinstance(features, np.ndarray) else feature_matrix(features)
+        x = np.ascontiguousarray(x, dtype=np.float32)
+        out = np.empty(len(x), dtype=np.float32)
+        for start in range(0, len(x), batch_size):
+            batch = x[start : start + batch_size]
+            (out[start : start + len(batch)],) = self.session.run(
+                [ONNX_OUTPUT], {ONNX_INPUT: batch}
+            )
+        return out
+
+    def latency(
+        self,
+        features: Union[pd.DataFrame, np.ndarray],
+        batch_sizes: Sequence[int] = LATENCY_BATCH_SIZES,
+        max_calls: int = 200,
+    ) -> pd.DataFrame:
+        """
+        Per-row cost of scoring at several batch sizes: throughput, mean
+        microseconds per row and percentiles of the per-call latency.
+        """
+        x = features if isinstance(features, np.ndarray) else feature_matrix(features)
+        x = np.ascontiguousarray(x, dtype=np.float32)
+        self.session.run([ONNX_OUTPUT], {ONNX_INPUT: x[:1]})  # warm-up
+        rows = []
+        for batch_size in batch_sizes:
+            batch_size = min(batch_size, len(x))
+            starts = np.arange(0, len(x) - batch_size + 1, batch_size)[:max_calls]
+            calls = np.empty(len(starts))
+            for k, start in enumerate(starts):
+                begin = time.perf_counter()
+                self.session.run(
+                    [ONNX_OUTPUT], {ONNX_INPUT: x[start : start + batch_size]}
+                )
+                calls[k] = time.perf_counter() - begin
+            scored = len(starts) * batch_size
+            rows.append(
+                {
+                    "batch_size": batch_size,
+                    "calls": len(starts),
+                    "rows_per_second": round(scored / calls.sum()),
+                    "us_per_row": round(1e6 * calls.sum() / scored, 3),
+                    "p50_ms": round(1e3 * float(np.percentile(calls, 50)), 4),
+                    "p99_ms": round(1e3 * float(np.percentile(calls, 99)), 4),
+                }
+            )
+            if batch_size == len(x):
+                break
+        return pd.DataFrame(rows)
+
+
+def score_users(
+    scorer: PassScorer,
+    examples: PassExamples,
+    batch_size: int = SCORE_BATCH_ROWS,
+) -> pd.DataFrame:
+    """Pass probability of every user, from their latest attempt."""
+    latest = examples.latest
+    return pd.DataFrame(
+        {
+            "user_id": latest["user_id"].to_numpy(),
+            "attempt_id": latest["attempt_id"].astype(str).to_numpy(),
+            "pass_probability": scorer.score(latest, batch_size),
+        }
+    )
+
+
+def model_version(model: onnx.ModelProto) -> str:
+    """pass_predictor@<first 12 hex digits of the graph's SHA-256>."""
+    digest = hashlib.sha256(model.SerializeToString()).hexdigest()
+    return f"pass_predictor@{digest[:12]}"
+
+
+def prediction_rows(scores: pd.DataFrame, version: str) -> Iterator[dict]:
+    """user_predictions rows for a score_users() frame."""
+    columns = zip(
+        scores["user_id"].tolist(),
+        np.round(scores["pass_probability"].to_numpy(np.float64), 3).tolist(),
+        scores["attempt_id"].tolist(),
+    )
+    for user, probability, attempt in columns:
+        yield {
+            "user_id": user,
+            "prediction_type": PREDICTION_TYPE,
+            "prediction_value": probability,
+            "model_version": version,
+            "features_used": {"attempt_id": attempt, "features": FEATURES},
+        }
+
+
+def write_predictions(
+    scores: pd.DataFrame, version: str, client: Optional[DataBackend] = None
+) -> int:
+    """
+    Upsert prediction_rows() into user_predictions; returns rows written.
+
+    Keyed by PREDICTIONS_KEY, so re-running a version replaces its rows.
+    """
+    client = client or get_backend()
+    return insert_rows(
+        client,
+        PREDICTIONS_TABLE,
+        prediction_rows(scores, version),
+        on_conflict=PREDICTIONS_KEY,
+    )
+
+
+def held_out(examples: PassExamples, model: PassPredictor) -> tuple:
+    """The test split train_pass_predictor() evaluated on: (features, labels)."""
+    test = examples.train.iloc[len(examples.train) - model.split["test"] :]
+    return feature_matrix(test), test["label"].to_numpy(dtype=np.int8)
+
+
+def write_model(
+    model: PassPredictor,
+    exported: onnx.ModelProto,
+    path: str = DEFAULT_OUTPUT,
+    evaluation: Optional[tuple] = None,
+) -> str:
+    """
+    Write the ONNX graph to path and model.to_json() beside it (.json).
+
+    evaluation, the held_out() split, is saved as <stem>_eval.npz so the
+    registry can check optimized and quantized graphs against it.
+    """
+    from ..export.artifacts import npz_bytes
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    stem = os.path.splitext(path)[0]
+    metadata = {"modelVersion": model_version(exported), **model.to_json()}
+    outputs = [
+        (path, exported.SerializeToString(), "wb"),
+        (f"{stem}.json", json.dumps(metadata, indent=2), "w"),
+    ]
+    if evaluation is not None:
+        x, y = evaluation
+        outputs.append((f"{stem}{EVAL_SUFFIX}", npz_bytes({"x": x, "y": y}), "wb"))
+    for target, payload, mode in outputs:
+        tmp = f"{target}.tmp"
+        with open(tmp, mode) as f:
+            f.write(payload)
+        os.replace(tmp, target)
+    return path
+
+
+def main(argv: Union[Sequence[str], None] = None) -> None:
+    parser = argparse.ArgumentParser(description="Train the pass predictor")
+    parser.add_argument(
+        "--input", help="Exported pass features (default: export from the backend)"
+    )
+    parser.add_argument("--output", default=DEFAULT_OUTPUT)
+    parser.add_argument("--min-attempts", type=int, default=3)
+    parser.add_argument("--test-fraction", type=float, default=TEST_FRACTION)
+    parser.add_argument("--batch-size", type=int, default=SCORE_BATCH_ROWS)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--dry-run", action="store_true", help=f"Do not write to {PREDICTIONS_TABLE}"
+    )
+    args = parser.parse_args(argv)
+
+    if args.input:
+        from ..data.columnar import read_export
+
+        features = read_export(args.input)
+    else:
+        from ..data.supabase_export import export_pass_prediction_features
+
+        features = export_pass_prediction_features(min_attempts=args.min_attempts)
+    if features.empty:
+        print("No pass prediction features to train on.")
+        return
+
+    examples = PassExamples.from_frame(features)
+    model = train_pass_predictor(
+        examples, test_fraction=args.test_fraction, seed=args.seed
+    )
+    exported = to_onnx(model)
+    scorer = PassScorer(exported)
+    scores = score_users(scorer, examples, args.batch_size)
+    report = scorer.latency(examples.latest)
+    model = PassPredictor(
+        model.booster,
+        model.slope,
+        model.intercept,
+        model.metrics,
+        model.split,
+        report.to_dict("records"),
+    )
+    path = write_model(
+        model, exported, args.output, evaluation=held_out(examples, model)
+    )
+
+    test = model.metrics["calibrated"]
+    print(
+        f"Held-out AUC {test['auc']:.3f}, Brier {test['brier']:.4f}, "
+        f"ECE {test['ece']:.4f} -> {path}"
+    )
+    print(report.to_string(index=False))
+    if not args.dry_run:
+        written = write_predictions(scores, model_version(exported))
+        print(f"Wrote {written} rows to {PREDICTIONS_TABLE}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,287 @@
+"""
+Theta Scoring
+
+Ability estimates for every user from calibrated item parameters, replacing
+the per-user Newton loop of the web app's estimateMIRT_MAP for the 1-D
+model. Two estimators, both computed for all users at once:
+
+- EAP: posterior mean and SD over the quadrature grid. The log-likelihood
+  of each user at every node is one sparse x dense product of the response
+  matrix with the [log(1 - P); log(P)] table, as in the calibration E-step.
+- MAP: posterior mode under the N(0, latent_sd) prior and its standard error
+  1 / sqrt(information), by Fisher scoring over all users started from EAP.
+
+Very large cohorts can be split into row blocks scored in a process pool.
+Results go to user_predictions in bulk, one row per user and estimator
+(prediction_type "theta_eap" / "theta_map") with a 95% interval.
+
+Usage:
+    python -m darwin_ml.models.theta_scoring --calibration artifacts/irt_calibration.json
+"""
+
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from scipy.special import logit
+
+from ..data.backend import DataBackend, get_backend, insert_rows
+from ..data.responses import ResponseMatrix
+from .irt_calibration import (
+    DEFAULT_CHUNK_SIZE,
+    DEFAULT_NODES,
+    DEFAULT_OUTPUT,
+    _fisher_theta,
+    _log_table,
+    _outcome_matrix,
+    _Params,
+    quadrature,
+    read_calibration,
+)
+
+METHODS = ("eap", "map")
+PREDICTION_TYPES = {"eap": "theta_eap", "map": "theta_map"}
+# Error column per method: posterior SD (EAP) or standard error (MAP)
+ERROR_COLUMNS = {"eap": "theta_eap_sd", "map": "theta_map_se"}
+PREDICTIONS_TABLE = "user_predictions"
+# Unique key of user_predictions (migration 025); rewrites replace rows
+PREDICTIONS_KEY = "user_id,prediction_type,model_version"
+INTERVAL_Z = 1.959964
+MAP_MAX_ITER = 20
+MAP_TOL = 1e-4
+# Blocks per worker, so a slow block does not hold up the pool
+BLOCKS_PER_WORKER = 4
+
+
+def _item_arrays(
+    responses: ResponseMatrix, items: pd.DataFrame
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Discrimination, difficulty and guessing per item code (NaN if the
+    item was not calibrated)."""
+    params = items.reindex(pd.Index(responses.items.values, dtype=object))
+    a = params["discrimination"].to_numpy(dtype=np.float64)
+    b = params["difficulty"].to_numpy(dtype=np.float64)
+    c = params["guessing"].fillna(0).to_numpy(dtype=np.float64)
+    return a, b, c
+
+
+def _score_block(
+    x: sp.csr_matrix,
+    a: np.ndarray,
+    b: np.ndarray,
+    c: np.ndarray,
+    methods: Sequence[str],
+    nodes: np.ndarray,
+    log_prior: np.ndarray,
+    prior_sd: float,
+    chunk_size: int,
+) -> dict[str, np.ndarray]:
+    """Scores for the rows of one CSR block (runs in pool workers)."""
+    n = x.shape[0]
+    out: dict[str, np.ndarray] = {}
+    params = _Params(
+        slope=a,
+        intercept=-a * b,
+        guessing_logit=np.where(c > 0, logit(np.clip(c, 1e-12, 1)), -np.inf),
+    )
+    table = _log_table(params, nodes)
+    outcomes = _outcome_matrix(x)
+    nodes32 = np.stack([nodes, nodes**2], axis=1).astype(np.float32)
+    prior32 = log_prior.astype(np.float32)
+    moments = np.empty((n, 2))
+    for start in range(0, n, chunk_size):
+        log_post = outcomes[start : start + chunk_size] @ table
+        log_post += prior32
+        log_post -= log_post.max(axis=1, keepdims=True)
+        posterior = np.exp(log_post, out=log_post)
+        posterior /= posterior.sum(axis=1, keepdims=True)
+        moments[start : start + len(posterior)] = posterior @ nodes32
+    eap = moments[:, 0]
+    if "eap" in methods:
+        out["theta_eap"] = eap
+        out["theta_eap_sd"] = np.sqrt(np.maximum(moments[:, 1] - eap**2, 0))
+    if "map" in methods:
+        theta, information = _fisher_theta(
+            x, a, b, c, eap, prior_sd, max_iter=MAP_MAX_ITER, tol=MAP_TOL
+        )
+        out["theta_map"] = theta
+        out["theta_map_se"] = 1 / np.sqrt(information)
+    return out
+
+
+def _row_blocks(x: sp.csr_matrix, n_blocks: int) -> list[tuple[int, int]]:
+    """Contiguous row ranges with roughly equal numbers of responses."""
+    bounds = np.searchsorted(x.indptr, np.linspace(0, x.nnz, n_blocks + 1))
+    bounds[0], bounds[-1] = 0, x.shape[0]
+    bounds = np.unique(bounds)
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def score_thetas(
+    responses: ResponseMatrix,
+    items: pd.DataFrame,
+    methods: Sequence[str] = METHODS,
+    latent_sd: float = 1.0,
+    n_nodes: int = DEFAULT_NODES,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    workers: int = 1,
+) -> pd.DataFrame:
+    """
+    EAP and/or MAP abilities for every user in a response matrix.
+
+    Responses to items without calibrated parameters are ignored; users
+    with none left get the prior (theta 0, error latent_sd).
+
+    Args:
+        responses: Users x items responses
+        items: Calibrated parameters indexed by item ID, with difficulty,
+            discrimination and guessing (CalibrationResult.items)
+        methods: Any of "eap" and "map"
+        latent_sd: SD of the N(0, sd) ability prior (the calibration's
+            latent_sd)
+        n_nodes: Quadrature nodes for EAP
+        chunk_size: Users per E-step product
+        workers: Processes to score row blocks in (1 scores in-process)
+
+    Returns:
+        Frame indexed by user_id with n_responses and, per method,
+        theta_eap/theta_eap_sd or theta_map/theta_map_se
+    """
+    unknown = set(methods) - set(METHODS)
+    if unknown or not methods:
+        raise ValueError(f"Unknown methods {sorted(unknown)}; expected {METHODS}")
+    a, b, c = _item_arrays(responses, items)
+    usable = np.flatnonzero(np.isfinite(a) & np.isfinite(b))
+    x = responses.to_csr()[:, usable]
+    a, b, c = a[usable], b[usable], c[usable]
+
+    base_nodes, log_prior = quadrature(n_nodes)
+    args = (a, b, c, tuple(methods), base_nodes * latent_sd, log_prior, latent_sd)
+    if workers > 1 and x.shape[0] > chunk_size:
+        blocks = _row_blocks(x, workers * BLOCKS_PER_WORKER)
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [
+                pool.submit(_score_block, x[start:stop], *args, chunk_size)
+                for start, stop in blocks
+            ]
+            parts = [future.result() for future in futures]
+        scores = {
+            key: np.concatenate([part[key] for part in parts]) for key in parts[0]
+        }
+    else:
+        scores = _score_block(x, *args, chunk_size)
+
+    frame = pd.DataFrame(
+        {"n_responses": np.diff(x.indptr), **scores},
+        index=pd.Index(responses.users.values, name="user_id", dtype=object),
+    )
+    return frame
+
+
+def prediction_rows(
+    scores: pd.DataFrame,
+    model_version: str,
+    methods: Optional[Sequence[str]] = None,
+) -> Iterator[dict]:
+    """
+    user_predictions rows for a score_thetas() frame: one per user and
+    method, with a 95% interval in confidence_interval. Users without
+    responses are skipped.
+    """
+    scored = scores[scores["n_responses"] > 0]
+    methods = methods or [m for m in METHODS if f"theta_{m}" in scores.columns]
+    users = scored.index.to_numpy(dtype=object)
+    counts = scored["n_responses"].to_numpy().tolist()
+    for method in methods:
+        theta = scored[f"theta_{method}"].to_numpy()
+        error = scored[ERROR_COLUMNS[method]].to_numpy()
+        columns = zip(
+            users,
+            np.round(theta, 3).tolist(),
+            np.round(theta - INTERVAL_Z * error, 3).tolist(),
+            np.round(theta + INTERVAL_Z * error, 3).tolist(),
+            np.round(error, 4).tolist(),
+            counts,
+        )
+        for user, value, lower, upper, err, n in columns:
+            yield {
+                "user_id": user,
+                "prediction_type": PREDICTION_TYPES[method],
+                "prediction_value": value,
+                "confidence_interval": {
+                    "lower": lower,
+                    "upper": upper,
+                    "level": 0.95,
+                    "se": err,
+                },
+                "model_version": model_version,
+                "features_used": {"n_responses": n},
+            }
+
+
+def write_predictions(
+    scores: pd.DataFrame,
+    model_version: str,
+    client: Optional[DataBackend] = None,
+    methods: Optional[Sequence[str]] = None,
+) -> int:
+    """
+    Upsert prediction_rows() into user_predictions; returns rows written.
+
+    Rows are keyed by PREDICTIONS_KEY, so a retried or re-run batch
+    replaces the model version's earlier predictions instead of adding more.
+    """
+    client = client or get_backend()
+    return insert_rows(
+        client,
+        PREDICTIONS_TABLE,
+        prediction_rows(scores, model_version, methods),
+        on_conflict=PREDICTIONS_KEY,
+    )
+
+
+def main(argv: Union[Sequence[str], None] = None) -> None:
+    parser = argparse.ArgumentParser(description="Score user abilities (EAP/MAP)")
+    parser.add_argument("--calibration", default=DEFAULT_OUTPUT)
+    parser.add_argument(
+        "--input", help="Exported item responses (default: export from the backend)"
+    )
+    parser.add_argument("--methods", nargs="+", choices=METHODS, default=list(METHODS))
+    parser.add_argument("--days-back", type=int, default=365)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--output", help="Also write the scores to this Parquet file")
+    parser.add_argument(
+        "--dry-run", action="store_true", help="Do not write to user_predictions"
+    )
+    args = parser.parse_args(argv)
+
+    calibration, batch_name = read_calibration(args.calibration)
+    if args.input:
+        matrix = ResponseMatrix.from_export(args.input)
+    else:
+        from ..data.supabase_export import export_irt_item_responses
+
+        matrix = ResponseMatrix.from_frame(
+            export_irt_item_responses(days_back=args.days_back)
+        )
+
+    scores = score_thetas(
+        matrix,
+        calibration.items,
+        methods=args.methods,
+        latent_sd=calibration.latent_sd,
+        workers=args.workers,
+    )
+    print(f"Scored {int((scores['n_responses'] > 0).sum())} users ({batch_name})")
+    if args.output:
+        scores.reset_index().to_parquet(args.output, index=False)
+    if not args.dry_run:
+        written = write_predictions(scores, batch_name, methods=args.methods)
+        print(f"Wrote {written} rows to {PREDICTIONS_TABLE}")
+
+
+if __name__ == "__main__":
+    main()
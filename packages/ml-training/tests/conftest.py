@@ -0,0 +1,219 @@
+"""Shared fixtures: an in-process PostgREST stand-in."""
+
+import json
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+import pytest
+
+
+def _split_top_level(expr: str) -> list[str]:
+    parts, depth, quoted, current = [], 0, False, ""
+    for char in expr:
+        if char == '"':
+            quoted = not quoted
+        elif not quoted and char == "(":
+            depth += 1
+        elif not quoted and char == ")":
+            depth -= 1
+        elif not quoted and depth == 0 and char == ",":
+            parts.append(current)
+            current = ""
+            continue
+        current += char
+    parts.append(current)
+    return parts
+
+
+def _coerce(value):
+    if isinstance(value, str):
+        try:
+            return datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            return value
+    return value
+
+
+def _compare(row_value, operator: str, raw: str) -> bool:
+    if operator in ("is", "not.is"):
+        result = row_value is None
+        return result if operator == "is" else not result
+    if row_value is None:
+        return False
+    value = raw[1:-1] if raw.startswith('"') else raw
+    left, right = _coerce(row_value), _coerce(value)
+    if type(left) is not type(right):
+        left, right = str(row_value), value
+    return {
+        "eq": left == right,
+        "gt": left > right,
+        "gte": left >= right,
+        "lt": left < right,
+    }[operator]
+
+
+def _term(row: dict, term: str) -> bool:
+    for logic in ("and", "or"):
+        if term.startswith(f"{logic}("):
+            results = [
+                _term(row, t) for t in _split_top_level(term[len(logic) + 1 : -1])
+            ]
+            return all(results) if logic == "and" else any(results)
+    column, rest = term.split(".", 1)
+    operator, raw = rest.split(".", 1)
+    if operator == "not":
+        inner, raw = raw.split(".", 1)
+        operator = f"not.{inner}"
+    return _compare(row.get(column), operator, raw)
+
+
+class FakePostgrest(ThreadingHTTPServer):
+    """
+    Serves in-memory tables over the PostgREST query syntax the exporters use.
+
+    Attributes:
+        tables: table name -> list of row dicts
+        rpcs: function name -> list of row dicts
+        fail_next: HTTP statuses to return (in order) before serving normally
+        delay: seconds each request sleeps, to expose concurrency
+        max_in_flight: highest number of simultaneously served requests
+    """
+
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.tables: dict[str, list[dict]] = {}
+        self.rpcs: dict[str, list[dict]] = {}
+        self.fail_next: list[int] = []
+        self.delay = 0.0
+        self.requests = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address
+        return f"http://{host}:{port}"
+
+    def query(self, rows: list[dict], params: list[tuple[str, str]]) -> list[dict]:
+        limit = None
+        order: list[str] = []
+        columns = None
+        for key, value in params:
+            if key == "select":
+                columns = None if value == "*" else value.split(",")
+            elif key == "order":
+                order = value.split(",")
+            elif key == "limit":
+                limit = int(value)
+            elif key == "or":
+                rows = [r for r in rows if _term(r, f"or{value}")]
+            else:
+                rows = [r for r in rows if _term(r, f"{key}.{value}")]
+
+        for term in reversed(order):
+            column = term.split(".")[0]
+            desc = ".desc" in term
+            # Postgres default: NULLS LAST ascending, NULLS FIRST descending
+            nulls_first = ".nullsfirst" in term or (desc and ".nullslast" not in term)
+            present = sorted(
+                (r for r in rows if r.get(column) is not None),
+                key=lambda r: _coerce(r[column]),
+                reverse=desc,
+            )
+            nulls = [r for r in rows if r.get(column) is None]
+            rows = nulls + present if nulls_first else present + nulls
+        if limit is not None:
+            rows = rows[:limit]
+        if columns is not None:
+            rows = [{c: r.get(c) for c in columns} for r in rows]
+        return rows
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: FakePostgrest
+
+    def log_message(self, *args):
+        pass
+
+    def _serve(self, rows_for):
+        server = self.server
+        with server.lock:
+            server.requests += 1
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+            status = server.fail_next.pop(0) if server.fail_next else None
+        try:
+            time.sleep(server.delay)
+            if status is not None:
+                self.send_response(status)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            url = urlsplit(self.path)
+            params = parse_qsl(url.query, keep_blank_values=True)
+            name = url.path.rsplit("/", 1)[-1]
+            source = rows_for(name)
+            if source is None:
+                self.send_response(404)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            body = json.dumps(server.query(source, params)).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        finally:
+            with server.lock:
+                server.in_flight -= 1
+
+    def do_GET(self):
+        self._serve(self.server.tables.get)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length)
+        if "/rpc/" in self.path:
+            self._serve(self.server.rpcs.get)
+            return
+        # Table insert (Prefer: return=minimal), or an upsert on on_conflict
+        url = urlsplit(self.path)
+        name = url.path.rsplit("/", 1)[-1]
+        key = dict(parse_qsl(url.query)).get("on_conflict")
+        rows = json.loads(body)
+        with self.server.lock:
+            self.server.requests += 1
+            status = self.server.fail_next.pop(0) if self.server.fail_next else None
+            if status is not None:
+                self.send_response(status)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            table = self.server.tables.setdefault(name, [])
+            if key and "merge-duplicates" in self.headers.get("Prefer", ""):
+                columns = key.split(",")
+                new = {tuple(r.get(c) for c in columns) for r in rows}
+                table[:] = [
+                    r for r in table if tuple(r.get(c) for c in columns) not in new
+                ]
+            table.extend(rows)
+        self.send_response(201)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+
+@pytest.fixture
+def fake_postgrest():
+    server = FakePostgrest()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
@@ -0,0 +1,129 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from darwin_ml.data import LocalBackend, export_study_activity
+from darwin_ml.data.rest_client import RestClient
+from darwin_ml.models.bkt import (
+    DEFAULT_PARAMS,
+    PARAMS,
+    fit_bkt,
+    knowledge_state_rows,
+    write_knowledge_states,
+)
+
+TRUE_PARAMS = {
+    "kc0": (0.2, 0.1, 0.08, 0.2),
+    "kc1": (0.5, 0.3, 0.1, 0.3),
+    "kc2": (0.1, 0.05, 0.05, 0.15),
+}
+START = pd.Timestamp("2026-01-01", tz="UTC")
+
+
+def _simulate(n_users, seed=0, params=TRUE_PARAMS):
+    rng = np.random.default_rng(seed)
+    rows = []
+    for kc, (p_init, p_transit, p_slip, p_guess) in params.items():
+        for user in range(n_users):
+            learned = rng.random() < p_init
+            for step in range(rng.integers(5, 40)):
+                correct = rng.random() < (1 - p_slip if learned else p_guess)
+                rows.append((f"u{user}", kc, correct, START + pd.Timedelta(hours=step)))
+                learned = learned or rng.random() < p_transit
+    df = pd.DataFrame(
+        rows, columns=["user_id", "knowledge_component", "correct", "created_at"]
+    )
+    return df.sample(frac=1, random_state=seed).reset_index(drop=True)
+
+
+def _trace(correct, p_init, p_transit, p_slip, p_guess):
+    """Mastery and log-likelihood the way calculators/bkt.ts traces them."""
+    mastery, loglik = p_init, 0.0
+    for c in correct:
+        p_correct = mastery * (1 - p_slip) + (1 - mastery) * p_guess
+        loglik += np.log(p_correct if c else 1 - p_correct)
+        posterior = (
+            mastery * (1 - p_slip) / p_correct
+            if c
+            else mastery * p_slip / (1 - p_correct)
+        )
+        mastery = posterior + (1 - posterior) * p_transit
+    return mastery, loglik
+
+
+def test_recovers_parameters_and_matches_trace():
+    df = _simulate(400, seed=1)
+    result = fit_bkt(df)
+    params = result.params
+    assert params["converged"].all()
+    np.testing.assert_allclose(
+        params.loc[list(TRUE_PARAMS), list(PARAMS)],
+        np.array(list(TRUE_PARAMS.values())),
+        atol=0.06,
+    )
+
+    mastery = result.mastery.set_index(["user_id", "knowledge_component"])
+    total = 0.0
+    for (user, kc), rows in df.sort_values("created_at").groupby(
+        ["user_id", "knowledge_component"]
+    ):
+        final, loglik = _trace(rows["correct"], *params.loc[kc, list(PARAMS)])
+        total += loglik
+        if user in ("u0", "u17"):
+            row = mastery.loc[(user, kc)]
+            assert row["mastery"] == pytest.approx(final, abs=1e-12)
+            assert row["response_count"] == len(rows)
+            assert row["correct_count"] == rows["correct"].sum()
+            assert (
+                row["last_correct_at"] == rows.loc[rows["correct"], "created_at"].max()
+            )
+    assert params["log_likelihood"].sum() == pytest.approx(total, rel=1e-10)
+
+
+def test_process_pool_matches_in_process_and_small_components_keep_defaults():
+    df = _simulate(200, seed=2)
+    sparse = pd.DataFrame(
+        {
+            "user_id": ["u0"] * 5,
+            "knowledge_component": ["kc9"] * 5,
+            "correct": [True, False, True, True, True],
+            "created_at": START + pd.to_timedelta(np.arange(5), unit="h"),
+        }
+    )
+    df = pd.concat([df, sparse], ignore_index=True)
+    single = fit_bkt(df)
+    pooled = fit_bkt(df, workers=2)
+    pd.testing.assert_frame_equal(single.params, pooled.params)
+    merge = ["user_id", "knowledge_component"]
+    pd.testing.assert_frame_equal(
+        single.mastery.sort_values(merge).reset_index(drop=True),
+        pooled.mastery.sort_values(merge).reset_index(drop=True),
+    )
+    assert tuple(single.params.loc["kc9", list(PARAMS)]) == DEFAULT_PARAMS
+    assert single.params.loc["kc9", "iterations"] == 0
+
+
+def test_knowledge_states_are_upserted(fake_postgrest):
+    df = _simulate(30, seed=3)
+    result = fit_bkt(df)
+    rows = list(knowledge_state_rows(result))
+    assert len(rows) == 3 * 30
+    assert {"user_id", "topic", "mastery_probability", "response_count"} <= set(rows[0])
+    assert 0 <= rows[0]["mastery_probability"] <= 1
+
+    with LocalBackend() as backend:
+        backend.load_table(
+            "study_activity_log", df.assign(id=[f"a{i:05d}" for i in range(len(df))])
+        )
+        exported = export_study_activity(backend, days_back=10_000, cache=False)
+        assert len(exported) == len(df)
+        assert write_knowledge_states(result, backend) == 90
+        # Refitting replaces each (user_id, topic) row instead of adding one
+        assert write_knowledge_states(result, backend) == 90
+        stored = backend.table("knowledge_states").select("*").execute().data
+        assert len(stored) == 90
+
+    with RestClient(fake_postgrest.url, "key") as client:
+        write_knowledge_states(result, client)
+        write_knowledge_states(result, client)
+    assert len(fake_postgrest.tables["knowledge_states"]) == 90
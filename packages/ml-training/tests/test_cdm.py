@@ -0,0 +1,206 @@
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from darwin_ml.data.responses import ResponseMatrix
+from darwin_ml.models.cdm import (
+    _blocks,
+    _e_step,
+    _m_step_dina,
+    _Structure,
+    calibrate_cdm,
+    classify,
+    item_probabilities,
+    latent_classes,
+    q_matrix_from_rows,
+)
+
+ATTRIBUTES = ["a0", "a1", "a2", "a3"]
+
+
+def _q_matrix(n_attributes=4, seed=0):
+    """Each attribute alone twice, then random pairs and triples."""
+    rng = np.random.default_rng(seed)
+    rows = [np.eye(n_attributes, dtype=np.int8)[k] for k in range(n_attributes)] * 2
+    for size in (2, 2, 3):
+        for _ in range(n_attributes):
+            row = np.zeros(n_attributes, dtype=np.int8)
+            row[rng.choice(n_attributes, size, replace=False)] = 1
+            rows.append(row)
+    return np.array(rows)
+
+
+def _simulate(q, n_persons=3_000, missing=0.0, seed=0):
+    """DINA responses; returns (matrix, true classes, slip, guessing)."""
+    rng = np.random.default_rng(seed)
+    n_items, n_attributes = q.shape
+    mastery = rng.random((n_persons, n_attributes)) < rng.uniform(
+        0.3, 0.7, n_attributes
+    )
+    slip = rng.uniform(0.05, 0.2, n_items)
+    guessing = rng.uniform(0.1, 0.25, n_items)
+    eta = (mastery.astype(int) @ q.T) == q.sum(axis=1)
+    p = np.where(eta, 1 - slip, guessing)
+    x = (rng.random(p.shape) < p).astype(float)
+    keep = rng.random(x.shape) >= missing
+    users, items = np.nonzero(keep)
+    frame = pd.DataFrame(
+        {
+            "user_id": [f"u{u}" for u in users],
+            "question_id": [f"q{j}" for j in items],
+            "correct": x[users, items].astype(bool),
+        }
+    )
+    classes = (mastery * (1 << np.arange(n_attributes))).sum(axis=1)
+    return ResponseMatrix.from_frame(frame), classes, slip, guessing
+
+
+def _frame(q):
+    return pd.DataFrame(
+        q,
+        index=[f"q{j}" for j in range(len(q))],
+        columns=[f"a{k}" for k in range(q.shape[1])],
+    )
+
+
+def test_e_and_m_steps_match_loop_reference():
+    """eStep() and mStepDINA() of cdm.ts, transcribed loop by loop."""
+    q = _q_matrix()
+    matrix, _, _, _ = _simulate(q, n_persons=60, seed=1)
+    x = matrix.to_csr()[:, pd.Index(matrix.items.values).get_indexer(_frame(q).index)]
+    structure = _Structure.from_q(q)
+    rng = np.random.default_rng(2)
+    slip, guessing = rng.uniform(0.05, 0.3, (2, len(q)))
+    priors = rng.dirichlet(np.ones(16))
+    p = np.where(structure.eta, 1 - slip[:, None], guessing[:, None])
+
+    right, answered, totals, log_likelihood = _e_step(_blocks(x, 16), p, priors)
+
+    dense = x.toarray()
+    classes = latent_classes(4)
+    posterior = np.zeros((len(dense), 16))
+    expected_ll = 0.0
+    for i, row in enumerate(dense):
+        log_post = [
+            math.log(priors[c])
+            + sum(
+                math.log(p[j, c]) if row[j] else math.log(1 - p[j, c])
+                for j in range(len(q))
+            )
+            for c in range(16)
+        ]
+        top = max(log_post)
+        z = top + math.log(sum(math.exp(v - top) for v in log_post))
+        posterior[i] = [math.exp(v - z) for v in log_post]
+        expected_ll += z
+    assert log_likelihood == pytest.approx(expected_ll)
+    np.testing.assert_allclose(totals, posterior.sum(axis=0))
+
+    new_slip, new_guessing = _m_step_dina(structure, right, answered)
+    for j in (0, 9, 17):
+        required = np.flatnonzero(q[j])
+        eta = [all(classes[c, k] for k in required) for c in range(16)]
+        t1 = w1 = t0 = c0 = 0.0
+        for i, row in enumerate(dense):
+            for c in range(16):
+                if eta[c]:
+                    t1 += posterior[i, c]
+                    w1 += posterior[i, c] * (1 - row[j])
+                else:
+                    t0 += posterior[i, c]
+                    c0 += posterior[i, c] * row[j]
+        assert new_slip[j] == pytest.approx(np.clip(w1 / t1, 0.001, 0.499))
+        assert new_guessing[j] == pytest.approx(np.clip(c0 / t0, 0.001, 0.499))
+
+
+def test_dina_recovers_parameters_and_profiles():
+    q = _q_matrix()
+    matrix, classes, slip, guessing = _simulate(q, missing=0.1)
+    result = calibrate_cdm(matrix, _frame(q))
+    assert result.converged
+    order = result.items.index.map(lambda item: int(item[1:]))
+    np.testing.assert_allclose(result.items["slip"], slip[order], atol=0.05)
+    np.testing.assert_allclose(result.items["guessing"], guessing[order], atol=0.05)
+
+    profiles = classify(matrix, result)
+    truth = pd.Series(classes, index=[f"u{i}" for i in range(len(classes))])
+    latent = profiles["latent_class"].to_numpy()
+    mastery = (latent[:, None] >> np.arange(4)) & 1
+    true_mastery = (truth.loc[profiles.index].to_numpy()[:, None] >> np.arange(4)) & 1
+    assert (mastery == true_mastery).mean() > 0.9
+    assert profiles["posterior_entropy"].between(0, 4).all()
+    assert profiles[[f"eap_a{k}" for k in range(4)]].stack().between(0, 1).all()
+
+
+def test_gdina_deltas_solve_design_system_and_round_trip():
+    q = _q_matrix()
+    matrix, _, _, _ = _simulate(q, seed=3)
+    dina = calibrate_cdm(matrix, _frame(q), model="dina")
+    gdina = calibrate_cdm(matrix, _frame(q), model="gdina")
+    # The saturated model nests DINA
+    assert gdina.log_likelihood >= dina.log_likelihood - 1e-6
+    assert gdina.fit["numParameters"] > dina.fit["numParameters"]
+
+    for item, row in gdina.items.iterrows():
+        delta = np.array(row["delta"])
+        m = len(row["required_attributes"])
+        assert len(delta) == 1 << m
+        # buildGDINADesignMatrix(): S[l][t] = 1 iff t's attributes are in l
+        levels = np.arange(1 << m)
+        design = ((levels[:, None] & levels[None, :]) == levels[None, :]).astype(float)
+        rates = design @ delta
+        assert ((rates > -1e-9) & (rates < 1 + 1e-9)).all()
+
+    for result in (dina, gdina):
+        payload = json_round_trip(result.to_json())
+        assert len(payload["class_priors"]) == 16
+        assert sum(payload["class_priors"]) == pytest.approx(1)
+        np.testing.assert_allclose(
+            item_probabilities(payload, n_attributes=4), result.probabilities
+        )
+    first = gdina.to_json()["item_parameters"][0]
+    assert set(first) == {
+        "itemId",
+        "deltaCoeffs",
+        "numRequiredAttributes",
+        "requiredAttributes",
+        "linkFunction",
+    }
+    assert set(dina.to_json()["fit_indices"]) >= {"aic", "bic", "rmsea", "srmr"}
+
+
+def json_round_trip(payload):
+    import json
+
+    return json.loads(json.dumps(payload, default=float))
+
+
+def test_eight_attributes_and_q_matrix_rows():
+    assert latent_classes(8).shape == (256, 8)
+    with pytest.raises(ValueError):
+        latent_classes(9)
+
+    q = _q_matrix(n_attributes=8, seed=4)
+    matrix, _, _, _ = _simulate(q, n_persons=800, seed=5)
+    result = calibrate_cdm(matrix, _frame(q), max_iter=20, batch_rows=128)
+    assert result.class_priors.shape == (256,)
+    assert result.probabilities.shape == (len(q), 256)
+    assert result.iterations <= 20
+
+    rows = pd.DataFrame(
+        {
+            "question_id": ["q1", "q1", "q2", "q3"],
+            "attribute_id": [
+                "data_gathering",
+                "clinical_judgment",
+                "emergency_management",
+                "unknown",
+            ],
+        }
+    )
+    frame = q_matrix_from_rows(rows)
+    assert frame.loc["q1"].tolist() == [1, 0, 1, 0, 0, 0]
+    assert frame.loc["q2"].tolist() == [0, 0, 0, 0, 0, 1]
+    assert "q3" not in frame.index
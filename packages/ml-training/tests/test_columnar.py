@@ -0,0 +1,48 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+
+from darwin_ml.data.columnar import ExportWriter, read_export
+
+
+def _reviews(n_rows=20_000, n_users=300, n_cards=4_000, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame(
+        {
+            "id": [f"r{i:08d}" for i in range(n_rows)],
+            "user_id": [f"user-{u:05d}" for u in rng.integers(0, n_users, n_rows)],
+            "flashcard_id": [f"card-{c:06d}" for c in rng.integers(0, n_cards, n_rows)],
+            "quality": rng.integers(0, 6, n_rows),
+            "interval_after": rng.integers(0, 300, n_rows),
+        }
+    )
+
+
+def test_pages_are_buffered_into_row_groups(tmp_path):
+    df = _reviews()
+    pages = [df.iloc[i : i + 1000] for i in range(0, len(df), 1000)]
+    sizes = {}
+    for suffix in (".parquet", ".arrow", ".csv"):
+        path = str(tmp_path / f"reviews{suffix}")
+        with ExportWriter(path, "flashcard_reviews", row_group_size=8_192) as writer:
+            for page in pages:
+                writer.write(page)
+        assert writer.rows == len(df)
+        sizes[suffix] = os.path.getsize(path)
+
+        back = read_export(path)
+        assert back["user_id"].astype(str).tolist() == df["user_id"].tolist()
+        assert back["flashcard_id"].astype(str).tolist() == df["flashcard_id"].tolist()
+        assert back["quality"].tolist() == df["quality"].tolist()
+        if suffix != ".csv":
+            assert isinstance(back["user_id"].dtype, pd.CategoricalDtype)
+            assert back["quality"].dtype == np.int8
+
+    metadata = pq.ParquetFile(str(tmp_path / "reviews.parquet")).metadata
+    # 20 pages of 1000 rows -> ceil(20000 / 8192) row groups
+    assert metadata.num_row_groups == 3
+    assert metadata.row_group(0).num_rows >= 8_192
+    # Each row group's dictionary holds only the IDs it uses
+    assert sizes[".parquet"] < sizes[".csv"] / 2
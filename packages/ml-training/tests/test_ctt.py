@@ -0,0 +1,140 @@
+import numpy as np
+import pandas as pd
+import pytest
+import scipy.sparse as sp
+
+from darwin_ml.evaluation.ctt import (
+    compare_with_official,
+    fit_statistics,
+    item_statistics,
+    official_difficulty,
+    rasch_theta,
+    simulate_rasch,
+)
+
+B = np.linspace(-2, 2, 25)
+
+
+def test_dense_statistics_match_reference():
+    x = simulate_rasch(2_000, B, seed=1)
+    report = item_statistics(x)
+    totals = x.sum(axis=1)
+
+    for i in (0, 12, 24):
+        row = report.items.iloc[i]
+        assert row["p_value"] == pytest.approx(x[:, i].mean())
+        assert row["point_biserial"] == pytest.approx(
+            np.corrcoef(x[:, i], totals)[0, 1], abs=1e-5
+        )
+        assert row["item_total"] == pytest.approx(
+            np.corrcoef(x[:, i], totals - x[:, i])[0, 1], abs=1e-5
+        )
+        rest = np.delete(x, i, axis=1)
+        cov = np.cov(rest.T)
+        k = rest.shape[1]
+        expected = k / (k - 1) * (1 - np.trace(cov) / cov.sum())
+        assert row["alpha_if_deleted"] == pytest.approx(expected, abs=1e-5)
+
+    cov = np.cov(x.T)
+    expected = len(B) / (len(B) - 1) * (1 - np.trace(cov) / cov.sum())
+    assert report.alpha == pytest.approx(expected, abs=1e-5)
+
+
+def test_missing_responses_use_administered_persons():
+    x = simulate_rasch(2_000, B, missing=0.3, seed=2)
+    report = item_statistics(x)
+    totals = np.nansum(x, axis=1)
+
+    for i in (3, 17):
+        seen = ~np.isnan(x[:, i])
+        row = report.items.iloc[i]
+        assert row["n"] == seen.sum()
+        assert row["p_value"] == pytest.approx(x[seen, i].mean())
+        assert row["point_biserial"] == pytest.approx(
+            np.corrcoef(x[seen, i], totals[seen])[0, 1], abs=1e-6
+        )
+        assert row["item_total"] == pytest.approx(
+            np.corrcoef(x[seen, i], totals[seen] - x[seen, i])[0, 1], abs=1e-6
+        )
+
+    # Alpha from pairwise-complete covariances
+    seen = ~np.isnan(x)
+    cov = np.array(
+        [
+            [
+                np.cov(x[seen[:, i] & seen[:, j]][:, [i, j]].T, ddof=0)[0, 1]
+                for j in range(len(B))
+            ]
+            for i in range(len(B))
+        ]
+    )
+    expected = len(B) / (len(B) - 1) * (1 - np.trace(cov) / cov.sum())
+    assert report.alpha == pytest.approx(expected, abs=1e-6)
+
+    # A sparse matrix of the administered entries is the same input
+    rows, cols = np.nonzero(~np.isnan(x))
+    sparse = sp.csr_matrix((x[rows, cols], (rows, cols)), shape=x.shape)
+    pd.testing.assert_frame_equal(item_statistics(sparse).items, report.items)
+
+
+def test_theta_and_fit_agree_across_paths():
+    x = simulate_rasch(1_500, B, seed=3)
+    # Item 0 unusable on the dense path, unanswered on the sparse path
+    b = B.copy()
+    b[0] = np.nan
+    masked = x.copy()
+    masked[:, 0] = np.nan
+
+    dense_theta = rasch_theta(x, b)
+    sparse_theta = rasch_theta(masked, B)
+    np.testing.assert_allclose(dense_theta, sparse_theta, atol=1e-3)
+
+    dense_fit = fit_statistics(x, b)
+    sparse_fit = fit_statistics(masked, B)
+    assert dense_fit.iloc[0].isna().all()
+    np.testing.assert_allclose(
+        dense_fit.iloc[1:].to_numpy(), sparse_fit.iloc[1:].to_numpy(), atol=1e-3
+    )
+
+
+def test_fit_flags_misfitting_item():
+    x = simulate_rasch(5_000, B, seed=4)
+    rng = np.random.default_rng(5)
+    # Item 12 answered at random, unrelated to ability
+    x[:, 12] = rng.random(len(x)) < 0.5
+
+    fit = item_statistics(x, difficulty=B).items
+    fitting = fit.drop(index=12)
+    assert fitting["infit"].between(0.85, 1.15).all()
+    assert fitting["outfit"].between(0.8, 1.25).all()
+    assert fit.loc[12, "infit"] > 1.2
+    assert fit.loc[12, "outfit"] > 1.2
+
+
+def test_compare_with_official_skips_dropped_items():
+    items = [51, 52, 53]
+    x = simulate_rasch(3_000, [-1.0, 0.0, 1.0], seed=6)
+    report = item_statistics(x, items=items, difficulty=[-1.0, 0.0, 1.0])
+    official = pd.DataFrame(
+        {
+            "NU_ITEM_PROVA_1": items,
+            "ITEM_MANTIDO": [1, 0, 1],
+            "PARAMETRO_B": [-1.0, np.nan, 1.0],
+            "COR_BISSERIAL": [
+                report.items.loc[51, "point_biserial"],
+                0.3,
+                report.items.loc[53, "point_biserial"] + 0.2,
+            ],
+            "INFIT": [report.items.loc[51, "infit"], np.nan, 1.0],
+            "OUTFIT": [report.items.loc[51, "outfit"], np.nan, 1.0],
+        }
+    )
+
+    b = official_difficulty(official)
+    assert b.index.tolist() == items
+    assert np.isnan(b[52])
+
+    comparison = compare_with_official(report, official)
+    assert comparison.index.tolist() == [51, 53]
+    assert comparison.loc[51, "delta_point_biserial"] == pytest.approx(0)
+    assert comparison["agrees"].tolist() == [True, False]
@@ -0,0 +1,199 @@
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+from scipy.special import expit
+
+from darwin_ml.evaluation.ctt import _to_sparse
+from darwin_ml.evaluation.dif import (
+    DIFSplit,
+    analyze_split,
+    enamed_groups,
+    screen_dif,
+)
+
+B = np.linspace(-1.5, 1.5, 20)
+DIF_ITEMS = (3, 11)
+
+
+def _responses(n_persons=4_000, missing=0.2, seed=0):
+    """Rasch responses of two regions; DIF_ITEMS are 1.2 logits harder for Sul."""
+    rng = np.random.default_rng(seed)
+    region = rng.choice(["sudeste", "sul", "norte"], n_persons, p=[0.5, 0.3, 0.2])
+    sex = rng.choice(["feminino", "masculino"], n_persons)
+    theta = rng.standard_normal(n_persons)
+    b = np.tile(B, (n_persons, 1))
+    b[np.ix_(region == "sul", DIF_ITEMS)] += 1.2
+    x = (rng.random(b.shape) < expit(theta[:, None] - b)).astype(np.float32)
+    x[rng.random(x.shape) < missing] = np.nan
+    return x, pd.DataFrame({"region": region, "gender": sex})
+
+
+def _reference_mh(focal, reference, n_strata=5):
+    """
+    computeMantelHaenszel() of dif.ts, transcribed loop by loop: one item's
+    focal and reference (score, correct) responses, banded over their own
+    score range.
+    """
+    everyone = focal + reference
+    low = min(s for s, _ in everyone)
+    high = max(s for s, _ in everyone)
+    width = (high - low) / n_strata if high > low else 1
+
+    def stratum(s):
+        return 0 if high == low else min(n_strata - 1, math.floor((s - low) / width))
+
+    cells = [[0, 0, 0, 0] for _ in range(n_strata)]
+    for s, correct in focal:
+        cells[stratum(s)][0 if correct else 1] += 1
+    for s, correct in reference:
+        cells[stratum(s)][2 if correct else 3] += 1
+
+    ad = bc = num = var = 0.0
+    for a, b, c, d in cells:
+        t = a + b + c + d
+        if t == 0:
+            continue
+        ad += a * d / t
+        bc += b * c / t
+        n1, n2, m1, m0 = a + b, c + d, a + c, b + d
+        num += a - n1 * m1 / t
+        var += n1 * n2 * m1 * m0 / (t * t * ((t - 1) or 1))
+    alpha = ad / bc if bc > 0 else 1
+    delta = -2.35 * math.log(max(alpha, 0.001))
+    chi = max(0, abs(num) - 0.5) ** 2 / var if var > 0 else 0
+    return alpha, delta, chi, sum(1 for cell in cells if sum(cell))
+
+
+def _assert_matches_reference(x, groups, split, items):
+    result = analyze_split(
+        _to_sparse(x), groups[split.variable].to_numpy(object), split, min_group_size=0
+    )
+    scores = np.nansum(x, axis=1)
+    for item in items:
+        seen = ~np.isnan(x[:, item])
+
+        def group(name, seen=seen, item=item):
+            rows = np.flatnonzero(seen & (groups[split.variable] == name).to_numpy())
+            return [(scores[r], x[r, item] > 0) for r in rows]
+
+        focal, reference = group(split.focal), group(split.reference)
+        alpha, delta, chi, strata = _reference_mh(focal, reference)
+        row = result.items.loc[item]
+        assert row["alpha_mh"] == pytest.approx(alpha)
+        assert row["delta_mh"] == pytest.approx(delta)
+        assert row["chi_square"] == pytest.approx(chi)
+        assert row["p_value"] == pytest.approx(math.erfc(math.sqrt(chi / 2)))
+        assert row["strata_count"] == strata
+        assert (row["n_focal"], row["n_reference"]) == (len(focal), len(reference))
+    return result
+
+
+def test_matches_loop_reference():
+    x, groups = _responses(n_persons=600)
+    _assert_matches_reference(
+        x, groups, DIFSplit("region", "sudeste", "sul"), (0, 3, 11, 19)
+    )
+
+
+def test_strata_follow_each_items_responders():
+    # Hard items only reach the top half and easy items the bottom half,
+    # so each item's responders span a different part of the score range
+    x, groups = _responses(n_persons=800, missing=0.1, seed=5)
+    top = np.nansum(x, axis=1) >= np.median(np.nansum(x, axis=1))
+    x[np.ix_(~top, np.arange(15, 20))] = np.nan
+    x[np.ix_(top, np.arange(0, 5))] = np.nan
+    split = DIFSplit("region", "sudeste", "sul")
+    items = (0, 3, 11, 16, 19)
+    result = _assert_matches_reference(x, groups, split, items)
+
+    positions = {item: k for k, item in enumerate(result.items.index)}
+    low = {item: result.score_ranges[positions[item], 0, 0] for item in items}
+    assert low[16] > low[11] and low[19] > low[11]
+    high = {item: result.score_ranges[positions[item], -1, 1] for item in items}
+    assert high[0] < high[11] and high[3] < high[11]
+
+
+def test_injected_dif_flagged_across_splits():
+    x, groups = _responses()
+    results = screen_dif(x, groups, difficulty=B)
+    by_split = {(r.split.variable, r.split.focal): r for r in results}
+    assert [r.split.variable for r in results] == ["region", "region", "gender"]
+    assert set(by_split) >= {("region", "sul"), ("region", "norte")}
+
+    sul = by_split["region", "sul"]
+    assert sul.split.reference == "sudeste"
+    flagged = sul.items.index[sul.items["flagged"]]
+    assert set(flagged) == set(DIF_ITEMS)
+    assert (sul.items.loc[list(DIF_ITEMS), "direction"] == "favors_reference").all()
+    # Sorted by |delta|: the injected items lead
+    assert set(sul.items.index[:2]) == set(DIF_ITEMS)
+    assert (sul.items.loc[list(DIF_ITEMS), "lord_p_value"] < 0.05).all()
+
+    for result in results:
+        if result is sul:
+            continue
+        assert (result.items["ets"] != "C").all()
+        assert result.summary()["overallFairness"] in ("fair", "moderate_concern")
+    assert sul.summary()["overallFairness"] == "moderate_concern"
+
+
+def test_screen_matches_single_splits():
+    x, groups = _responses(n_persons=1_500, seed=3)
+    results = screen_dif(x, groups, reference={"region": "sul"})
+    assert [r.split.reference for r in results[:2]] == ["sul", "sul"]
+    for result in results:
+        single = analyze_split(
+            _to_sparse(x), groups[result.split.variable].to_numpy(object), result.split
+        )
+        pd.testing.assert_frame_equal(result.items, single.items)
+        np.testing.assert_array_equal(result.tables, single.tables)
+        np.testing.assert_array_equal(result.score_ranges, single.score_ranges)
+        assert result.sample_size == single.sample_size
+
+
+def test_small_groups_skipped_and_json_shape():
+    x, groups = _responses(n_persons=400, seed=4)
+    split = DIFSplit("region", "sudeste", "norte")
+    labels = groups["region"].to_numpy(object)
+    result = analyze_split(_to_sparse(x), labels, split, min_group_size=77)
+    counts = result.items[["n_focal", "n_reference"]]
+    assert (counts.to_numpy() >= 77).all()
+    assert len(result.items) < len(B)
+
+    payload = result.to_json()
+    assert payload["groupDefinition"] == {
+        "variable": "region",
+        "referenceGroup": "sudeste",
+        "focalGroup": "norte",
+    }
+    item = payload["itemResults"][0]
+    assert set(item) >= {"itemId", "mh", "etsClassification", "direction"}
+    tables = item["mh"]["contingencyTables"]
+    assert len(tables) == item["mh"]["strataCount"]
+    assert sum(t["focalCorrect"] + t["focalIncorrect"] for t in tables) == (
+        item["sampleSizeFocal"]
+    )
+    assert payload["summary"]["totalItems"] == len(result.items)
+
+
+def test_enamed_codes_mapped_to_groups():
+    codes = pd.DataFrame(
+        {
+            "CO_REGIAO_CURSO": [3, 1, 5, None],
+            "CO_CATEGAD": [1, 4, 7, 8],
+            "TP_SEXO": ["F", "M", "9", None],
+        }
+    )
+    groups = enamed_groups(codes)
+    assert groups["region"].tolist()[:3] == ["sudeste", "norte", "centro_oeste"]
+    assert groups["institution_category"].tolist() == [
+        "publica",
+        "privada",
+        "especial",
+        "privada",
+    ]
+    assert groups["gender"].tolist()[:2] == ["feminino", "masculino"]
+    assert groups["gender"].iloc[2:].isna().all()
+    assert pd.isna(groups["region"].iloc[3])
@@ -0,0 +1,60 @@
+import uuid
+
+import numpy as np
+import pandas as pd
+
+from darwin_ml.data.dtypes import DATASET_DTYPES, FrameCoercer, coerce_frame
+from darwin_ml.data.supabase_export import _collect
+
+
+def _review_rows(n, offset=0):
+    users = [str(uuid.UUID(int=u)) for u in range(50)]
+    return pd.DataFrame(
+        {
+            "id": [str(uuid.UUID(int=10**6 + offset + i)) for i in range(n)],
+            "user_id": [users[(offset + i) % 50] for i in range(n)],
+            "flashcard_id": [f"card-{(offset + i) % 300}" for i in range(n)],
+            "quality": [(offset + i) % 6 for i in range(n)],
+            "reviewed_at": ["2026-03-01T12:00:00+00:00"] * n,
+            "ease_factor_before": [2.5] * n,
+            "ease_factor_after": [2.6] * n,
+            "interval_before": [None if i % 7 == 0 else i for i in range(n)],
+            "interval_after": list(range(n)),
+        }
+    )
+
+
+def test_registry_follows_export_schemas():
+    dtypes = DATASET_DTYPES["flashcard_reviews"]
+    assert dtypes["user_id"] == "category"
+    assert dtypes["quality"] == "Int8"
+    assert dtypes["ease_factor_after"] == "float32"
+    assert dtypes["reviewed_at"] == "datetime64[ns, UTC]"
+    assert "id" not in dtypes
+    assert DATASET_DTYPES["pass_prediction"]["target"] == "boolean"
+
+
+def test_coerce_frame_narrows_columns():
+    df = coerce_frame(_review_rows(100), "flashcard_reviews")
+    assert isinstance(df["user_id"].dtype, pd.CategoricalDtype)
+    assert df["quality"].dtype == "Int8"
+    assert df["interval_before"].dtype == "Int32"
+    assert df["interval_before"].isna().sum() == 15
+    assert df["ease_factor_before"].dtype == np.float32
+    assert df["id"].dtype == object
+
+
+def test_coercer_keeps_codes_stable_across_pages():
+    coercer = FrameCoercer("flashcard_reviews")
+    pages = [coercer(_review_rows(400, offset=k * 400)) for k in range(3)]
+    df = _collect(iter(pages))
+
+    raw = pd.concat([_review_rows(400, offset=k * 400) for k in range(3)])
+    assert df["user_id"].astype(str).tolist() == raw["user_id"].tolist()
+    assert df["flashcard_id"].astype(str).tolist() == raw["flashcard_id"].tolist()
+
+    report = coercer.report
+    assert report.rows == 1200
+    # The unique id strings stay as objects; everything else shrinks
+    assert report.ratio > 0.4
+    assert "saved" in str(report)
@@ -0,0 +1,100 @@
+import time
+
+import pandas as pd
+import pytest
+
+from darwin_ml.data.enamed import EnamedStore, open_enamed
+
+
+def _write(path, text):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(text.replace("\n", "\r\n").encode("ascii"))
+
+
+@pytest.fixture
+def source_dir(tmp_path):
+    dados = tmp_path / "DADOS"
+    enade = dados / "Enade"
+    _write(
+        enade / "microdados_enade_2025_arq1.txt",
+        "NU_ANO;CO_CURSO;CO_IES;CO_UF_CURSO\n"
+        "2025;12;316;35\n2025;12;316;35\n2025;5000979;3974;31\n",
+    )
+    # Same courses, independently shuffled, as in the INEP release
+    _write(
+        enade / "microdados_enade_2025_arq5.txt",
+        "NU_ANO;CO_CURSO;TP_SEXO\n2025;5000979;M\n2025;12;F\n2025;12;F\n",
+    )
+    _write(
+        enade / "microdados_enade_2025_arq6.txt",
+        "NU_ANO;CO_CURSO;NU_IDADE\n2025;12;24\n2025;5000979;31\n2025;12;.\n",
+    )
+    _write(
+        enade / "microdados_enade_2025_arq7.txt",
+        "NU_ANO;CO_CURSO;QE_I01\n2025;12;A\n2025;5000979;.\n2025;12;B\n",
+    )
+    _write(
+        dados / "Demais Participantes" / "microdados_demais_part_2025_arq2.txt",
+        "NU_ANO;TP_SEXO\n2025;F\n2025;9\n",
+    )
+    _write(
+        dados / "microdados2025_parametros_itens.txt",
+        "NU_ITEM_PROVA_1;NU_ITEM_PROVA_2;ITEM_MANTIDO;PARAMETRO_B;INFIT\n"
+        "1;51;1;-2.09686;0.96412\n2;52;0;;\n",
+    )
+    return dados
+
+
+def test_store_reads_compact_columns(source_dir, tmp_path):
+    store = open_enamed(tmp_path / "store", source_dir)
+    assert "enade_arq7" in store.tables
+
+    df = store.read(["CO_CURSO", "CO_IES", "CO_UF_CURSO"])
+    assert df["CO_CURSO"].tolist() == [12, 12, 5000979]
+    assert str(df["CO_CURSO"].dtype) == "int32"
+    assert str(df["CO_UF_CURSO"].dtype) == "int8"
+
+    answers = store.column("QE_I01")
+    assert isinstance(answers.dtype, pd.CategoricalDtype)
+    assert answers.isna().tolist() == [False, True, False]
+    assert store.column("NU_IDADE").dtype == "Int8"
+    assert store.column("TP_SEXO", "demais").tolist() == ["F", "9"]
+
+    items = store.items()
+    assert items["PARAMETRO_B"].dtype == "float32"
+    assert items["INFIT"].isna().tolist() == [False, True]
+
+
+def test_rows_are_not_joined_across_files(source_dir, tmp_path):
+    store = open_enamed(tmp_path / "store", source_dir)
+    # Keys shared by every file can accompany any column
+    assert store.read(["CO_CURSO", "TP_SEXO"])["TP_SEXO"].tolist() == ["M", "F", "F"]
+    with pytest.raises(ValueError, match="by_course"):
+        store.read(["TP_SEXO", "NU_IDADE"])
+
+    profile = store.by_course(["TP_SEXO", "NU_IDADE", "QE_I01"])
+    assert profile.loc[12, "n"] == 2
+    assert profile.loc[12, "TP_SEXO=F"] == pytest.approx(1.0)
+    assert profile.loc[5000979, "NU_IDADE"] == pytest.approx(31)
+    # Missing answers are left out of the share denominator
+    assert profile.loc[12, "QE_I01=A"] == pytest.approx(0.5)
+
+
+def test_store_is_converted_once(source_dir, tmp_path):
+    store_dir = tmp_path / "store"
+    open_enamed(store_dir, source_dir)
+    arrow = store_dir / "enade_arq1.arrow"
+    written = arrow.stat().st_mtime_ns
+    time.sleep(0.01)
+
+    open_enamed(store_dir, source_dir)
+    assert arrow.stat().st_mtime_ns == written
+
+    # A changed source file triggers a rebuild
+    _write(
+        source_dir / "Enade" / "microdados_enade_2025_arq1.txt",
+        "NU_ANO;CO_CURSO;CO_IES;CO_UF_CURSO\n2025;12;316;35\n",
+    )
+    store = open_enamed(store_dir, source_dir)
+    assert store.manifest["tables"]["enade_arq1"]["rows"] == 1
+    assert EnamedStore(store_dir).column("CO_IES").tolist() == [316]
@@ -0,0 +1,125 @@
+import os
+import time
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+from darwin_ml.data import ExportCache
+from darwin_ml.data.rest_client import RestClient
+from darwin_ml.data.supabase_export import (
+    export_irt_item_responses,
+    export_knowledge_states,
+)
+
+
+def _frame(n):
+    return pd.DataFrame({"user_id": [f"u{i}" for i in range(n)], "value": range(n)})
+
+
+def test_cache_round_trip_and_ttl(tmp_path):
+    cache = ExportCache(str(tmp_path), ttl=timedelta(hours=1))
+    cache.put("knowledge_states", {"days_back": 7}, ["2026-01-01", "k1"], _frame(5))
+
+    hit = cache.get("knowledge_states", {"days_back": 7}, ["2026-01-01", "k1"])
+    assert hit["value"].tolist() == list(range(5))
+    # Different params or a newer watermark are different entries
+    assert (
+        cache.get("knowledge_states", {"days_back": 30}, ["2026-01-01", "k1"]) is None
+    )
+    assert cache.get("knowledge_states", {"days_back": 7}, ["2026-01-02", "k2"]) is None
+
+    cache.ttl = timedelta(0)
+    time.sleep(0.01)
+    assert cache.get("knowledge_states", {"days_back": 7}, ["2026-01-01", "k1"]) is None
+    assert os.listdir(tmp_path) == []
+
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    cache = ExportCache(str(tmp_path))
+    for i in range(3):
+        cache.put("flashcard_reviews", {"i": i}, None, _frame(1000))
+        time.sleep(0.01)
+    # Touch the oldest entry so the middle one becomes least recently used
+    assert cache.get("flashcard_reviews", {"i": 0}) is not None
+
+    entry_size = os.path.getsize(next(tmp_path.glob("*.parquet")))
+    cache.max_bytes = entry_size * 2
+    assert cache.evict() == 1
+    assert cache.get("flashcard_reviews", {"i": 1}) is None
+    assert cache.get("flashcard_reviews", {"i": 0}) is not None
+    assert cache.get("flashcard_reviews", {"i": 2}) is not None
+
+
+def test_repeated_export_is_served_from_cache(fake_postgrest, tmp_path):
+    now = datetime.utcnow()
+    fake_postgrest.tables["knowledge_states"] = [
+        {
+            "id": f"k{i:03d}",
+            "user_id": f"u{i % 5}",
+            "topic": f"t{i % 4}",
+            "mastery_probability": 0.5,
+            "response_count": i,
+            "updated_at": (
+                None if i % 9 == 0 else (now - timedelta(minutes=i)).isoformat()
+            ),
+        }
+        for i in range(40)
+    ]
+    cache = ExportCache(str(tmp_path))
+    with RestClient(fake_postgrest.url, "key") as client:
+        first = export_knowledge_states(client, page_size=10, cache=cache)
+        requests = fake_postgrest.requests
+        second = export_knowledge_states(client, page_size=10, cache=cache)
+        # Only the watermark probe goes to the server on a hit
+        assert fake_postgrest.requests == requests + 1
+        assert (cache.hits, cache.misses) == (1, 1)
+        assert list(second.columns) == list(first.columns)
+        assert second["id"].astype(str).tolist() == first["id"].tolist()
+        assert second["response_count"].tolist() == first["response_count"].tolist()
+
+        # A newer row moves the watermark and forces a fresh pull
+        fake_postgrest.tables["knowledge_states"].append(
+            {
+                "id": "k999",
+                "user_id": "u1",
+                "topic": "t1",
+                "mastery_probability": 0.9,
+                "response_count": 1,
+                "updated_at": (now + timedelta(minutes=1)).isoformat(),
+            }
+        )
+        third = export_knowledge_states(client, page_size=10, cache=cache)
+    assert len(third) == 41
+    assert cache.misses == 2
+
+
+def test_late_completed_attempt_invalidates_item_responses(fake_postgrest, tmp_path):
+    now = datetime.utcnow()
+
+    def attempt(i, started, completed):
+        return {
+            "id": f"a{i}",
+            "user_id": f"u{i}",
+            "started_at": (now - timedelta(hours=started)).isoformat(),
+            "completed_at": (
+                None
+                if completed is None
+                else (now - timedelta(hours=completed)).isoformat()
+            ),
+            "responses": (
+                None if completed is None else {"q1": {"correct": True, "time_ms": 900}}
+            ),
+        }
+
+    # a1 started before a2 but is still in progress
+    attempts = [attempt(0, 30, 29), attempt(1, 20, None), attempt(2, 10, 9)]
+    fake_postgrest.tables["exam_attempts"] = attempts
+    cache = ExportCache(str(tmp_path))
+    with RestClient(fake_postgrest.url, "key") as client:
+        first = export_irt_item_responses(client, page_size=10, cache=cache)
+        assert len(first) == 2
+        # Completing it writes its responses without moving max(started_at)
+        attempts[1] = attempt(1, 20, 0)
+        second = export_irt_item_responses(client, page_size=10, cache=cache)
+    assert len(second) == 3
+    assert (cache.hits, cache.misses) == (0, 2)
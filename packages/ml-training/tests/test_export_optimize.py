@@ -0,0 +1,83 @@
+import numpy as np
+import onnx
+import pytest
+from onnx import TensorProto, helper, numpy_helper
+
+from darwin_ml.export.optimize import (
+    optimize_for_serving,
+    optimize_graph,
+    quantized_nodes,
+)
+
+
+def _classifier(n_features=256, hidden=64, seed=0):
+    """A two-layer logistic network as ONNX, with labels it separates."""
+    rng = np.random.default_rng(seed)
+    w1 = rng.normal(0, 1 / np.sqrt(n_features), (n_features, hidden))
+    w2 = rng.normal(0, 1 / np.sqrt(hidden), (hidden, 1))
+    graph = helper.make_graph(
+        [
+            helper.make_node("MatMul", ["x", "w1"], ["h"]),
+            helper.make_node("Relu", ["h"], ["a"]),
+            helper.make_node("Identity", ["a"], ["a2"]),
+            helper.make_node("MatMul", ["a2", "w2"], ["z"]),
+            helper.make_node("Sigmoid", ["z"], ["p"]),
+        ],
+        "logistic",
+        [helper.make_tensor_value_info("x", TensorProto.FLOAT, [None, n_features])],
+        [helper.make_tensor_value_info("p", TensorProto.FLOAT, [None, 1])],
+        initializer=[
+            numpy_helper.from_array(w1.astype(np.float32), "w1"),
+            numpy_helper.from_array(w2.astype(np.float32), "w2"),
+        ],
+    )
+    model = helper.make_model(graph, opset_imports=[helper.make_opsetid("", 13)])
+    model.ir_version = 8
+    x = rng.normal(size=(4_000, n_features)).astype(np.float32)
+    z = (np.maximum(x @ w1, 0) @ w2)[:, 0]
+    z = 4 * (z - z.mean()) / z.std()
+    y = (rng.random(len(x)) < 1 / (1 + np.exp(-z))).astype(np.int8)
+    return model.SerializeToString(), x, y
+
+
+def test_graph_optimization_is_lossless():
+    import onnxruntime as ort
+
+    data, x, _ = _classifier()
+    optimized = optimize_graph(data)
+    ops = [node.op_type for node in onnx.load_from_string(optimized).graph.node]
+    assert "Identity" not in ops
+    run = [
+        ort.InferenceSession(d, providers=["CPUExecutionProvider"]).run(
+            None, {"x": x[:100]}
+        )[0]
+        for d in (data, optimized)
+    ]
+    np.testing.assert_allclose(run[0], run[1], rtol=1e-5, atol=1e-6)
+
+
+def test_int8_kept_only_within_tolerance():
+    data, x, y = _classifier()
+    served, report = optimize_for_serving(data, x, y)
+    assert report.kept == "int8"
+    assert report.quantized_nodes == quantized_nodes(served) > 0
+    assert abs(report.auc_delta) <= 0.002
+    assert report.int8_metrics["bytes"] < report.float_metrics["bytes"]
+    assert set(report.to_json()) >= {"float", "int8", "aucDelta", "logLossDelta"}
+
+    strict, rejected = optimize_for_serving(data, x, y, max_log_loss_increase=-1)
+    assert rejected.kept == "float"
+    assert "log-loss" in rejected.reason
+    assert quantized_nodes(strict) == 0
+    assert rejected.metrics == rejected.float_metrics
+    assert rejected.float_metrics["auc"] == pytest.approx(report.float_metrics["auc"])
+
+
+def test_single_class_labels_keep_float():
+    data, x, _ = _classifier()
+    served, report = optimize_for_serving(data, x, np.ones(len(x), dtype=np.int8))
+    assert report.kept == "float"
+    assert "AUC" in report.reason
+    assert quantized_nodes(served) == 0
+    assert report.auc_delta is None
+    assert report.to_json()["aucDelta"] is None
@@ -0,0 +1,168 @@
+import hashlib
+import json
+import shutil
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from darwin_ml.data.cache import ExportCache
+from darwin_ml.data.supabase_export import export_pass_prediction_features
+from darwin_ml.data.synthetic import SyntheticSpec, build_local_backend
+from darwin_ml.export.artifacts import (
+    content_hash,
+    fsrs_user_arrays,
+    npz_bytes,
+    read_npz,
+)
+from darwin_ml.export.registry import ModelRegistry, publish_artifacts
+from darwin_ml.models import pass_predictor
+
+SPEC = SyntheticSpec(
+    n_users=100,
+    n_questions=40,
+    questions_per_attempt=10,
+    n_attempts=1_000,
+    n_flashcards=10,
+    n_reviews=50,
+    n_topics=12,
+    days=30,
+)
+
+
+def _user_weights(n_users=3, scale=1.0):
+    return {
+        "globalWeights": [0.4] * 21,
+        "users": {
+            f"u{k}": {
+                "reviews": 400 + k,
+                "weights": [scale * (k + j / 10) for j in range(21)],
+                "logLoss": 0.3,
+                "defaultLogLoss": 0.35,
+                "durationMs": 12 + k,
+            }
+            for k in range(n_users)
+        },
+    }
+
+
+@pytest.fixture(scope="module")
+def artifacts(tmp_path_factory):
+    root = tmp_path_factory.mktemp("artifacts")
+    with build_local_backend(SPEC, end=datetime(2026, 6, 1)) as backend:
+        features = export_pass_prediction_features(backend, cache=False)
+    examples = pass_predictor.PassExamples.from_frame(features)
+    model = pass_predictor.train_pass_predictor(examples)
+    pass_predictor.write_model(
+        model,
+        pass_predictor.to_onnx(model),
+        str(root / "pass_predictor.onnx"),
+        evaluation=pass_predictor.held_out(examples, model),
+    )
+    fsrs = {"weights": [0.1] * 21, "logLoss": 0.31, "durationMs": 840}
+    (root / "fsrs_weights.json").write_text(json.dumps(fsrs, indent=2))
+    (root / "fsrs_user_weights.json").write_text(json.dumps(_user_weights()))
+    return root
+
+
+def test_npz_artifacts_are_reproducible():
+    arrays = fsrs_user_arrays(_user_weights())
+    data = npz_bytes(arrays)
+    assert npz_bytes(fsrs_user_arrays(_user_weights())) == data
+    loaded = read_npz(data)
+    assert loaded["weights"].shape == (3, 21)
+    assert loaded["users"].tolist() == ["u0", "u1", "u2"]
+    np.testing.assert_array_equal(loaded["reviews"], [400, 401, 402])
+
+    # Run timestamps and durations do not change a JSON model's identity
+    first = json.dumps({"values": [1, 2], "updatedAt": "2026-01-01"}).encode()
+    second = json.dumps({"updatedAt": "2026-02-01", "values": [1, 2]}).encode()
+    assert content_hash(first, "json") == content_hash(second, "json")
+    assert content_hash(first, "json") != content_hash(b'{"values":[1,3]}', "json")
+
+
+def test_artifacts_published_with_manifest(artifacts, tmp_path):
+    cache = ExportCache(str(tmp_path / "cache"))
+    frame = pd.DataFrame({"x": [1]})
+    cache.put("pass_prediction", {}, ["2026-05-30T00:00:00", "a9"], frame)
+    cache.put("flashcard_reviews", {}, ["2026-05-31T00:00:00", "r7"], frame)
+    registry = ModelRegistry(str(tmp_path / "registry"))
+
+    published = publish_artifacts(str(artifacts), registry, cache.watermarks())
+    assert set(published) == {"pass_predictor", "fsrs", "fsrs_user"}
+    assert all(changed for _, changed in published.values())
+
+    manifest = json.loads((tmp_path / "registry" / "manifest.json").read_text())
+    entry = manifest["models"]["pass_predictor"]["versions"][0]
+    assert manifest["models"]["pass_predictor"]["latest"] == 1
+    assert entry["watermark"] == {"pass_prediction": ["2026-05-30T00:00:00", "a9"]}
+    assert entry["metrics"]["auc"] > 0.5
+    assert set(entry["latency"]) == {"loadMs", "p50RowUs", "rowsPerSecond"}
+    stored = (tmp_path / "registry" / entry["file"]).read_bytes()
+    assert hashlib.sha256(stored).hexdigest() == entry["sha256"]
+    assert entry["bytes"] == len(stored)
+    assert entry["file"].endswith(f"pass_predictor-v1-{entry['sha256'][:12]}.onnx")
+    # Trees have no int8 kernels: the optimized float graph is served, and it
+    # scores the held-out split as the exported model did
+    serving = entry["serving"]
+    assert serving["kept"] == "float" and serving["quantizedNodes"] == 0
+    assert serving["float"]["auc"] == pytest.approx(entry["metrics"]["auc"], abs=1e-3)
+
+    users = registry.latest("fsrs_user")
+    assert users.format == "npz" and users.metrics == {"users": 3}
+    assert registry.load("fsrs_user")["weights"].shape == (3, 21)
+    fsrs = registry.latest("fsrs")
+    assert fsrs.watermark == {"flashcard_reviews": ["2026-05-31T00:00:00", "r7"]}
+    assert fsrs.metrics == {"logLoss": 0.31}
+    # Compact JSON: smaller than the indented file the model module wrote
+    assert fsrs.size < (artifacts / "fsrs_weights.json").stat().st_size
+    assert registry.load("fsrs")["weights"] == [0.1] * 21
+
+
+def test_unchanged_models_are_skipped_and_old_versions_pruned(tmp_path):
+    artifacts = tmp_path / "artifacts"
+    artifacts.mkdir()
+    registry = ModelRegistry(str(tmp_path / "registry"), keep=2)
+    path = artifacts / "fsrs_weights.json"
+
+    def publish(weight, duration):
+        payload = {"weights": [weight] * 21, "logLoss": 0.3, "durationMs": duration}
+        path.write_text(json.dumps(payload))
+        return publish_artifacts(str(artifacts), registry, {})["fsrs"]
+
+    first, changed = publish(0.1, 100)
+    assert changed and first.version == 1
+    again, changed = publish(0.1, 250)
+    assert not changed and again == first
+
+    for k, weight in enumerate((0.2, 0.3), start=2):
+        entry, changed = publish(weight, 100)
+        assert changed and entry.version == k
+    versions = registry.versions("fsrs")
+    assert [v.version for v in versions] == [2, 3]
+    assert not (tmp_path / "registry" / first.file).exists()
+    assert registry.load("fsrs", version=2)["weights"][0] == 0.2
+    with pytest.raises(KeyError):
+        registry.load("fsrs", version=1)
+
+
+def test_restored_registry_continues_versions(tmp_path):
+    artifacts = tmp_path / "artifacts"
+    artifacts.mkdir()
+    path = artifacts / "fsrs_weights.json"
+    path.write_text(json.dumps({"weights": [0.1] * 21, "durationMs": 1}))
+    first, _ = publish_artifacts(
+        str(artifacts), ModelRegistry(str(tmp_path / "run1")), {}
+    )["fsrs"]
+
+    # The next run starts from a copy of the previous run's registry root
+    shutil.copytree(tmp_path / "run1", tmp_path / "run2")
+    restored = ModelRegistry(str(tmp_path / "run2"))
+    path.write_text(json.dumps({"weights": [0.1] * 21, "durationMs": 2}))
+    entry, changed = publish_artifacts(str(artifacts), restored, {})["fsrs"]
+    assert not changed and entry == first
+    path.write_text(json.dumps({"weights": [0.2] * 21, "durationMs": 3}))
+    entry, changed = publish_artifacts(str(artifacts), restored, {})["fsrs"]
+    assert changed and entry.version == 2
+    assert restored.load("fsrs", version=1)["weights"][0] == 0.1
@@ -0,0 +1,240 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from darwin_ml.models.fsrs import (
+    DEFAULT_WEIGHTS,
+    ReviewHistories,
+    UserWeights,
+    load_user_weights,
+    log_loss,
+    loss_gradient,
+    optimize_weights,
+    personalize,
+    write_weights,
+)
+
+START = pd.Timestamp("2026-01-01", tz="UTC")
+
+
+def _random_reviews(n_users=10, n_cards=20, seed=0):
+    rng = np.random.default_rng(seed)
+    rows = []
+    for user in range(n_users):
+        for card in range(n_cards):
+            at = START + pd.Timedelta(days=int(rng.integers(0, 30)))
+            for _ in range(rng.integers(1, 12)):
+                rows.append((f"u{user}", f"c{card}", int(rng.integers(0, 6)), at))
+                at += pd.Timedelta(days=float(rng.exponential(6)))
+    return pd.DataFrame(
+        rows, columns=["user_id", "flashcard_id", "quality", "reviewed_at"]
+    )
+
+
+def _simulate(weights, n_cards=3000, seed=0):
+    """Reviews of cards whose memory follows FSRS with the given weights."""
+    rng = np.random.default_rng(seed)
+    w = weights
+    rows = []
+    for card in range(n_cards):
+        rating = int(rng.choice([1, 2, 3, 4], p=[0.2, 0.1, 0.5, 0.2]))
+        d = min(max(w[4] - np.exp(w[5] * (rating - 1)) + 1, 1), 10)
+        s = max(w[rating - 1], 0.1)
+        day = 0.0
+        rows.append((f"u{card % 7}", f"c{card}", rating, day))
+        for _ in range(rng.integers(1, 15)):
+            gap = min(365, max(1, round(s * rng.uniform(0.5, 3))))
+            day += gap
+            r = 1 / (1 + gap / (9 * s))
+            recalled = rng.random() < r
+            rating = int(rng.choice([2, 3, 4], p=[0.15, 0.7, 0.15])) if recalled else 1
+            nd = d + w[6] * (rating - 3)
+            d = min(max(w[7] * w[4] + (1 - w[7]) * nd, 1), 10)
+            if recalled:
+                bonus = (w[15] if rating == 2 else 1) * (w[16] if rating == 4 else 1)
+                growth = np.exp(w[8]) * (11 - d) * s ** -w[9] * bonus
+                s *= 1 + growth * (np.exp(w[10] * (1 - r)) - 1)
+            else:
+                s = (
+                    w[11]
+                    * d ** -w[12]
+                    * ((s + 1) ** w[13] - 1)
+                    * np.exp(w[14] * (1 - r))
+                )
+            s = max(s, 0.01)
+            rows.append((f"u{card % 7}", f"c{card}", rating, day))
+    df = pd.DataFrame(rows, columns=["user_id", "flashcard_id", "rating", "day"])
+    df["reviewed_at"] = START + pd.to_timedelta(df.pop("day"), unit="D")
+    return df.sample(frac=1, random_state=seed)
+
+
+def _reference_loss(histories, w):
+    """computeLogLoss of calculators/fsrs.ts, one card and review at a time."""
+    total, count = 0.0, 0
+    for card in range(histories.n_cards):
+        span = slice(histories.starts[card], histories.starts[card + 1])
+        ratings, elapsed = histories.ratings[span], histories.elapsed[span]
+        d = min(max(w[4] - np.exp(w[5] * (ratings[0] - 1)) + 1, 1), 10)
+        s = max(w[ratings[0] - 1], 0.1)
+        for rating, days in zip(ratings[1:], elapsed[1:]):
+            r = 1 / (1 + days / (9 * s)) if days > 0 else 1.0
+            p = min(max(r, 1e-7), 1 - 1e-7)
+            total -= np.log(p) if rating >= 2 else np.log(1 - p)
+            count += 1
+            nd = d + w[6] * (rating - 3)
+            d = min(max(w[7] * w[4] + (1 - w[7]) * nd, 1), 10)
+            if rating >= 2:
+                bonus = (w[15] if rating == 2 else 1) * (w[16] if rating == 4 else 1)
+                growth = np.exp(w[8]) * (11 - d) * s ** -w[9] * bonus
+                s *= 1 + growth * (np.exp(w[10] * (1 - r)) - 1)
+            else:
+                s = (
+                    w[11]
+                    * d ** -w[12]
+                    * ((s + 1) ** w[13] - 1)
+                    * np.exp(w[14] * (1 - r))
+                )
+            s = max(s, 0.01)
+    return total / count
+
+
+def test_batched_loss_and_gradient_match_reference():
+    histories = ReviewHistories.from_frame(_random_reviews())
+    assert histories.n_cards == 200
+    w = DEFAULT_WEIGHTS.copy()
+    w[[8, 11]] = (1.4, 2.3)
+    loss, grad = loss_gradient(histories, w)
+    assert loss == pytest.approx(_reference_loss(histories, w), rel=1e-12)
+    assert log_loss(histories, w) == pytest.approx(loss, rel=1e-12)
+
+    numeric = np.empty_like(grad)
+    for k in range(len(w)):
+        step = np.zeros_like(w)
+        step[k] = 1e-6
+        numeric[k] = (
+            log_loss(histories, w + step) - log_loss(histories, w - step)
+        ) / 2e-6
+    np.testing.assert_allclose(grad, numeric, atol=1e-6)
+
+
+def test_optimizer_approaches_generating_weights(tmp_path):
+    truth = DEFAULT_WEIGHTS.copy()
+    truth[[0, 8, 11]] = (1.0, 1.9, 1.2)
+    histories = ReviewHistories.from_frame(_simulate(truth, seed=1))
+    result = optimize_weights(histories, seed=2)
+
+    assert result.log_loss < result.default_log_loss - 0.001
+    assert result.log_loss < log_loss(histories, truth) + 0.002
+    assert result.improvement_ratio > 0
+    assert result.unique_cards == 3000
+    assert result.training_samples == histories.n_reviews - 3000
+
+    payload = json.loads(open(write_weights(result, str(tmp_path / "w.json"))).read())
+    assert len(payload["weights"]) == 21
+    assert set(payload) >= {
+        "logLoss",
+        "defaultLogLoss",
+        "improvementRatio",
+        "iterations",
+        "converged",
+        "trainingSamples",
+        "uniqueCards",
+    }
+
+
+def test_too_little_or_one_sided_data_keeps_defaults():
+    small = ReviewHistories.from_frame(_random_reviews(n_users=1, n_cards=3))
+    result = optimize_weights(small)
+    np.testing.assert_array_equal(result.weights, DEFAULT_WEIGHTS)
+    assert result.iterations == 0
+
+    reviews = _random_reviews(seed=3)
+    reviews["quality"] = 5
+    result = optimize_weights(ReviewHistories.from_frame(reviews))
+    np.testing.assert_array_equal(result.weights, DEFAULT_WEIGHTS)
+    assert not result.converged
+
+
+def _users(weights, n_cards=250, seed=10):
+    frames = []
+    for k, w in enumerate(weights):
+        df = _simulate(w, n_cards=n_cards, seed=seed + k)
+        df["user_id"] = f"user{k}"
+        df["flashcard_id"] = f"{k}-" + df["flashcard_id"]
+        frames.append(df)
+    return pd.concat(frames, ignore_index=True)
+
+
+def test_personalized_weights_pooled_and_cached(tmp_path):
+    fast, slow = DEFAULT_WEIGHTS.copy(), DEFAULT_WEIGHTS.copy()
+    fast[[8, 11]] = (2.0, 1.0)
+    slow[[8, 11]] = (1.2, 3.0)
+    light = _simulate(DEFAULT_WEIGHTS, n_cards=20, seed=3).assign(user_id="light")
+    reviews = pd.concat([_users([fast, slow, fast]), light], ignore_index=True)
+    histories = ReviewHistories.from_frame(reviews)
+    global_weights = optimize_weights(histories).weights
+
+    fits = personalize(histories, global_weights)
+    assert set(fits.results) == set(fits.refit) == {"user0", "user1", "user2"}
+    for user, truth in zip(("user0", "user1"), (fast, slow)):
+        result = fits.results[user]
+        mine = histories.for_user(histories.users.get_loc(user))
+        assert result.default_log_loss == pytest.approx(
+            log_loss(mine, global_weights, None)
+        )
+        assert result.log_loss < result.default_log_loss - 0.001
+        assert result.log_loss < log_loss(mine, truth) + 0.002
+    # Pulled towards the global weights: the two profiles still separate
+    assert fits.results["user0"].weights[8] > fits.results["user1"].weights[8]
+
+    pooled = personalize(histories, global_weights, workers=2)
+    for user, result in fits.results.items():
+        np.testing.assert_array_equal(pooled.results[user].weights, result.weights)
+
+    path = write_weights(fits, str(tmp_path / "users.json"))
+    cache = load_user_weights(path)
+    assert isinstance(cache, UserWeights)
+    assert cache.reviews == fits.reviews
+    assert personalize(histories, global_weights, cache=cache).refit == ()
+
+    more = _simulate(slow, n_cards=5, seed=9).assign(user_id="user1")
+    grown = ReviewHistories.from_frame(pd.concat([reviews, more], ignore_index=True))
+    refit = personalize(grown, global_weights, cache=cache)
+    assert refit.refit == ("user1",)
+    assert refit.results["user0"] is cache.results["user0"]
+
+    # Rolling window: user2's oldest review ages out as a new one arrives
+    user2 = reviews.index[reviews["user_id"] == "user2"]
+    oldest = reviews.loc[user2, "reviewed_at"].idxmin()
+    newest = reviews.loc[user2, "reviewed_at"].idxmax()
+    late = reviews.loc[[newest]].assign(
+        reviewed_at=reviews.loc[newest, "reviewed_at"] + pd.Timedelta(days=30)
+    )
+    rolled = pd.concat([reviews.drop(index=oldest), late], ignore_index=True)
+    shifted = personalize(
+        ReviewHistories.from_frame(rolled), global_weights, cache=cache
+    )
+    assert shifted.reviews["user2"] == cache.reviews["user2"]
+    assert shifted.refit == ("user2",)
+
+    # A weekly refit nudges every global weight: the cached fits and their
+    # prior survive, and a user with new reviews is fit towards that prior
+    nudged = global_weights * 1.002
+    nudged[8] += 0.05
+    kept = personalize(grown, nudged, cache=cache)
+    assert kept.refit == ("user1",)
+    np.testing.assert_array_equal(kept.global_weights, cache.global_weights)
+    np.testing.assert_array_equal(
+        kept.results["user1"].weights, refit.results["user1"].weights
+    )
+
+    # A prior that drifted far, or new options, invalidate every cached fit
+    moved = global_weights.copy()
+    moved[8] += 0.5
+    drifted = personalize(histories, moved, cache=cache)
+    assert len(drifted.refit) == 3
+    np.testing.assert_array_equal(drifted.global_weights, moved)
+    stronger = personalize(histories, global_weights, regularization=200, cache=cache)
+    assert len(stronger.refit) == 3
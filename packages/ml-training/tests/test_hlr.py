@@ -0,0 +1,142 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from darwin_ml.models.hlr import (
+    DEFAULT_WEIGHTS,
+    FEATURE_NAMES,
+    build_dataset,
+    train_hlr,
+    write_weights,
+)
+
+START = pd.Timestamp("2026-01-01", tz="UTC")
+TRUE_WEIGHTS = np.array([0.5, 1.2, -0.1, 0.2, -1.5, -0.9])
+
+
+def _simulate(n_sequences, n_cards=200, n_topics=5, seed=0):
+    """Review sequences whose recall follows HLR with TRUE_WEIGHTS."""
+    rng = np.random.default_rng(seed)
+    card_offsets = rng.normal(0, 0.3, n_cards)
+    topic_of = rng.integers(0, n_topics, n_cards)
+    topic_offsets = rng.normal(0, 0.3, n_topics)
+    irt_b = rng.normal(0, 1.5, n_cards)
+    card = rng.integers(0, n_cards, n_sequences)
+    length = rng.integers(2, 13, n_sequences)
+    offset = card_offsets[card] + topic_offsets[topic_of[card]]
+    difficulty = np.clip((irt_b[card] + 4) / 8, 0, 1)
+    at = rng.uniform(0, 30, n_sequences)
+    history, streak, fails = np.zeros((3, n_sequences))
+    streak += 1  # every sequence starts with a recalled first review
+    steps = [(np.arange(n_sequences), np.ones(n_sequences, bool), at.copy())]
+    for k in range(1, length.max()):
+        idx = np.flatnonzero(length > k)
+        history[idx] += 1
+        w = TRUE_WEIGHTS
+        base = (
+            w[0]
+            + w[1] * np.sqrt(history[idx])
+            + w[3] * streak[idx]
+            + w[4] * difficulty[idx]
+            + w[5] * fails[idx]
+            + offset[idx]
+        )
+        delta = np.clip(2.0**base, 0.5, 365) * rng.uniform(0.2, 3, len(idx))
+        half_life = np.clip(2.0 ** (base + w[2] * np.log(delta + 1)), 0.5, 365)
+        recalled = rng.random(len(idx)) < 2.0 ** (-delta / half_life)
+        at[idx] += delta
+        steps.append((idx, recalled, at[idx].copy()))
+        streak[idx] = np.where(recalled, streak[idx] + 1, 0)
+        fails[idx] += ~recalled
+    seq, recalled, at = (np.concatenate(parts) for parts in zip(*steps))
+    reviews = pd.DataFrame(
+        {
+            "user_id": [f"u{s}" for s in seq],
+            "flashcard_id": [f"c{c}" for c in card[seq]],
+            "quality": np.where(recalled, 4, 1),
+            "reviewed_at": START + pd.to_timedelta(at, unit="D"),
+        }
+    )
+    cards = [f"c{c}" for c in range(n_cards)]
+    return (
+        reviews.sample(frac=1, random_state=seed),
+        pd.Series(card_offsets, index=cards),
+        pd.Series([f"t{t}" for t in topic_of], index=cards),
+        pd.Series(irt_b, index=cards),
+    )
+
+
+def test_features_match_extract_features_per_review():
+    times = START + pd.to_timedelta([0, 1, 3, 7, 8, 20], unit="D")
+    reviews = pd.DataFrame(
+        {
+            "user_id": ["a"] * 6 + ["b"] * 2,
+            "flashcard_id": ["x"] * 6 + ["x", "y"],
+            "quality": [5, 4, 1, 3, 0, 4, 5, 2],
+            "reviewed_at": list(times) + [times[0], times[1]],
+        }
+    ).iloc[::-1]
+    data = build_dataset(reviews, topics={"x": "cardio"}, difficulty={"x": 2.0})
+    # Only a's reviews after the first; b reviews each card once
+    assert len(data) == 5
+    expected = np.array(
+        [
+            # history, lag, streak, difficulty, fails
+            [1, 1, 1, 0.75, 0],
+            [2, 2, 2, 0.75, 0],
+            [3, 4, 0, 0.75, 1],
+            [4, 1, 1, 0.75, 1],
+            [5, 12, 0, 0.75, 2],
+        ]
+    )
+    order = np.argsort(data.reviewed_at)
+    dense = data.dense[order]
+    np.testing.assert_allclose(dense[:, 0], 1)
+    np.testing.assert_allclose(dense[:, 1], np.sqrt(expected[:, 0]), rtol=1e-6)
+    np.testing.assert_allclose(dense[:, 2], np.log(expected[:, 1] + 1), rtol=1e-6)
+    np.testing.assert_allclose(dense[:, 3:], expected[:, 2:], rtol=1e-6)
+    np.testing.assert_allclose(data.delta[order], expected[:, 1])
+    np.testing.assert_array_equal(data.recalled[order], [1, 0, 1, 0, 1])
+    assert list(data.topics) == ["cardio"]
+    assert data.indicators.shape == (5, 3)
+    x = data.lexemes.get_loc("x")
+    np.testing.assert_array_equal(data.indicators[:, [x, 2]].toarray(), 1)
+
+
+def test_training_beats_defaults_on_held_out_reviews(tmp_path):
+    reviews, card_offsets, topics, irt_b = _simulate(20_000, seed=1)
+    data = build_dataset(reviews, topics=topics, difficulty=irt_b)
+    baseline = train_hlr(data, epochs=0)
+    assert baseline.weights == pytest.approx(DEFAULT_WEIGHTS)
+    result = train_hlr(data, batch_size=2048, seed=2)
+
+    assert result.validation_loss < baseline.validation_loss - 0.01
+    assert result.training_loss < baseline.training_loss - 0.02
+    assert result.training_count == len(data) - int(len(data) * 0.1)
+    # Per-card offsets track the simulated card effects
+    fitted = result.lexeme_weights.reindex(card_offsets.index).fillna(0)
+    assert np.corrcoef(fitted, card_offsets)[0, 1] > 0.6
+
+    half_life, recall = result.predict(data)
+    assert ((half_life >= 0.5) & (half_life <= 365)).all()
+    assert ((recall > 0) & (recall <= 1)).all()
+
+    payload = json.loads(open(write_weights(result, str(tmp_path / "hlr.json"))).read())
+    assert len(payload["values"]) == len(FEATURE_NAMES)
+    assert payload["trainingCount"] == result.training_count
+    assert set(payload) >= {"trainingLoss", "updatedAt", "lexemeWeights"}
+    assert set(payload["topicWeights"]) == set(topics)
+
+
+def test_early_stopping_keeps_best_epoch():
+    reviews, _, topics, irt_b = _simulate(5_000, seed=3)
+    data = build_dataset(reviews, topics=topics, difficulty=irt_b)
+    result = train_hlr(data, learning_rate=1.0, batch_size=512, epochs=30, patience=1)
+    assert result.stopped_early
+    assert result.epochs < 30
+    again = train_hlr(
+        data, learning_rate=1.0, batch_size=512, epochs=result.epochs - 1, patience=1
+    )
+    assert result.validation_loss == pytest.approx(again.validation_loss)
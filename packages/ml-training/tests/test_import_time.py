@@ -0,0 +1,75 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+SRC = os.path.join(os.path.dirname(os.path.dirname(__file__)), "src")
+
+# Cold-import budgets in microseconds (cumulative, as reported by -X importtime)
+IMPORT_BUDGETS_US = {
+    "darwin_ml.data": 50_000,
+}
+
+HEAVY_MODULES = ("pandas", "numpy", "pyarrow", "httpx", "supabase", "dotenv")
+
+
+def _run(code, cwd=None, importtime=False):
+    env = {**os.environ, "PYTHONPATH": SRC}
+    env.pop("SUPABASE_URL", None)
+    args = [sys.executable, *(["-X", "importtime"] if importtime else []), "-c", code]
+    result = subprocess.run(args, capture_output=True, text=True, cwd=cwd, env=env)
+    assert result.returncode == 0, result.stderr
+    return result
+
+
+def _cumulative_us(stderr, module):
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        # "import time: self [us] | cumulative | imported package"
+        _, cumulative, name = line.split(":", 1)[1].split("|")
+        if name.strip() == module:
+            return int(cumulative)
+    raise AssertionError(f"{module} not found in -X importtime output")
+
+
+@pytest.mark.parametrize("module", sorted(IMPORT_BUDGETS_US))
+def test_cold_import_within_budget(module):
+    result = _run(f"import {module}", importtime=True)
+    cost = _cumulative_us(result.stderr, module)
+    assert cost <= IMPORT_BUDGETS_US[module], (
+        f"import {module} took {cost / 1000:.1f} ms "
+        f"(budget {IMPORT_BUDGETS_US[module] / 1000:.1f} ms)"
+    )
+
+
+def test_package_import_defers_heavy_dependencies():
+    code = (
+        "import sys, darwin_ml.data\n"
+        f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    )
+    assert _run(code).stdout.strip() == ""
+
+
+def test_exporters_do_not_import_supabase_until_used():
+    code = (
+        "import sys\n"
+        "from darwin_ml.data import RestClient, export_irt_item_responses\n"
+        "print(','.join(m for m in ('supabase', 'postgrest', 'dotenv') "
+        "if m in sys.modules))"
+    )
+    assert _run(code).stdout.strip() == ""
+
+
+def test_env_is_loaded_explicitly(tmp_path):
+    (tmp_path / ".env").write_text("DARWIN_ML_ENV_PROBE=loaded\n")
+    code = (
+        "import os\n"
+        "import darwin_ml.data.supabase_export\n"
+        "print(os.environ.get('DARWIN_ML_ENV_PROBE'))\n"
+        "from darwin_ml.data import load_env\n"
+        "load_env()\n"
+        "print(os.environ.get('DARWIN_ML_ENV_PROBE'))"
+    )
+    assert _run(code, cwd=tmp_path).stdout.split() == ["None", "loaded"]
@@ -0,0 +1,199 @@
+import os
+from datetime import datetime, timedelta
+
+import pytest
+
+from darwin_ml.data import incremental
+from darwin_ml.data.incremental import (
+    compact_dataset,
+    export_incremental,
+    list_partitions,
+    load_watermarks,
+    read_dataset,
+)
+from darwin_ml.data.rest_client import RestClient
+
+NOW = datetime.utcnow()
+
+
+def _attempt(i, started_hours_ago, completed_hours_ago=None, correct=True):
+    completed = (
+        None
+        if completed_hours_ago is None
+        else (NOW - timedelta(hours=completed_hours_ago)).isoformat()
+    )
+    return {
+        "id": f"a{i:03d}",
+        "user_id": f"u{i % 3}",
+        "started_at": (NOW - timedelta(hours=started_hours_ago)).isoformat(),
+        "completed_at": completed,
+        "responses": (
+            None
+            if completed is None
+            else {f"q{j}": {"correct": correct, "time_ms": 100 * j} for j in range(3)}
+        ),
+    }
+
+
+def _review(i, hours_ago):
+    return {
+        "id": f"r{i:04d}",
+        "user_id": f"u{i % 4}",
+        "flashcard_id": f"f{i % 7}",
+        "quality": i % 6,
+        "reviewed_at": (NOW - timedelta(hours=hours_ago)).isoformat(),
+    }
+
+
+def test_watermark_resumes_after_last_row(fake_postgrest, tmp_path):
+    reviews = fake_postgrest.tables["flashcard_reviews"] = [
+        _review(i, 40 - i // 2) for i in range(30)
+    ]
+    out = str(tmp_path)
+    with RestClient(fake_postgrest.url, "key") as client:
+        first = export_incremental("flashcard_reviews", client, out, page_size=7)
+        mark = load_watermarks(out)["flashcard_reviews"]
+        assert (mark["cursor"], mark["id"]) == (reviews[-1]["reviewed_at"], "r0029")
+        assert export_incremental("flashcard_reviews", client, out) is None
+
+        # Same timestamp as the watermark: the id tiebreak still picks it up
+        reviews.append({**_review(30, 0), "reviewed_at": reviews[-1]["reviewed_at"]})
+        reviews.append(_review(31, -1))
+        second = export_incremental("flashcard_reviews", client, out, page_size=7)
+
+    assert list_partitions("flashcard_reviews", out) == [first, second]
+    assert sorted(read_dataset("flashcard_reviews", out)["id"]) == [
+        r["id"] for r in reviews
+    ]
+
+
+def test_attempts_completed_after_watermark_are_exported(fake_postgrest, tmp_path):
+    attempts = fake_postgrest.tables["exam_attempts"] = [
+        _attempt(0, started_hours_ago=50, completed_hours_ago=49),
+        _attempt(1, started_hours_ago=48),  # still in progress
+        _attempt(2, started_hours_ago=47, completed_hours_ago=46),
+    ]
+    out = str(tmp_path)
+    with RestClient(fake_postgrest.url, "key") as client:
+        export_incremental("irt_responses", client, out)
+        assert set(read_dataset("irt_responses", out)["attempt_id"]) == {
+            "a000",
+            "a002",
+        }
+        # Started before the watermark, responses written after it
+        attempts[1] = _attempt(1, started_hours_ago=48, completed_hours_ago=1)
+        export_incremental("irt_responses", client, out)
+
+    df = read_dataset("irt_responses", out)
+    assert set(df["attempt_id"]) == {"a000", "a001", "a002"}
+    assert len(df) == 9
+
+
+def test_lookback_rereads_and_dedups_by_key(fake_postgrest, tmp_path):
+    attempts = fake_postgrest.tables["exam_attempts"] = [
+        _attempt(i, started_hours_ago=30 - i, completed_hours_ago=20 - i)
+        for i in range(5)
+    ]
+    out = str(tmp_path)
+    with RestClient(fake_postgrest.url, "key") as client:
+        export_incremental("irt_responses", client, out)
+        # A late rescoring rewrites an attempt just behind the watermark
+        attempts[3] = _attempt(
+            3, started_hours_ago=27, completed_hours_ago=17, correct=False
+        )
+        # No lookback: only rows past the watermark
+        assert (
+            export_incremental("irt_responses", client, out, lookback=timedelta(0))
+            is None
+        )
+        # The default one-day lookback re-reads it
+        export_incremental("irt_responses", client, out)
+
+    parts = list_partitions("irt_responses", out)
+    assert len(parts) == 2
+    df = read_dataset("irt_responses", out)
+    assert len(df) == 15
+    rescored = df[df["attempt_id"] == "a003"]
+    assert (rescored["correct"] == 0).all()
+
+
+def test_lookback_parses_postgres_timestamps(fake_postgrest, tmp_path):
+    # Completed 100, 80, 60, 40 and 20 hours ago
+    fake_postgrest.tables["exam_attempts"] = [
+        _attempt(i, started_hours_ago=101 - 20 * i, completed_hours_ago=100 - 20 * i)
+        for i in range(5)
+    ]
+    out = str(tmp_path)
+    # As PostgREST returns timestamptz: trailing fractional zeros dropped
+    cursor = (NOW - timedelta(hours=20)).replace(microsecond=123450)
+    incremental.save_watermark(out, "irt_responses", cursor.isoformat()[:-1], "a004")
+    with RestClient(fake_postgrest.url, "key") as client:
+        export_incremental("irt_responses", client, out)
+    # The one-day lookback reaches back to a003 only
+    assert set(read_dataset("irt_responses", out)["attempt_id"]) == {"a003", "a004"}
+
+
+def test_watermark_for_another_cursor_is_ignored(fake_postgrest, tmp_path):
+    fake_postgrest.tables["exam_attempts"] = [
+        _attempt(i, started_hours_ago=10 - i, completed_hours_ago=5 - i)
+        for i in range(3)
+    ]
+    out = str(tmp_path)
+    incremental.save_watermark(out, "irt_responses", NOW.isoformat(), "a999")
+    with open(os.path.join(out, incremental.WATERMARK_FILE)) as f:
+        stale = f.read().replace('"completed_at"', '"started_at"')
+    with open(os.path.join(out, incremental.WATERMARK_FILE), "w") as f:
+        f.write(stale)
+
+    with RestClient(fake_postgrest.url, "key") as client:
+        export_incremental("irt_responses", client, out)
+    assert len(read_dataset("irt_responses", out)) == 9
+    assert load_watermarks(out)["irt_responses"]["column"] == "completed_at"
+
+
+def test_compaction_keeps_newest_rows(fake_postgrest, tmp_path, monkeypatch):
+    states = fake_postgrest.tables["knowledge_states"] = [
+        {
+            "id": f"k{i}",
+            "user_id": "u0",
+            "topic": f"t{i}",
+            "mastery_probability": 0.1,
+            "response_count": 1,
+            "updated_at": (NOW - timedelta(hours=10 - i)).isoformat(),
+        }
+        for i in range(4)
+    ]
+    out = str(tmp_path)
+    with RestClient(fake_postgrest.url, "key") as client:
+        export_incremental("knowledge_states", client, out)
+        states[1] = {
+            **states[1],
+            "mastery_probability": 0.9,
+            "updated_at": NOW.isoformat(),
+        }
+        export_incremental("knowledge_states", client, out)
+
+    parts = list_partitions("knowledge_states", out)
+    assert len(parts) == 2
+
+    # Killed right after deleting the first superseded partition
+    remove = os.remove
+
+    def killed(path):
+        remove(path)
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr(incremental.os, "remove", killed)
+    with pytest.raises(KeyboardInterrupt):
+        compact_dataset("knowledge_states", out)
+    assert not os.path.exists(parts[0])
+    df = read_dataset("knowledge_states", out).set_index("id")
+    assert len(df) == 4
+    assert df.loc["k1", "mastery_probability"] == pytest.approx(0.9)
+    monkeypatch.undo()
+
+    path = compact_dataset("knowledge_states", out)
+    assert list_partitions("knowledge_states", out) == [path]
+    df = read_dataset("knowledge_states", out).set_index("id")
+    assert len(df) == 4
+    assert df.loc["k1", "mastery_probability"] == pytest.approx(0.9)
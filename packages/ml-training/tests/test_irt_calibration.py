@@ -0,0 +1,83 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from darwin_ml.models.irt_calibration import (
+    calibrate,
+    calibrate_frame,
+    write_calibration,
+)
+
+
+def simulate(n_persons, a, b, c=None, sd=1.0, missing=0.0, seed=0):
+    rng = np.random.default_rng(seed)
+    theta = rng.normal(0, sd, n_persons)
+    c = np.zeros(len(b)) if c is None else np.asarray(c)
+    p = c + (1 - c) / (1 + np.exp(-np.asarray(a) * (theta[:, None] - b)))
+    x = (rng.random(p.shape) < p).astype(float)
+    x[rng.random(p.shape) < missing] = np.nan
+    return x
+
+
+B = np.linspace(-2, 2, 20)
+A = np.tile([0.7, 1.0, 1.4, 1.8], 5)
+
+
+def test_rasch_recovers_difficulty_and_ability_sd():
+    x = simulate(8_000, np.ones(len(B)), B, sd=1.4, missing=0.3, seed=1)
+    result = calibrate(x, model="rasch")
+    assert result.converged
+    np.testing.assert_allclose(result.items["difficulty"], B, atol=0.1)
+    assert (result.items["discrimination"] == 1).all()
+    assert result.latent_sd == pytest.approx(1.4, abs=0.05)
+    assert result.items["infit"].between(0.9, 1.1).all()
+
+
+def test_2pl_recovers_parameters_with_standard_errors():
+    x = simulate(10_000, A, B, missing=0.3, seed=2)
+    items = calibrate(x, model="2pl").items
+    np.testing.assert_allclose(items["difficulty"], B, atol=0.15)
+    np.testing.assert_allclose(items["discrimination"], A, rtol=0.15)
+    # Reported SEs cover the estimation error
+    z = (items["difficulty"] - B) / items["difficulty_se"]
+    assert (z.abs() < 4).all()
+    assert items["guessing"].eq(0).all() and items["guessing_se"].isna().all()
+
+
+def test_3pl_estimates_guessing():
+    x = simulate(15_000, A, B, c=np.full(len(B), 0.2), seed=3)
+    items = calibrate(x, model="3pl").items
+    assert items["guessing"].mean() == pytest.approx(0.2, abs=0.04)
+    assert np.abs(items["difficulty"] - B).mean() < 0.15
+    assert items["guessing_se"].gt(0).all()
+
+
+def test_sparse_items_are_left_out(tmp_path):
+    x = simulate(3_000, np.ones(len(B)), B, seed=4)
+    rows = np.repeat(np.arange(len(x)), len(B))
+    df = pd.DataFrame(
+        {
+            "user_id": rows,
+            "question_id": np.tile([f"q{i:02d}" for i in range(len(B))], len(x)),
+            "correct": x.ravel(),
+        }
+    )
+    # q19 answered by only 10 persons
+    df = df[(df["question_id"] != "q19") | (df["user_id"] < 10)]
+    result = calibrate_frame(df, model="rasch", min_responses=30)
+    assert result.items.index[-1] == "q19"
+    assert result.items.loc["q19"].drop("n_responses").isna().all()
+    assert result.items.loc["q19", "n_responses"] == 10
+
+    path = write_calibration(result, str(tmp_path / "irt.json"), batch_name="test")
+    payload = json.loads((tmp_path / "irt.json").read_text())
+    assert path.endswith("irt.json")
+    assert payload["batch"]["batch_name"] == "test"
+    assert payload["batch"]["model_type"] == "1PL"
+    assert payload["batch"]["responses_count"] == result.n_responses
+    item = payload["items"][0]
+    assert item["question_id"] == "q00"
+    assert {"difficulty", "discrimination", "guessing", "infit", "outfit"} <= set(item)
+    assert payload["items"][-1]["difficulty"] is None
@@ -0,0 +1,122 @@
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+from darwin_ml.data.backend import get_backend
+from darwin_ml.data.local_backend import LocalBackend
+from darwin_ml.data.parallel_export import export_all_concurrent
+from darwin_ml.data.supabase_export import (
+    export_flashcard_reviews,
+    export_irt_item_responses,
+    export_knowledge_states,
+    export_pass_prediction_features,
+    iter_keyset_pages,
+)
+from darwin_ml.data.synthetic import (
+    SyntheticSpec,
+    build_local_backend,
+    generate_synthetic_tables,
+)
+
+END = datetime(2026, 6, 1, 12, 0, 0)
+SPEC = SyntheticSpec(
+    n_users=60,
+    n_questions=80,
+    questions_per_attempt=20,
+    n_attempts=300,
+    n_flashcards=50,
+    n_reviews=2_500,
+    n_topics=12,
+    days=30,
+)
+
+
+@pytest.fixture(scope="module")
+def backend():
+    with build_local_backend(SPEC, end=END) as backend:
+        yield backend
+
+
+def test_generator_is_deterministic_and_sized():
+    first = generate_synthetic_tables(SPEC, end=END)
+    second = generate_synthetic_tables(SPEC, end=END)
+    for name, df in first.items():
+        pd.testing.assert_frame_equal(df, second[name])
+    assert len(first["exam_attempts"]) == 300
+    assert len(first["flashcard_reviews"]) == 2_500
+    assert len(first["knowledge_states"]) == 60 * 12
+    assert first["knowledge_states"][["user_id", "topic"]].duplicated().sum() == 0
+
+    spec = SyntheticSpec.for_rows(1_000_000)
+    assert spec.n_reviews == 1_000_000
+    assert spec.n_attempts * spec.questions_per_attempt == 1_000_000
+    assert spec.n_users * spec.n_topics == 1_000_000
+
+
+def test_keyset_paging_covers_table_with_null_cursors(backend):
+    backend.load_table(
+        "events",
+        pd.DataFrame(
+            {
+                "id": [f"e{i:03d}" for i in range(50)],
+                "at": pd.to_datetime(
+                    [
+                        None if i % 7 == 0 else f"2026-01-{i % 5 + 1:02d}"
+                        for i in range(50)
+                    ],
+                    utc=True,
+                ),
+            }
+        ),
+    )
+    pages = list(iter_keyset_pages(backend, "events", "id,at", "at", page_size=6))
+    ids = [row["id"] for page in pages for row in page]
+    assert sorted(ids) == [f"e{i:03d}" for i in range(50)]
+    assert len(ids) == 50
+    assert all(len(page) <= 6 for page in pages)
+
+
+def test_exports_run_offline(backend):
+    days = (datetime.utcnow() - END).days + SPEC.days + 1
+    tables = generate_synthetic_tables(SPEC, end=END)
+    attempts = tables["exam_attempts"]
+    completed = attempts["responses"].notna()
+
+    responses = export_irt_item_responses(backend, days_back=days, cache=False)
+    assert len(responses) == completed.sum() * SPEC.questions_per_attempt
+
+    reviews = export_flashcard_reviews(backend, days_back=days, cache=False)
+    assert len(reviews) == len(tables["flashcard_reviews"])
+    assert reviews["reviewed_at"].is_monotonic_increasing
+
+    states = export_knowledge_states(backend, cache=False)
+    assert len(states) == len(tables["knowledge_states"])
+
+    features = export_pass_prediction_features(backend, min_attempts=3, cache=False)
+    counts = attempts[attempts["completed_at"].notna()]["user_id"].value_counts()
+    assert len(features) == counts[counts >= 3].sum()
+    assert features["theta_delta"].notna().all()
+    assert features["target"].dtype == "boolean"
+
+
+def test_concurrent_export_accepts_local_backend(backend, tmp_path):
+    exports = export_all_concurrent(str(tmp_path), client=backend, concurrency=4)
+    assert set(exports) == {
+        "pass_prediction",
+        "irt_responses",
+        "flashcard_reviews",
+        "knowledge_states",
+    }
+
+
+def test_get_backend_local(monkeypatch, tmp_path):
+    path = str(tmp_path / "local.sqlite")
+    LocalBackend(path).close()
+    monkeypatch.setenv("DARWIN_ML_BACKEND", "local")
+    monkeypatch.setenv("DARWIN_ML_LOCAL_DB", path)
+    backend = get_backend()
+    assert isinstance(backend, LocalBackend)
+    backend.close()
+    with pytest.raises(ValueError):
+        get_backend("bigquery")
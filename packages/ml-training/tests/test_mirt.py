@@ -0,0 +1,123 @@
+import json
+
+import numpy as np
+import pandas as pd
+from scipy.optimize import minimize
+
+from darwin_ml.data import ResponseMatrix
+from darwin_ml.models.mirt import (
+    DIMENSIONS,
+    LOADING_COLUMNS,
+    N_DIM,
+    calibrate_mirt,
+    items_from_json,
+    score_mirt,
+    write_mirt,
+)
+
+N_ITEMS = 30
+PRIMARY = np.arange(N_ITEMS) % N_DIM
+ITEM_IDS = [f"q{i}" for i in range(N_ITEMS)]
+AREAS = dict(zip(ITEM_IDS, (DIMENSIONS[k] for k in PRIMARY)))
+
+
+def _items(seed=0, guessing=0.0):
+    rng = np.random.default_rng(seed)
+    loadings = rng.normal(0, 0.1, (N_ITEMS, N_DIM))
+    loadings[np.arange(N_ITEMS), PRIMARY] = rng.uniform(0.8, 2.0, N_ITEMS)
+    frame = pd.DataFrame(
+        loadings, columns=LOADING_COLUMNS, index=pd.Index(ITEM_IDS, name="item")
+    )
+    frame["intercept"] = rng.normal(0, 1, N_ITEMS)
+    frame["guessing"] = guessing
+    frame["primary_dimension"] = [DIMENSIONS[k] for k in PRIMARY]
+    return frame
+
+
+def _responses(items, n_users, seed=0, missing=0.1):
+    rng = np.random.default_rng(seed)
+    theta = rng.normal(size=(n_users, N_DIM))
+    c = items["guessing"].to_numpy()
+    eta = theta @ items[LOADING_COLUMNS].to_numpy().T + items["intercept"].to_numpy()
+    p = c + (1 - c) / (1 + np.exp(-eta))
+    x = (rng.random(p.shape) < p).astype(int)
+    users, cols = np.nonzero(rng.random(p.shape) >= missing)
+    df = pd.DataFrame(
+        {
+            "user_id": [f"u{u}" for u in users],
+            "question_id": np.asarray(ITEM_IDS)[cols],
+            "correct": x[users, cols],
+        }
+    )
+    return ResponseMatrix.from_frame(df)
+
+
+def test_recovers_loadings_and_exports_mirt_items(tmp_path):
+    truth = _items()
+    matrix = _responses(truth, 2500, seed=1)
+    result = calibrate_mirt(matrix, AREAS, seed=2)
+    assert result.converged
+    fitted = result.items.loc[ITEM_IDS]
+    assert (fitted["primary_dimension"] == truth["primary_dimension"]).all()
+
+    rows = np.arange(N_ITEMS)
+    primary = fitted[LOADING_COLUMNS].to_numpy()[rows, PRIMARY]
+    expected = truth[LOADING_COLUMNS].to_numpy()[rows, PRIMARY]
+    assert np.corrcoef(primary, expected)[0, 1] > 0.9
+    assert np.abs(fitted["intercept"] - truth["intercept"]).mean() < 0.15
+    cross = fitted[LOADING_COLUMNS].to_numpy().copy()
+    cross[rows, PRIMARY] = 0
+    assert np.abs(cross).max() < 0.5
+    assert (fitted["se_intercept"] > 0).all()
+
+    path = write_mirt(result, str(tmp_path / "mirt.json"))
+    payload = json.loads(open(path).read())
+    item = payload["items"][0]
+    assert set(item) >= {
+        "itemId",
+        "discriminations",
+        "intercept",
+        "guessing",
+        "primaryDimension",
+    }
+    assert len(item["discriminations"]) == N_DIM
+    restored = items_from_json(payload)
+    np.testing.assert_allclose(
+        restored.loc[ITEM_IDS, LOADING_COLUMNS], fitted[LOADING_COLUMNS]
+    )
+
+
+def test_items_without_area_are_left_out():
+    truth = _items()
+    matrix = _responses(truth, 300, seed=3)
+    areas = {k: v for k, v in AREAS.items() if k != "q0"}
+    result = calibrate_mirt(matrix, areas, burn_in=5, sem_cycles=5, max_cycles=5)
+    assert np.isnan(result.items.loc["q0", "intercept"])
+    assert "q0" not in {item["itemId"] for item in result.to_json()["items"]}
+    assert result.n_responses == int(matrix.to_csr()[:, 1:].nnz)
+
+
+def test_map_scores_match_direct_optimization():
+    items = _items(seed=4, guessing=0.2)
+    matrix = _responses(items, 200, seed=5, missing=0.3)
+    scores = score_mirt(matrix, items, max_iter=50, tol=1e-6)
+    assert scores["converged"].all()
+
+    a = items[LOADING_COLUMNS].to_numpy()
+    d, c = items["intercept"].to_numpy(), items["guessing"].to_numpy()
+    for user in ("u0", "u11", "u123"):
+        row = matrix.user(user)
+        cols = np.asarray(row.codes)
+        x = np.asarray(row.outcomes, dtype=float)
+        idx = items.index.get_indexer(matrix.items.decode(cols))
+
+        def negative_log_posterior(theta):
+            eta = a[idx] @ theta + d[idx]
+            p = c[idx] + (1 - c[idx]) / (1 + np.exp(-eta))
+            loglik = np.sum(x * np.log(p) + (1 - x) * np.log1p(-p))
+            return -(loglik - theta @ theta / 2)
+
+        best = minimize(negative_log_posterior, np.zeros(N_DIM), method="BFGS").x
+        estimate = scores.loc[user, [f"theta_{dim}" for dim in DIMENSIONS]]
+        np.testing.assert_allclose(estimate.to_numpy(float), best, atol=1e-3)
+    assert (scores[[f"se_{dim}" for dim in DIMENSIONS]] < 1).all().all()
@@ -0,0 +1,166 @@
+from datetime import datetime, timedelta
+
+import httpx
+import pytest
+
+from darwin_ml.data import read_export
+from darwin_ml.data.parallel_export import cursor_windows, export_all_concurrent
+from darwin_ml.data.rest_client import RestClient
+from darwin_ml.data.supabase_export import iter_keyset_pages
+
+
+def _seed(server, n_attempts=230, n_reviews=410, n_states=57):
+    now = datetime.utcnow()
+    server.tables["exam_attempts"] = [
+        {
+            "id": f"a{i:05d}",
+            "user_id": f"u{i % 17}",
+            "started_at": (now - timedelta(hours=i * 7)).isoformat(),
+            "responses": (
+                None
+                if i % 11 == 0
+                else {
+                    f"q{j}": {"correct": (i + j) % 3 == 0, "time_ms": 500 * j}
+                    for j in range(4)
+                }
+            ),
+        }
+        for i in range(n_attempts)
+    ]
+    server.tables["flashcard_reviews"] = [
+        {
+            "id": f"r{i:05d}",
+            "user_id": f"u{i % 13}",
+            "flashcard_id": f"f{i % 29}",
+            "quality": i % 6,
+            # Duplicate timestamps exercise the (cursor, id) tiebreak
+            "reviewed_at": (now - timedelta(hours=(i // 3) * 5)).isoformat(),
+            "ease_factor_before": 2.5,
+            "ease_factor_after": 2.6,
+            "interval_before": 1,
+            "interval_after": 3,
+        }
+        for i in range(n_reviews)
+    ]
+    server.tables["knowledge_states"] = [
+        {
+            "id": f"k{i:05d}",
+            "user_id": f"u{i % 5}",
+            "topic": f"t{i % 4}",
+            "mastery_probability": 0.5,
+            "response_count": i,
+            "updated_at": (
+                None if i % 9 == 0 else (now - timedelta(minutes=i)).isoformat()
+            ),
+        }
+        for i in range(n_states)
+    ]
+    server.rpcs["get_pass_prediction_features"] = [
+        {
+            "attempt_id": f"a{i}",
+            "user_id": f"u{i % 4}",
+            "theta": 0.1 * i,
+            "theta_delta": None,
+            "clinica_medica_pct": 50.0,
+            "cirurgia_pct": None,
+            "gine_pct": 40.0,
+            "pediatria_pct": 30.0,
+            "saude_pct": 20.0,
+            "target": i % 2 == 0,
+        }
+        for i in range(20)
+    ]
+
+
+def test_keyset_pages_cover_every_row_once(fake_postgrest):
+    _seed(fake_postgrest)
+    with RestClient(fake_postgrest.url, "key") as client:
+        pages = list(
+            iter_keyset_pages(
+                client, "flashcard_reviews", cursor_column="reviewed_at", page_size=50
+            )
+        )
+    ids = [row["id"] for page in pages for row in page]
+    assert len(ids) == len(set(ids)) == 410
+    assert max(len(page) for page in pages) == 50
+
+
+def test_concurrent_export_matches_source(fake_postgrest, tmp_path):
+    _seed(fake_postgrest)
+    fake_postgrest.delay = 0.01
+    with RestClient(fake_postgrest.url, "key", max_connections=4) as client:
+        exports = export_all_concurrent(
+            str(tmp_path), client=client, concurrency=4, page_size=40
+        )
+
+    cutoff = datetime.utcnow() - timedelta(days=365)
+    expected_attempts = [
+        a
+        for a in fake_postgrest.tables["exam_attempts"]
+        if a["responses"] and datetime.fromisoformat(a["started_at"]) >= cutoff
+    ]
+    irt = read_export(exports["irt_responses"])
+    assert len(irt) == 4 * len(expected_attempts)
+
+    reviews = read_export(exports["flashcard_reviews"])
+    assert sorted(reviews["id"]) == sorted(
+        r["id"] for r in fake_postgrest.tables["flashcard_reviews"]
+    )
+    states = read_export(exports["knowledge_states"])
+    assert len(states) == 57
+    assert fake_postgrest.max_in_flight <= 4
+
+
+def test_retries_transient_errors(fake_postgrest):
+    _seed(fake_postgrest)
+    fake_postgrest.fail_next = [429, 503, 502]
+    client = RestClient(fake_postgrest.url, "key", backoff=0.001)
+    rows = client.table("knowledge_states").select("*").limit(5).execute().data
+    assert len(rows) == 5
+    assert client.retry_count == 3
+    assert fake_postgrest.requests == 4
+
+
+def test_gives_up_after_max_retries(fake_postgrest):
+    _seed(fake_postgrest)
+    fake_postgrest.fail_next = [500] * 3
+    client = RestClient(fake_postgrest.url, "key", max_retries=2, backoff=0.001)
+    with pytest.raises(httpx.HTTPStatusError):
+        client.table("knowledge_states").select("*").execute()
+
+
+def test_sent_inserts_are_not_retried(fake_postgrest):
+    client = RestClient(fake_postgrest.url, "key", backoff=0.001)
+    fake_postgrest.fail_next = [503]
+    with pytest.raises(httpx.HTTPStatusError):
+        client.table("user_predictions").insert([{"user_id": "u1"}]).execute()
+    assert fake_postgrest.requests == 1
+
+    # Rate-limited requests were not processed, and upserts are idempotent
+    fake_postgrest.fail_next = [429]
+    client.table("user_predictions").insert([{"user_id": "u1"}]).execute()
+    fake_postgrest.fail_next = [502]
+    client.table("user_predictions").upsert(
+        [{"user_id": "u1"}], on_conflict="user_id"
+    ).execute()
+    assert [row["user_id"] for row in fake_postgrest.tables["user_predictions"]] == [
+        "u1"
+    ]
+
+
+def test_client_errors_are_not_retried(fake_postgrest):
+    client = RestClient(fake_postgrest.url, "key", backoff=0.001)
+    with pytest.raises(httpx.HTTPStatusError):
+        client.table("missing_table").select("*").execute()
+    assert fake_postgrest.requests == 1
+
+
+def test_cursor_windows_are_contiguous():
+    now = datetime(2026, 1, 1)
+    windows = cursor_windows(365, 4, now=now)
+    assert len(windows) == 4
+    assert windows[0][0] == (now - timedelta(days=365)).isoformat()
+    assert windows[-1][1] is None
+    for (_, until), (since, _) in zip(windows, windows[1:]):
+        assert until == since
+    assert cursor_windows(None, 4) == [(None, None)]
@@ -0,0 +1,132 @@
+import json
+from datetime import datetime
+
+import numpy as np
+import onnx
+import pandas as pd
+import pytest
+
+from darwin_ml.data import LocalBackend
+from darwin_ml.data.supabase_export import export_pass_prediction_features
+from darwin_ml.data.synthetic import SyntheticSpec, build_local_backend
+from darwin_ml.models.pass_predictor import (
+    FEATURES,
+    ONNX_OUTPUT,
+    PassExamples,
+    PassScorer,
+    feature_matrix,
+    model_version,
+    prediction_rows,
+    score_users,
+    to_onnx,
+    train_pass_predictor,
+    write_model,
+    write_predictions,
+)
+
+SPEC = SyntheticSpec(
+    n_users=400,
+    n_questions=80,
+    questions_per_attempt=20,
+    n_attempts=4_000,
+    n_flashcards=20,
+    n_reviews=100,
+    n_topics=12,
+    days=60,
+)
+
+
+@pytest.fixture(scope="module")
+def features():
+    with build_local_backend(SPEC, end=datetime(2026, 6, 1)) as backend:
+        return export_pass_prediction_features(backend, cache=False)
+
+
+@pytest.fixture(scope="module")
+def trained(features):
+    examples = PassExamples.from_frame(features)
+    return examples, train_pass_predictor(examples)
+
+
+def test_examples_label_the_next_attempt():
+    at = pd.Timestamp("2026-01-01", tz="UTC") + pd.to_timedelta([3, 1, 2, 5], "D")
+    features = pd.DataFrame(
+        {
+            "attempt_id": ["a3", "a1", "a2", "b1"],
+            "user_id": ["a", "a", "a", "b"],
+            "target": [True, False, False, True],
+            "completed_at": at,
+            **{name: 0.0 for name in FEATURES},
+        }
+    )
+    examples = PassExamples.from_frame(features)
+    assert examples.train["attempt_id"].tolist() == ["a1", "a2"]
+    assert examples.train["label"].tolist() == [False, True]
+    assert examples.train["label_at"].tolist() == [at[2], at[0]]
+    assert sorted(examples.latest["attempt_id"]) == ["a3", "b1"]
+
+    with pytest.raises(ValueError, match="migration 024"):
+        PassExamples.from_frame(features.drop(columns="completed_at"))
+
+
+def test_time_split_and_calibrated_metrics(trained):
+    examples, model = trained
+    split = model.split
+    assert split["fit"] + split["calibration"] + split["test"] == len(examples.train)
+    assert split["calibration_from"] < split["test_from"]
+    # Nothing later than the test window's start is used to fit
+    fit_end = examples.train["label_at"].iloc[split["fit"] - 1]
+    assert fit_end.isoformat() <= split["calibration_from"]
+
+    raw, calibrated = model.metrics["raw"], model.metrics["calibrated"]
+    assert calibrated["auc"] > 0.8
+    assert calibrated["auc"] == pytest.approx(raw["auc"])
+    assert calibrated["ece"] < 0.1
+    assert calibrated["brier"] < model.metrics["base_rate"]
+
+
+def test_onnx_graph_matches_booster_and_scores_in_batches(tmp_path, trained):
+    examples, model = trained
+    exported = to_onnx(model)
+    assert [o.name for o in exported.graph.output] == [ONNX_OUTPUT]
+
+    x = feature_matrix(examples.train)
+    scorer = PassScorer(exported)
+    scores = scorer.score(x)
+    # ONNX trees compare against float32 thresholds: rows sitting exactly on a
+    # LightGBM split may take the other branch
+    close = np.isclose(scores, model.predict_proba(x), atol=1e-5)
+    assert close.mean() > 0.995
+    np.testing.assert_allclose(scorer.score(x, batch_size=97), scores, atol=1e-6)
+
+    report = scorer.latency(x, batch_sizes=(1, 64, 10**6), max_calls=20)
+    assert report["batch_size"].tolist() == [1, 64, len(x)]
+    assert (report["rows_per_second"] > 0).all()
+    assert (report["p50_ms"] <= report["p99_ms"]).all()
+
+    path = write_model(model, exported, str(tmp_path / "pass.onnx"))
+    again = PassScorer(path)
+    np.testing.assert_allclose(again.score(x[:100]), scores[:100], atol=1e-6)
+    payload = json.loads((tmp_path / "pass.json").read_text())
+    assert payload["modelVersion"] == model_version(onnx.load(path))
+    assert payload["features"] == FEATURES
+    assert set(payload["calibration"]) == {"slope", "intercept"}
+
+
+def test_latest_attempts_written_as_predictions(trained):
+    examples, model = trained
+    exported = to_onnx(model)
+    scores = score_users(PassScorer(exported), examples)
+    assert len(scores) == examples.latest["user_id"].nunique()
+    assert scores["pass_probability"].between(0, 1).all()
+
+    version = model_version(exported)
+    first = next(prediction_rows(scores, version))
+    assert first["prediction_type"] == "pass_probability"
+    assert first["model_version"].startswith("pass_predictor@")
+    with LocalBackend() as backend:
+        assert write_predictions(scores, version, backend) == len(scores)
+        assert write_predictions(scores, version, backend) == len(scores)
+        stored = backend.table("user_predictions").select("*").execute().data
+    assert len(stored) == len(scores)
+    assert stored[0]["features_used"]["attempt_id"] == scores["attempt_id"].iloc[0]
@@ -0,0 +1,105 @@
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pytest
+
+from darwin_ml.data import ResponseMatrix, Vocabulary, write_frame
+from darwin_ml.data.responses import MISSING_TIME
+
+ROWS = pd.DataFrame(
+    {
+        "user_id": ["u1", "u2", "u1", "u3", "u1"],
+        "question_id": ["q2", "q1", "q1", "q2", "q2"],
+        "correct": [1, 1, 0, 0, 0],
+        "response_time_ms": [1200, None, 800, 950, 400],
+    }
+)
+
+
+def test_from_frame_keeps_each_users_responses_in_order():
+    matrix = ResponseMatrix.from_frame(ROWS)
+    assert matrix.shape == (3, 2)
+    assert len(matrix) == 5
+    assert matrix.users.values == ["u1", "u2", "u3"]
+    assert matrix.items.values == ["q2", "q1"]
+    assert matrix.outcomes.dtype == np.int8 and matrix.times.dtype == np.int32
+
+    codes, outcomes, times = matrix.user("u1")
+    assert codes.tolist() == [0, 1, 0]
+    assert outcomes.tolist() == [1, 0, 0]
+    assert times.tolist() == [1200, 800, 400]
+    assert matrix.user("u2").times.tolist() == [MISSING_TIME]
+
+    # Per-item access goes through the CSC permutation
+    codes, outcomes, times = matrix.item("q2")
+    assert codes.tolist() == [0, 0, 2]
+    assert outcomes.tolist() == [1, 0, 0]
+    assert times.tolist() == [1200, 400, 950]
+    np.testing.assert_array_equal(matrix.item_counts, [3, 2])
+    np.testing.assert_array_equal(matrix.user_counts, [3, 1, 1])
+
+
+def test_matrix_views_keep_last_response_per_cell():
+    matrix = ResponseMatrix.from_frame(ROWS)
+    assert matrix.has_repeats
+    csr = matrix.to_csr()
+    # Explicit zeros are administered responses
+    assert csr.nnz == 4
+    np.testing.assert_array_equal(csr.toarray(), [[0, 0], [0, 1], [0, 0]])
+    np.testing.assert_array_equal(
+        matrix.mask().toarray(), [[True, True], [False, True], [True, False]]
+    )
+    dense = matrix.to_dense()
+    assert np.isnan(dense[1, 0]) and np.isnan(dense[2, 1])
+    assert not matrix.unique().has_repeats
+
+
+def test_export_round_trip_shares_vocabularies(tmp_path):
+    users, items = Vocabulary(["u3"]), Vocabulary()
+    for suffix in (".parquet", ".arrow"):
+        path = str(tmp_path / f"responses{suffix}")
+        write_frame(ROWS.iloc[:2], path, "irt_responses")
+        matrix = ResponseMatrix.from_export(path, users=users, items=items)
+        # u3 keeps the code it was given; new IDs extend the vocabularies
+        assert users.values[:3] == ["u3", "u1", "u2"]
+        assert matrix.user("u1").codes.tolist() == [items.add("q2")]
+        assert matrix.user("u3").codes.tolist() == []
+
+    path = str(tmp_path / "all.parquet")
+    write_frame(ROWS, path, "irt_responses")
+    matrix = ResponseMatrix.from_export(path)
+    frame = matrix.to_frame()
+    expected = ROWS.iloc[[0, 2, 4, 1, 3]].reset_index(drop=True)
+    assert frame["user_id"].astype(str).tolist() == expected["user_id"].tolist()
+    assert frame["correct"].tolist() == expected["correct"].tolist()
+    assert frame["response_time_ms"].isna().tolist() == [False] * 3 + [True, False]
+
+
+def test_arrow_codes_are_not_copied():
+    table = pa.table(
+        {
+            "user_id": pa.array(["a", "a", "b"]).dictionary_encode(),
+            "question_id": pa.array(["x", "y", "x"]).dictionary_encode(),
+            "correct": pa.array([1, 0, 1], pa.int8()),
+        }
+    )
+    matrix = ResponseMatrix.from_arrow(table)
+    buffer = table.column("question_id").chunk(0).indices.buffers()[1]
+    assert matrix.indices.ctypes.data == buffer.address
+    assert matrix.times is None
+
+    block = matrix.user_rows(1, 2)
+    assert block.shape == (1, 2) and block.users.values == ["b"]
+    assert block.user(0).codes.tolist() == [0]
+
+
+def test_invalid_layout_is_rejected():
+    with pytest.raises(ValueError):
+        ResponseMatrix(
+            np.array([0, 2]),
+            np.zeros(1),
+            np.zeros(1),
+            None,
+            Vocabulary(["a"]),
+            Vocabulary(["x"]),
+        )
@@ -0,0 +1,82 @@
+from darwin_ml.data.rest_client import RestClient
+from darwin_ml.data.supabase_export import (
+    export_pass_prediction_features,
+    flatten_attempt_responses,
+)
+from darwin_ml.data.vocab import Vocabulary
+
+
+def _feature_rows(n_users=6):
+    rows = []
+    for u in range(n_users):
+        for k in range(u + 1):
+            rows.append(
+                {
+                    "attempt_id": f"a{u:02d}{k:02d}",
+                    "user_id": f"u{u}",
+                    "theta": 0.1 * k,
+                    "theta_delta": None if k == 0 else 0.1,
+                    "clinica_medica_pct": None,
+                    "cirurgia_pct": 50.0,
+                    "gine_pct": 40.0,
+                    "pediatria_pct": 30.0,
+                    "saude_pct": 20.0,
+                    "target": k % 2 == 0,
+                }
+            )
+    return rows
+
+
+def test_pass_features_server_side_pages_and_projects(fake_postgrest):
+    # The stand-in returns the RPC rows as-is; filtering happens in SQL
+    fake_postgrest.rpcs["get_pass_prediction_training_rows"] = _feature_rows()
+    with RestClient(fake_postgrest.url, "key") as client:
+        df = export_pass_prediction_features(
+            client, columns=["user_id", "theta", "target"], page_size=4
+        )
+    assert list(df.columns) == ["user_id", "theta", "target"]
+    assert len(df) == 21
+    assert fake_postgrest.requests == 6
+
+
+def test_pass_features_fall_back_to_client_side(fake_postgrest):
+    fake_postgrest.rpcs["get_pass_prediction_features"] = _feature_rows()
+    with RestClient(fake_postgrest.url, "key") as client:
+        df = export_pass_prediction_features(client, min_attempts=3)
+    # Users u2..u5 have >= 3 attempts: 3 + 4 + 5 + 6 rows
+    assert len(df) == 18
+    assert df["theta_delta"].notna().all()
+    assert (df["clinica_medica_pct"] == 0).all()
+
+
+def test_flatten_responses_shares_vocabulary_codes():
+    users, questions = Vocabulary(), Vocabulary()
+    first = flatten_attempt_responses(
+        [
+            {
+                "id": "a1",
+                "user_id": "u1",
+                "responses": {
+                    "q1": {"correct": True, "time_ms": 1200},
+                    "q2": {"correct": False},
+                },
+            },
+            {"id": "a2", "user_id": "u2", "responses": None},
+        ],
+        users,
+        questions,
+        include_attempt_id=True,
+    )
+    second = flatten_attempt_responses(
+        [{"id": "a3", "user_id": "u2", "responses": {"q2": {"correct": True}}}],
+        users,
+        questions,
+    )
+    assert first["attempt_id"].tolist() == ["a1", "a1"]
+    assert first["correct"].tolist() == [1, 0]
+    assert first["response_time_ms"].isna().tolist() == [False, True]
+    assert first["correct"].dtype == "int8"
+    # u2 only answered on the second page; q2 keeps its code
+    assert second["user_id"].cat.codes.tolist() == [users.add("u2")] == [1]
+    assert second["question_id"].cat.codes.tolist() == [questions.add("q2")]
+    assert "attempt_id" not in second
@@ -0,0 +1,136 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+from scipy.optimize import minimize_scalar
+
+from darwin_ml.data import LocalBackend, ResponseMatrix
+from darwin_ml.data.rest_client import RestClient
+from darwin_ml.models.irt_calibration import (
+    calibrate,
+    read_calibration,
+    write_calibration,
+)
+from darwin_ml.models.theta_scoring import (
+    prediction_rows,
+    score_thetas,
+    write_predictions,
+)
+
+N_ITEMS = 15
+ITEMS = pd.DataFrame(
+    {
+        "difficulty": np.linspace(-2, 2, N_ITEMS),
+        "discrimination": np.linspace(0.6, 2.0, N_ITEMS),
+        "guessing": np.tile([0.0, 0.2, 0.1], N_ITEMS // 3),
+    },
+    index=pd.Index([f"q{i}" for i in range(N_ITEMS)], name="item"),
+)
+
+
+def _responses(n_users, seed=0, missing=0.3):
+    rng = np.random.default_rng(seed)
+    theta = rng.normal(size=n_users)
+    a, b, c = (
+        ITEMS[k].to_numpy() for k in ("discrimination", "difficulty", "guessing")
+    )
+    p = c + (1 - c) / (1 + np.exp(-a * (theta[:, None] - b)))
+    x = (rng.random(p.shape) < p).astype(int)
+    users, items = np.nonzero(rng.random(p.shape) >= missing)
+    df = pd.DataFrame(
+        {
+            "user_id": [f"u{u}" for u in users],
+            "question_id": ITEMS.index[items],
+            "correct": x[users, items],
+        }
+    )
+    return ResponseMatrix.from_frame(df)
+
+
+def _log_posterior(theta, outcomes, a, b, c):
+    p = c + (1 - c) / (1 + np.exp(-a * (theta - b)))
+    return np.sum(outcomes * np.log(p) + (1 - outcomes) * np.log1p(-p)) - theta**2 / 2
+
+
+def test_scores_match_direct_integration():
+    matrix = _responses(300, seed=1)
+    scores = score_thetas(matrix, ITEMS, n_nodes=121)
+    grid = np.linspace(-5, 5, 2001)
+    for user in ("u0", "u7", "u42"):
+        codes, outcomes, _ = matrix.user(user)
+        params = ITEMS.loc[matrix.items.decode(codes)]
+        a, b, c = (
+            params[k].to_numpy() for k in ("discrimination", "difficulty", "guessing")
+        )
+        log_post = np.array([_log_posterior(t, outcomes, a, b, c) for t in grid])
+        weight = np.exp(log_post - log_post.max())
+        weight /= weight.sum()
+        mean = weight @ grid
+        row = scores.loc[user]
+        assert row["theta_eap"] == pytest.approx(mean, abs=2e-3)
+        assert row["theta_eap_sd"] == pytest.approx(
+            np.sqrt(weight @ (grid - mean) ** 2), abs=2e-3
+        )
+        mode = minimize_scalar(
+            lambda t: -_log_posterior(t, outcomes, a, b, c),
+            bounds=(-5, 5),
+            method="bounded",
+            options={"xatol": 1e-8},
+        ).x
+        assert row["theta_map"] == pytest.approx(mode, abs=1e-3)
+        assert row["n_responses"] == len(codes)
+
+
+def test_process_pool_matches_in_process():
+    matrix = _responses(3_000, seed=2)
+    single = score_thetas(matrix, ITEMS, chunk_size=256)
+    pooled = score_thetas(matrix, ITEMS, chunk_size=256, workers=2)
+    # Blocks stop Fisher scoring independently, so MAP agrees to tolerance
+    pd.testing.assert_frame_equal(single, pooled, check_exact=False, atol=1e-4)
+
+
+def test_uncalibrated_items_are_ignored():
+    matrix = _responses(200, seed=3)
+    items = ITEMS.copy()
+    items.loc["q3", "difficulty"] = np.nan
+    scores = score_thetas(matrix, items.drop(index="q5"), methods=["eap"])
+    assert "theta_map" not in scores.columns
+    dropped = {matrix.items.add("q3"), matrix.items.add("q5")}
+    for user in ("u0", "u1"):
+        codes = matrix.user(user).codes
+        assert scores.loc[user, "n_responses"] == sum(c not in dropped for c in codes)
+
+
+def test_predictions_written_in_bulk(tmp_path, fake_postgrest):
+    matrix = _responses(50, seed=4)
+    result = calibrate(matrix, model="2pl")
+    path = write_calibration(result, str(tmp_path / "irt.json"), batch_name="b1")
+    calibration, batch = read_calibration(path)
+    pd.testing.assert_frame_equal(calibration.items, result.items, check_dtype=False)
+    assert calibration.latent_sd == result.latent_sd
+
+    scores = score_thetas(matrix, calibration.items)
+    rows = list(prediction_rows(scores, batch))
+    assert len(rows) == 2 * 50
+    first = rows[0]
+    assert first["prediction_type"] == "theta_eap"
+    assert first["model_version"] == "b1"
+    interval = first["confidence_interval"]
+    assert interval["lower"] < first["prediction_value"] < interval["upper"]
+
+    with LocalBackend() as backend:
+        assert write_predictions(scores, batch, backend) == 100
+        # Re-running a version replaces its rows; a new version adds its own
+        assert write_predictions(scores, batch, backend, methods=["map"]) == 50
+        assert write_predictions(scores, "b2", backend, methods=["map"]) == 50
+        stored = backend.table("user_predictions").select("*").execute().data
+        assert len(stored) == 150
+        assert stored[0]["confidence_interval"] == interval
+
+    with RestClient(fake_postgrest.url, "key") as client:
+        assert write_predictions(scores, batch, client, methods=["map"]) == 50
+        assert write_predictions(scores, batch, client, methods=["map"]) == 50
+    stored = fake_postgrest.tables["user_predictions"]
+    assert [row["prediction_type"] for row in stored] == ["theta_map"] * 50
+    assert json.loads(json.dumps(stored[0]))["features_used"]["n_responses"] > 0